@@ -31,7 +31,9 @@ async def run_ai_code_agent():
         startup_commands=[
             "python -m pip install requests beautifulsoup4 pandas",
             "cd C:/Users/WDAGUtilityAccount/Desktop/workspace"
-        ]
+        ],
+        # Reuse downloaded wheels across sandboxes instead of reinstalling from PyPI
+        provisioning={"cache_enabled": True}
     )
     
     async with SandboxManager() as manager:
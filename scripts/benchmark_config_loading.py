@@ -0,0 +1,76 @@
+"""
+Benchmark configuration loading over many files.
+
+Compares the pure-Python YAML loader with full validation on every load
+against ConfigLoader (libyaml when available, thread pool, validated-config
+cache) for a cold and a warm pass.
+
+Usage: python scripts/benchmark_config_loading.py [--files 1000]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from windows_sandbox_manager.config.loader import ConfigLoader
+from windows_sandbox_manager.config.models import SandboxConfig, YamlLoader
+
+
+def write_configs(directory: Path, count: int) -> list:
+    """Write ``count`` realistic configuration files."""
+    paths = []
+    for i in range(count):
+        config = SandboxConfig(
+            name=f"bench-{i}",
+            description="Benchmark sandbox",
+            memory_mb=2048 + (i % 8) * 512,
+            cpu_cores=1 + i % 4,
+            folders=[
+                {"host": f"C:/work/{i}/src", "guest": "C:/Users/WDAGUtilityAccount/src"},
+                {"host": f"C:/work/{i}/data", "guest": "C:/data", "readonly": True},
+            ],
+            environment={"PYTHONPATH": "C:/src", "RUN_ID": str(i)},
+            startup_commands=["python -m pip install requests", "python -c 'print(1)'"],
+        )
+        path = directory / f"sandbox_{i:05d}.yaml"
+        config.to_file(path)
+        paths.append(path)
+    return paths
+
+
+def timed(label: str, func) -> float:
+    """Run ``func`` once and print its duration."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:9.1f} ms")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=1000, help="Number of config files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        directory = Path(temp)
+        paths = write_configs(directory, args.files)
+        print(f"{args.files} files, YAML loader: {YamlLoader.__name__}\n")
+
+        def baseline() -> None:
+            for path in paths:
+                SandboxConfig(**yaml.safe_load(path.read_text(encoding="utf-8")))
+
+        loader = ConfigLoader()
+        base = timed("safe_load + validate (sequential)", baseline)
+        cold = timed("ConfigLoader.load_directory (cold)", lambda: loader.load_directory(directory))
+        warm = timed("ConfigLoader.load_directory (warm)", lambda: loader.load_directory(directory))
+
+        print(f"\ncold speedup: {base / cold:.1f}x, warm speedup: {base / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,76 @@ Main CLI entry point with rich interface.
 """
 
 import asyncio
+import json
 import sys
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
 
 import click
+import yaml
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn
 
+from ..config.fleet import FleetManifest
+from ..config.loader import ConfigLoader
 from ..config.models import SandboxConfig
+from ..core.audit import AuditLog
+from ..core.fleet import ADMIT_STAGE, FleetProgress
 from ..core.manager import SandboxManager
-from ..core.sandbox import SandboxState
+from ..core.sandbox import CREATION_STAGES, ExecutionResult, Sandbox, SandboxState
+from ..core.session import SessionResult, ShellSession
 from ..exceptions import SandboxError
+from ..monitoring.live import (
+    EXPORT_FIELDS,
+    EXPORT_FORMATS,
+    SORT_COLUMNS,
+    MonitorBoard,
+    MonitorExporter,
+)
+from ..utils.records import RECORD_FORMATS, RecordWriter
 from ..utils.windows import WindowsUtils
-from ..utils.system_check import SystemChecker, check_requirements
+from ..utils.system_check import SystemChecker, SystemRequirement, check_requirements
 
 console = Console()
 
+# Fields of each command's machine-readable records; keep these stable
+SANDBOX_FIELDS = ("id", "name", "state", "memory_mb", "cpu_cores", "uptime_seconds", "created_at")
+EXECUTION_FIELDS = (
+    "sandbox_id",
+    "command",
+    "returncode",
+    "success",
+    "stdout",
+    "stderr",
+    "execution_time",
+    "queue_time",
+    "cached",
+    "stdout_truncated_bytes",
+    "stderr_truncated_bytes",
+    "cpu_time_seconds",
+    "peak_memory_mb",
+    "io_read_bytes",
+    "io_write_bytes",
+    "process_count",
+    "client_cpu_time_seconds",
+    "client_peak_memory_mb",
+    "client_io_read_bytes",
+    "client_io_write_bytes",
+)
+REQUIREMENT_FIELDS = ("name", "status", "message", "details", "fix_instructions")
+
+output_option = click.option(
+    "--output",
+    "output_format",
+    type=click.Choice(RECORD_FORMATS),
+    help="Write machine-readable records to stdout instead of tables",
+)
+
 
 @click.group(invoke_without_command=True)
 @click.option("--version", is_flag=True, help="Show version information")
@@ -59,9 +110,20 @@ def create(config_file: Path, name: Optional[str]):
 @click.option("--name", help="Sandbox name to shutdown")
 @click.option("--all", "shutdown_all", is_flag=True, help="Shutdown all sandboxes")
 @click.option("--timeout", default=30, help="Shutdown timeout in seconds")
-def shutdown(sandbox_id: Optional[str], name: Optional[str], shutdown_all: bool, timeout: int):
+@click.option("--deadline", type=float, help="Overall deadline in seconds for --all")
+@click.option("--concurrency", default=10, help="Sandboxes stopped at once with --all")
+def shutdown(
+    sandbox_id: Optional[str],
+    name: Optional[str],
+    shutdown_all: bool,
+    timeout: int,
+    deadline: Optional[float],
+    concurrency: int,
+):
     """Shutdown sandbox(es)."""
-    asyncio.run(_shutdown_sandbox(sandbox_id, name, shutdown_all, timeout))
+    asyncio.run(
+        _shutdown_sandbox(sandbox_id, name, shutdown_all, timeout, deadline, concurrency)
+    )
 
 
 @cli.command()
@@ -70,27 +132,131 @@ def shutdown(sandbox_id: Optional[str], name: Optional[str], shutdown_all: bool,
     type=click.Choice(["pending", "creating", "running", "stopping", "stopped", "failed"]),
     help="Filter by state",
 )
-def list(state: Optional[str]):
+@output_option
+def list(state: Optional[str], output_format: Optional[str]):
     """List all sandboxes."""
-    asyncio.run(_list_sandboxes(state))
+    with _structured_output(output_format, SANDBOX_FIELDS) as writer:
+        asyncio.run(_list_sandboxes(state, writer))
 
 
 @cli.command()
 @click.argument("sandbox_id")
 @click.argument("command")
 @click.option("--timeout", default=300, help="Command timeout in seconds")
-def exec(sandbox_id: str, command: str, timeout: int):
+@click.option("--max-output-bytes", type=int, help="Bytes kept per output stream")
+@click.option(
+    "--truncation",
+    type=click.Choice(["head", "tail", "head_tail"]),
+    help="Which part of oversized output to keep",
+)
+@click.option(
+    "--priority",
+    type=click.Choice(["high", "normal", "low"]),
+    default="normal",
+    help="Execution queue priority, against other processes using the sandbox",
+)
+@click.option("--queue-timeout", type=float, help="Seconds to wait for an execution slot")
+@output_option
+def exec(
+    sandbox_id: str,
+    command: str,
+    timeout: int,
+    max_output_bytes: Optional[int],
+    truncation: Optional[str],
+    priority: str,
+    queue_timeout: Optional[float],
+    output_format: Optional[str],
+):
     """Execute command in sandbox."""
-    asyncio.run(_exec_command(sandbox_id, command, timeout))
+    with _structured_output(output_format, EXECUTION_FIELDS) as writer:
+        asyncio.run(
+            _exec_command(
+                sandbox_id,
+                command,
+                timeout,
+                max_output_bytes,
+                truncation,
+                priority,
+                queue_timeout,
+                writer,
+            )
+        )
+
+
+@cli.command()
+@click.argument("sandbox_id")
+@click.option(
+    "--command",
+    "-c",
+    "commands",
+    multiple=True,
+    help="Run this command instead of prompting; repeat to run several in order",
+)
+@click.option("--working-dir", help="Guest directory to start in")
+@click.option("--timeout", type=float, help="Per-command timeout in seconds")
+def shell(
+    sandbox_id: str,
+    commands: Tuple[str, ...],
+    working_dir: Optional[str],
+    timeout: Optional[float],
+):
+    """Open a persistent PowerShell session in a sandbox."""
+    asyncio.run(_shell_session(sandbox_id, commands, timeout, working_dir))
 
 
 @cli.command()
 @click.argument("sandbox_id", required=False)
 @click.option("--all", "monitor_all", is_flag=True, help="Monitor all sandboxes")
-@click.option("--interval", default=5, help="Refresh interval in seconds")
-def monitor(sandbox_id: Optional[str], monitor_all: bool, interval: int):
+@click.option("--interval", default=5.0, help="Refresh interval in seconds")
+@click.option(
+    "--sort", "sort_by", type=click.Choice(SORT_COLUMNS), default="cpu", help="Sort column"
+)
+@click.option("--ascending", is_flag=True, help="Sort in ascending order")
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    help="Row filter such as cpu>50, memory<=2048 or name=web-*; repeat to combine",
+)
+@click.option("--top", type=int, help="Show only the first N rows")
+@click.option(
+    "--export",
+    "export_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Also write each new sample to a .csv or .jsonl file",
+)
+@click.option(
+    "--export-format", type=click.Choice(EXPORT_FORMATS), help="Export format (default: from suffix)"
+)
+@output_option
+def monitor(
+    sandbox_id: Optional[str],
+    monitor_all: bool,
+    interval: float,
+    sort_by: str,
+    ascending: bool,
+    filters: Tuple[str, ...],
+    top: Optional[int],
+    export_path: Optional[Path],
+    export_format: Optional[str],
+    output_format: Optional[str],
+):
     """Monitor sandbox resource usage."""
-    asyncio.run(_monitor_sandbox(sandbox_id, monitor_all, interval))
+    with _structured_output(output_format, EXPORT_FIELDS) as writer:
+        asyncio.run(
+            _monitor_sandbox(
+                sandbox_id,
+                monitor_all,
+                interval,
+                sort_by,
+                ascending,
+                filters,
+                top,
+                export_path,
+                export_format,
+                writer,
+            )
+        )
 
 
 @cli.command()
@@ -99,8 +265,207 @@ def status():
     _show_status()
 
 
+@cli.group()
+def config():
+    """Inspect sandbox configuration files."""
+
+
+@config.command()
+@click.argument("config_file", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--overlay",
+    "overlays",
+    multiple=True,
+    type=click.Path(exists=True, path_type=Path),
+    help="Overlay file merged on top (repeatable, applied in order)",
+)
+@click.option(
+    "--format", "output_format", type=click.Choice(["yaml", "json"]), default="yaml"
+)
+def render(config_file: Path, overlays: Tuple[Path, ...], output_format: str):
+    """Show the effective configuration after extends and overlays."""
+    _render_config(config_file, overlays, output_format)
+
+
+@cli.group()
+def fleet():
+    """Manage groups of sandboxes described by a manifest."""
+
+
+@fleet.command()
+@click.argument("manifest_file", type=click.Path(exists=True, path_type=Path))
+@click.option("--max-concurrent", default=5, help="Maximum sandboxes starting at once")
+@click.option("--priority", default=0, help="Admission priority for the fleet")
+def up(manifest_file: Path, max_concurrent: int, priority: int):
+    """Create and start every sandbox in a fleet manifest."""
+    asyncio.run(_fleet_up(manifest_file, max_concurrent, priority))
+
+
+@cli.group()
+def audit():
+    """Inspect the audit log of executions and security decisions."""
+
+
+@audit.command()
+@click.option("--sandbox", "sandbox_id", help="Sandbox ID or ID prefix")
+@click.option("--since", help="Start time: ISO 8601 or an age such as 30m, 2h, 7d")
+@click.option("--until", help="End time: ISO 8601 or an age such as 30m, 2h, 7d")
+@click.option(
+    "--type", "entry_type", type=click.Choice(["execution", "security"]), help="Entry type"
+)
+@click.option("--limit", type=int, help="Maximum entries shown")
+@click.option("--jsonl", is_flag=True, help="Print raw entries as JSON lines")
+@click.option(
+    "--dir", "directory", type=click.Path(path_type=Path), help="Audit log directory"
+)
+def query(
+    sandbox_id: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    entry_type: Optional[str],
+    limit: Optional[int],
+    jsonl: bool,
+    directory: Optional[Path],
+):
+    """Show audit entries matching the filters, oldest first."""
+    _query_audit(sandbox_id, since, until, entry_type, limit, jsonl, directory)
+
+
+async def _open_manager(**kwargs: Any) -> SandboxManager:
+    """Create a manager that picks up sandboxes started by earlier commands.
+
+    Callers close it when done; sandboxes it created keep running.
+    """
+    # Commands are short-lived, so there is nothing for the reaper to do
+    manager = SandboxManager(reaper_interval=None, **kwargs)
+    try:
+        await manager.start()
+    except BaseException:
+        await manager.close()
+        raise
+    return manager
+
+
+@contextmanager
+def _structured_output(
+    output_format: Optional[str], fields: Sequence[str]
+) -> Iterator[Optional[RecordWriter]]:
+    """Record writer on stdout for --output, with console messages moved to stderr.
+
+    Yields None when no format was chosen. The writer is closed on the way
+    out, even on errors or sys.exit(), so JSON output stays a valid array.
+    """
+    if not output_format:
+        yield None
+        return
+
+    console.stderr = True
+    writer = RecordWriter(sys.stdout, output_format, fields)
+    try:
+        yield writer
+    finally:
+        writer.close()
+        console.stderr = False
+
+
+def _sandbox_record(sandbox: Sandbox) -> Dict[str, Any]:
+    """Machine-readable summary of a sandbox."""
+    return {
+        "id": sandbox.id,
+        "name": sandbox.config.name,
+        "state": sandbox.state.value,
+        "memory_mb": sandbox.config.memory_mb,
+        "cpu_cores": sandbox.config.cpu_cores,
+        "uptime_seconds": round(sandbox.uptime, 3),
+        "created_at": sandbox.created_at.isoformat(),
+    }
+
+
+def _execution_record(sandbox_id: str, command: str, result: ExecutionResult) -> Dict[str, Any]:
+    """Machine-readable result of an execution."""
+    return {
+        "sandbox_id": sandbox_id,
+        "command": command,
+        "returncode": result.returncode,
+        "success": result.success,
+        "stdout": result.stdout,
+        "stderr": result.stderr,
+        "execution_time": result.execution_time,
+        "queue_time": result.queue_time,
+        "cached": result.cached,
+        "stdout_truncated_bytes": result.stdout_truncated_bytes,
+        "stderr_truncated_bytes": result.stderr_truncated_bytes,
+        **result.usage.to_dict(),
+    }
+
+
+def _requirement_record(requirement: SystemRequirement) -> Dict[str, Any]:
+    """Machine-readable result of one requirement check."""
+    return {
+        "name": requirement.name,
+        "status": requirement.status.value,
+        "message": requirement.message,
+        "details": requirement.details,
+        "fix_instructions": requirement.fix_instructions,
+    }
+
+
+def _query_audit(
+    sandbox_id: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    entry_type: Optional[str],
+    limit: Optional[int],
+    jsonl: bool,
+    directory: Optional[Path],
+):
+    """Query audit log implementation."""
+    try:
+        entries = AuditLog(directory).query(
+            sandbox_id=sandbox_id, since=since, until=until, entry_type=entry_type, limit=limit
+        )
+        if jsonl:
+            for entry in entries:
+                click.echo(json.dumps(entry, separators=(",", ":")))
+            return
+
+        table = Table(title="Audit Log")
+        table.add_column("Time", style="cyan", no_wrap=True)
+        table.add_column("Sandbox", style="green")
+        table.add_column("Type")
+        table.add_column("Action")
+        table.add_column("Result", justify="right")
+
+        for entry in entries:
+            moment = datetime.fromtimestamp(entry["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+            sandbox = (entry.get("sandbox_id") or "-")[:8]
+            if entry["type"] == "execution":
+                action = entry["command"]
+                if entry["error"]:
+                    result = f"[red]{entry['error']}[/red]"
+                else:
+                    result = f"exit {entry['returncode']}, {entry['execution_time']:.2f}s"
+            else:
+                action = f"{entry['check']}: {entry['target']}"
+                if entry["allowed"]:
+                    result = "[green]allowed[/green]"
+                else:
+                    result = f"[red]denied[/red] ({entry['reason']})"
+            table.add_row(moment, sandbox, entry["type"], action, result)
+
+        if table.row_count:
+            console.print(table)
+        else:
+            console.print("No audit entries found.")
+
+    except ValueError as e:
+        console.print(f"[red]ERROR[/red] {e}")
+        sys.exit(1)
+
+
 async def _create_sandbox(config_file: Path, name_override: Optional[str]):
     """Create sandbox implementation."""
+    manager: Optional[SandboxManager] = None
     try:
         # Load configuration
         with Progress(
@@ -114,7 +479,7 @@ async def _create_sandbox(config_file: Path, name_override: Optional[str]):
                 config.name = name_override
 
             progress.update(task, description="Creating sandbox manager...")
-            manager = SandboxManager()
+            manager = await _open_manager()
 
             progress.update(task, description=f"Creating sandbox '{config.name}'...")
             sandbox = await manager.create_sandbox(config)
@@ -135,14 +500,107 @@ async def _create_sandbox(config_file: Path, name_override: Optional[str]):
     except Exception as e:
         console.print(f"[red]ERROR[/red] Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        if manager:
+            await manager.close()
+
+
+def _render_config(config_file: Path, overlays: Tuple[Path, ...], output_format: str):
+    """Render config implementation."""
+    try:
+        config = ConfigLoader().load(config_file, overlays)
+    except Exception as e:
+        console.print(f"[red]ERROR[/red] Error resolving configuration: {e}")
+        sys.exit(1)
+
+    data = config.model_dump(mode="json")
+    if output_format == "json":
+        click.echo(json.dumps(data, indent=2))
+    else:
+        click.echo(yaml.dump(data, default_flow_style=False, sort_keys=False), nl=False)
+
+
+async def _fleet_up(manifest_file: Path, max_concurrent: int, priority: int):
+    """Fleet up implementation."""
+    try:
+        configs = FleetManifest.from_file(manifest_file).build_configs()
+    except Exception as e:
+        console.print(f"[red]ERROR[/red] Error loading fleet manifest: {e}")
+        sys.exit(1)
+
+    stages = (ADMIT_STAGE, *CREATION_STAGES)
+    manager = await _open_manager(max_concurrent=max_concurrent)
+
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("{task.fields[name]}", style="green"),
+            BarColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            tasks = [
+                progress.add_task("queued", total=len(stages), name=config.name)
+                for config in configs
+            ]
+
+            def on_progress(update: FleetProgress) -> None:
+                task = tasks[update.index]
+                if update.status == "started":
+                    progress.update(task, description=update.stage)
+                elif update.status == "completed":
+                    progress.advance(task)
+                    if update.stage == stages[-1]:
+                        progress.update(task, description="[green]running[/green]")
+                else:
+                    progress.update(task, description=f"[red]failed at {update.stage}[/red]")
+
+            result = await manager.create_many(
+                configs, priority=priority, on_progress=on_progress
+            )
+    finally:
+        await manager.close()
+
+    if result.sandboxes:
+        table = Table(title="Fleet")
+        table.add_column("ID", style="cyan", no_wrap=True)
+        table.add_column("Name", style="green")
+        table.add_column("State", style="yellow")
+        for sandbox in result.sandboxes:
+            table.add_row(sandbox.id[:8] + "...", sandbox.config.name, sandbox.state.value)
+        console.print(table)
+
+    if result.errors:
+        table = Table(title="Failures")
+        table.add_column("Name", style="green")
+        table.add_column("Stage", style="yellow")
+        table.add_column("Error", style="red")
+        table.add_column("Message")
+        for error in result.errors:
+            table.add_row(error.name, error.stage, error.error_type, error.message)
+        console.print(table)
+
+    status = "[green]SUCCESS[/green]" if result.success else "[red]ERROR[/red]"
+    console.print(
+        f"{status} Created {len(result.sandboxes)} of {len(configs)} sandboxes "
+        f"in {result.elapsed:.1f}s"
+    )
+    if not result.success:
+        sys.exit(1)
 
 
 async def _shutdown_sandbox(
-    sandbox_id: Optional[str], name: Optional[str], shutdown_all: bool, timeout: int
+    sandbox_id: Optional[str],
+    name: Optional[str],
+    shutdown_all: bool,
+    timeout: int,
+    deadline: Optional[float] = None,
+    concurrency: int = 10,
 ):
     """Shutdown sandbox implementation."""
+    manager: Optional[SandboxManager] = None
     try:
-        manager = SandboxManager()
+        manager = await _open_manager()
 
         if shutdown_all:
             with Progress(
@@ -151,8 +609,26 @@ async def _shutdown_sandbox(
                 console=console,
             ) as progress:
                 progress.add_task("Shutting down all sandboxes...", total=None)
-                await manager.shutdown_all(timeout)
-            console.print("[green]SUCCESS[/green] All sandboxes shut down successfully!")
+                report = await manager.shutdown_all(
+                    timeout, deadline=deadline, max_concurrent=concurrency
+                )
+
+            for record in report.force_killed:
+                console.print(
+                    f"[yellow]WARNING[/yellow] Force-killed {record.name} ({record.sandbox_id})"
+                )
+            for record in report.failed:
+                console.print(f"[red]ERROR[/red] {record.name}: {record.error}")
+
+            totals = ", ".join(
+                f"{stage} {seconds:.1f}s" for stage, seconds in report.stage_totals().items()
+            )
+            console.print(f"Stage time: {totals}")
+            if report.failed:
+                sys.exit(1)
+            console.print(
+                f"[green]SUCCESS[/green] All sandboxes shut down in {report.elapsed:.1f}s!"
+            )
 
         elif sandbox_id:
             await manager.shutdown_sandbox(sandbox_id, timeout)
@@ -173,12 +649,16 @@ async def _shutdown_sandbox(
     except SandboxError as e:
         console.print(f"[red]ERROR[/red] Error shutting down sandbox: {e}")
         sys.exit(1)
+    finally:
+        if manager:
+            await manager.close()
 
 
-async def _list_sandboxes(state_filter: Optional[str]):
+async def _list_sandboxes(state_filter: Optional[str], writer: Optional[RecordWriter] = None):
     """List sandboxes implementation."""
+    manager: Optional[SandboxManager] = None
     try:
-        manager = SandboxManager()
+        manager = await _open_manager()
 
         filter_state = None
         if state_filter:
@@ -186,6 +666,10 @@ async def _list_sandboxes(state_filter: Optional[str]):
 
         sandboxes = manager.list_sandboxes(filter_state)
 
+        if writer:
+            writer.write_many(_sandbox_record(sandbox) for sandbox in sandboxes)
+            return
+
         if not sandboxes:
             console.print("No sandboxes found.")
             return
@@ -223,12 +707,26 @@ async def _list_sandboxes(state_filter: Optional[str]):
     except Exception as e:
         console.print(f"[red]ERROR[/red] Error listing sandboxes: {e}")
         sys.exit(1)
-
-
-async def _exec_command(sandbox_id: str, command: str, timeout: int):
+    finally:
+        if manager:
+            await manager.close()
+
+
+async def _exec_command(
+    sandbox_id: str,
+    command: str,
+    timeout: int,
+    max_output_bytes: Optional[int] = None,
+    truncation: Optional[str] = None,
+    priority: str = "normal",
+    queue_timeout: Optional[float] = None,
+    writer: Optional[RecordWriter] = None,
+):
     """Execute command implementation."""
+    audit_log = AuditLog()
+    manager: Optional[SandboxManager] = None
     try:
-        manager = SandboxManager()
+        manager = await _open_manager(audit_log=audit_log)
         sandbox = manager.get_sandbox(sandbox_id)
 
         if not sandbox:
@@ -239,8 +737,22 @@ async def _exec_command(sandbox_id: str, command: str, timeout: int):
             console.print(f"[red]ERROR[/red] Sandbox '{sandbox_id}' is not running")
             sys.exit(1)
 
-        console.print(f"Executing: {command}")
-        result = await sandbox.execute(command, timeout)
+        if not writer:
+            console.print(f"Executing: {command}")
+        result = await sandbox.execute(
+            command,
+            timeout,
+            max_output_bytes=max_output_bytes,
+            truncation=truncation,
+            priority=priority,
+            queue_timeout=queue_timeout,
+        )
+
+        if writer:
+            writer.write_many([_execution_record(sandbox.id, command, result)])
+            if not result.success:
+                sys.exit(result.returncode)
+            return
 
         if result.stdout:
             console.print("STDOUT:", style="green")
@@ -250,8 +762,32 @@ async def _exec_command(sandbox_id: str, command: str, timeout: int):
             console.print("STDERR:", style="red")
             console.print(result.stderr)
 
+        if result.truncated:
+            console.print(
+                f"[yellow]WARNING[/yellow] Output truncated: "
+                f"{result.stdout_truncated_bytes} stdout / "
+                f"{result.stderr_truncated_bytes} stderr bytes discarded"
+            )
+
         console.print(f"Exit code: {result.returncode}")
         console.print(f"Execution time: {result.execution_time:.2f}s")
+        if result.queue_time:
+            console.print(f"Queued for: {result.queue_time:.2f}s")
+        usage = result.usage
+        if usage.measured:
+            console.print(
+                f"CPU time: {usage.cpu_time_seconds:.2f}s, "
+                f"peak memory: {usage.peak_memory_mb:.1f}MB, "
+                f"I/O: {usage.io_read_bytes}B read / {usage.io_write_bytes}B written, "
+                f"processes: {usage.process_count}"
+            )
+        else:
+            console.print("Guest usage: not reported")
+        console.print(
+            f"Host client CPU time: {usage.client_cpu_time_seconds:.2f}s, "
+            f"peak memory: {usage.client_peak_memory_mb:.1f}MB, "
+            f"I/O: {usage.client_io_read_bytes}B read / {usage.client_io_write_bytes}B written"
+        )
 
         if not result.success:
             sys.exit(result.returncode)
@@ -259,18 +795,124 @@ async def _exec_command(sandbox_id: str, command: str, timeout: int):
     except SandboxError as e:
         console.print(f"[red]ERROR[/red] Error executing command: {e}")
         sys.exit(1)
+    finally:
+        # Detaches the audit log too, writing what it buffered
+        if manager:
+            await manager.close()
 
 
-async def _monitor_sandbox(sandbox_id: Optional[str], monitor_all: bool, interval: int):
+async def _shell_session(
+    sandbox_id: str,
+    commands: Tuple[str, ...],
+    timeout: Optional[float] = None,
+    working_dir: Optional[str] = None,
+):
+    """Shell session implementation."""
+    audit_log = AuditLog()
+    manager: Optional[SandboxManager] = None
+    try:
+        manager = await _open_manager(audit_log=audit_log)
+        sandbox = manager.get_sandbox(sandbox_id)
+
+        if not sandbox:
+            console.print(f"[red]ERROR[/red] Sandbox '{sandbox_id}' not found")
+            sys.exit(1)
+
+        if not sandbox.is_running:
+            console.print(f"[red]ERROR[/red] Sandbox '{sandbox_id}' is not running")
+            sys.exit(1)
+
+        async with await sandbox.open_session() as session:
+            if working_dir:
+                quoted = working_dir.replace("'", "''")
+                result = await session.run(f"Set-Location -LiteralPath '{quoted}'", timeout)
+                if not result.success:
+                    console.print(f"[red]ERROR[/red] Cannot change to '{working_dir}': {result.output}")
+                    sys.exit(1)
+
+            if commands:
+                # Scripted use: stop at the first failure and exit with its code
+                for command in commands:
+                    result = await _run_in_session(session, command, timeout)
+                    if not result.success:
+                        sys.exit(result.returncode)
+                return
+
+            console.print(
+                f"Connected to {sandbox.config.name}. State persists between commands; "
+                "type 'exit' to leave."
+            )
+            while True:
+                try:
+                    line = await asyncio.to_thread(input, "PS> ")
+                except EOFError:
+                    break
+                if line.strip() in ("exit", "quit"):
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    result = await _run_in_session(session, line, timeout)
+                except SandboxError as e:
+                    console.print(f"[red]ERROR[/red] {e}")
+                    if session.closed:
+                        break
+                    continue
+                if not result.success:
+                    console.print(f"[dim]exit code {result.returncode}[/dim]")
+
+    except SandboxError as e:
+        console.print(f"[red]ERROR[/red] Error in shell session: {e}")
+        sys.exit(1)
+    finally:
+        # Detaches the audit log too, writing what it buffered
+        if manager:
+            await manager.close()
+
+
+async def _run_in_session(
+    session: ShellSession, command: str, timeout: Optional[float]
+) -> SessionResult:
+    """Send a command and echo output as it arrives.
+
+    Output of earlier commands that timed out is printed first, as it
+    arrives ahead of this command's output.
+    """
+    await session.send(command)
+    while session.pending:
+        async for line in session.iter_lines(timeout):
+            click.echo(line)
+    assert session.last_result is not None
+    return session.last_result
+
+
+async def _monitor_sandbox(
+    sandbox_id: Optional[str],
+    monitor_all: bool,
+    interval: float,
+    sort_by: str = "cpu",
+    ascending: bool = False,
+    filters: Tuple[str, ...] = (),
+    top: Optional[int] = None,
+    export_path: Optional[Path] = None,
+    export_format: Optional[str] = None,
+    writer: Optional[RecordWriter] = None,
+):
     """Monitor sandbox implementation."""
+    exporter: Optional[MonitorExporter] = None
+    manager: Optional[SandboxManager] = None
     try:
-        manager = SandboxManager()
-        
+        manager = await _open_manager()
+
         if monitor_all:
-            sandboxes = manager.list_sandboxes(SandboxState.RUNNING)
-            if not sandboxes:
+            if not manager.list_sandboxes(SandboxState.RUNNING):
                 console.print("No running sandboxes to monitor.")
                 return
+
+            # Re-read each refresh so sandboxes starting or stopping come and go
+            def sandboxes():
+                return manager.list_sandboxes(SandboxState.RUNNING)
         else:
             if not sandbox_id:
                 console.print("[red]ERROR[/red] Must specify sandbox ID or use --all")
@@ -284,69 +926,76 @@ async def _monitor_sandbox(sandbox_id: Optional[str], monitor_all: bool, interva
             if not sandbox.is_running:
                 console.print(f"[red]ERROR[/red] Sandbox '{sandbox_id}' is not running")
                 sys.exit(1)
-                
-            sandboxes = [sandbox]
-        
-        console.print(f"Monitoring {len(sandboxes)} sandbox(es). Press Ctrl+C to stop.")
-        console.print()
-        
+
+            def sandboxes():
+                return [sandbox] if sandbox.is_running else []
+
         try:
-            while True:
-                # Create monitoring table
-                table = Table(title=f"Resource Monitor (Interval: {interval}s)")
-                table.add_column("Sandbox", style="cyan")
-                table.add_column("Name", style="green")
-                table.add_column("Memory", justify="right", style="yellow")
-                table.add_column("CPU", justify="right", style="blue")
-                table.add_column("Disk", justify="right", style="magenta")
-                table.add_column("Network", justify="right", style="cyan")
-                table.add_column("Disk I/O", justify="right", style="red")
-                table.add_column("Procs", justify="right", style="white")
-                
-                for sandbox in sandboxes:
-                    if sandbox._resource_monitor:
-                        stats = await sandbox._resource_monitor.get_stats()
-                        table.add_row(
-                            sandbox.id[:8] + "...",
-                            sandbox.config.name,
-                            f"{stats.memory_mb}MB ({stats.memory_percent:.1f}%)",
-                            f"{stats.cpu_percent:.1f}%",
-                            f"{stats.disk_mb}MB",
-                            f"↑{stats.network_sent_mb:.1f}MB ↓{stats.network_recv_mb:.1f}MB",
-                            f"R:{stats.disk_io_read_mb:.1f}MB W:{stats.disk_io_write_mb:.1f}MB",
-                            str(stats.process_count)
-                        )
-                    else:
-                        table.add_row(
-                            sandbox.id[:8] + "...",
-                            sandbox.config.name,
-                            "N/A",
-                            "N/A",
-                            "N/A",
-                            "N/A",
-                            "N/A",
-                            "N/A"
-                        )
-                
-                # Clear screen and show table
-                console.clear()
-                console.print(table)
-                
-                await asyncio.sleep(interval)
-                
-        except KeyboardInterrupt:
+            board = MonitorBoard(
+                sandboxes,
+                sort_by=sort_by,
+                descending=not ascending,
+                filters=filters,
+                limit=top,
+                # Monitors sample on their own, slower schedule; refresh stale rows
+                max_age=interval,
+            )
+            if export_path:
+                exporter = MonitorExporter(export_path, export_format)
+        except ValueError as e:
+            console.print(f"[red]ERROR[/red] {e}")
+            sys.exit(1)
+
+        loop = asyncio.get_running_loop()
+        try:
+            if writer:
+                # Stream samples without building any tables
+                stream = MonitorExporter(writer)
+                while True:
+                    started = loop.time()
+                    rows = await board.refresh()
+                    stream.write(rows)
+                    if exporter:
+                        exporter.write(rows)
+                    await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+            console.print("Press Ctrl+C to stop.")
+            # Live redraws the table in place instead of clearing the screen
+            with Live(console=console, auto_refresh=False) as live:
+                while True:
+                    started = loop.time()
+                    rows = await board.refresh()
+                    if exporter:
+                        exporter.write(rows)
+                    live.update(board.render(rows, interval), refresh=True)
+                    await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
             console.print("\n[yellow]Monitoring stopped by user[/yellow]")
             
     except SandboxError as e:
         console.print(f"[red]ERROR[/red] Error monitoring sandbox: {e}")
         sys.exit(1)
+    finally:
+        if exporter:
+            exporter.close()
+            console.print(f"Exported {exporter.rows_written} sample(s) to {exporter.path}")
+        if manager:
+            await manager.close()
 
 
 @cli.command(name="check-system")
 @click.option("--verbose", "-v", is_flag=True, help="Show detailed information")
 @click.option("--fix-instructions", is_flag=True, help="Show fix instructions for failures")
-def check_system(verbose: bool, fix_instructions: bool):
+@output_option
+def check_system(verbose: bool, fix_instructions: bool, output_format: Optional[str]):
     """Check if system meets Windows Sandbox requirements."""
+    if output_format:
+        with _structured_output(output_format, REQUIREMENT_FIELDS) as writer:
+            result = check_requirements()
+            writer.write_many(_requirement_record(req) for req in result.requirements)
+        sys.exit(0 if result.can_run_sandbox else 1)
+
     console.print("[bold]Windows Sandbox System Requirements Check[/bold]\n")
     
     with Progress(
@@ -2,10 +2,29 @@
 Configuration management components.
 """
 
-from .models import SandboxConfig, SecurityConfig, MonitoringConfig
+from .models import (
+    SandboxConfig,
+    SecurityConfig,
+    PolicyRules,
+    MonitoringConfig,
+    ProvisioningConfig,
+    LifecycleConfig,
+    ExecutionConfig,
+    TransferConfig,
+)
+from .loader import ConfigLoader
+from .fleet import FleetManifest, FleetEntry
 
 __all__ = [
     "SandboxConfig",
     "SecurityConfig",
+    "PolicyRules",
     "MonitoringConfig",
+    "ProvisioningConfig",
+    "LifecycleConfig",
+    "ExecutionConfig",
+    "TransferConfig",
+    "ConfigLoader",
+    "FleetManifest",
+    "FleetEntry",
 ]
@@ -0,0 +1,82 @@
+"""
+Fleet manifests: many sandboxes described in one file.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
+
+from .loader import ConfigLoader, deep_merge
+from .models import SandboxConfig, read_config_data
+from ..exceptions import ConfigurationError
+
+
+class FleetEntry(BaseModel):
+    """One group of identical sandboxes in a fleet manifest."""
+
+    config: Path
+    name: Optional[str] = None
+    count: int = Field(default=1, ge=1, le=100)
+    overlays: List[Path] = Field(default_factory=list)
+    overrides: Dict[str, Any] = Field(default_factory=dict)
+
+
+class FleetManifest(BaseModel):
+    """
+    A list of sandbox groups plus defaults applied to all of them.
+
+    Defaults fill in settings a config leaves unset; an entry's overrides
+    take precedence over both. Config and overlay paths are relative to the
+    manifest file. An entry with
+    ``count`` above one produces sandboxes named ``<name>-1`` to ``<name>-N``.
+    """
+
+    defaults: Dict[str, Any] = Field(default_factory=dict)
+    sandboxes: List[FleetEntry] = Field(min_length=1)
+    _base_dir: Path = PrivateAttr(default=Path("."))
+
+    @classmethod
+    def from_file(cls, file_path: Union[str, Path]) -> "FleetManifest":
+        """Load a manifest from a YAML or JSON file."""
+        file_path = Path(file_path)
+        try:
+            manifest = cls(**read_config_data(file_path))
+        except ValidationError as e:
+            raise ConfigurationError(f"Invalid fleet manifest {file_path}: {e}")
+        manifest._base_dir = file_path.parent
+        return manifest
+
+    def build_configs(self, loader: Optional[ConfigLoader] = None) -> List[SandboxConfig]:
+        """Resolve every entry into sandbox configurations, in manifest order.
+
+        Raises ConfigurationError listing every entry that failed to resolve.
+        """
+        loader = loader or ConfigLoader()
+        configs: List[SandboxConfig] = []
+        errors: List[str] = []
+
+        for position, entry in enumerate(self.sandboxes, start=1):
+            try:
+                data = loader.resolve_data(
+                    self._base_dir / entry.config,
+                    [self._base_dir / overlay for overlay in entry.overlays],
+                )
+                # Defaults fill in what the config leaves unset; overrides win over both
+                data = deep_merge(deep_merge(self.defaults, data), entry.overrides)
+                name = entry.name or data.get("name") or entry.config.stem
+
+                for number in range(1, entry.count + 1):
+                    instance = dict(data)
+                    instance["name"] = f"{name}-{number}" if entry.count > 1 else name
+                    configs.append(SandboxConfig(**instance))
+            except Exception as e:
+                errors.append(f"entry {position} ({entry.config}): {e}")
+
+        if errors:
+            raise ConfigurationError(
+                f"Failed to resolve {len(errors)} fleet entr"
+                f"{'y' if len(errors) == 1 else 'ies'}:\n" + "\n".join(errors)
+            )
+
+        return configs
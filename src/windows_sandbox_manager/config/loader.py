@@ -0,0 +1,258 @@
+"""
+Cached and bulk loading of sandbox configuration files.
+"""
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .models import SandboxConfig, read_config_data
+from ..exceptions import ConfigurationError
+
+CONFIG_SUFFIXES = (".yaml", ".yml", ".json")
+EXTENDS_KEY = "extends"
+
+# (mtime_ns, size) identifies a file version without reading it
+_FileStamp = Tuple[int, int]
+# Ordered (path, stamp) pairs of every file that contributes to a config
+_ChainKey = Tuple[Tuple[Path, _FileStamp], ...]
+
+
+def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge ``override`` into ``base``.
+
+    Mappings merge key by key; any other value, including lists, replaces the
+    base value. Neither input is modified.
+    """
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class ConfigLoader:
+    """
+    Loads SandboxConfig files with parse and validation caches.
+
+    A file may name one or more base files under ``extends:`` (paths relative
+    to the file); bases are merged first, then the file, then any overlays
+    passed to load(). Raw file contents are cached by path, mtime and size, so
+    a base shared by many configs is parsed once, and validated configs are
+    memoized by the chain of files that produced them. Callers receive deep
+    copies, so mutating a returned config never affects the cache.
+    """
+
+    def __init__(self, cache_size: int = 4096, max_workers: Optional[int] = None):
+        self.cache_size = cache_size
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._raw_cache: "OrderedDict[Path, Tuple[_FileStamp, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._cache: "OrderedDict[_ChainKey, SandboxConfig]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._parses = 0
+
+    def load(
+        self, file_path: Union[str, Path], overlays: Sequence[Union[str, Path]] = ()
+    ) -> SandboxConfig:
+        """Load a configuration file, resolving ``extends`` and applying overlays."""
+        chain = self._resolve_chain(file_path, overlays)
+        key: _ChainKey = tuple((path, stamp) for path, stamp, _ in chain)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached.model_copy(deep=True)
+            self._misses += 1
+
+        config = SandboxConfig(**self._merge_chain(chain))
+
+        with self._lock:
+            self._cache[key] = config
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return config.model_copy(deep=True)
+
+    def resolve_data(
+        self, file_path: Union[str, Path], overlays: Sequence[Union[str, Path]] = ()
+    ) -> Dict[str, Any]:
+        """Get the merged, unvalidated data for a file and its overlays."""
+        return self._merge_chain(self._resolve_chain(file_path, overlays))
+
+    def merge_extends(self, file_path: Union[str, Path], data: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge already parsed file data over the bases it ``extends``.
+
+        For callers that have read the file themselves; only the bases are
+        read from disk.
+        """
+        chain: List[Tuple[Path, _FileStamp, Dict[str, Any]]] = []
+        self._collect_chain((Path(file_path).resolve(), (0, 0), data), chain, (), set())
+        return self._merge_chain(chain)
+
+    def load_many(self, file_paths: Iterable[Union[str, Path]]) -> Dict[Path, SandboxConfig]:
+        """Load many files across a thread pool.
+
+        Raises ConfigurationError listing every file that failed to load.
+        """
+        paths = [Path(p) for p in file_paths]
+        if not paths:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths))) as pool:
+            outcomes = list(pool.map(self._load_safely, paths))
+
+        configs: Dict[Path, SandboxConfig] = {}
+        errors: List[str] = []
+        for path, outcome in zip(paths, outcomes):
+            if isinstance(outcome, SandboxConfig):
+                configs[path] = outcome
+            else:
+                errors.append(f"{path}: {outcome}")
+
+        if errors:
+            raise ConfigurationError(
+                f"Failed to load {len(errors)} of {len(paths)} configuration file(s):\n"
+                + "\n".join(errors)
+            )
+
+        return configs
+
+    def load_directory(
+        self, directory: Union[str, Path], recursive: bool = False
+    ) -> Dict[Path, SandboxConfig]:
+        """Load every YAML/JSON configuration file in a directory."""
+        directory = Path(directory)
+        if not directory.is_dir():
+            raise ConfigurationError(f"Not a directory: {directory}")
+
+        pattern = "**/*" if recursive else "*"
+        paths = sorted(
+            p for p in directory.glob(pattern) if p.suffix.lower() in CONFIG_SUFFIXES
+        )
+        return self.load_many(paths)
+
+    def invalidate(self, file_path: Optional[Union[str, Path]] = None) -> None:
+        """Drop one file, or everything, from the cache."""
+        with self._lock:
+            if file_path is None:
+                self._raw_cache.clear()
+                self._cache.clear()
+                return
+
+            path = Path(file_path).resolve()
+            self._raw_cache.pop(path, None)
+            for key in [k for k in self._cache if any(p == path for p, _ in k)]:
+                del self._cache[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        with self._lock:
+            return {
+                "cached": len(self._cache),
+                "cached_files": len(self._raw_cache),
+                "cache_size": self.cache_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "files_parsed": self._parses,
+            }
+
+    def _resolve_chain(
+        self, file_path: Union[str, Path], overlays: Sequence[Union[str, Path]]
+    ) -> List[Tuple[Path, _FileStamp, Dict[str, Any]]]:
+        """List every contributing file in merge order."""
+        chain: List[Tuple[Path, _FileStamp, Dict[str, Any]]] = []
+        seen: Set[Path] = set()
+        for path in [file_path, *overlays]:
+            self._collect_chain(self._read_raw(Path(path)), chain, (), seen)
+        return chain
+
+    def _collect_chain(
+        self,
+        entry: Tuple[Path, _FileStamp, Dict[str, Any]],
+        chain: List[Tuple[Path, _FileStamp, Dict[str, Any]]],
+        ancestors: Tuple[Path, ...],
+        seen: Set[Path],
+    ) -> None:
+        """Append a file's bases (depth first) and then the file itself to ``chain``.
+
+        A file reached again through another branch (a diamond, where two
+        bases share a base) keeps its first position only; merging it a
+        second time would undo the overrides of the files between.
+        """
+        path, _, data = entry
+        if path in ancestors:
+            cycle = " -> ".join(str(p) for p in (*ancestors, path))
+            raise ConfigurationError(f"Circular 'extends' in configuration: {cycle}")
+        if path in seen:
+            return
+
+        bases = data.get(EXTENDS_KEY) or []
+        if isinstance(bases, (str, Path)):
+            bases = [bases]
+        if not isinstance(bases, list):
+            raise ConfigurationError(
+                f"'{EXTENDS_KEY}' must be a path or list of paths: {path}"
+            )
+
+        for base in bases:
+            self._collect_chain(
+                self._read_raw(path.parent / base), chain, (*ancestors, path), seen
+            )
+        seen.add(path)
+        chain.append(entry)
+
+    def _read_raw(self, file_path: Path) -> Tuple[Path, _FileStamp, Dict[str, Any]]:
+        """Read and parse one file, reusing the parse while it is unchanged."""
+        path = file_path.resolve()
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file not found: {file_path}")
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._raw_cache.get(path)
+            if cached and cached[0] == stamp:
+                self._raw_cache.move_to_end(path)
+                return path, stamp, cached[1]
+
+        data = read_config_data(path)
+        if not isinstance(data, dict):
+            raise ConfigurationError(f"Configuration must be a mapping: {path}")
+
+        with self._lock:
+            self._parses += 1
+            self._raw_cache[path] = (stamp, data)
+            while len(self._raw_cache) > self.cache_size:
+                self._raw_cache.popitem(last=False)
+
+        return path, stamp, data
+
+    @staticmethod
+    def _merge_chain(chain: List[Tuple[Path, _FileStamp, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Deep-merge a resolved chain in order, dropping ``extends`` keys."""
+        merged: Dict[str, Any] = {}
+        for _, _, data in chain:
+            layer = {k: v for k, v in data.items() if k != EXTENDS_KEY}
+            merged = deep_merge(merged, layer)
+        return merged
+
+    def _load_safely(self, path: Path) -> Union[SandboxConfig, Exception]:
+        """Load a file, returning the exception instead of raising it."""
+        try:
+            return self.load(path)
+        except Exception as e:
+            return e
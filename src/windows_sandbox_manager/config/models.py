@@ -8,6 +8,31 @@ from pydantic import BaseModel, Field, field_validator, ConfigDict
 import yaml
 import json
 
+try:
+    # libyaml-backed loader is several times faster than the pure-Python one
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeLoader as YamlLoader  # type: ignore[assignment]
+
+
+def read_config_data(file_path: Union[str, Path]) -> Dict[str, Any]:
+    """Read raw configuration data from a YAML or JSON file."""
+    file_path = Path(file_path)
+
+    if not file_path.exists():
+        raise FileNotFoundError(f"Configuration file not found: {file_path}")
+
+    content = file_path.read_text(encoding="utf-8")
+
+    if file_path.suffix.lower() in [".yml", ".yaml"]:
+        data = yaml.load(content, Loader=YamlLoader)
+    elif file_path.suffix.lower() == ".json":
+        data = json.loads(content)
+    else:
+        raise ValueError(f"Unsupported file format: {file_path.suffix}")
+
+    return data or {}
+
 
 class FolderMapping(BaseModel):
     """Configuration for folder mapping between host and guest."""
@@ -15,6 +40,9 @@ class FolderMapping(BaseModel):
     host: Path
     guest: Path
     readonly: bool = False
+    # Workspace mirrored into ``host`` before launch and by Sandbox.sync_folders()
+    sync_from: Optional[Path] = None
+    sync_mode: str = Field(default="copy", pattern=r"^(copy|hardlink|reflink)$")
 
     @field_validator("host", "guest")
     @classmethod
@@ -31,6 +59,28 @@ class NetworkRestriction(BaseModel):
     deny: Optional[List[str]] = None
 
 
+class PolicyRules(BaseModel):
+    """Security policy rules; unset fields keep the isolation level's defaults.
+
+    Empty allow lists (``allowed_*``) allow anything. Lists replace the
+    default list rather than extending it.
+    """
+
+    allowed_extensions: Optional[List[str]] = None
+    max_file_size_mb: Optional[int] = Field(default=None, ge=0)
+    # Glob patterns, each also covering everything below what it matches
+    allowed_paths: Optional[List[str]] = None
+    denied_paths: Optional[List[str]] = None
+    # Base command names, e.g. "shutdown"
+    allowed_commands: Optional[List[str]] = None
+    denied_commands: Optional[List[str]] = None
+    # Regular expressions refused anywhere in a command
+    command_patterns: Optional[List[str]] = None
+    max_command_length: Optional[int] = Field(default=None, ge=1)
+    url_schemes: Optional[List[str]] = None
+    block_private_networks: Optional[bool] = None
+
+
 class SecurityConfig(BaseModel):
     """Security configuration for sandbox."""
 
@@ -38,6 +88,17 @@ class SecurityConfig(BaseModel):
     isolation_level: str = Field(default="medium", pattern=r"^(low|medium|high)$")
     network_restrictions: Optional[NetworkRestriction] = None
     file_access: Dict[str, bool] = Field(default_factory=dict)
+    # Rule overrides per isolation level, applied when that level is selected
+    rules: Dict[str, PolicyRules] = Field(default_factory=dict)
+
+    @field_validator("rules")
+    @classmethod
+    def validate_rule_levels(cls, v: Dict[str, PolicyRules]) -> Dict[str, PolicyRules]:
+        """Rule overrides must name a known isolation level."""
+        unknown = set(v) - {"low", "medium", "high"}
+        if unknown:
+            raise ValueError(f"Unknown isolation level in rules: {', '.join(sorted(unknown))}")
+        return v
 
 
 class MonitoringConfig(BaseModel):
@@ -49,6 +110,52 @@ class MonitoringConfig(BaseModel):
     health_check_interval: int = Field(default=30, ge=1, le=3600)
 
 
+class ProvisioningConfig(BaseModel):
+    """Caching of artifacts produced by startup commands."""
+
+    cache_enabled: bool = False
+    # Host files whose content affects provisioning (e.g. requirements.txt)
+    inputs: List[Path] = Field(default_factory=list)
+    guest_path: Path = Path("C:/ProvisionCache")
+
+
+class LifecycleConfig(BaseModel):
+    """Automatic shutdown of idle or long-lived sandboxes."""
+
+    # Seconds without executions or CPU activity before shutdown
+    idle_ttl: Optional[float] = Field(default=None, gt=0)
+    # Seconds after creation before shutdown, busy or not
+    max_lifetime: Optional[float] = Field(default=None, gt=0)
+    # CPU usage at or below this counts as idle
+    idle_cpu_percent: float = Field(default=5.0, ge=0, le=100)
+
+
+class ExecutionConfig(BaseModel):
+    """Limits applied to commands executed in the sandbox."""
+
+    # Bytes kept per output stream; None keeps everything
+    max_output_bytes: Optional[int] = Field(default=10 * 1024 * 1024, ge=0)
+    truncation: str = Field(default="head_tail", pattern=r"^(head|tail|head_tail)$")
+    # Commands running at once; further ones wait in the execution queue
+    max_concurrent: int = Field(default=4, ge=1, le=64)
+    max_queue_size: int = Field(default=100, ge=0)
+    # Seconds a command may wait for a slot; None waits indefinitely
+    queue_timeout: Optional[float] = Field(default=None, gt=0)
+
+
+class TransferConfig(BaseModel):
+    """Staging folder used by Sandbox.put_files() and get_files()."""
+
+    enabled: bool = False
+    # Defaults to a per-sandbox directory in the cache
+    host_dir: Optional[Path] = None
+    guest_dir: Path = Path("C:/Transfer")
+    chunk_size: int = Field(default=1024 * 1024, ge=4096)
+    workers: int = Field(default=4, ge=1, le=64)
+    # Seconds allowed for the copy run inside the guest
+    timeout: int = Field(default=3600, gt=0)
+
+
 class PluginConfig(BaseModel):
     """Plugin configuration."""
 
@@ -70,6 +177,10 @@ class SandboxConfig(BaseModel):
     folders: List[FolderMapping] = Field(default_factory=list)
     environment: Dict[str, str] = Field(default_factory=dict)
     startup_commands: List[str] = Field(default_factory=list)
+    provisioning: ProvisioningConfig = Field(default_factory=ProvisioningConfig)
+    lifecycle: LifecycleConfig = Field(default_factory=LifecycleConfig)
+    execution: ExecutionConfig = Field(default_factory=ExecutionConfig)
+    transfer: TransferConfig = Field(default_factory=TransferConfig)
 
     security: SecurityConfig = Field(default_factory=SecurityConfig)
     monitoring: MonitoringConfig = Field(default_factory=MonitoringConfig)
@@ -79,28 +190,21 @@ class SandboxConfig(BaseModel):
 
     @classmethod
     def from_file(cls, file_path: Union[str, Path]) -> "SandboxConfig":
-        """Load configuration from YAML or JSON file."""
-        file_path = Path(file_path)
-
-        if not file_path.exists():
-            raise FileNotFoundError(f"Configuration file not found: {file_path}")
-
-        content = file_path.read_text(encoding="utf-8")
-
-        if file_path.suffix.lower() in [".yml", ".yaml"]:
-            data = yaml.safe_load(content)
-        elif file_path.suffix.lower() == ".json":
-            data = json.loads(content)
-        else:
-            raise ValueError(f"Unsupported file format: {file_path.suffix}")
+        """Load configuration from YAML or JSON file, resolving ``extends``."""
+        data = read_config_data(file_path)
+        if "extends" in data:
+            # The loader builds on this module, so import it lazily
+            from .loader import ConfigLoader
 
+            return cls(**ConfigLoader().merge_extends(file_path, data))
         return cls(**data)
 
     def to_file(self, file_path: Union[str, Path], format: str = "yaml") -> None:
         """Save configuration to file."""
         file_path = Path(file_path)
 
-        data = self.model_dump()
+        # JSON mode turns paths into strings so the file can be read back
+        data = self.model_dump(mode="json")
 
         if format.lower() in ["yml", "yaml"]:
             content = yaml.dump(data, default_flow_style=False, sort_keys=False)
@@ -2,8 +2,78 @@
 Core sandbox management components.
 """
 
-from .sandbox import Sandbox
+from .sandbox import Sandbox, ShutdownStage
 from .manager import SandboxManager
-from .registry import SandboxRegistry
+from .registry import SandboxRegistry, SandboxInfo
+from .recovery import RecoveryReport
+from .events import (
+    EventBus,
+    DropPolicy,
+    SandboxEvent,
+    StateChangedEvent,
+    ExecutionStartedEvent,
+    ExecutionFinishedEvent,
+    MonitorSampleEvent,
+    SecurityDecisionEvent,
+)
+from .scheduler import ResourceScheduler, Reservation
+from .provisioning import ProvisioningCache, ProvisioningPlan
+from .wsb_cache import WsbFileCache
+from .result_cache import ResultCache
+from .transfer import FileTransfer, TransferReport
+from .workspace_sync import WorkspaceSync, SyncReport, SyncMode
+from .fleet import CreationPipeline, FleetProgress, FleetError, FleetResult
+from .execution_queue import (
+    ExecutionScheduler,
+    ExecutionPriority,
+    ExecutionTicket,
+    SharedSlots,
+)
+from .output import OutputBuffer, TruncationPolicy
+from .shutdown import ShutdownCoordinator, ShutdownReport, SandboxShutdown
+from .audit import AuditLog
+from .session import ShellSession, SessionResult
 
-__all__ = ["Sandbox", "SandboxManager", "SandboxRegistry"]
+__all__ = [
+    "Sandbox",
+    "SandboxManager",
+    "SandboxRegistry",
+    "SandboxInfo",
+    "RecoveryReport",
+    "ResourceScheduler",
+    "Reservation",
+    "EventBus",
+    "DropPolicy",
+    "SandboxEvent",
+    "StateChangedEvent",
+    "ExecutionStartedEvent",
+    "ExecutionFinishedEvent",
+    "MonitorSampleEvent",
+    "SecurityDecisionEvent",
+    "ProvisioningCache",
+    "ProvisioningPlan",
+    "WsbFileCache",
+    "ResultCache",
+    "FileTransfer",
+    "TransferReport",
+    "WorkspaceSync",
+    "SyncReport",
+    "SyncMode",
+    "CreationPipeline",
+    "FleetProgress",
+    "FleetError",
+    "FleetResult",
+    "ShutdownCoordinator",
+    "ShutdownReport",
+    "SandboxShutdown",
+    "ShutdownStage",
+    "OutputBuffer",
+    "TruncationPolicy",
+    "ExecutionScheduler",
+    "ExecutionPriority",
+    "ExecutionTicket",
+    "SharedSlots",
+    "AuditLog",
+    "ShellSession",
+    "SessionResult",
+]
@@ -0,0 +1,410 @@
+"""
+Append-only audit log of executions and security decisions.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
+
+from .events import EventBus, ExecutionFinishedEvent, SecurityDecisionEvent, Subscription
+from ..security.validation import CommandValidator
+from ..utils.windows import WindowsUtils
+
+_INDEX_FILE = "index.json"
+_RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhdw])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def command_hash(command: str) -> str:
+    """SHA-256 of a command line, for matching replays without comparing text."""
+    return hashlib.sha256(command.encode("utf-8")).hexdigest()
+
+
+def parse_time(value: Union[str, float, datetime]) -> float:
+    """Epoch seconds from a timestamp, ISO date or age such as ``30m`` or ``2d``."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        match = _RELATIVE_TIME.match(value.strip().lower())
+        if match:
+            return time.time() - float(match.group(1)) * _UNITS[match.group(2)]
+        try:
+            moment = datetime.fromisoformat(value.strip())
+        except ValueError:
+            raise ValueError(f"Invalid time: {value!r} (use ISO 8601 or e.g. 30m, 2h, 7d)")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class AuditLog:
+    """
+    Buffered, rotating audit log of executions and security decisions.
+
+    ``record()`` only appends to an in-memory buffer, so callers such as
+    ``Sandbox.execute`` never wait on disk. A background task writes the
+    buffer every ``flush_interval`` seconds, in a worker thread, to segment
+    files of JSON lines (gzip-compressed with ``compress``; each batch is
+    one gzip member, so segments stay appendable). Segments rotate at
+    ``max_segment_bytes`` and the oldest are deleted beyond ``max_segments``.
+    ``index.json`` records each segment's time range, entry count and
+    sandboxes, so queries only open segments that can match.
+
+    If the buffer fills faster than it is written, the oldest entries are
+    dropped and counted rather than blocking.
+
+    Allowed security decisions are only recorded with ``include_allowed``;
+    bulk checks such as staging a directory decide once per file. With
+    ``validator_denials`` the log also records CommandValidator denials.
+    Those hooks are process-wide: an attached log hears denials from every
+    caller in the process, not only from its manager's sandboxes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        compress: bool = False,
+        max_segment_bytes: int = 16 * 1024 * 1024,
+        max_segments: Optional[int] = None,
+        flush_interval: float = 1.0,
+        max_buffer: int = 100_000,
+        include_allowed: bool = False,
+        validator_denials: bool = True,
+    ):
+        self.directory = Path(directory) if directory else WindowsUtils.get_cache_dir("audit")
+        self.compress = compress
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        # Record allowed security decisions too, not only denials
+        self.include_allowed = include_allowed
+        self.validator_denials = validator_denials
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=max_buffer)
+        self._write_lock = threading.Lock()
+        self._recorded = 0
+        self._written = 0
+        self._dropped = 0
+        # Events lost by earlier subscriptions because the log fell behind
+        self._subscription_dropped = 0
+        self._subscription: Optional[Subscription] = None
+        self._follow_task: Optional[asyncio.Task] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Queue an entry for writing. Never blocks; safe from any thread."""
+        entry.setdefault("ts", time.time())
+        if len(self._buffer) == self._buffer.maxlen:
+            self._dropped += 1
+        self._buffer.append(entry)
+        self._recorded += 1
+
+    def record_execution(self, event: ExecutionFinishedEvent) -> None:
+        """Queue an entry for a finished execution."""
+        usage = event.usage
+        finished = event.timestamp.replace(tzinfo=timezone.utc).timestamp()
+        self.record(
+            {
+                "ts": finished,
+                "type": "execution",
+                "sandbox_id": event.sandbox_id,
+                "command": event.command,
+                "command_sha256": command_hash(event.command),
+                "started_at": finished - event.execution_time,
+                "execution_time": event.execution_time,
+                "queue_time": event.queue_time,
+                "returncode": event.returncode,
+                "cached": event.cached,
+                "error": event.error,
+                "stdout_bytes": usage.stdout_bytes if usage else 0,
+                "stderr_bytes": usage.stderr_bytes if usage else 0,
+                "cpu_time_seconds": usage.cpu_time_seconds if usage else None,
+                "peak_memory_mb": usage.peak_memory_mb if usage else None,
+                "io_read_bytes": usage.io_read_bytes if usage else None,
+                "io_write_bytes": usage.io_write_bytes if usage else None,
+                "client_cpu_time_seconds": usage.client_cpu_time_seconds if usage else 0.0,
+                "client_peak_memory_mb": usage.client_peak_memory_mb if usage else 0.0,
+            }
+        )
+
+    def record_decision(
+        self,
+        sandbox_id: Optional[str],
+        check: str,
+        target: str,
+        allowed: bool,
+        reason: str,
+        rule: Optional[str] = None,
+    ) -> None:
+        """Queue an entry for a security decision."""
+        if allowed and not self.include_allowed:
+            return
+        self.record(
+            {
+                "type": "security",
+                "sandbox_id": sandbox_id,
+                "check": check,
+                "target": target,
+                "allowed": allowed,
+                "rule": rule,
+                "reason": reason,
+            }
+        )
+
+    def attach(self, event_bus: EventBus) -> None:
+        """Record execution and security events, and validator denials, until detached."""
+        if self._follow_task and not self._follow_task.done():
+            return
+
+        self._subscription = event_bus.subscribe(
+            event_types={ExecutionFinishedEvent, SecurityDecisionEvent},
+            # Filtered here so unrecorded decisions never take up queue space
+            predicate=self._wants,
+            maxsize=10_000,
+        )
+        self._follow_task = asyncio.create_task(self._follow(self._subscription))
+        self._writer_task = asyncio.create_task(self._write_periodically())
+        if self.validator_denials:
+            CommandValidator.add_listener(self._on_validation_denied)
+
+    async def detach(self) -> None:
+        """Stop recording and write everything still buffered."""
+        CommandValidator.remove_listener(self._on_validation_denied)
+        if self._subscription:
+            self._subscription.close()
+            self._subscription_dropped += self._subscription.dropped
+            self._subscription = None
+        if self._follow_task:
+            await self._follow_task
+            self._follow_task = None
+        if self._writer_task:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered entries now. Returns the number written."""
+        return await asyncio.to_thread(self.flush_sync)
+
+    def flush_sync(self) -> int:
+        """Write buffered entries from the calling thread."""
+        with self._write_lock:
+            batch: List[Dict[str, Any]] = []
+            while self._buffer:
+                batch.append(self._buffer.popleft())
+            if batch:
+                self._write_batch(batch)
+                self._written += len(batch)
+            return len(batch)
+
+    def query(
+        self,
+        sandbox_id: Optional[str] = None,
+        since: Optional[Union[str, float, datetime]] = None,
+        until: Optional[Union[str, float, datetime]] = None,
+        entry_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Written entries matching all filters, in the order they were written.
+
+        ``sandbox_id`` may be a prefix of the full ID.
+        """
+        start = parse_time(since) if since is not None else None
+        end = parse_time(until) if until is not None else None
+        matched = 0
+
+        for segment in self._load_index():
+            if start is not None and segment["last_ts"] < start:
+                continue
+            if end is not None and segment["first_ts"] > end:
+                continue
+            if sandbox_id and not any(
+                s and s.startswith(sandbox_id) for s in segment["sandboxes"]
+            ):
+                continue
+
+            for entry in self._read_segment(self.directory / segment["name"]):
+                if start is not None and entry["ts"] < start:
+                    continue
+                if end is not None and entry["ts"] > end:
+                    continue
+                if sandbox_id and not (entry.get("sandbox_id") or "").startswith(sandbox_id):
+                    continue
+                if entry_type and entry.get("type") != entry_type:
+                    continue
+                yield entry
+                matched += 1
+                if limit is not None and matched >= limit:
+                    return
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer and write counters.
+
+        ``events_dropped`` counts bus events lost before they were recorded,
+        because the subscription's queue overflowed.
+        """
+        events_dropped = self._subscription_dropped
+        if self._subscription:
+            events_dropped += self._subscription.dropped
+        return {
+            "recorded": self._recorded,
+            "written": self._written,
+            "buffered": len(self._buffer),
+            "dropped": self._dropped,
+            "events_dropped": events_dropped,
+            "segments": len(self._load_index()),
+        }
+
+    def _wants(self, event: Any) -> bool:
+        """Whether a bus event would be recorded."""
+        return not (
+            isinstance(event, SecurityDecisionEvent)
+            and event.allowed
+            and not self.include_allowed
+        )
+
+    async def _follow(self, subscription: Subscription) -> None:
+        """Turn bus events into audit entries."""
+        async for event in subscription:
+            try:
+                if isinstance(event, ExecutionFinishedEvent):
+                    self.record_execution(event)
+                else:
+                    self.record_decision(
+                        event.sandbox_id,
+                        event.kind,
+                        event.target,
+                        event.allowed,
+                        event.reason,
+                        event.rule,
+                    )
+            except Exception as e:
+                logging.error(f"Failed to audit {type(event).__name__}: {e}")
+
+    async def _write_periodically(self) -> None:
+        """Flush the buffer every flush_interval seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logging.error(f"Failed to write audit log: {e}")
+
+    def _on_validation_denied(self, check: str, target: str, reason: str) -> None:
+        """Record a CommandValidator denial, which has no sandbox."""
+        self.record_decision(None, check, target, False, reason)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Append a batch to the current segment and update the index."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self._load_index()
+        if not segments or self._segment_full(segments[-1]):
+            segments.append(self._new_segment(segments))
+        segment = segments[-1]
+
+        data = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch).encode()
+        with open(self.directory / segment["name"], "ab") as f:
+            f.write(gzip.compress(data) if self.compress else data)
+
+        timestamps = [e["ts"] for e in batch]
+        segment["first_ts"] = min([segment["first_ts"], *timestamps])
+        segment["last_ts"] = max([segment["last_ts"], *timestamps])
+        segment["count"] += len(batch)
+        segment["sandboxes"] = sorted(
+            set(segment["sandboxes"]) | {e.get("sandbox_id") or "" for e in batch}
+        )
+
+        if self.max_segments and len(segments) > self.max_segments:
+            for old in segments[: -self.max_segments]:
+                try:
+                    (self.directory / old["name"]).unlink()
+                except FileNotFoundError:
+                    pass
+            segments = segments[-self.max_segments :]
+        self._save_index(segments)
+
+    def _segment_full(self, segment: Dict[str, Any]) -> bool:
+        """Whether a segment has reached the rotation size or uses the other format."""
+        if segment["name"].endswith(".gz") != self.compress:
+            return True
+        try:
+            return (self.directory / segment["name"]).stat().st_size >= self.max_segment_bytes
+        except FileNotFoundError:
+            return False
+
+    def _new_segment(self, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Index entry for the next segment file."""
+        number = int(segments[-1]["name"].split("-")[1].split(".")[0]) + 1 if segments else 1
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        return {
+            "name": f"audit-{number:06d}{suffix}",
+            "first_ts": float("inf"),
+            "last_ts": float("-inf"),
+            "count": 0,
+            "sandboxes": [],
+        }
+
+    def _load_index(self) -> List[Dict[str, Any]]:
+        """Segment entries, oldest first."""
+        try:
+            data = json.loads((self.directory / _INDEX_FILE).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logging.error(f"Unreadable audit index, rebuilding: {e}")
+            return self._rebuild_index()
+        return data.get("segments", [])
+
+    def _save_index(self, segments: List[Dict[str, Any]]) -> None:
+        """Atomically replace the index."""
+        path = self.directory / _INDEX_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"segments": segments}), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _rebuild_index(self) -> List[Dict[str, Any]]:
+        """Index entries recomputed by reading every segment."""
+        segments = []
+        for path in sorted(self.directory.glob("audit-*.jsonl*")):
+            entries = list(self._read_segment(path))
+            timestamps = [e["ts"] for e in entries] or [0.0]
+            segments.append(
+                {
+                    "name": path.name,
+                    "first_ts": min(timestamps),
+                    "last_ts": max(timestamps),
+                    "count": len(entries),
+                    "sandboxes": sorted({e.get("sandbox_id") or "" for e in entries}),
+                }
+            )
+        return segments
+
+    @staticmethod
+    def _read_segment(path: Path) -> Iterator[Dict[str, Any]]:
+        """Entries of one segment; a torn last line is skipped."""
+        opener = gzip.open if path.suffix == ".gz" else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except (FileNotFoundError, EOFError):
+            return
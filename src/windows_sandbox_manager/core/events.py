@@ -0,0 +1,231 @@
+"""
+Async event bus for sandbox lifecycle, execution and monitoring events.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Type,
+)
+
+from ..monitoring.accounting import ExecutionUsage
+from ..monitoring.resources import ResourceStats
+
+if TYPE_CHECKING:
+    from .sandbox import SandboxState
+
+
+class DropPolicy(Enum):
+    """What to discard when a subscriber's queue is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+
+@dataclass(frozen=True)
+class SandboxEvent:
+    """Base class for events published on the bus."""
+
+    sandbox_id: str
+    timestamp: datetime = field(default_factory=datetime.utcnow, init=False)
+
+
+@dataclass(frozen=True)
+class StateChangedEvent(SandboxEvent):
+    """A sandbox moved between lifecycle states."""
+
+    old_state: "SandboxState"
+    new_state: "SandboxState"
+
+
+@dataclass(frozen=True)
+class ExecutionStartedEvent(SandboxEvent):
+    """A command started executing in a sandbox."""
+
+    command: str
+
+
+@dataclass(frozen=True)
+class ExecutionFinishedEvent(SandboxEvent):
+    """A command finished executing, successfully or not."""
+
+    command: str
+    returncode: Optional[int]
+    execution_time: float
+    error: Optional[str] = None
+    usage: Optional[ExecutionUsage] = None
+    # Seconds spent waiting for an execution slot
+    queue_time: float = 0.0
+    # Served from the result cache; nothing ran in the sandbox
+    cached: bool = False
+
+
+@dataclass(frozen=True)
+class SecurityDecisionEvent(SandboxEvent):
+    """A sandbox's security policy allowed or denied an action."""
+
+    kind: str
+    target: str
+    allowed: bool
+    rule: Optional[str]
+    reason: str
+
+
+@dataclass(frozen=True)
+class MonitorSampleEvent(SandboxEvent):
+    """A resource monitor collected a new sample."""
+
+    stats: ResourceStats
+
+
+EventFilter = Callable[[SandboxEvent], bool]
+
+_CLOSED = object()
+
+
+class Subscription:
+    """
+    Bounded queue of events matching a subscriber's filter.
+    """
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        event_types: Optional[Set[Type[SandboxEvent]]] = None,
+        sandbox_id: Optional[str] = None,
+        predicate: Optional[EventFilter] = None,
+        maxsize: int = 1000,
+        drop_policy: DropPolicy = DropPolicy.DROP_OLDEST,
+    ):
+        self._bus = bus
+        self.event_types = tuple(event_types) if event_types else None
+        self.sandbox_id = sandbox_id
+        self.predicate = predicate
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=maxsize)
+        self._closed = False
+
+    def matches(self, event: SandboxEvent) -> bool:
+        """Check whether an event passes this subscription's filters."""
+        if self.event_types and not isinstance(event, self.event_types):
+            return False
+        if self.sandbox_id and event.sandbox_id != self.sandbox_id:
+            return False
+        if self.predicate and not self.predicate(event):
+            return False
+        return True
+
+    def offer(self, event: Any) -> bool:
+        """Enqueue without blocking, applying the drop policy. Returns False if dropped."""
+        if self._queue.full():
+            if self.drop_policy == DropPolicy.DROP_NEWEST and event is not _CLOSED:
+                self.dropped += 1
+                return False
+            self._queue.get_nowait()
+            self.dropped += 1
+
+        self._queue.put_nowait(event)
+        return True
+
+    async def get(self) -> SandboxEvent:
+        """Wait for the next event. Raises StopAsyncIteration once closed."""
+        event = await self._queue.get()
+        if event is _CLOSED:
+            raise StopAsyncIteration
+        return event
+
+    @property
+    def pending(self) -> int:
+        """Number of queued events."""
+        return self._queue.qsize()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the subscription has been closed."""
+        return self._closed
+
+    def close(self) -> None:
+        """Stop receiving events and wake up any waiting consumer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._bus.unsubscribe(self)
+        self.offer(_CLOSED)
+
+    def __aiter__(self) -> AsyncIterator[SandboxEvent]:
+        return self
+
+    async def __anext__(self) -> SandboxEvent:
+        return await self.get()
+
+
+class EventBus:
+    """
+    In-process publish/subscribe hub. Publishing never blocks: each subscriber
+    has its own bounded queue and a policy for what to drop when it falls behind.
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: List[Subscription] = []
+        self._published = 0
+
+    def subscribe(
+        self,
+        event_types: Optional[Set[Type[SandboxEvent]]] = None,
+        sandbox_id: Optional[str] = None,
+        predicate: Optional[EventFilter] = None,
+        maxsize: int = 1000,
+        drop_policy: DropPolicy = DropPolicy.DROP_OLDEST,
+    ) -> Subscription:
+        """Subscribe to events, optionally filtered by type, sandbox or predicate."""
+        subscription = Subscription(
+            self,
+            event_types=event_types,
+            sandbox_id=sandbox_id,
+            predicate=predicate,
+            maxsize=maxsize,
+            drop_policy=drop_policy,
+        )
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription from the bus."""
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def publish(self, event: SandboxEvent) -> None:
+        """Deliver an event to every matching subscriber."""
+        self._published += 1
+        for subscription in list(self._subscriptions):
+            try:
+                if subscription.matches(event):
+                    subscription.offer(event)
+            except Exception as e:
+                logging.error(f"Event delivery failed for {type(event).__name__}: {e}")
+
+    def close(self) -> None:
+        """Close all subscriptions."""
+        for subscription in list(self._subscriptions):
+            subscription.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get publish and per-subscriber queue statistics."""
+        return {
+            "published": self._published,
+            "subscribers": len(self._subscriptions),
+            "pending": sum(s.pending for s in self._subscriptions),
+            "dropped": sum(s.dropped for s in self._subscriptions),
+        }
@@ -0,0 +1,356 @@
+"""
+Per-sandbox scheduling of command executions.
+"""
+
+import asyncio
+import itertools
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Optional, Union
+
+from ..exceptions import ResourceError
+from ..utils.locks import FileLock
+
+DEFAULT_TENANT = "default"
+
+
+class ExecutionPriority(IntEnum):
+    """Priority classes; lower values are served first."""
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+@dataclass
+class ExecutionTicket:
+    """A granted execution slot."""
+
+    id: int
+    tenant: str
+    priority: ExecutionPriority
+    wait_time: float
+    granted_at: float = field(default_factory=time.monotonic)
+    # Slot shared with other processes, when the scheduler has SharedSlots
+    slot: Optional[FileLock] = field(default=None, repr=False)
+
+
+@dataclass
+class _QueuedExecution:
+    """Execution waiting for a slot."""
+
+    seq: int
+    tenant: str
+    priority: ExecutionPriority
+    enqueued_at: float
+    future: "asyncio.Future[ExecutionTicket]"
+
+
+class SharedSlots:
+    """
+    Execution slots of one sandbox, shared by every process using it.
+
+    Each slot is a lock file in ``directory``: holding the lock holds the
+    slot, and a process that exits gives its slots up with it. A process
+    with executions queued also holds a marker per priority class it is
+    waiting in, and no process takes a slot while another one is waiting
+    in a higher class.
+    """
+
+    def __init__(self, directory: Union[str, Path], count: int):
+        self.directory = Path(directory)
+        self.count = count
+        self._token = uuid.uuid4().hex
+        self._markers: Dict[ExecutionPriority, FileLock] = {}
+
+    def try_take(self, priority: ExecutionPriority) -> Optional[FileLock]:
+        """Hold a free slot, or return None if all are taken or outranked."""
+        if self._outranked(priority):
+            return None
+        for index in range(self.count):
+            slot = FileLock(self.directory / f"slot-{index}.lock")
+            if slot.try_acquire():
+                return slot
+        return None
+
+    def set_waiting(self, priorities: Iterable[ExecutionPriority]) -> None:
+        """Advertise the classes this process has executions queued in."""
+        wanted = set(priorities)
+        for priority in [p for p in self._markers if p not in wanted]:
+            marker = self._markers.pop(priority)
+            marker.release()
+            try:
+                marker.path.unlink()
+            except OSError:
+                pass
+        for priority in wanted - set(self._markers):
+            marker = FileLock(self.directory / f"waiting-{priority.value}-{self._token}.lock")
+            if marker.try_acquire():
+                self._markers[priority] = marker
+
+    def _outranked(self, priority: ExecutionPriority) -> bool:
+        """Whether another process is waiting in a higher class."""
+        if not self.directory.is_dir():
+            return False
+        for path in self.directory.glob("waiting-*.lock"):
+            _, value, token = path.stem.split("-", 2)
+            if token == self._token or int(value) >= priority:
+                continue
+            # Markers left by processes that died are no longer locked
+            probe = FileLock(path)
+            if not probe.try_acquire():
+                return True
+            probe.release()
+        return False
+
+
+class ExecutionScheduler:
+    """
+    Limits concurrent executions in one sandbox.
+
+    Waiting executions are served strictly by priority class. Within a class,
+    tenants take turns (round robin) and each tenant's executions run in
+    arrival order, so one busy tenant cannot starve the others. Executions
+    that wait longer than their queue timeout, or arrive while the queue is
+    full, fail with ResourceError.
+
+    With ``shared_slots`` the limit also holds across processes: every
+    execution takes one of the shared slots as well, and queued executions
+    poll for one every ``poll_interval`` seconds. Priority classes are
+    honoured across processes; tenant turns only among this scheduler's
+    own waiters.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue_size: int = 100,
+        queue_timeout: Optional[float] = None,
+        shared_slots: Optional[SharedSlots] = None,
+        poll_interval: float = 0.1,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self.shared_slots = shared_slots
+        self.poll_interval = poll_interval
+        self._poll_task: Optional[asyncio.Task] = None
+
+        # Per class: tenant -> FIFO of waiters, in round-robin order
+        self._queues: Dict[ExecutionPriority, "OrderedDict[str, Deque[_QueuedExecution]]"] = {
+            priority: OrderedDict() for priority in ExecutionPriority
+        }
+        self._queued = 0
+        self._running: Dict[int, ExecutionTicket] = {}
+        self._seq = itertools.count()
+
+        self._granted_count = 0
+        self._rejected_count = 0
+        self._timeout_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Union[ExecutionPriority, str, int] = ExecutionPriority.NORMAL,
+        tenant: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[ExecutionTicket]:
+        """Hold an execution slot for the duration of the block."""
+        ticket = await self.acquire(priority, tenant, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def acquire(
+        self,
+        priority: Union[ExecutionPriority, str, int] = ExecutionPriority.NORMAL,
+        tenant: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> ExecutionTicket:
+        """Wait for an execution slot. ``timeout`` defaults to ``queue_timeout``."""
+        priority = self._parse_priority(priority)
+        tenant = tenant or DEFAULT_TENANT
+        timeout = self.queue_timeout if timeout is None else timeout
+        seq = next(self._seq)
+        now = time.monotonic()
+
+        # Run immediately only when nobody is queued ahead of us
+        if not self._queued and len(self._running) < self.max_concurrent:
+            if self.shared_slots is None:
+                return self._grant(seq, tenant, priority, 0.0)
+            slot = self.shared_slots.try_take(priority)
+            if slot:
+                return self._grant(seq, tenant, priority, 0.0, slot)
+
+        if self._queued >= self.max_queue_size:
+            self._rejected_count += 1
+            raise ResourceError(f"Execution queue full ({self.max_queue_size} waiting)")
+
+        waiter = _QueuedExecution(
+            seq=seq,
+            tenant=tenant,
+            priority=priority,
+            enqueued_at=now,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._queues[priority].setdefault(tenant, deque()).append(waiter)
+        self._queued += 1
+        self._watch_shared_slots()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._timeout_count += 1
+            self._abandon(waiter)
+            raise ResourceError(f"Timed out after {timeout}s waiting for an execution slot")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self, ticket: ExecutionTicket) -> None:
+        """Free a slot and start the next waiting execution. Idempotent."""
+        if self._running.pop(ticket.id, None) is None:
+            return
+        if ticket.slot:
+            ticket.slot.release()
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get concurrency, queue and wait-time statistics."""
+        now = time.monotonic()
+        waiters = [
+            waiter
+            for queue in self._queues.values()
+            for tenant_queue in queue.values()
+            for waiter in tenant_queue
+        ]
+        running_by_tenant: Dict[str, int] = {}
+        for ticket in self._running.values():
+            running_by_tenant[ticket.tenant] = running_by_tenant.get(ticket.tenant, 0) + 1
+
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": len(self._running),
+            "running_by_tenant": running_by_tenant,
+            "queue_depth": self._queued,
+            "queue_depth_by_priority": {
+                priority.name.lower(): sum(len(q) for q in self._queues[priority].values())
+                for priority in ExecutionPriority
+            },
+            "oldest_wait_seconds": max((now - w.enqueued_at for w in waiters), default=0.0),
+            "granted": self._granted_count,
+            "rejected": self._rejected_count,
+            "timed_out": self._timeout_count,
+            "average_wait_seconds": (
+                self._total_wait_time / self._granted_count if self._granted_count else 0.0
+            ),
+            "max_wait_seconds": self._max_wait_time,
+        }
+
+    @staticmethod
+    def _parse_priority(priority: Union[ExecutionPriority, str, int]) -> ExecutionPriority:
+        """Accept a priority class, its name or its value."""
+        if isinstance(priority, str):
+            try:
+                return ExecutionPriority[priority.upper()]
+            except KeyError:
+                raise ValueError(f"Unknown execution priority: {priority}")
+        return ExecutionPriority(priority)
+
+    def _grant(
+        self,
+        seq: int,
+        tenant: str,
+        priority: ExecutionPriority,
+        wait_time: float,
+        slot: Optional[FileLock] = None,
+    ) -> ExecutionTicket:
+        """Record a granted slot."""
+        ticket = ExecutionTicket(
+            id=seq, tenant=tenant, priority=priority, wait_time=wait_time, slot=slot
+        )
+        self._running[seq] = ticket
+
+        self._granted_count += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+        return ticket
+
+    def _next_waiter(self) -> Optional[_QueuedExecution]:
+        """Pop the next waiter: highest class first, tenants in turn within a class."""
+        for priority in ExecutionPriority:
+            queue = self._queues[priority]
+            while queue:
+                tenant, tenant_queue = next(iter(queue.items()))
+                waiter = tenant_queue.popleft()
+                if tenant_queue:
+                    # Tenant goes to the back of the rotation
+                    queue.move_to_end(tenant)
+                else:
+                    del queue[tenant]
+                self._queued -= 1
+                if not waiter.future.done():
+                    return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        """Start waiting executions while slots are free."""
+        now = time.monotonic()
+        while self._queued and len(self._running) < self.max_concurrent:
+            slot: Optional[FileLock] = None
+            if self.shared_slots:
+                top = next((p for p in ExecutionPriority if self._queues[p]), None)
+                slot = self.shared_slots.try_take(top) if top is not None else None
+                if slot is None:
+                    break
+            waiter = self._next_waiter()
+            if waiter is None:
+                if slot:
+                    slot.release()
+                break
+            ticket = self._grant(
+                waiter.seq, waiter.tenant, waiter.priority, now - waiter.enqueued_at, slot
+            )
+            waiter.future.set_result(ticket)
+        self._watch_shared_slots()
+
+    def _watch_shared_slots(self) -> None:
+        """Keep waiting markers current and poll while executions are queued."""
+        if self.shared_slots is None:
+            return
+        self.shared_slots.set_waiting(p for p in ExecutionPriority if self._queues[p])
+        if self._queued and not self._poll_task:
+            self._poll_task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self) -> None:
+        """Retry queued executions as slots free up in other processes."""
+        try:
+            while self._queued:
+                await asyncio.sleep(self.poll_interval)
+                self._dispatch()
+        finally:
+            self._poll_task = None
+            self.shared_slots.set_waiting(())
+
+    def _abandon(self, waiter: _QueuedExecution) -> None:
+        """Remove a waiter that gave up, freeing its slot if it was granted meanwhile."""
+        tenant_queue = self._queues[waiter.priority].get(waiter.tenant)
+        if tenant_queue and waiter in tenant_queue:
+            tenant_queue.remove(waiter)
+            self._queued -= 1
+            if not tenant_queue:
+                del self._queues[waiter.priority][waiter.tenant]
+
+        if waiter.future.done() and not waiter.future.cancelled():
+            self.release(waiter.future.result())
+        else:
+            waiter.future.cancel()
+        self._watch_shared_slots()
@@ -0,0 +1,193 @@
+"""
+Pipelined creation of many sandboxes at once.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from .sandbox import Sandbox
+
+# Stage that waits for a resource reservation, before Sandbox.create() runs
+ADMIT_STAGE = "admit"
+
+
+@dataclass
+class FleetProgress:
+    """A progress update for one sandbox in a fleet."""
+
+    index: int
+    name: str
+    stage: str
+    # "started", "completed" or "failed"
+    status: str
+    sandbox_id: Optional[str] = None
+    message: Optional[str] = None
+
+
+@dataclass
+class FleetError:
+    """Why one sandbox in a fleet failed to come up."""
+
+    index: int
+    name: str
+    stage: str
+    error_type: str
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            "index": self.index,
+            "name": self.name,
+            "stage": self.stage,
+            "error_type": self.error_type,
+            "message": self.message,
+        }
+
+
+@dataclass
+class FleetResult:
+    """Outcome of SandboxManager.create_many()."""
+
+    sandboxes: List["Sandbox"] = field(default_factory=list)
+    errors: List[FleetError] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        """Whether every sandbox was created."""
+        return not self.errors
+
+
+ProgressCallback = Callable[[FleetProgress], None]
+StageStep = Callable[[], Awaitable[None]]
+
+
+class CreationPipeline:
+    """
+    Runs creation stages for many sandboxes with per-stage concurrency limits.
+
+    Each sandbox moves through the stages on its own, so a slow stage for one
+    sandbox only holds up others waiting for the same stage slot. Shared stages
+    (by default the host requirements check) run once and every sandbox awaits
+    the same outcome. When ``slots`` is given, a sandbox takes a slot before
+    ``slot_stage`` and keeps it until finish(), which bounds how many sandboxes
+    are booting at once while host-side stages for the rest carry on.
+    """
+
+    def __init__(
+        self,
+        stage_limits: Optional[Dict[str, int]] = None,
+        shared_stages: Iterable[str] = ("validate",),
+        on_progress: Optional[ProgressCallback] = None,
+        slots: Optional[asyncio.Semaphore] = None,
+        slot_stage: str = "launch",
+    ):
+        self.stage_limits = dict(stage_limits or {})
+        self.shared_stages = set(shared_stages)
+        self.on_progress = on_progress
+        self.slot_stage = slot_stage
+        self._slots = slots
+        self._holding: Set[str] = set()
+        self._semaphores = {
+            stage: asyncio.Semaphore(limit) for stage, limit in self.stage_limits.items()
+        }
+        self._shared: Dict[str, "asyncio.Future[None]"] = {}
+        self._members: Dict[str, Tuple[int, str]] = {}
+        self._failures: Dict[str, Tuple[str, BaseException]] = {}
+        self._stage_times: Dict[str, List[float]] = {}
+
+    def add(self, sandbox: "Sandbox", index: int) -> None:
+        """Register a sandbox so its progress is reported under ``index``."""
+        self._members[sandbox.id] = (index, sandbox.config.name)
+
+    async def run(self, stage: str, sandbox: "Sandbox", step: StageStep) -> None:
+        """Run one stage for a sandbox, honouring the stage's limit."""
+        if stage == self.slot_stage and self._slots and sandbox.id not in self._holding:
+            await self._slots.acquire()
+            self._holding.add(sandbox.id)
+
+        semaphore = self._semaphores.get(stage)
+        if semaphore:
+            await semaphore.acquire()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.report(sandbox, stage, "started")
+        try:
+            if stage in self.shared_stages:
+                shared = self._shared.get(stage)
+                if shared is None:
+                    shared = self._shared[stage] = asyncio.ensure_future(step())
+                # Shield so one cancelled sandbox does not cancel the check for all
+                await asyncio.shield(shared)
+            else:
+                await step()
+        except BaseException as e:
+            self._failures[sandbox.id] = (stage, e)
+            self.report(sandbox, stage, "failed", str(e))
+            raise
+        finally:
+            if semaphore:
+                semaphore.release()
+            self._stage_times.setdefault(stage, []).append(loop.time() - started)
+
+        self.report(sandbox, stage, "completed")
+
+    def finish(self, sandbox: "Sandbox") -> None:
+        """Give back the slot held by a sandbox that has left the pipeline."""
+        if sandbox.id in self._holding:
+            self._holding.discard(sandbox.id)
+            if self._slots:
+                self._slots.release()
+
+    def failure(self, sandbox_id: str) -> Optional[Tuple[str, BaseException]]:
+        """Stage and original exception for a sandbox that failed inside the pipeline."""
+        return self._failures.get(sandbox_id)
+
+    def report(
+        self,
+        sandbox: "Sandbox",
+        stage: str,
+        status: str,
+        message: Optional[str] = None,
+    ) -> None:
+        """Send a progress update for a registered sandbox."""
+        if not self.on_progress:
+            return
+
+        index, name = self._members.get(sandbox.id, (-1, sandbox.config.name))
+        self.on_progress(
+            FleetProgress(
+                index=index,
+                name=name,
+                stage=stage,
+                status=status,
+                sandbox_id=sandbox.id,
+                message=message,
+            )
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-stage run counts and durations."""
+        return {
+            stage: {
+                "runs": len(times),
+                "total_seconds": sum(times),
+                "max_seconds": max(times),
+            }
+            for stage, times in self._stage_times.items()
+        }
@@ -4,12 +4,31 @@ Multi-sandbox manager with async operations and registry integration.
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Any, Set, Union
+
+from .audit import AuditLog
+from .events import EventBus
+from .fleet import ADMIT_STAGE, CreationPipeline, FleetError, FleetResult, ProgressCallback
+from .provisioning import ProvisioningCache
+from .result_cache import ResultCache
+from .wsb_cache import WsbFileCache
 from .sandbox import Sandbox, SandboxState
-from .registry import SandboxRegistry
+from .recovery import (
+    AdoptedProcess,
+    RecoveryReport,
+    is_same_process,
+    process_start_time,
+    scan_processes,
+)
+from .registry import SandboxInfo, SandboxRegistry
+from .scheduler import ResourceScheduler, Reservation
+from .shutdown import ShutdownCoordinator, ShutdownReport
 from ..config.models import SandboxConfig
 from ..exceptions import SandboxNotFoundError, SandboxError
+from ..security.folders import FolderValidator
+
+_EPOCH = datetime(1970, 1, 1)
 
 
 class SandboxManager:
@@ -17,38 +36,290 @@ class SandboxManager:
     Manages multiple sandbox instances with lifecycle coordination.
     """
 
-    def __init__(self, max_concurrent: int = 5):
+    def __init__(
+        self,
+        max_concurrent: int = 5,
+        scheduler: Optional[ResourceScheduler] = None,
+        provisioning_cache: Optional[ProvisioningCache] = None,
+        wsb_cache: Optional[WsbFileCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        reaper_interval: Optional[float] = 60.0,
+        recover_on_start: bool = True,
+        audit_log: Optional[AuditLog] = None,
+    ):
         self.max_concurrent = max_concurrent
+        self.reaper_interval = reaper_interval
+        self.recover_on_start = recover_on_start
+        # Insertion order of ``_sandboxes`` is creation order
         self._sandboxes: Dict[str, Sandbox] = {}
+        self._name_index: Dict[str, Dict[str, None]] = {}
+        self._state_index: Dict[SandboxState, Dict[str, None]] = {
+            state: {} for state in SandboxState
+        }
+        self._creation_seq: Dict[str, int] = {}
+        self._next_seq = 0
+        self._running_memory_mb = 0
+        self._running_cpu_cores = 0
+        self._running_created_sum = 0.0
+        self.events = EventBus()
         self._registry = SandboxRegistry()
+        # Without a scheduler, budgets are tracked but nothing is held back;
+        # pass ResourceScheduler.for_host() to admit against host capacity
+        self._scheduler = scheduler or ResourceScheduler()
+        self.provisioning_cache = provisioning_cache or ProvisioningCache()
+        self.wsb_cache = wsb_cache or WsbFileCache()
+        # Shared so sandboxes built from the same config reuse each other's results
+        self.result_cache = result_cache or ResultCache()
+        # Shared so configs mapping the same folders validate them once
+        self.folder_validator = FolderValidator()
+        # Records executions and security decisions published on ``events``
+        self.audit_log = audit_log
+        self._reservations: Dict[str, Reservation] = {}
+        # Sandboxes owned by another running manager, usable but not ours to reap
+        self._borrowed: Set[str] = set()
         self._creation_semaphore = asyncio.Semaphore(max_concurrent)
         self._shutdown_event = asyncio.Event()
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Prepare the manager for use, cleaning up after previous runs."""
+        removed = await asyncio.to_thread(self.wsb_cache.gc)
+        if removed:
+            logging.info(f"Removed {removed} orphaned WSB file(s)")
+
+        self._follow_events()
+        if self.recover_on_start:
+            await self.recover()
+
+        if self.reaper_interval and not self._reaper_task:
+            self._reaper_task = asyncio.create_task(self._reaper_loop())
+
+    async def recover(self, remove_dead: bool = True) -> RecoveryReport:
+        """Reconcile the persisted registry with live processes.
+
+        Sandboxes recorded as running whose process is still alive are
+        re-adopted and their monitors restarted. Those whose owning manager
+        has exited are claimed by this one; those of a manager that is still
+        running (same PID and start time) stay its own, but can be used and
+        shut down from here too. Only sandboxes this manager owns are reaped
+        or shut down when it exits.
+        Entries whose process is gone are removed, or marked failed when
+        ``remove_dead`` is False. Live sandboxes that were mid-creation or
+        mid-shutdown are left untouched.
+        """
+        report = RecoveryReport()
+        await self._registry.load()
+
+        active_states = {
+            SandboxState.PENDING.value,
+            SandboxState.CREATING.value,
+            SandboxState.RUNNING.value,
+            SandboxState.STOPPING.value,
+        }
+        candidates = [
+            info
+            for info in await self._registry.list_all()
+            if info.state in active_states and info.id not in self._sandboxes
+        ]
+        if not candidates:
+            return report
+
+        # One pass over the process table instead of a lookup per sandbox
+        table = await asyncio.to_thread(scan_processes)
+
+        for info in candidates:
+            owned_elsewhere = self._owned_elsewhere(info, table)
+            if not is_same_process(table, info.pid, info.process_started_at):
+                # The owner may still be creating it, before its PID is recorded
+                if owned_elsewhere:
+                    report.skipped.append(info.id)
+                else:
+                    report.dead.append(info.id)
+            elif info.state != SandboxState.RUNNING.value:
+                report.skipped.append(info.id)
+            else:
+                try:
+                    await self._adopt(info, claim=not owned_elsewhere)
+                except Exception as e:
+                    logging.error(f"Failed to re-adopt sandbox {info.id}: {e}")
+                    report.skipped.append(info.id)
+                    continue
+                if owned_elsewhere:
+                    report.owned_elsewhere.append(info.id)
+                else:
+                    report.adopted.append(info.id)
+
+        if report.dead:
+            if remove_dead:
+                await self._registry.remove_many(report.dead)
+            else:
+                for sandbox_id in report.dead:
+                    await self._registry.update_state(sandbox_id, SandboxState.FAILED)
+
+        logging.info(
+            f"Registry recovery: {len(report.adopted)} re-adopted, "
+            f"{len(report.owned_elsewhere)} owned by other managers, "
+            f"{len(report.dead)} dead, {len(report.skipped)} skipped"
+        )
+        return report
+
+    async def stop_reaper(self) -> None:
+        """Stop the background reaper."""
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:
+                pass
+            self._reaper_task = None
+
+    async def close(self) -> None:
+        """Stop the reaper and event followers, leaving sandboxes running.
+
+        ``async with`` calls this after shutting everything down; a manager
+        used without it, whose sandboxes should outlive it, must call it
+        itself.
+        """
+        await self.stop_reaper()
+        await self._registry.detach()
+        if self.audit_log:
+            await self.audit_log.detach()
+
+    async def reap(self, timeout: int = 30) -> Dict[str, str]:
+        """Shut down running sandboxes past their idle TTL or maximum lifetime.
+
+        Uses each sandbox's ``config.lifecycle`` policy. A sandbox is idle when
+        it has no execution in progress and none has started or finished, nor
+        has a monitor sample shown CPU above ``idle_cpu_percent``, within
+        ``idle_ttl`` seconds. Returns the reason for each sandbox shut down.
+        """
+        reaped: Dict[str, str] = {}
+        for sandbox in self.list_sandboxes(SandboxState.RUNNING):
+            if sandbox.id in self._borrowed:
+                # Reaped by the manager that owns it
+                continue
+            policy = sandbox.config.lifecycle
+            if policy.max_lifetime and sandbox.uptime >= policy.max_lifetime:
+                reaped[sandbox.id] = "max_lifetime"
+            elif policy.idle_ttl and sandbox.idle_seconds >= policy.idle_ttl:
+                reaped[sandbox.id] = "idle"
+
+        for sandbox_id, reason in reaped.items():
+            logging.info(f"Reaping sandbox {sandbox_id} ({reason})")
+            try:
+                await self.shutdown_sandbox(sandbox_id, timeout)
+            except Exception as e:
+                logging.error(f"Error reaping sandbox {sandbox_id}: {e}")
 
-    async def create_sandbox(self, config: SandboxConfig) -> Sandbox:
-        """Create and start a new sandbox instance."""
-        async with self._creation_semaphore:
-            # Check if sandbox with same name already exists
-            existing = self.get_sandbox_by_name(config.name)
-            if existing and existing.is_running:
-                raise SandboxError(f"Sandbox '{config.name}' already running")
+        return reaped
 
-            # Create new sandbox
-            sandbox = Sandbox(config)
+    @property
+    def scheduler(self) -> ResourceScheduler:
+        """Resource scheduler used for admission control."""
+        return self._scheduler
 
-            try:
-                # Add to registry before creation
-                self._sandboxes[sandbox.id] = sandbox
-                await self._registry.register(sandbox)
+    async def create_sandbox(
+        self,
+        config: SandboxConfig,
+        priority: int = 0,
+        admission_timeout: Optional[float] = None,
+    ) -> Sandbox:
+        """Create and start a new sandbox instance.
 
-                # Create and start sandbox
-                await sandbox.create()
+        The sandbox's memory and vCPU budget is reserved before creation and held
+        until it is shut down. Higher ``priority`` values are admitted first.
+        """
+        self._check_name_available(config.name)
 
-                return sandbox
+        reservation = await self._scheduler.acquire(
+            config.memory_mb, config.cpu_cores, priority=priority, timeout=admission_timeout
+        )
+
+        try:
+            async with self._creation_semaphore:
+                # Checked again now that no other creation can claim the name
+                self._check_name_available(config.name)
+                return await self._launch(self._new_sandbox(config), reservation)
+        except BaseException:
+            # Release is idempotent, so this also covers cancellation while queued
+            self._scheduler.release(reservation)
+            raise
+
+    async def create_many(
+        self,
+        configs: Iterable[SandboxConfig],
+        priority: int = 0,
+        admission_timeout: Optional[float] = None,
+        stage_limits: Optional[Dict[str, int]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> FleetResult:
+        """Create many sandboxes, pipelining their creation stages.
+
+        Sandboxes advance through admission, validation, WSB generation,
+        launch, readiness and startup independently. The host requirements
+        check runs once for the whole fleet, and at most ``max_concurrent``
+        sandboxes (shared with create_sandbox) are between launch and the end
+        of startup at a time. Failures do not stop the rest: the result lists
+        the sandboxes that came up and a FleetError for each one that did not.
+        """
+        configs = list(configs)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        pipeline = CreationPipeline(
+            stage_limits=stage_limits, on_progress=on_progress, slots=self._creation_semaphore
+        )
+        names = [config.name for config in configs]
+
+        async def bring_up(index: int, config: SandboxConfig) -> Union[Sandbox, FleetError]:
+            sandbox = self._new_sandbox(config)
+            pipeline.add(sandbox, index)
+            reservation: Optional[Reservation] = None
+            try:
+                pipeline.report(sandbox, ADMIT_STAGE, "started")
+                try:
+                    if names.index(config.name) != index:
+                        raise SandboxError(f"Duplicate sandbox name in fleet: '{config.name}'")
+                    self._check_name_available(config.name)
+                    reservation = await self._scheduler.acquire(
+                        config.memory_mb,
+                        config.cpu_cores,
+                        priority=priority,
+                        timeout=admission_timeout,
+                    )
+                    # Checked again: another creation may have taken the name while queued
+                    self._check_name_available(config.name)
+                except Exception as e:
+                    pipeline.report(sandbox, ADMIT_STAGE, "failed", str(e))
+                    raise
+                pipeline.report(sandbox, ADMIT_STAGE, "completed")
+
+                return await self._launch(sandbox, reservation, pipeline)
 
             except Exception as e:
-                # Remove from registry on failure
-                await self._cleanup_failed_sandbox(sandbox.id)
-                raise e
+                stage, cause = pipeline.failure(sandbox.id) or (ADMIT_STAGE, e)
+                return FleetError(
+                    index=index,
+                    name=config.name,
+                    stage=stage,
+                    error_type=type(cause).__name__,
+                    message=str(cause),
+                )
+            finally:
+                pipeline.finish(sandbox)
+                if reservation and sandbox.id not in self._reservations:
+                    self._scheduler.release(reservation)
+
+        outcomes = await asyncio.gather(
+            *(bring_up(index, config) for index, config in enumerate(configs))
+        )
+
+        result = FleetResult(elapsed=loop.time() - started)
+        for outcome in outcomes:
+            if isinstance(outcome, FleetError):
+                result.errors.append(outcome)
+            else:
+                result.sandboxes.append(outcome)
+        return result
 
     async def shutdown_sandbox(self, sandbox_id: str, timeout: int = 30) -> None:
         """Shutdown a specific sandbox."""
@@ -59,51 +330,73 @@ class SandboxManager:
         try:
             await sandbox.shutdown(timeout)
         finally:
-            # Remove from registry
-            await self._registry.unregister(sandbox_id)
-            self._sandboxes.pop(sandbox_id, None)
-
-    async def shutdown_all(self, timeout: int = 30) -> None:
-        """Shutdown all sandboxes."""
-        if not self._sandboxes:
-            return
-
-        # Create shutdown tasks for all sandboxes
-        shutdown_tasks = []
-        for sandbox_id in list(self._sandboxes.keys()):
-            task = asyncio.create_task(self._safe_shutdown_sandbox(sandbox_id, timeout))
-            shutdown_tasks.append(task)
-
-        # Wait for all shutdowns to complete
-        if shutdown_tasks:
-            await asyncio.gather(*shutdown_tasks, return_exceptions=True)
+            await self._forget(sandbox)
+
+    async def shutdown_all(
+        self,
+        timeout: int = 30,
+        deadline: Optional[float] = None,
+        max_concurrent: int = 10,
+        graceful_timeout: float = 0.0,
+        include_borrowed: bool = True,
+    ) -> ShutdownReport:
+        """Shutdown all sandboxes.
+
+        At most ``max_concurrent`` sandboxes are stopped at once. Each is asked
+        to stop gracefully (if ``graceful_timeout`` is set), terminated, and
+        killed if still running after ``timeout`` seconds. With a ``deadline``
+        in seconds, stages are shortened so the whole fleet is down in time.
+        Returns a report of stage timings and which sandboxes were force-killed.
+        With ``include_borrowed`` False, sandboxes owned by another running
+        manager are left to it.
+        """
+        sandboxes = [
+            sandbox
+            for sandbox in self.list_sandboxes()
+            if include_borrowed or sandbox.id not in self._borrowed
+        ]
+        if not sandboxes:
+            return ShutdownReport(deadline=deadline)
+
+        coordinator = ShutdownCoordinator(
+            max_concurrent=max_concurrent,
+            deadline=deadline,
+            graceful_timeout=graceful_timeout,
+            terminate_timeout=timeout,
+        )
+        report = await coordinator.shutdown(sandboxes, on_finished=self._forget)
+
+        if report.force_killed:
+            logging.warning(
+                f"Force-killed {len(report.force_killed)} of "
+                f"{len(report.sandboxes)} sandbox(es) during shutdown"
+            )
 
         self._shutdown_event.set()
+        return report
 
     def get_sandbox(self, sandbox_id: str) -> Optional[Sandbox]:
         """Get sandbox by ID."""
         return self._sandboxes.get(sandbox_id)
 
     def get_sandbox_by_name(self, name: str) -> Optional[Sandbox]:
-        """Get sandbox by name."""
-        for sandbox in self._sandboxes.values():
-            if sandbox.config.name == name:
-                return sandbox
-        return None
+        """Get sandbox by name (the earliest created one if names repeat)."""
+        ids = self._name_index.get(name)
+        if not ids:
+            return None
+        return self._sandboxes[next(iter(ids))]
 
     def list_sandboxes(self, state_filter: Optional[SandboxState] = None) -> List[Sandbox]:
-        """List all sandboxes, optionally filtered by state."""
-        sandboxes = list(self._sandboxes.values())
-
-        if state_filter:
-            sandboxes = [s for s in sandboxes if s.state == state_filter]
+        """List all sandboxes in creation order, optionally filtered by state."""
+        if not state_filter:
+            return list(self._sandboxes.values())
 
-        # Sort by creation time
-        return sorted(sandboxes, key=lambda s: s.created_at)
+        ids = sorted(self._state_index[state_filter], key=self._creation_seq.__getitem__)
+        return [self._sandboxes[sandbox_id] for sandbox_id in ids]
 
     def get_running_count(self) -> int:
         """Get count of running sandboxes."""
-        return len([s for s in self._sandboxes.values() if s.is_running])
+        return len(self._state_index[SandboxState.RUNNING])
 
     def get_total_count(self) -> int:
         """Get total count of sandboxes."""
@@ -112,65 +405,239 @@ class SandboxManager:
     async def cleanup_stopped_sandboxes(self) -> int:
         """Remove stopped sandboxes from management. Returns count cleaned up."""
         cleanup_count = 0
-        stopped_ids = []
-
-        for sandbox_id, sandbox in self._sandboxes.items():
-            if sandbox.state in [SandboxState.STOPPED, SandboxState.FAILED]:
-                stopped_ids.append(sandbox_id)
+        stopped_ids = [
+            *self._state_index[SandboxState.STOPPED],
+            *self._state_index[SandboxState.FAILED],
+        ]
 
         for sandbox_id in stopped_ids:
             await self._registry.unregister(sandbox_id)
-            self._sandboxes.pop(sandbox_id, None)
+            self._untrack(sandbox_id)
+            self._release_reservation(sandbox_id)
             cleanup_count += 1
 
         return cleanup_count
 
     async def get_system_stats(self) -> Dict[str, Any]:
         """Get system-wide sandbox statistics."""
-        running_sandboxes = self.list_sandboxes(SandboxState.RUNNING)
-
-        total_memory = sum(s.config.memory_mb for s in running_sandboxes)
-        total_cpu_cores = sum(s.config.cpu_cores for s in running_sandboxes)
+        running_count = self.get_running_count()
 
-        # Calculate average uptime for running sandboxes
+        # Average uptime follows from the sum of creation timestamps
         avg_uptime = 0.0
-        if running_sandboxes:
-            total_uptime = sum(s.uptime for s in running_sandboxes)
-            avg_uptime = total_uptime / len(running_sandboxes)
+        if running_count:
+            now = (datetime.utcnow() - _EPOCH).total_seconds()
+            avg_uptime = now - self._running_created_sum / running_count
 
         return {
             "total_sandboxes": self.get_total_count(),
-            "running_sandboxes": len(running_sandboxes),
-            "total_memory_mb": total_memory,
-            "total_cpu_cores": total_cpu_cores,
+            "running_sandboxes": running_count,
+            "total_memory_mb": self._running_memory_mb,
+            "total_cpu_cores": self._running_cpu_cores,
             "average_uptime_seconds": avg_uptime,
             "max_concurrent": self.max_concurrent,
             "registry_size": await self._registry.size(),
+            "scheduler": self._scheduler.get_stats(),
+            "result_cache": self.result_cache.get_stats(),
+            "audit": self.audit_log.get_stats() if self.audit_log else None,
+            "executions": {
+                sandbox_id: sandbox.execution_scheduler.get_stats()
+                for sandbox_id, sandbox in self._sandboxes.items()
+            },
         }
 
     async def wait_for_shutdown(self) -> None:
         """Wait for manager shutdown."""
         await self._shutdown_event.wait()
 
-    async def _safe_shutdown_sandbox(self, sandbox_id: str, timeout: int) -> None:
-        """Safely shutdown a sandbox with error handling."""
-        try:
-            await self.shutdown_sandbox(sandbox_id, timeout)
-        except Exception as e:
-            logging.error(f"Error during sandbox shutdown {sandbox_id}: {e}")
+    async def _reaper_loop(self) -> None:
+        """Periodically reap idle and expired sandboxes."""
+        while True:
+            await asyncio.sleep(self.reaper_interval)
+            try:
+                await self.reap()
+            except Exception as e:
+                logging.error(f"Sandbox reaper failed: {e}")
+
+    async def _forget(self, sandbox: Sandbox) -> None:
+        """Stop managing a shut down sandbox and return its resources."""
+        # Remove from registry
+        await self._registry.unregister(sandbox.id)
+        self._untrack(sandbox.id)
+        self._release_reservation(sandbox.id)
 
     async def _cleanup_failed_sandbox(self, sandbox_id: str) -> None:
         """Clean up a failed sandbox creation."""
         try:
+            self._release_reservation(sandbox_id)
             await self._registry.unregister(sandbox_id)
-            self._sandboxes.pop(sandbox_id, None)
+            self._untrack(sandbox_id)
         except Exception as e:
             logging.error(f"Error cleaning up failed sandbox {sandbox_id}: {e}")
 
+    def _check_name_available(self, name: str) -> None:
+        """Reject a name already used by a sandbox being created or running.
+
+        Sandboxes are tracked before their first await in _launch(), so a
+        check made just before it cannot race another creation.
+        """
+        for sandbox_id in self._name_index.get(name, ()):
+            state = self._sandboxes[sandbox_id].state
+            if state == SandboxState.RUNNING:
+                raise SandboxError(f"Sandbox '{name}' already running")
+            if state in (SandboxState.PENDING, SandboxState.CREATING):
+                raise SandboxError(f"Sandbox '{name}' is already being created")
+
+    def _follow_events(self) -> None:
+        """Start the registry (and audit log) following the event bus."""
+        # Registry follows state changes pushed on the event bus
+        self._registry.attach(self.events)
+        if self.audit_log:
+            self.audit_log.attach(self.events)
+
+    def _new_sandbox(self, config: SandboxConfig) -> Sandbox:
+        """Build a sandbox wired to the manager's event bus and caches."""
+        return Sandbox(
+            config,
+            event_bus=self.events,
+            provisioning_cache=self.provisioning_cache,
+            wsb_cache=self.wsb_cache,
+            result_cache=self.result_cache,
+            folder_validator=self.folder_validator,
+        )
+
+    async def _launch(
+        self,
+        sandbox: Sandbox,
+        reservation: Reservation,
+        pipeline: Optional[CreationPipeline] = None,
+    ) -> Sandbox:
+        """Register and create a sandbox that already holds a reservation."""
+        self._follow_events()
+        self._reservations[sandbox.id] = reservation
+
+        try:
+            # Add to registry before creation
+            self._track(sandbox)
+            await self._registry.register(sandbox)
+
+            # Create and start sandbox
+            if pipeline:
+                await sandbox.create(pipeline)
+            else:
+                await sandbox.create()
+
+            # Record the process so a restarted manager can find it again
+            if sandbox.process:
+                pid = sandbox.process.pid
+                started_at = await asyncio.to_thread(process_start_time, pid)
+                await self._registry.record_process(sandbox.id, pid, started_at)
+
+            return sandbox
+
+        except Exception as e:
+            # Remove from registry on failure
+            await self._cleanup_failed_sandbox(sandbox.id)
+            raise e
+
+    def _owned_elsewhere(self, info: SandboxInfo, table: Dict[int, float]) -> bool:
+        """Whether an entry belongs to another manager that is still running."""
+        if info.owner_id is None or self._registry.owns(info):
+            return False
+        return is_same_process(table, info.owner_pid, info.owner_started_at)
+
+    async def _adopt(self, info: SandboxInfo, claim: bool = True) -> Sandbox:
+        """Take over a sandbox left running by a previous manager.
+
+        Without ``claim`` the sandbox is only borrowed: it can be used here,
+        but its owner stays responsible for reaping it.
+        """
+        config = SandboxConfig(**info.config_snapshot)
+        sandbox = Sandbox.adopt(
+            info.id,
+            config,
+            datetime.fromisoformat(info.created_at),
+            AdoptedProcess.from_pid(info.pid),
+            event_bus=self.events,
+            provisioning_cache=self.provisioning_cache,
+            wsb_cache=self.wsb_cache,
+            result_cache=self.result_cache,
+            folder_validator=self.folder_validator,
+        )
+
+        self._follow_events()
+        # Its memory and vCPUs are already in use, whatever the current capacity
+        self._reservations[sandbox.id] = self._scheduler.reserve_existing(
+            config.memory_mb, config.cpu_cores
+        )
+        self._track(sandbox)
+        if claim:
+            await self._registry.claim(sandbox.id)
+        else:
+            self._borrowed.add(sandbox.id)
+        await sandbox.start_monitoring()
+        return sandbox
+
+    def _track(self, sandbox: Sandbox) -> None:
+        """Add a sandbox to the manager and its indexes."""
+        self._sandboxes[sandbox.id] = sandbox
+        self._creation_seq[sandbox.id] = self._next_seq
+        self._next_seq += 1
+        self._name_index.setdefault(sandbox.config.name, {})[sandbox.id] = None
+        self._state_index[sandbox.state][sandbox.id] = None
+        if sandbox.state == SandboxState.RUNNING:
+            self._update_running_totals(sandbox, 1)
+        sandbox.add_state_listener(self._on_state_change)
+
+    def _untrack(self, sandbox_id: str) -> None:
+        """Remove a sandbox from the manager and its indexes."""
+        sandbox = self._sandboxes.pop(sandbox_id, None)
+        if not sandbox:
+            return
+
+        sandbox.remove_state_listener(self._on_state_change)
+        self._borrowed.discard(sandbox_id)
+        self._creation_seq.pop(sandbox_id, None)
+        self._state_index[sandbox.state].pop(sandbox_id, None)
+        if sandbox.state == SandboxState.RUNNING:
+            self._update_running_totals(sandbox, -1)
+
+        name_ids = self._name_index.get(sandbox.config.name)
+        if name_ids is not None:
+            name_ids.pop(sandbox_id, None)
+            if not name_ids:
+                del self._name_index[sandbox.config.name]
+
+    def _on_state_change(
+        self, sandbox: Sandbox, old_state: SandboxState, new_state: SandboxState
+    ) -> None:
+        """Keep state index and running totals in step with sandbox transitions."""
+        self._state_index[old_state].pop(sandbox.id, None)
+        self._state_index[new_state][sandbox.id] = None
+
+        if old_state == SandboxState.RUNNING:
+            self._update_running_totals(sandbox, -1)
+        if new_state == SandboxState.RUNNING:
+            self._update_running_totals(sandbox, 1)
+
+    def _update_running_totals(self, sandbox: Sandbox, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a sandbox from running aggregates."""
+        self._running_memory_mb += sign * sandbox.config.memory_mb
+        self._running_cpu_cores += sign * sandbox.config.cpu_cores
+        self._running_created_sum += sign * (sandbox.created_at - _EPOCH).total_seconds()
+
+    def _release_reservation(self, sandbox_id: str) -> None:
+        """Return a sandbox's resource budget to the scheduler."""
+        reservation = self._reservations.pop(sandbox_id, None)
+        if reservation:
+            self._scheduler.release(reservation)
+
     async def __aenter__(self) -> "SandboxManager":
         """Async context manager entry."""
+        await self.start()
         return self
 
     async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
         """Async context manager exit with cleanup."""
-        await self.shutdown_all()
+        await self.stop_reaper()
+        await self.shutdown_all(include_borrowed=False)
+        await self.close()
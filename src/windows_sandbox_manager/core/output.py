@@ -0,0 +1,94 @@
+"""
+Bounded capture of command output.
+"""
+
+import asyncio
+from enum import Enum
+from typing import Optional, Union
+
+
+class TruncationPolicy(Enum):
+    """Which part of oversized output to keep."""
+
+    HEAD = "head"
+    TAIL = "tail"
+    HEAD_TAIL = "head_tail"
+
+
+class OutputBuffer:
+    """
+    Collects a stream's bytes while holding at most ``limit`` of them.
+
+    HEAD keeps the first bytes, TAIL the last, and HEAD_TAIL splits the budget
+    between both ends and marks the gap. Bytes beyond the budget are counted
+    and discarded as they arrive. ``limit=None`` keeps everything.
+    """
+
+    MARKER = b"\n... [%d bytes truncated] ...\n"
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        policy: Union[TruncationPolicy, str] = TruncationPolicy.HEAD_TAIL,
+    ):
+        self.limit = limit
+        self.policy = TruncationPolicy(policy)
+        self.total_bytes = 0
+
+        if limit is None:
+            head_limit, tail_limit = None, 0
+        elif self.policy == TruncationPolicy.HEAD:
+            head_limit, tail_limit = limit, 0
+        elif self.policy == TruncationPolicy.TAIL:
+            head_limit, tail_limit = 0, limit
+        else:
+            head_limit, tail_limit = limit - limit // 2, limit // 2
+
+        self._head_limit = head_limit
+        self._tail_limit = tail_limit
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        """Add bytes read from the stream."""
+        self.total_bytes += len(chunk)
+
+        if self._head_limit is None:
+            self._head += chunk
+            return
+
+        room = self._head_limit - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+
+        if chunk and self._tail_limit:
+            self._tail += chunk[-self._tail_limit :]
+            # Trim lazily so repeated small chunks stay amortised O(1)
+            if len(self._tail) > 2 * self._tail_limit:
+                del self._tail[: len(self._tail) - self._tail_limit]
+
+    @property
+    def kept_bytes(self) -> int:
+        """Bytes of output retained."""
+        return len(self._head) + min(len(self._tail), self._tail_limit)
+
+    @property
+    def truncated_bytes(self) -> int:
+        """Bytes of output discarded."""
+        return self.total_bytes - self.kept_bytes
+
+    def getvalue(self) -> bytes:
+        """Retained output, with a marker where HEAD_TAIL dropped bytes."""
+        tail = bytes(self._tail[-self._tail_limit :]) if self._tail_limit else b""
+        if self.truncated_bytes and self.policy == TruncationPolicy.HEAD_TAIL:
+            return bytes(self._head) + self.MARKER % self.truncated_bytes + tail
+        return bytes(self._head) + tail
+
+    async def drain(self, stream: asyncio.StreamReader, chunk_size: int = 64 * 1024) -> None:
+        """Read a stream to EOF into the buffer."""
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            self.feed(chunk)
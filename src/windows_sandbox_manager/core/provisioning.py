@@ -0,0 +1,289 @@
+"""
+Host-side cache of artifacts produced by sandbox startup commands.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config.models import FolderMapping, SandboxConfig
+from ..exceptions import ConfigurationError
+from ..utils.windows import WindowsUtils
+
+# Matches "pip install ...", "pip3 install ..." and "python -m pip install ..."
+_PIP_INSTALL = re.compile(r"^(?P<pip>.*?\bpip3?(?:\.exe)?)\s+install\s+(?P<args>.+)$", re.I)
+# pip install options that pip download rejects, dropped from the download step
+_INSTALL_ONLY_FLAGS = frozenset(
+    {
+        "-U",
+        "--upgrade",
+        "--force-reinstall",
+        "-I",
+        "--ignore-installed",
+        "--user",
+        "--compile",
+        "--no-compile",
+        "--no-warn-script-location",
+        "--no-warn-conflicts",
+        "--break-system-packages",
+    }
+)
+_INSTALL_ONLY_OPTIONS = frozenset({"--upgrade-strategy", "-t", "--target", "--prefix", "--root"})
+# Installs of local source trees are left alone; there is nothing to download
+_EDITABLE_FLAGS = frozenset({"-e", "--editable"})
+
+
+@dataclass
+class ProvisioningPlan:
+    """How a sandbox's startup commands use the cache."""
+
+    key: str
+    hit: bool
+    entry_dir: Path
+    folder: FolderMapping
+    commands: List[str] = field(default_factory=list)
+    # Set once a miss's artifacts have been copied into the cache
+    committed: bool = False
+
+
+class ProvisioningCache:
+    """
+    Content-addressed cache of provisioned artifacts (wheels, downloaded files).
+
+    Entries are keyed by a hash of the startup commands and their inputs. On a
+    miss the sandbox gets a writable staging folder and pip installs download
+    their wheels there first; once provisioning succeeds the staging folder is
+    copied into the cache entry, and it is removed once the sandbox is gone.
+    On a hit the entry is mapped read-only and pip installs from it offline.
+    Entries are evicted least recently used first when the cache grows beyond
+    ``max_size_bytes``, except those pinned by a sandbox that mapped or
+    committed them.
+    """
+
+    WHEELS_DIR = "wheels"
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self, cache_dir: Optional[Path] = None, max_size_bytes: int = 10 * 1024**3
+    ):
+        self.cache_dir = cache_dir or WindowsUtils.get_cache_dir("provisioning")
+        self.max_size_bytes = max_size_bytes
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._in_use: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def compute_key(self, config: SandboxConfig) -> str:
+        """Hash the startup commands, environment and provisioning inputs."""
+        inputs = []
+        for path in config.provisioning.inputs:
+            try:
+                digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+            except OSError as e:
+                raise ConfigurationError(f"Cannot read provisioning input {path}: {e}")
+            inputs.append([Path(path).name, digest])
+
+        material = {
+            "commands": config.startup_commands,
+            "environment": dict(sorted(config.environment.items())),
+            "inputs": inputs,
+        }
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def plan(self, config: SandboxConfig) -> ProvisioningPlan:
+        """Decide how to map the cache and rewrite the startup commands."""
+        key = self.compute_key(config)
+        guest = config.provisioning.guest_path
+        wheels = f"{guest}/{self.WHEELS_DIR}"
+        index = self._load_index()
+        entry_dir = self.cache_dir / key
+
+        if key in index and entry_dir.is_dir():
+            self._hits += 1
+            index[key]["last_used"] = time.time()
+            self._save_index()
+            self._pin(key)
+
+            return ProvisioningPlan(
+                key=key,
+                hit=True,
+                entry_dir=entry_dir,
+                folder=FolderMapping(host=entry_dir, guest=guest, readonly=True),
+                commands=self._rewrite_commands(config.startup_commands, wheels, False),
+            )
+
+        self._misses += 1
+        staging_dir = self.cache_dir / f"{key}.partial-{uuid.uuid4().hex[:8]}"
+        (staging_dir / self.WHEELS_DIR).mkdir(parents=True, exist_ok=True)
+
+        return ProvisioningPlan(
+            key=key,
+            hit=False,
+            entry_dir=staging_dir,
+            folder=FolderMapping(host=staging_dir, guest=guest, readonly=False),
+            commands=self._rewrite_commands(config.startup_commands, wheels, True),
+        )
+
+    def commit(self, plan: ProvisioningPlan) -> None:
+        """Copy a successful miss's staging folder into a cache entry.
+
+        The staging folder is still mapped into the running sandbox, so it is
+        copied rather than moved; discard() removes it once the sandbox is
+        gone. The entry stays pinned until release().
+        """
+        if plan.hit or plan.committed:
+            return
+
+        final_dir = self.cache_dir / plan.key
+        index = self._load_index()
+        temp_dir = self.cache_dir / f"{plan.key}.commit-{uuid.uuid4().hex[:8]}"
+        try:
+            shutil.copytree(plan.entry_dir, temp_dir)
+            temp_dir.rename(final_dir)
+        except OSError:
+            # Another sandbox populated the same entry first
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if plan.key not in index:
+                return
+        else:
+            now = time.time()
+            index[plan.key] = {
+                "size": self._dir_size(final_dir),
+                "created": now,
+                "last_used": now,
+            }
+            self._save_index()
+
+        plan.committed = True
+        self._pin(plan.key)
+        self.evict()
+
+    def discard(self, plan: ProvisioningPlan) -> None:
+        """Remove a miss's staging folder; call once no sandbox maps it."""
+        if not plan.hit:
+            shutil.rmtree(plan.entry_dir, ignore_errors=True)
+
+    def release(self, plan: ProvisioningPlan) -> None:
+        """Unpin the entry a sandbox mapped (hit) or committed (miss)."""
+        if (plan.hit or plan.committed) and self._in_use.get(plan.key):
+            self._in_use[plan.key] -= 1
+            if not self._in_use[plan.key]:
+                del self._in_use[plan.key]
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits. Returns count removed."""
+        index = self._load_index()
+        total = sum(entry["size"] for entry in index.values())
+        removed = 0
+
+        for key in sorted(index, key=lambda k: index[k]["last_used"]):
+            if total <= self.max_size_bytes:
+                break
+            if key in self._in_use:
+                continue
+
+            shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+            total -= index.pop(key)["size"]
+            removed += 1
+
+        if removed:
+            self._save_index()
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        index = self._load_index()
+        return {
+            "entries": len(index),
+            "size_bytes": sum(entry["size"] for entry in index.values()),
+            "max_size_bytes": self.max_size_bytes,
+            "in_use": len(self._in_use),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+    def _pin(self, key: str) -> None:
+        """Protect an entry from eviction until a matching release()."""
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+
+    @staticmethod
+    def _rewrite_commands(commands: List[str], wheels: str, download: bool) -> List[str]:
+        """Make pip installs use the cached wheels, downloading them first on a miss."""
+        rewritten = []
+        for command in commands:
+            match = _PIP_INSTALL.match(command.strip())
+            args = shlex.split(match["args"], posix=False) if match else []
+            if not match or _EDITABLE_FLAGS.intersection(args):
+                rewritten.append(command)
+                continue
+
+            pip = match["pip"]
+            if download:
+                download_args = " ".join(ProvisioningCache._download_args(args))
+                rewritten.append(f"{pip} download -d {wheels} {download_args}")
+            rewritten.append(f"{pip} install --no-index --find-links {wheels} {match['args']}")
+        return rewritten
+
+    @staticmethod
+    def _download_args(args: List[str]) -> List[str]:
+        """pip install arguments without the options pip download does not accept."""
+        kept: List[str] = []
+        skip_value = False
+        for arg in args:
+            if skip_value:
+                skip_value = False
+                continue
+            name = arg.split("=", 1)[0]
+            if name in _INSTALL_ONLY_FLAGS:
+                continue
+            if name in _INSTALL_ONLY_OPTIONS:
+                skip_value = "=" not in arg
+                continue
+            kept.append(arg)
+        return kept
+
+    @staticmethod
+    def _dir_size(path: Path) -> int:
+        """Total size of files under a directory."""
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the entry index, dropping entries whose folder is gone."""
+        if self._index is not None:
+            return self._index
+
+        index: Dict[str, Dict[str, Any]] = {}
+        index_path = self.cache_dir / self.INDEX_FILE
+        if index_path.exists():
+            try:
+                index = json.loads(index_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable provisioning index {index_path}: {e}")
+
+        self._index = {k: v for k, v in index.items() if (self.cache_dir / k).is_dir()}
+        return self._index
+
+    def _save_index(self) -> None:
+        """Persist the entry index atomically."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.cache_dir / self.INDEX_FILE
+        temp_path = index_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(self._index, indent=2), encoding="utf-8")
+        os.replace(temp_path, index_path)
@@ -0,0 +1,99 @@
+"""
+Reconciliation of the persisted registry with live processes after a restart.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import psutil
+
+# Process start times recorded by the registry are compared with this slack
+START_TIME_TOLERANCE = 1.0
+
+
+@dataclass
+class RecoveryReport:
+    """Outcome of reconciling the registry at manager startup."""
+
+    adopted: List[str] = field(default_factory=list)
+    # Registry entries whose process was gone (or never recorded)
+    dead: List[str] = field(default_factory=list)
+    # Live sandboxes caught mid-creation or mid-shutdown, left untouched
+    skipped: List[str] = field(default_factory=list)
+    # Entries of another manager that is still running, left untouched
+    owned_elsewhere: List[str] = field(default_factory=list)
+
+
+def scan_processes() -> Dict[int, float]:
+    """Map every live PID to its start time in a single pass over the process table."""
+    table: Dict[int, float] = {}
+    for proc in psutil.process_iter(["pid", "create_time"]):
+        create_time = proc.info.get("create_time")
+        if create_time is not None:
+            table[proc.info["pid"]] = create_time
+    return table
+
+
+def process_start_time(pid: int) -> Optional[float]:
+    """Start time of a process, or None if it cannot be read."""
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.Error, OSError):
+        return None
+
+
+def is_same_process(
+    table: Dict[int, float], pid: Optional[int], started_at: Optional[float]
+) -> bool:
+    """Check a recorded PID is still running and has not been reused."""
+    if pid is None or pid not in table:
+        return False
+    if started_at is None:
+        return True
+    return abs(table[pid] - started_at) <= START_TIME_TOLERANCE
+
+
+class AdoptedProcess:
+    """
+    Stands in for the asyncio subprocess of a sandbox started by an earlier
+    manager, so shutdown can terminate, kill and wait for it the same way.
+    """
+
+    def __init__(self, process: psutil.Process, poll_interval: float = 0.5):
+        self._process = process
+        self.pid = process.pid
+        self.poll_interval = poll_interval
+        self.returncode: Optional[int] = None
+
+    @classmethod
+    def from_pid(cls, pid: int) -> "AdoptedProcess":
+        """Attach to a running process by PID."""
+        return cls(psutil.Process(pid))
+
+    def terminate(self) -> None:
+        """Ask the process to exit."""
+        try:
+            self._process.terminate()
+        except psutil.NoSuchProcess:
+            raise ProcessLookupError(self.pid)
+
+    def kill(self) -> None:
+        """Kill the process."""
+        try:
+            self._process.kill()
+        except psutil.NoSuchProcess:
+            raise ProcessLookupError(self.pid)
+
+    async def wait(self) -> int:
+        """Wait for the process to exit without tying up a thread."""
+        while self.returncode is None:
+            try:
+                # Exit codes are only known for our own children
+                code = self._process.wait(timeout=0)
+                self.returncode = code if code is not None else 0
+            except psutil.TimeoutExpired:
+                await asyncio.sleep(self.poll_interval)
+            except psutil.NoSuchProcess:
+                self.returncode = 0
+        return self.returncode
@@ -4,13 +4,23 @@ Sandbox registry for tracking and persistence.
 
 import asyncio
 import json
+import logging
+import os
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 
+from .events import EventBus, StateChangedEvent, Subscription
+from .recovery import process_start_time
 from .sandbox import Sandbox, SandboxState
 from ..exceptions import SandboxError
+from ..utils.locks import FileLock
+
+# Applies a change to the entries read from disk; returns what the caller
+# gets back, and the file is only rewritten when that is truthy
+RegistryChange = Callable[[Dict[str, "SandboxInfo"]], Any]
 
 
 @dataclass
@@ -23,49 +33,140 @@ class SandboxInfo:
     created_at: str
     config_snapshot: Dict
     last_seen: str
+    # Sandbox process, for reconciliation after a restart
+    pid: Optional[int] = None
+    process_started_at: Optional[float] = None
+    # Manager responsible for the sandbox, so another one never takes it over
+    owner_id: Optional[str] = None
+    owner_pid: Optional[int] = None
+    owner_started_at: Optional[float] = None
 
 
 class SandboxRegistry:
     """
     Registry for tracking sandbox instances and state persistence.
+
+    Several managers, in this process or others, may share one registry
+    file. Each change re-reads the file under a lock file and applies only
+    that change before writing it back, so concurrent writers never drop
+    each other's entries. Lookups read the copy refreshed by the last load
+    or change.
     """
 
     def __init__(self, registry_path: Optional[Path] = None):
         self.registry_path = registry_path or Path.cwd() / ".sandbox_registry.json"
+        self._file_lock_path = self.registry_path.with_suffix(".lock")
         self._registry: Dict[str, SandboxInfo] = {}
         self._lock = asyncio.Lock()
+        self._subscription: Optional[Subscription] = None
+        self._follow_task: Optional[asyncio.Task] = None
+        # Identity written into the entries this registry creates or claims;
+        # the ID tells apart managers sharing one process
+        self.owner_id = uuid.uuid4().hex
+        self.owner_pid = os.getpid()
+        self.owner_started_at = process_start_time(self.owner_pid)
+
+    def attach(self, event_bus: EventBus) -> None:
+        """Follow state-change events so registry state tracks sandboxes."""
+        if self._follow_task and not self._follow_task.done():
+            return
+
+        self._subscription = event_bus.subscribe(event_types={StateChangedEvent})
+        self._follow_task = asyncio.create_task(self._follow(self._subscription))
+
+    async def detach(self) -> None:
+        """Stop following events, applying any that are already queued."""
+        if self._subscription:
+            self._subscription.close()
+            self._subscription = None
+        if self._follow_task:
+            await self._follow_task
+            self._follow_task = None
+
+    async def _follow(self, subscription: Subscription) -> None:
+        """Apply state-change events to the registry."""
+        async for event in subscription:
+            try:
+                await self.update_state(event.sandbox_id, event.new_state)
+            except Exception as e:
+                logging.error(f"Failed to record state for sandbox {event.sandbox_id}: {e}")
 
     async def register(self, sandbox: Sandbox) -> None:
         """Register a sandbox in the registry."""
-        async with self._lock:
-            info = SandboxInfo(
-                id=sandbox.id,
-                name=sandbox.config.name,
-                state=sandbox.state.value,
-                created_at=sandbox.created_at.isoformat(),
-                config_snapshot=sandbox.config.model_dump(),
-                last_seen=datetime.utcnow().isoformat(),
-            )
-
-            self._registry[sandbox.id] = info
-            await self._persist()
+        info = SandboxInfo(
+            id=sandbox.id,
+            name=sandbox.config.name,
+            state=sandbox.state.value,
+            created_at=sandbox.created_at.isoformat(),
+            config_snapshot=sandbox.config.model_dump(mode="json"),
+            last_seen=datetime.utcnow().isoformat(),
+        )
+        self._set_owner(info)
+
+        def add(entries: Dict[str, SandboxInfo]) -> bool:
+            entries[sandbox.id] = info
+            return True
+
+        await self._update(add)
+
+    async def record_process(
+        self, sandbox_id: str, pid: int, started_at: Optional[float]
+    ) -> None:
+        """Record the PID and start time of a sandbox's process."""
+
+        def record(entries: Dict[str, SandboxInfo]) -> bool:
+            if sandbox_id not in entries:
+                return False
+            entries[sandbox_id].pid = pid
+            entries[sandbox_id].process_started_at = started_at
+            return True
+
+        await self._update(record)
+
+    async def claim(self, sandbox_id: str) -> None:
+        """Record this registry's manager as the owner of an entry."""
+
+        def claim(entries: Dict[str, SandboxInfo]) -> bool:
+            if sandbox_id not in entries:
+                return False
+            self._set_owner(entries[sandbox_id])
+            return True
+
+        await self._update(claim)
+
+    def owns(self, info: SandboxInfo) -> bool:
+        """Whether an entry was created or claimed by this registry's manager."""
+        return info.owner_id == self.owner_id
+
+    def _set_owner(self, info: SandboxInfo) -> None:
+        """Stamp an entry with this registry's owner identity."""
+        info.owner_id = self.owner_id
+        info.owner_pid = self.owner_pid
+        info.owner_started_at = self.owner_started_at
+
+    async def remove_many(self, sandbox_ids: List[str]) -> int:
+        """Remove several entries with a single write. Returns count removed."""
+
+        def remove(entries: Dict[str, SandboxInfo]) -> int:
+            return sum(entries.pop(sandbox_id, None) is not None for sandbox_id in sandbox_ids)
+
+        return await self._update(remove)
 
     async def unregister(self, sandbox_id: str) -> bool:
         """Unregister a sandbox from the registry."""
-        async with self._lock:
-            if sandbox_id in self._registry:
-                del self._registry[sandbox_id]
-                await self._persist()
-                return True
-            return False
+        return bool(await self.remove_many([sandbox_id]))
 
     async def update_state(self, sandbox_id: str, state: SandboxState) -> None:
         """Update sandbox state in registry."""
-        async with self._lock:
-            if sandbox_id in self._registry:
-                self._registry[sandbox_id].state = state.value
-                self._registry[sandbox_id].last_seen = datetime.utcnow().isoformat()
-                await self._persist()
+
+        def update(entries: Dict[str, SandboxInfo]) -> bool:
+            if sandbox_id not in entries:
+                return False
+            entries[sandbox_id].state = state.value
+            entries[sandbox_id].last_seen = datetime.utcnow().isoformat()
+            return True
+
+        await self._update(update)
 
     async def get_info(self, sandbox_id: str) -> Optional[SandboxInfo]:
         """Get sandbox information from registry."""
@@ -95,12 +196,11 @@ class SandboxRegistry:
     async def cleanup_stale(self, max_age_hours: int = 24) -> int:
         """Clean up stale registry entries. Returns count of cleaned entries."""
         cutoff_time = datetime.utcnow().timestamp() - (max_age_hours * 3600)
-        cleanup_count = 0
 
-        async with self._lock:
+        def cleanup(entries: Dict[str, SandboxInfo]) -> int:
             stale_ids = []
 
-            for sandbox_id, info in self._registry.items():
+            for sandbox_id, info in entries.items():
                 try:
                     last_seen = datetime.fromisoformat(info.last_seen)
                     if last_seen.timestamp() < cutoff_time:
@@ -110,48 +210,62 @@ class SandboxRegistry:
                     stale_ids.append(sandbox_id)
 
             for sandbox_id in stale_ids:
-                del self._registry[sandbox_id]
-                cleanup_count += 1
+                del entries[sandbox_id]
+            return len(stale_ids)
 
-            if cleanup_count > 0:
-                await self._persist()
-
-        return cleanup_count
+        return await self._update(cleanup)
 
     async def clear(self) -> None:
         """Clear all registry entries."""
-        async with self._lock:
-            self._registry.clear()
-            await self._persist()
 
-    async def load(self) -> None:
-        """Load registry from persistent storage."""
-        if not self.registry_path.exists():
-            return
+        def clear(entries: Dict[str, SandboxInfo]) -> bool:
+            entries.clear()
+            return True
 
-        try:
-            async with self._lock:
-                content = self.registry_path.read_text(encoding="utf-8")
-                data = json.loads(content)
+        await self._update(clear)
 
-                self._registry = {k: SandboxInfo(**v) for k, v in data.items()}
-        except (json.JSONDecodeError, TypeError, ValueError):
-            # Log error and start with empty registry
-            self._registry = {}
+    async def load(self) -> None:
+        """Load registry from persistent storage."""
+        async with self._lock:
+            # Files are replaced whole, so reading needs no lock file
+            self._registry = await asyncio.to_thread(self._read)
 
-    async def _persist(self) -> None:
-        """Persist registry to storage."""
+    async def _update(self, change: RegistryChange) -> Any:
+        """Apply a change to the current file contents and save it."""
+        async with self._lock:
+            try:
+                entries, result = await asyncio.to_thread(self._update_sync, change)
+            except OSError as e:
+                raise SandboxError(f"Failed to persist registry: {e}") from e
+            self._registry = entries
+            return result
+
+    def _update_sync(self, change: RegistryChange) -> Tuple[Dict[str, SandboxInfo], Any]:
+        """Read, change and write the registry file while holding the lock file."""
+        with FileLock(self._file_lock_path):
+            entries = self._read()
+            result = change(entries)
+            if result:
+                self._write(entries)
+        return entries, result
+
+    def _read(self) -> Dict[str, SandboxInfo]:
+        """Entries stored on disk; an unreadable file counts as empty."""
         try:
-            # Convert to JSON-serializable format
-            data = {k: asdict(v) for k, v in self._registry.items()}
-
-            # Write to temporary file first, then rename for atomicity
-            temp_path = self.registry_path.with_suffix(".tmp")
-            temp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
-            temp_path.rename(self.registry_path)
-
-        except Exception as e:
-            raise SandboxError(f"Failed to persist registry: {e}") from e
+            data = json.loads(self.registry_path.read_text(encoding="utf-8"))
+            return {k: SandboxInfo(**v) for k, v in data.items()}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            logging.error(f"Ignoring unreadable registry {self.registry_path}: {e}")
+            return {}
+
+    def _write(self, entries: Dict[str, SandboxInfo]) -> None:
+        """Replace the registry file in one step."""
+        data = {k: asdict(v) for k, v in entries.items()}
+        temp_path = self.registry_path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(temp_path, self.registry_path)
 
     async def get_stats(self) -> Dict[str, int]:
         """Get registry statistics."""
@@ -0,0 +1,147 @@
+"""
+In-memory cache of results from deterministic commands.
+"""
+
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..config.models import SandboxConfig
+
+if TYPE_CHECKING:
+    from .sandbox import ExecutionResult
+
+# SandboxConfig fields that cannot change what a command prints
+FINGERPRINT_EXCLUDE = {"name", "description", "lifecycle", "monitoring"}
+
+
+@dataclass
+class _CachedResult:
+    """A stored result and when it stops being valid."""
+
+    fingerprint: str
+    result: "ExecutionResult"
+    expires_at: Optional[float]
+
+
+class ResultCache:
+    """
+    Caches ExecutionResults of commands the caller declares deterministic.
+
+    Keys combine a fingerprint of the sandbox configuration, the command and
+    an optional caller-supplied hash of its inputs, so sandboxes built from
+    the same config share entries. Entries expire after ``ttl`` seconds and
+    the least recently used are evicted beyond ``max_entries``. Callers that
+    run mutating commands drop stale entries with ``invalidate()``.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _CachedResult]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def fingerprint(config: SandboxConfig) -> str:
+        """Hash of the configuration fields that shape a sandbox's contents."""
+        material = config.model_dump(mode="json", exclude=FINGERPRINT_EXCLUDE)
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def compute_key(
+        fingerprint: str, command: str, input_hash: Optional[str] = None, **options: Any
+    ) -> str:
+        """Key for a command run in a sandbox with the given fingerprint.
+
+        ``options`` are settings that change the returned result, such as
+        output limits.
+        """
+        material = {
+            "config": fingerprint,
+            "command": command,
+            "input": input_hash,
+            "options": options,
+        }
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional["ExecutionResult"]:
+        """Cached result for a key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self._expirations += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        # Callers may modify the result they get back
+        result = copy.copy(entry.result)
+        result.cached = True
+        return result
+
+    def put(
+        self,
+        key: str,
+        fingerprint: str,
+        result: "ExecutionResult",
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Store a result, evicting the least recently used entries if full."""
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._entries[key] = _CachedResult(fingerprint, copy.copy(result), expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, fingerprint: Optional[str] = None, key: Optional[str] = None) -> int:
+        """Drop one entry by key, every entry of a fingerprint, or everything.
+
+        Returns the number of entries removed.
+        """
+        if key is not None:
+            removed = 1 if self._entries.pop(key, None) is not None else 0
+        elif fingerprint is not None:
+            stale = [k for k, entry in self._entries.items() if entry.fingerprint == fingerprint]
+            for k in stale:
+                del self._entries[k]
+            removed = len(stale)
+        else:
+            removed = len(self._entries)
+            self._entries.clear()
+
+        self._invalidations += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters."""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "invalidations": self._invalidations,
+        }
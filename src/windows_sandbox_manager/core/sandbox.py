@@ -3,20 +3,70 @@ Async sandbox lifecycle manager with state management and resource monitoring.
 """
 
 import asyncio
+import hashlib
+import shutil
 import uuid
 import logging
+from dataclasses import replace
 from datetime import datetime
 from enum import Enum
-from pathlib import Path
-from typing import Optional, Dict, Any
+from pathlib import Path, PureWindowsPath
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Dict,
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Set,
+    Tuple,
+    Union,
+)
 import subprocess
 import asyncio.subprocess
 import xml.etree.ElementTree as ET
 
-from ..config.models import SandboxConfig
+from .events import (
+    EventBus,
+    StateChangedEvent,
+    ExecutionStartedEvent,
+    ExecutionFinishedEvent,
+    MonitorSampleEvent,
+    SecurityDecisionEvent,
+)
+from .execution_queue import ExecutionPriority, ExecutionScheduler, SharedSlots
+from .output import OutputBuffer, TruncationPolicy
+from .provisioning import ProvisioningCache, ProvisioningPlan
+from .result_cache import ResultCache
+from .session import SESSION_LINE_LIMIT, ShellSession
+from .transfer import FileTransfer, TransferReport
+from .workspace_sync import SyncReport, WorkspaceSync
+from .wsb_cache import WsbFileCache
+from ..config.models import SandboxConfig, FolderMapping
 from ..exceptions import SandboxCreationError, SandboxError, ResourceError
+from ..monitoring.accounting import (
+    GUEST_JOB_SOURCE,
+    ExecutionUsage,
+    ProcessTreeSampler,
+    UsageTotals,
+    read_guest_usage,
+)
 from ..monitoring.resources import ResourceMonitor, ResourceStats
+from ..security.folders import FolderValidator
+from ..security.ingest import FileIngestValidator
+from ..security.network import NetworkDecision, NetworkPolicy
+from ..security.policy import PolicyDecision, SecurityPolicy
 from ..utils.system_check import SystemChecker, RequirementStatus
+from ..utils.windows import WindowsUtils
+
+
+if TYPE_CHECKING:
+    from .fleet import CreationPipeline
+
+
+# Order in which Sandbox.create() runs its stages
+CREATION_STAGES = ("validate", "folders", "generate_wsb", "launch", "readiness", "startup")
 
 
 class SandboxState(Enum):
@@ -30,108 +80,378 @@ class SandboxState(Enum):
     FAILED = "failed"
 
 
+class ShutdownStage(Enum):
+    """Escalating ways of stopping a sandbox process."""
+
+    GRACEFUL = "graceful"
+    TERMINATE = "terminate"
+    KILL = "kill"
+
+
 class ExecutionResult:
     """Result of command execution in sandbox."""
 
-    def __init__(self, stdout: str, stderr: str, returncode: int, execution_time: float):
+    def __init__(
+        self,
+        stdout: str,
+        stderr: str,
+        returncode: int,
+        execution_time: float,
+        usage: Optional[ExecutionUsage] = None,
+        stdout_truncated_bytes: int = 0,
+        stderr_truncated_bytes: int = 0,
+        queue_time: float = 0.0,
+        cached: bool = False,
+    ):
         self.stdout = stdout
         self.stderr = stderr
         self.returncode = returncode
         self.execution_time = execution_time
+        self.usage = usage or ExecutionUsage()
+        self.stdout_truncated_bytes = stdout_truncated_bytes
+        self.stderr_truncated_bytes = stderr_truncated_bytes
+        # Seconds spent waiting for an execution slot
+        self.queue_time = queue_time
+        # Served from the result cache without running the command
+        self.cached = cached
         self.success = returncode == 0
 
+    @property
+    def truncated(self) -> bool:
+        """Whether any output was discarded by the output limit."""
+        return bool(self.stdout_truncated_bytes or self.stderr_truncated_bytes)
+
+
+StateListener = Callable[["Sandbox", SandboxState, SandboxState], None]
+
 
 class Sandbox:
     """
     Async sandbox instance with lifecycle management.
     """
 
-    def __init__(self, config: SandboxConfig):
+    def __init__(
+        self,
+        config: SandboxConfig,
+        event_bus: Optional[EventBus] = None,
+        provisioning_cache: Optional[ProvisioningCache] = None,
+        wsb_cache: Optional[WsbFileCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        folder_validator: Optional[FolderValidator] = None,
+    ):
         self.id = str(uuid.uuid4())
         self.config = config
-        self.state = SandboxState.PENDING
+        self.event_bus = event_bus
+        self.provisioning_cache = provisioning_cache
+        self.wsb_cache = wsb_cache or WsbFileCache()
+        self.result_cache = result_cache or ResultCache()
+        self.folder_validator = folder_validator or FolderValidator()
+        self._config_fingerprint: Optional[str] = None
+        self._security_policy: Optional[SecurityPolicy] = None
+        self._provisioning_plan: Optional[ProvisioningPlan] = None
+        # Mappings added by the manager on top of config.folders
+        self._extra_folders: List[FolderMapping] = []
+        self._state = SandboxState.PENDING
+        self._state_listeners: List[StateListener] = []
         self.created_at = datetime.utcnow()
+        self.last_activity = self.created_at
+        self._active_executions = 0
+        # Resources used by all executions so far
+        self.usage_totals = UsageTotals()
+        self.execution_scheduler = self._new_execution_scheduler()
         self.process: Optional[asyncio.subprocess.Process] = None
         self.wsb_file_path: Optional[Path] = None
         self._shutdown_event = asyncio.Event()
         self._resource_monitor: Optional[ResourceMonitor] = None
+        # Open shell sessions, closed when the sandbox shuts down
+        self._sessions: Set[ShellSession] = set()
 
-    async def create(self) -> None:
-        """Create and start the sandbox."""
-        try:
-            self.state = SandboxState.CREATING
-            
-            # Validate system requirements
-            await self._validate_system_requirements()
+    @classmethod
+    def adopt(
+        cls,
+        sandbox_id: str,
+        config: SandboxConfig,
+        created_at: datetime,
+        process: Any,
+        **kwargs: Any,
+    ) -> "Sandbox":
+        """Rebuild a running sandbox whose process outlived the manager that created it."""
+        sandbox = cls(config, **kwargs)
+        sandbox.id = sandbox_id
+        # Share execution slots with other processes using this sandbox
+        sandbox.execution_scheduler = sandbox._new_execution_scheduler()
+        sandbox.created_at = created_at
+        sandbox.process = process
+        # Set directly: the sandbox was already running, this is not a transition
+        sandbox._state = SandboxState.RUNNING
+        return sandbox
 
-            # Generate WSB configuration file
-            self.wsb_file_path = await self._generate_wsb_file()
+    async def create(self, pipeline: Optional["CreationPipeline"] = None) -> None:
+        """Create and start the sandbox.
 
-            # Start Windows Sandbox
-            await self._start_sandbox()
-
-            # Initialize resource monitoring
-            if self.config.monitoring.metrics_enabled:
-                self._resource_monitor = ResourceMonitor(self.id)
-                await self._resource_monitor.start()
+        When a pipeline is given, each creation stage runs through it so the
+        caller can bound and observe stages across many sandboxes.
+        """
+        try:
+            self.state = SandboxState.CREATING
 
-            # Execute startup commands
-            if self.config.startup_commands:
-                await self._execute_startup_commands()
+            for stage, step in self._creation_steps():
+                if pipeline:
+                    await pipeline.run(stage, self, step)
+                else:
+                    await step()
 
             self.state = SandboxState.RUNNING
+            self.touch()
 
         except Exception as e:
+            await self._cleanup()
             self.state = SandboxState.FAILED
             raise SandboxCreationError(f"Failed to create sandbox: {e}") from e
 
+    def _creation_steps(self) -> List[Tuple[str, Callable[[], Awaitable[None]]]]:
+        """Creation stages in order, named as in CREATION_STAGES."""
+        return [
+            ("validate", self._validate_system_requirements),
+            ("folders", self.validate_folders),
+            ("generate_wsb", self._stage_generate_wsb),
+            ("launch", self._start_sandbox),
+            ("readiness", self._wait_until_ready),
+            ("startup", self._stage_startup),
+        ]
+
+    async def validate_folders(self) -> None:
+        """Validate all configured folder mappings at once.
+
+        Raises SecurityError listing every invalid mapping.
+        """
+        if not self.config.folders:
+            return
+        report = await asyncio.to_thread(self.folder_validator.validate, self.config.folders)
+        report.raise_for_violations()
+
+    @property
+    def security_policy(self) -> SecurityPolicy:
+        """Compiled rules of config.security for checking agent actions."""
+        if self._security_policy is None:
+            self._security_policy = SecurityPolicy(self.config.security)
+            self._security_policy.add_listener(self._publish_decision)
+        return self._security_policy
+
+    @property
+    def network_policy(self) -> NetworkPolicy:
+        """Compiled allow/deny policy from config.security.network_restrictions."""
+        return self.security_policy.network
+
+    def check_egress(self, target: str) -> NetworkDecision:
+        """Decide whether the sandbox's network restrictions allow a host or URL.
+
+        Windows Sandbox can only switch networking on or off, so callers
+        that fetch on the sandbox's behalf should consult this first.
+        """
+        if "://" in target:
+            return self.network_policy.check_url(target)
+        return self.network_policy.check_host(target)
+
+    async def _stage_generate_wsb(self) -> None:
+        """Map cached provisioning artifacts, then get the WSB configuration file."""
+        self._plan_provisioning()
+        self._plan_transfers()
+        await self.sync_folders()
+        self.wsb_file_path = await self._generate_wsb_file()
+
+    async def _wait_until_ready(self) -> None:
+        """Wait for the sandbox to initialize and start resource monitoring."""
+        # Give sandbox time to initialize
+        await asyncio.sleep(5)
+
+        await self.start_monitoring()
+
+    async def start_monitoring(self) -> None:
+        """Start resource monitoring if enabled in the configuration."""
+        if self.config.monitoring.metrics_enabled and not self._resource_monitor:
+            self._resource_monitor = ResourceMonitor(self.id, on_sample=self._on_monitor_sample)
+            await self._resource_monitor.start()
+
+    async def _stage_startup(self) -> None:
+        """Execute startup commands and record provisioning results."""
+        if self.config.startup_commands:
+            succeeded = await self._execute_startup_commands()
+            self._finish_provisioning(succeeded)
+
     async def shutdown(self, timeout: int = 30) -> None:
         """Gracefully shutdown the sandbox."""
-        if self.state in [SandboxState.STOPPED, SandboxState.FAILED]:
+        if not await self.begin_shutdown():
             return
 
+        try:
+            # Terminate, then force kill if graceful shutdown failed
+            if not await self.stop_process(ShutdownStage.TERMINATE, timeout):
+                await self.stop_process(ShutdownStage.KILL)
+
+            await self.finish_shutdown()
+
+        except Exception as e:
+            self.state = SandboxState.FAILED
+            raise SandboxError(f"Failed to shutdown sandbox: {e}") from e
+
+    async def begin_shutdown(self) -> bool:
+        """Enter STOPPING and stop monitoring. Returns False if already stopped."""
+        if self.state in [SandboxState.STOPPED, SandboxState.FAILED]:
+            return False
+
         self.state = SandboxState.STOPPING
 
-        try:
-            # Stop resource monitoring
-            if self._resource_monitor:
-                await self._resource_monitor.stop()
+        # Stop resource monitoring
+        if self._resource_monitor:
+            await self._resource_monitor.stop()
+
+        for session in list(self._sessions):
+            await session.close()
+        return True
+
+    async def stop_process(
+        self, stage: ShutdownStage, timeout: Optional[float] = None
+    ) -> bool:
+        """Apply one shutdown stage and wait up to ``timeout`` for the process to exit.
 
-            # Terminate sandbox process
-            if self.process:
+        Returns True once the sandbox process is gone.
+        """
+        if not self.process_alive:
+            return True
+
+        helper: Optional[asyncio.subprocess.Process] = None
+        try:
+            if stage == ShutdownStage.GRACEFUL:
+                # Ask Windows inside the sandbox to shut itself down
+                helper = await asyncio.create_subprocess_shell(
+                    self._build_powershell_command("shutdown.exe /s /t 0"),
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+            elif stage == ShutdownStage.TERMINATE:
                 self.process.terminate()
+            else:
+                self.process.kill()
+        except ProcessLookupError:
+            return True
+        except OSError as e:
+            logging.warning(f"Shutdown stage {stage.value} failed for sandbox {self.id}: {e}")
 
-                # Wait for graceful shutdown
-                try:
-                    await asyncio.wait_for(
-                        asyncio.create_task(self._wait_for_process()), timeout=timeout
-                    )
-                except asyncio.TimeoutError:
-                    # Force kill if graceful shutdown failed
-                    self.process.kill()
-                    await self._wait_for_process()
+        try:
+            await asyncio.wait_for(self._wait_for_process(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if helper and helper.returncode is None:
+                helper.kill()
 
-            # Cleanup temporary files
-            await self._cleanup()
+    def kill_process(self) -> None:
+        """Kill the sandbox process immediately without waiting."""
+        if self.process_alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
 
-            self.state = SandboxState.STOPPED
-            self._shutdown_event.set()
+    async def finish_shutdown(self) -> None:
+        """Release resources once the process has exited and enter STOPPED."""
+        # Cleanup temporary files
+        await self._cleanup()
 
-        except Exception as e:
-            self.state = SandboxState.FAILED
-            raise SandboxError(f"Failed to shutdown sandbox: {e}") from e
+        self.state = SandboxState.STOPPED
+        self._shutdown_event.set()
+
+    async def execute(
+        self,
+        command: str,
+        timeout: int = 300,
+        max_output_bytes: Optional[int] = None,
+        truncation: Optional[Union[TruncationPolicy, str]] = None,
+        priority: Union[ExecutionPriority, str] = ExecutionPriority.NORMAL,
+        tenant: Optional[str] = None,
+        queue_timeout: Optional[float] = None,
+        cache: bool = False,
+        input_hash: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+    ) -> ExecutionResult:
+        """Execute a command in the sandbox.
 
-    async def execute(self, command: str, timeout: int = 300) -> ExecutionResult:
-        """Execute a command in the sandbox."""
+        Each output stream keeps at most ``max_output_bytes`` (default from
+        ``config.execution``); the rest is discarded while reading according
+        to the ``truncation`` policy and counted on the result.
+
+        Commands beyond ``config.execution.max_concurrent`` wait for a slot in
+        ``execution_scheduler`` by ``priority``, taking turns per ``tenant``.
+        The limit covers every process using the sandbox, shell sessions
+        included; tenants take turns within this process only. ``timeout``
+        starts once the command runs; ``queue_timeout`` bounds the wait and
+        raises ResourceError when exceeded.
+
+        With ``cache=True`` the command is treated as deterministic: a result
+        from ``result_cache`` for the same config, command and ``input_hash``
+        is returned without running it, and successful results are stored
+        for ``cache_ttl`` seconds. Call ``invalidate_cache()`` after commands
+        that change the sandbox.
+        """
         if self.state != SandboxState.RUNNING:
             raise SandboxError(f"Cannot execute command, sandbox state: {self.state}")
 
+        limits = self.config.execution
+        if max_output_bytes is None:
+            max_output_bytes = limits.max_output_bytes
+        policy = TruncationPolicy(truncation or limits.truncation)
+        stdout = OutputBuffer(max_output_bytes, policy)
+        stderr = OutputBuffer(max_output_bytes, policy)
+
+        cache_key: Optional[str] = None
+        if cache:
+            cache_key = self.result_cache.compute_key(
+                self.config_fingerprint,
+                command,
+                input_hash,
+                max_output_bytes=max_output_bytes,
+                truncation=policy.value,
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                self.touch()
+                self._publish(
+                    ExecutionFinishedEvent(
+                        sandbox_id=self.id,
+                        command=command,
+                        returncode=cached.returncode,
+                        execution_time=0.0,
+                        cached=True,
+                    )
+                )
+                return cached
+
+        proc: Optional[asyncio.subprocess.Process] = None
+        returncode: Optional[int] = None
+        error: Optional[str] = None
+        sampler: Optional[ProcessTreeSampler] = None
+        usage = ExecutionUsage()
+        # Queued commands count as activity so the reaper leaves the sandbox be
+        self._active_executions += 1
+        self.touch()
+        try:
+            ticket = await self.execution_scheduler.acquire(priority, tenant, queue_timeout)
+        except BaseException:
+            self._active_executions -= 1
+            raise
+
         start_time = asyncio.get_event_loop().time()
+        self._publish(ExecutionStartedEvent(sandbox_id=self.id, command=command))
+        # The guest's counters for the command are written here once it ends
+        usage_path = self._execution_dir / f"usage-{uuid.uuid4().hex}.json"
 
         try:
+            await asyncio.to_thread(usage_path.parent.mkdir, parents=True, exist_ok=True)
             # Execute command in Windows Sandbox via PowerShell remoting
             # Using PowerShell Direct to communicate with the sandbox VM
-            ps_command = self._build_powershell_command(command)
+            ps_command = self._build_powershell_command(command, usage_path)
             
             proc = await asyncio.create_subprocess_shell(
                 ps_command,
@@ -139,22 +459,307 @@ class Sandbox:
                 stderr=asyncio.subprocess.PIPE,
             )
 
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+            # Overhead of the host-side client relaying the command
+            sampler = ProcessTreeSampler(proc.pid)
+            sampler.start()
+
+            await asyncio.wait_for(
+                asyncio.gather(
+                    stdout.drain(proc.stdout), stderr.drain(proc.stderr), proc.wait()
+                ),
+                timeout=timeout,
+            )
 
             execution_time = asyncio.get_event_loop().time() - start_time
+            returncode = proc.returncode or 0
+            await sampler.stop()
+            usage = replace(
+                sampler.usage(stdout_bytes=stdout.total_bytes, stderr_bytes=stderr.total_bytes),
+                **await asyncio.to_thread(read_guest_usage, usage_path),
+            )
 
-            return ExecutionResult(
-                stdout=stdout.decode("utf-8", errors="ignore"),
-                stderr=stderr.decode("utf-8", errors="ignore"),
-                returncode=proc.returncode or 0,
+            result = ExecutionResult(
+                stdout=stdout.getvalue().decode("utf-8", errors="ignore"),
+                stderr=stderr.getvalue().decode("utf-8", errors="ignore"),
+                returncode=returncode,
                 execution_time=execution_time,
+                usage=usage,
+                stdout_truncated_bytes=stdout.truncated_bytes,
+                stderr_truncated_bytes=stderr.truncated_bytes,
+                queue_time=ticket.wait_time,
             )
+            # Failures may be transient, so only successes are reused
+            if cache_key and result.success:
+                self.result_cache.put(
+                    cache_key, self.config_fingerprint, result, ttl=cache_ttl
+                )
+            return result
 
         except asyncio.TimeoutError:
-            raise SandboxError(f"Command execution timed out after {timeout} seconds")
+            error = f"Command execution timed out after {timeout} seconds"
+            raise SandboxError(error)
         except Exception as e:
-            execution_time = asyncio.get_event_loop().time() - start_time
-            raise SandboxError(f"Command execution failed: {e}") from e
+            error = f"Command execution failed: {e}"
+            raise SandboxError(error) from e
+        finally:
+            if proc and proc.returncode is None:
+                # Don't leave a timed-out or abandoned command running; the
+                # shell's children hold the pipes open, so kill the whole tree
+                WindowsUtils.kill_process_tree(proc.pid)
+                await proc.wait()
+            self.execution_scheduler.release(ticket)
+            if sampler:
+                await sampler.stop()
+                if returncode is None:
+                    usage = sampler.usage(
+                        stdout_bytes=stdout.total_bytes, stderr_bytes=stderr.total_bytes
+                    )
+                    # Failed commands report nothing; drop any partial report
+                    await asyncio.to_thread(read_guest_usage, usage_path)
+            elapsed = asyncio.get_event_loop().time() - start_time
+            self.usage_totals.add(usage, elapsed)
+            self._active_executions -= 1
+            self.touch()
+            self._publish(
+                ExecutionFinishedEvent(
+                    sandbox_id=self.id,
+                    command=command,
+                    returncode=returncode,
+                    execution_time=elapsed,
+                    error=error,
+                    usage=usage,
+                    queue_time=ticket.wait_time,
+                )
+            )
+
+    async def open_session(
+        self,
+        max_output_bytes: Optional[int] = None,
+        truncation: Optional[Union[TruncationPolicy, str]] = None,
+        priority: Union[ExecutionPriority, str, int] = ExecutionPriority.NORMAL,
+        tenant: Optional[str] = None,
+        queue_timeout: Optional[float] = None,
+    ) -> ShellSession:
+        """Start a persistent shell in the sandbox.
+
+        Unlike ``execute()``, commands run through the session share one
+        guest shell, so the working directory, environment and variables
+        persist between them. Output limits default to ``config.execution``.
+        The session holds one ``execution_scheduler`` slot until it closes,
+        waiting for it like ``execute()`` does. Close the session (or use it
+        as an async context manager) when done; open sessions are closed on
+        shutdown.
+        """
+        if self.state != SandboxState.RUNNING:
+            raise SandboxError(f"Cannot open session, sandbox state: {self.state}")
+
+        limits = self.config.execution
+        # The session's shell counts as one execution for as long as it is open
+        ticket = await self.execution_scheduler.acquire(priority, tenant, queue_timeout)
+        try:
+            process = await asyncio.create_subprocess_shell(
+                self._build_shell_command(),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=SESSION_LINE_LIMIT,
+            )
+        except Exception as e:
+            self.execution_scheduler.release(ticket)
+            raise SandboxError(f"Failed to open shell session: {e}") from e
+
+        def on_close(session: ShellSession) -> None:
+            self._sessions.discard(session)
+            self.execution_scheduler.release(ticket)
+
+        session = ShellSession(
+            self,
+            process,
+            max_output_bytes=(
+                limits.max_output_bytes if max_output_bytes is None else max_output_bytes
+            ),
+            truncation=truncation or limits.truncation,
+            on_close=on_close,
+        )
+        self._sessions.add(session)
+        self.touch()
+        return session
+
+    async def put_files(
+        self,
+        source: Union[str, Path],
+        guest_dest: Optional[str] = None,
+        compress: bool = False,
+        workers: Optional[int] = None,
+        validate: bool = False,
+    ) -> TransferReport:
+        """Copy a host file or directory into the sandbox.
+
+        Files go through the staging folder (``config.transfer``), which the
+        guest sees under ``guest_dir/inbox``; with ``guest_dest`` they are
+        then copied there inside the guest. Files already staged with the same
+        content are skipped and interrupted copies resume. ``compress`` sends
+        a directory's changes as one zip archive, which the guest extracts.
+        With ``validate``, every file is first checked against the security
+        policy and nothing is copied if any fails.
+        """
+        staging = self._require_transfers()
+        source = Path(source)
+        if validate:
+            ingest = FileIngestValidator(self.security_policy)
+            await asyncio.to_thread(ingest.raise_for_violations, source)
+        transfer = self._file_transfer(workers)
+        guest_inbox = PureWindowsPath(str(self.config.transfer.guest_dir)) / "inbox"
+        started = asyncio.get_event_loop().time()
+
+        if compress:
+            if not source.is_dir():
+                raise SandboxError("Compressed transfers need a directory source")
+            dest = guest_dest or str(guest_inbox / source.name)
+            # What earlier archives delivered to this destination stays on the host
+            key = f"{source.resolve()}\0{dest}".encode("utf-8")
+            packed = f"{source.name}-{hashlib.sha256(key).hexdigest()[:12]}"
+            manifest_dir = staging / "packed" / packed
+            archive = f"{packed}.zip"
+            report = await asyncio.to_thread(
+                transfer.pack, source, staging / "inbox" / archive, manifest_dir
+            )
+            await self._run_transfer_command(
+                f'(if not exist "{dest}" mkdir "{dest}") && '
+                f'tar -xf "{guest_inbox / archive}" -C "{dest}"'
+            )
+            await asyncio.to_thread(transfer.commit_pack, manifest_dir)
+        elif source.is_dir():
+            report = await asyncio.to_thread(
+                transfer.copy_tree, source, staging / "inbox" / source.name, "put"
+            )
+            if guest_dest:
+                staged = str(guest_inbox / source.name)
+                await self._run_robocopy(staged, guest_dest, transfer.workers)
+        else:
+            report = await asyncio.to_thread(
+                transfer.copy_tree, source, staging / "inbox", "put"
+            )
+            if guest_dest:
+                await self._run_robocopy(
+                    str(guest_inbox), guest_dest, transfer.workers, source.name
+                )
+
+        report.direction = "put"
+        report.elapsed = asyncio.get_event_loop().time() - started
+        return report
+
+    async def get_files(
+        self,
+        guest_source: str,
+        dest: Union[str, Path],
+        compress: bool = False,
+        workers: Optional[int] = None,
+    ) -> TransferReport:
+        """Copy files out of the sandbox into a host directory.
+
+        A relative ``guest_source`` names a file or directory the guest wrote
+        to ``guest_dir/outbox``. An absolute one must be a guest directory;
+        it is first copied (or, with ``compress``, archived) into the outbox
+        inside the guest. Files already at ``dest`` with the same content are
+        skipped and interrupted copies resume.
+        """
+        staging = self._require_transfers()
+        dest = Path(dest)
+        transfer = self._file_transfer(workers)
+        guest_outbox = PureWindowsPath(str(self.config.transfer.guest_dir)) / "outbox"
+        source_path = PureWindowsPath(guest_source)
+        started = asyncio.get_event_loop().time()
+
+        if not source_path.is_absolute():
+            report = await asyncio.to_thread(
+                transfer.copy_tree, staging / "outbox" / source_path.as_posix(), dest, "get"
+            )
+        elif compress:
+            archive = f"{source_path.name}.zip"
+            await self._run_transfer_command(
+                f'(if not exist "{guest_outbox}" mkdir "{guest_outbox}") && '
+                f'tar -a -cf "{guest_outbox / archive}" -C "{source_path}" .'
+            )
+            report = await asyncio.to_thread(
+                transfer.unpack, staging / "outbox" / archive, dest
+            )
+        else:
+            staged = str(guest_outbox / source_path.name)
+            await self._run_robocopy(str(source_path), staged, transfer.workers)
+            report = await asyncio.to_thread(
+                transfer.copy_tree, staging / "outbox" / source_path.name, dest, "get"
+            )
+
+        report.direction = "get"
+        report.elapsed = asyncio.get_event_loop().time() - started
+        return report
+
+    async def sync_folders(self, full: bool = False) -> Dict[str, SyncReport]:
+        """Mirror each mapped folder's ``sync_from`` workspace into its host folder.
+
+        Only changed files are copied and files removed from the workspace
+        are deleted; see WorkspaceSync. Returns a report per host folder.
+        """
+        reports: Dict[str, SyncReport] = {}
+        for mapping in self.mapped_folders:
+            if mapping.sync_from is None:
+                continue
+            sync = WorkspaceSync.for_mapping(mapping)
+            reports[str(mapping.host)] = await asyncio.to_thread(sync.sync, full)
+        return reports
+
+    @property
+    def transfer_dir(self) -> Path:
+        """Host side of the staging folder used for file transfers."""
+        if self.config.transfer.host_dir:
+            return Path(self.config.transfer.host_dir)
+        return WindowsUtils.get_cache_dir("transfers") / self.id
+
+    @property
+    def _execution_dir(self) -> Path:
+        """Host folder for this sandbox's execution slots and usage reports."""
+        return WindowsUtils.get_cache_dir("executions") / self.id
+
+    def _require_transfers(self) -> Path:
+        """Staging directory, if transfers can run now."""
+        if not self.config.transfer.enabled:
+            raise SandboxError("File transfer is not enabled in the sandbox configuration")
+        if self.state != SandboxState.RUNNING:
+            raise SandboxError(f"Cannot transfer files, sandbox state: {self.state}")
+        return self.transfer_dir
+
+    def _file_transfer(self, workers: Optional[int]) -> FileTransfer:
+        """Copy engine configured from ``config.transfer``."""
+        return FileTransfer(
+            chunk_size=self.config.transfer.chunk_size,
+            workers=workers or self.config.transfer.workers,
+        )
+
+    async def _run_robocopy(
+        self, source: str, dest: str, workers: int, file_name: Optional[str] = None
+    ) -> None:
+        """Copy a directory (or one file in it) inside the guest, skipping unchanged files."""
+        files = f' "{file_name}"' if file_name else " /E"
+        await self._run_transfer_command(
+            f'robocopy "{source}" "{dest}"{files} /MT:{workers} /NFL /NDL /NJH /NJS /NP',
+            # Robocopy exit codes below 8 mean success
+            max_success_code=7,
+        )
+
+    async def _run_transfer_command(self, command: str, max_success_code: int = 0) -> None:
+        """Run the guest half of a transfer, failing on a bad exit code."""
+        result = await self.execute(command, timeout=self.config.transfer.timeout)
+        if not 0 <= result.returncode <= max_success_code:
+            raise SandboxError(
+                f"Transfer command failed with exit code {result.returncode}: "
+                f"{result.stderr or result.stdout}"
+            )
+
+    @property
+    def resource_monitor(self) -> Optional[ResourceMonitor]:
+        """Resource monitor, once monitoring has started."""
+        return self._resource_monitor
 
     async def get_resource_stats(self) -> ResourceStats:
         """Get current resource usage statistics."""
@@ -172,28 +777,111 @@ class Sandbox:
         """Wait for sandbox to shutdown."""
         await self._shutdown_event.wait()
 
+    @property
+    def state(self) -> SandboxState:
+        """Current lifecycle state."""
+        return self._state
+
+    @state.setter
+    def state(self, new_state: SandboxState) -> None:
+        """Transition to a new state and notify listeners."""
+        old_state = self._state
+        if old_state == new_state:
+            return
+
+        self._state = new_state
+        for listener in list(self._state_listeners):
+            try:
+                listener(self, old_state, new_state)
+            except Exception as e:
+                logging.error(f"State listener failed for sandbox {self.id}: {e}")
+
+        self._publish(
+            StateChangedEvent(sandbox_id=self.id, old_state=old_state, new_state=new_state)
+        )
+
+    def add_state_listener(self, listener: StateListener) -> None:
+        """Register a callback invoked as ``listener(sandbox, old_state, new_state)``."""
+        self._state_listeners.append(listener)
+
+    def remove_state_listener(self, listener: StateListener) -> None:
+        """Unregister a state callback."""
+        if listener in self._state_listeners:
+            self._state_listeners.remove(listener)
+
     @property
     def is_running(self) -> bool:
         """Check if sandbox is running."""
         return self.state == SandboxState.RUNNING
 
+    @property
+    def idle_seconds(self) -> float:
+        """Seconds since the last execution or CPU activity; 0 while executing."""
+        if self._active_executions or any(session.busy for session in self._sessions):
+            return 0.0
+        return (datetime.utcnow() - self.last_activity).total_seconds()
+
+    def touch(self) -> None:
+        """Record activity, resetting the idle timer."""
+        self.last_activity = datetime.utcnow()
+
+    @property
+    def config_fingerprint(self) -> str:
+        """Hash identifying sandboxes built from an equivalent config."""
+        if self._config_fingerprint is None:
+            self._config_fingerprint = ResultCache.fingerprint(self.config)
+        return self._config_fingerprint
+
+    def invalidate_cache(self) -> int:
+        """Drop cached results for this sandbox's config, e.g. after a mutating command.
+
+        Returns the number of entries removed.
+        """
+        return self.result_cache.invalidate(fingerprint=self.config_fingerprint)
+
+    @property
+    def process_alive(self) -> bool:
+        """Check if the sandbox process has been started and not exited."""
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def mapped_folders(self) -> List[FolderMapping]:
+        """Configured folder mappings plus any added by caches or transfers."""
+        return [*self.config.folders, *self._extra_folders]
+
     @property
     def uptime(self) -> float:
         """Get sandbox uptime in seconds."""
         return (datetime.utcnow() - self.created_at).total_seconds()
 
-    async def _generate_wsb_file(self) -> Path:
-        """Generate Windows Sandbox configuration file."""
-        wsb_content = self._build_wsb_xml()
+    def _publish_decision(self, decision: PolicyDecision) -> None:
+        """Publish a security policy decision."""
+        self._publish(
+            SecurityDecisionEvent(
+                sandbox_id=self.id,
+                kind=decision.kind,
+                target=decision.target,
+                allowed=decision.allowed,
+                rule=decision.rule,
+                reason=decision.reason,
+            )
+        )
 
-        # Create temporary WSB file
-        temp_dir = Path.cwd() / "temp"
-        temp_dir.mkdir(exist_ok=True)
+    def _publish(self, event: Any) -> None:
+        """Publish an event if the sandbox is attached to a bus."""
+        if self.event_bus:
+            self.event_bus.publish(event)
 
-        wsb_file = temp_dir / f"{self.config.name}_{self.id[:8]}.wsb"
-        wsb_file.write_text(wsb_content, encoding="utf-8")
+    def _on_monitor_sample(self, stats: ResourceStats) -> None:
+        """Forward resource monitor samples to the event bus."""
+        if stats.cpu_percent > self.config.lifecycle.idle_cpu_percent:
+            self.touch()
+        self._publish(MonitorSampleEvent(sandbox_id=self.id, stats=stats))
 
-        return wsb_file
+    async def _generate_wsb_file(self) -> Path:
+        """Get a Windows Sandbox configuration file, shared with identical configs."""
+        key = WsbFileCache.compute_key(self.config, self.mapped_folders)
+        return self.wsb_cache.acquire(key, self._build_wsb_xml)
 
     def _build_wsb_xml(self) -> str:
         """Build Windows Sandbox XML configuration."""
@@ -217,9 +905,10 @@ class Sandbox:
             gpu.text = "Enable"
 
         # Folder mappings
-        if self.config.folders:
+        folders = self.mapped_folders
+        if folders:
             mapped_folders = ET.SubElement(root, "MappedFolders")
-            for folder in self.config.folders:
+            for folder in folders:
                 mapped_folder = ET.SubElement(mapped_folders, "MappedFolder")
 
                 host_folder = ET.SubElement(mapped_folder, "HostFolder")
@@ -248,9 +937,6 @@ class Sandbox:
                 stderr=asyncio.subprocess.PIPE,
             )
 
-            # Give sandbox time to initialize
-            await asyncio.sleep(5)
-
         except FileNotFoundError:
             raise SandboxCreationError(
                 "Windows Sandbox not found. Ensure Windows Sandbox feature is enabled."
@@ -258,38 +944,141 @@ class Sandbox:
         except Exception as e:
             raise SandboxCreationError(f"Failed to start sandbox process: {e}") from e
 
-    async def _execute_startup_commands(self) -> None:
-        """Execute startup commands in the sandbox."""
-        for command in self.config.startup_commands:
+    async def _execute_startup_commands(self) -> bool:
+        """Execute startup commands in the sandbox. Returns True if all succeeded."""
+        commands = self.config.startup_commands
+        if self._provisioning_plan:
+            commands = self._provisioning_plan.commands
+
+        succeeded = True
+        for command in commands:
             try:
-                result = await self.execute(command, timeout=60)
+                result = await self.execute(
+                    command, timeout=60, priority=ExecutionPriority.HIGH
+                )
                 if not result.success:
+                    succeeded = False
                     logging.warning(f"Startup command failed: {command} - {result.stderr}")
             except Exception as e:
+                succeeded = False
                 logging.error(f"Error executing startup command '{command}': {e}")
+        return succeeded
+
+    def _plan_provisioning(self) -> None:
+        """Use the provisioning cache for startup commands when enabled."""
+        if not (
+            self.provisioning_cache
+            and self.config.provisioning.cache_enabled
+            and self.config.startup_commands
+        ):
+            return
+
+        self._provisioning_plan = self.provisioning_cache.plan(self.config)
+        self._extra_folders.append(self._provisioning_plan.folder)
+        logging.info(
+            f"Provisioning cache {'hit' if self._provisioning_plan.hit else 'miss'} "
+            f"for sandbox {self.id}: {self._provisioning_plan.key[:12]}"
+        )
+
+    def _plan_transfers(self) -> None:
+        """Map the staging folder used by put_files() and get_files()."""
+        if not self.config.transfer.enabled:
+            return
+
+        staging = self.transfer_dir
+        for box in ("inbox", "outbox"):
+            (staging / box).mkdir(parents=True, exist_ok=True)
+        self._extra_folders.append(
+            FolderMapping(host=staging, guest=self.config.transfer.guest_dir, readonly=False)
+        )
+
+    def _finish_provisioning(self, succeeded: bool) -> None:
+        """Cache a successful miss's artifacts.
+
+        The staging folder stays mapped until cleanup, so it is only removed
+        by _release_provisioning().
+        """
+        plan = self._provisioning_plan
+        if not succeeded or not plan or plan.hit or not self.provisioning_cache:
+            return
+
+        try:
+            self.provisioning_cache.commit(plan)
+        except Exception as e:
+            logging.warning(f"Failed to update provisioning cache for {plan.key[:12]}: {e}")
+
+    async def _release_provisioning(self) -> None:
+        """Unpin this sandbox's cache entry and remove its staging folder."""
+        plan = self._provisioning_plan
+        if not plan or not self.provisioning_cache:
+            return
+        self._provisioning_plan = None
+        self.provisioning_cache.release(plan)
+        await asyncio.to_thread(self.provisioning_cache.discard, plan)
 
     async def _wait_for_process(self) -> None:
         """Wait for sandbox process to terminate."""
         if self.process:
             await self.process.wait()
 
-    def _build_powershell_command(self, command: str) -> str:
-        """Build PowerShell command to execute in Windows Sandbox."""
-        # Escape the command for PowerShell
-        escaped_command = command.replace('"', '""').replace("'", "''")
-        
+    def _new_execution_scheduler(self) -> ExecutionScheduler:
+        """Execution limit for this sandbox, shared by every process using it."""
+        limits = self.config.execution
+        return ExecutionScheduler(
+            max_concurrent=limits.max_concurrent,
+            max_queue_size=limits.max_queue_size,
+            queue_timeout=limits.queue_timeout,
+            shared_slots=SharedSlots(self._execution_dir, limits.max_concurrent),
+        )
+
+    def _build_powershell_command(self, command: str, usage_path: Path) -> str:
+        """Build PowerShell command to execute in Windows Sandbox.
+
+        The command runs in a job object in the guest, whose accounting covers
+        every process it starts. The counters come back with the output and
+        are written to ``usage_path`` on the host.
+        """
+        # Single-quoted PowerShell literals only need quotes doubled
+        def literal(text: str) -> str:
+            return "'" + text.replace("'", "''") + "'"
+
         # Use PowerShell Direct to execute command in sandbox VM
         # This requires the sandbox to be running and accessible
         ps_script = f'''
         $VMName = "WindowsSandbox_{self.id[:8]}"
         $Session = New-PSSession -VMName $VMName -Credential (Get-Credential -Message "Sandbox Access")
         try {{
-            $Result = Invoke-Command -Session $Session -ScriptBlock {{
-                cmd.exe /c "{escaped_command}" 2>&1
+            $Run = Invoke-Command -Session $Session -ScriptBlock {{
+                param($CommandLine, $JobSource)
+                # Compiled once per sandbox, then loaded from the guest's temp folder
+                if (-not ('WsbJobAccounting' -as [type])) {{
+                    $Dll = Join-Path $env:TEMP 'wsb-job-accounting-1.dll'
+                    try {{ Add-Type -Path $Dll }} catch {{
+                        try {{ Add-Type -TypeDefinition $JobSource -OutputAssembly $Dll; Add-Type -Path $Dll }}
+                        catch {{ Add-Type -TypeDefinition $JobSource }}
+                    }}
+                }}
+                $Job = New-Object WsbJobAccounting
+                $Info = New-Object System.Diagnostics.ProcessStartInfo 'cmd.exe', "/c $CommandLine"
+                $Info.UseShellExecute = $false
+                $Info.RedirectStandardOutput = $true
+                $Info.RedirectStandardError = $true
+                $Process = [System.Diagnostics.Process]::Start($Info)
+                $Measured = $Job.Add($Process)
+                $Out = $Process.StandardOutput.ReadToEndAsync()
+                $Err = $Process.StandardError.ReadToEndAsync()
+                $Process.WaitForExit()
+                [pscustomobject]@{{
+                    Output = $Out.Result + $Err.Result
+                    ExitCode = $Process.ExitCode
+                    Usage = if ($Measured) {{ $Job.Usage() }} else {{ $null }}
+                }}
+            }} -ArgumentList {literal(command)}, {literal(GUEST_JOB_SOURCE)}
+            Write-Output "STDOUT:$($Run.Output)"
+            Write-Output "EXITCODE:$($Run.ExitCode)"
+            if ($Run.Usage) {{
+                $Run.Usage | ConvertTo-Json -Compress | Set-Content -LiteralPath {literal(str(usage_path))} -Encoding UTF8
             }}
-            $ExitCode = Invoke-Command -Session $Session -ScriptBlock {{ $LASTEXITCODE }}
-            Write-Output "STDOUT:$Result"
-            Write-Output "EXITCODE:$ExitCode"
         }} finally {{
             Remove-PSSession -Session $Session -ErrorAction SilentlyContinue
         }}
@@ -298,13 +1087,39 @@ class Sandbox:
         escaped_script = ps_script.replace('"', '""')
         return f'powershell.exe -NoProfile -ExecutionPolicy Bypass -Command "{escaped_script}"'
     
+    def _build_shell_command(self) -> str:
+        """Build PowerShell command relaying stdin lines to one sandbox runspace."""
+        # Each line runs in the session's global scope, so state carries over
+        ps_script = f'''
+        $VMName = "WindowsSandbox_{self.id[:8]}"
+        $Session = New-PSSession -VMName $VMName -Credential (Get-Credential -Message "Sandbox Access")
+        try {{
+            while ($null -ne ($Line = [Console]::In.ReadLine())) {{
+                Invoke-Command -Session $Session -ScriptBlock {{
+                    param($Line)
+                    Invoke-Expression $Line 2>&1 | Out-String -Stream
+                }} -ArgumentList $Line
+                [Console]::Out.Flush()
+            }}
+        }} finally {{
+            Remove-PSSession -Session $Session -ErrorAction SilentlyContinue
+        }}
+        '''
+
+        escaped_script = ps_script.replace('"', '""')
+        return f'powershell.exe -NoProfile -ExecutionPolicy Bypass -Command "{escaped_script}"'
+
     async def _cleanup(self) -> None:
         """Clean up temporary files and resources."""
-        if self.wsb_file_path and self.wsb_file_path.exists():
-            try:
-                self.wsb_file_path.unlink()
-            except Exception as e:
-                logging.warning(f"Failed to cleanup WSB file {self.wsb_file_path}: {e}")
+        await self._release_provisioning()
+
+        if self.wsb_file_path:
+            self.wsb_cache.release(self.wsb_file_path)
+            self.wsb_file_path = None
+
+        # Staging folders in the cache live only as long as their sandbox
+        if self.config.transfer.enabled and not self.config.transfer.host_dir:
+            await asyncio.to_thread(shutil.rmtree, self.transfer_dir, True)
     
     async def _validate_system_requirements(self) -> None:
         """Validate system meets requirements for Windows Sandbox."""
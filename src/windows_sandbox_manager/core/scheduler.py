@@ -0,0 +1,264 @@
+"""
+Resource-aware admission control for sandbox creation.
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ..exceptions import ResourceError
+from ..utils.system_check import SystemChecker
+
+
+@dataclass
+class Reservation:
+    """Memory and vCPU budget held by a sandbox while it is alive."""
+
+    id: int
+    memory_mb: int
+    cpu_cores: int
+    priority: int
+    wait_time: float
+    granted_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Waiter:
+    """Queued admission request."""
+
+    seq: int
+    memory_mb: int
+    cpu_cores: int
+    priority: int
+    enqueued_at: float
+    future: "asyncio.Future[Reservation]"
+
+
+class ResourceScheduler:
+    """
+    Reserves memory and vCPU budgets against host capacity.
+
+    Requests that fit are granted immediately. Requests that do not fit wait in
+    a priority queue; waiting requests age so that low-priority work is not
+    starved. Requests that can never fit, or arrive while the queue is full,
+    are rejected immediately.
+
+    A capacity of None leaves that resource unlimited, so a scheduler built
+    without capacities only keeps accounts; this is what SandboxManager uses
+    unless given one. for_host() sizes both capacities to the machine.
+    """
+
+    def __init__(
+        self,
+        memory_capacity_mb: Optional[int] = None,
+        cpu_capacity: Optional[int] = None,
+        max_queue_size: int = 100,
+        aging_interval: float = 30.0,
+    ):
+        self.memory_capacity_mb = memory_capacity_mb
+        self.cpu_capacity = cpu_capacity
+        self.max_queue_size = max_queue_size
+        self.aging_interval = aging_interval
+
+        self._memory_reserved = 0
+        self._cpu_reserved = 0
+        self._waiters: List[_Waiter] = []
+        self._active: Dict[int, Reservation] = {}
+        self._seq = itertools.count()
+
+        self._granted_count = 0
+        self._rejected_count = 0
+        self._timeout_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @classmethod
+    def for_host(
+        cls,
+        reserved_memory_mb: int = 2048,
+        cpu_overcommit: float = 1.0,
+        **kwargs: Any,
+    ) -> "ResourceScheduler":
+        """Scheduler limited to this host's memory, less a headroom, and its cores.
+
+        A resource whose size cannot be detected is left unlimited rather
+        than rejecting every request.
+        """
+        host_memory_mb = int(SystemChecker.get_system_memory_gb() * 1024)
+        host_cores = SystemChecker.get_cpu_cores()
+        return cls(
+            memory_capacity_mb=(
+                max(host_memory_mb - reserved_memory_mb, 0) if host_memory_mb > 0 else None
+            ),
+            cpu_capacity=int(host_cores * cpu_overcommit) if host_cores > 0 else None,
+            **kwargs,
+        )
+
+    async def acquire(
+        self,
+        memory_mb: int,
+        cpu_cores: int,
+        priority: int = 0,
+        timeout: Optional[float] = None,
+    ) -> Reservation:
+        """Reserve a budget, waiting in the queue if the host is currently full."""
+        if not self._within(memory_mb, cpu_cores, 0, 0):
+            self._rejected_count += 1
+            raise ResourceError(
+                f"Request for {memory_mb}MB / {cpu_cores} vCPU exceeds host capacity "
+                f"({self._describe(self.memory_capacity_mb)}MB / "
+                f"{self._describe(self.cpu_capacity)} vCPU)"
+            )
+
+        seq = next(self._seq)
+        now = time.monotonic()
+
+        # Grant immediately only when nobody is queued ahead of us
+        if not self._waiters and self._fits(memory_mb, cpu_cores):
+            return self._grant(seq, memory_mb, cpu_cores, priority, 0.0)
+
+        if len(self._waiters) >= self.max_queue_size:
+            self._rejected_count += 1
+            raise ResourceError(f"Admission queue full ({self.max_queue_size} waiting)")
+
+        waiter = _Waiter(
+            seq=seq,
+            memory_mb=memory_mb,
+            cpu_cores=cpu_cores,
+            priority=priority,
+            enqueued_at=now,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._timeout_count += 1
+            self._abandon(waiter)
+            raise ResourceError(
+                f"Timed out after {timeout}s waiting for {memory_mb}MB / {cpu_cores} vCPU"
+            )
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def reserve_existing(self, memory_mb: int, cpu_cores: int) -> Reservation:
+        """Account for a sandbox that is already running, even beyond capacity.
+
+        Used when re-adopting sandboxes after a restart; the budget is already
+        in use on the host, so the request is granted without queueing.
+        """
+        return self._grant(next(self._seq), memory_mb, cpu_cores, 0, 0.0)
+
+    def release(self, reservation: Reservation) -> None:
+        """Return a reservation's budget and admit queued requests that now fit."""
+        if self._active.pop(reservation.id, None) is None:
+            return
+
+        self._memory_reserved -= reservation.memory_mb
+        self._cpu_reserved -= reservation.cpu_cores
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler capacity, queue and wait-time statistics."""
+        now = time.monotonic()
+        oldest_wait = max((now - w.enqueued_at for w in self._waiters), default=0.0)
+        avg_wait = self._total_wait_time / self._granted_count if self._granted_count else 0.0
+
+        return {
+            "memory_capacity_mb": self.memory_capacity_mb,
+            "cpu_capacity": self.cpu_capacity,
+            "memory_reserved_mb": self._memory_reserved,
+            "cpu_reserved": self._cpu_reserved,
+            "active_reservations": len(self._active),
+            "queue_depth": len(self._waiters),
+            "oldest_wait_seconds": oldest_wait,
+            "granted": self._granted_count,
+            "rejected": self._rejected_count,
+            "timed_out": self._timeout_count,
+            "average_wait_seconds": avg_wait,
+            "max_wait_seconds": self._max_wait_time,
+        }
+
+    def _fits(self, memory_mb: int, cpu_cores: int) -> bool:
+        """Check whether a request fits in the remaining budget."""
+        return self._within(memory_mb, cpu_cores, self._memory_reserved, self._cpu_reserved)
+
+    def _within(
+        self, memory_mb: int, cpu_cores: int, memory_reserved: int, cpu_reserved: int
+    ) -> bool:
+        """Check a request against capacity on top of already reserved amounts."""
+        return (
+            self.memory_capacity_mb is None
+            or memory_reserved + memory_mb <= self.memory_capacity_mb
+        ) and (self.cpu_capacity is None or cpu_reserved + cpu_cores <= self.cpu_capacity)
+
+    @staticmethod
+    def _describe(capacity: Optional[int]) -> str:
+        """Capacity for messages."""
+        return "unlimited" if capacity is None else str(capacity)
+
+    def _grant(
+        self, seq: int, memory_mb: int, cpu_cores: int, priority: int, wait_time: float
+    ) -> Reservation:
+        """Record a granted reservation."""
+        self._memory_reserved += memory_mb
+        self._cpu_reserved += cpu_cores
+
+        reservation = Reservation(
+            id=seq,
+            memory_mb=memory_mb,
+            cpu_cores=cpu_cores,
+            priority=priority,
+            wait_time=wait_time,
+        )
+        self._active[seq] = reservation
+
+        self._granted_count += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+        return reservation
+
+    def _effective_priority(self, waiter: _Waiter, now: float) -> float:
+        """Priority boosted by time spent waiting."""
+        if self.aging_interval <= 0:
+            return float(waiter.priority)
+        return waiter.priority + (now - waiter.enqueued_at) / self.aging_interval
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order until the head of the queue does not fit."""
+        if not self._waiters:
+            return
+
+        now = time.monotonic()
+        self._waiters.sort(key=lambda w: (-self._effective_priority(w, now), w.seq))
+
+        while self._waiters:
+            head = self._waiters[0]
+            if head.future.done():
+                self._waiters.pop(0)
+                continue
+            # Stop at the head instead of backfilling so large requests are not starved
+            if not self._fits(head.memory_mb, head.cpu_cores):
+                break
+
+            self._waiters.pop(0)
+            reservation = self._grant(
+                head.seq, head.memory_mb, head.cpu_cores, head.priority, now - head.enqueued_at
+            )
+            head.future.set_result(reservation)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Remove a waiter that gave up, returning its budget if it was granted meanwhile."""
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+        if waiter.future.done() and not waiter.future.cancelled():
+            self.release(waiter.future.result())
+        else:
+            waiter.future.cancel()
+            self._dispatch()
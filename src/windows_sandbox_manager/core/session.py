@@ -0,0 +1,278 @@
+"""
+Persistent shell sessions inside a sandbox.
+"""
+
+import asyncio
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Deque, Optional, Union
+
+from .events import ExecutionFinishedEvent, ExecutionStartedEvent
+from .output import OutputBuffer, TruncationPolicy
+from ..exceptions import SandboxError
+from ..monitoring.accounting import ExecutionUsage
+from ..utils.windows import WindowsUtils
+
+if TYPE_CHECKING:
+    from .sandbox import Sandbox
+
+# Longest output line read in one piece; longer lines are split
+SESSION_LINE_LIMIT = 1024 * 1024
+
+
+@dataclass
+class SessionResult:
+    """Outcome of one command run in a shell session."""
+
+    command: str
+    # Standard output and error, interleaved as the shell wrote them
+    output: str
+    returncode: int
+    execution_time: float
+    truncated_bytes: int = 0
+
+    @property
+    def success(self) -> bool:
+        """Whether the command exited with code 0."""
+        return self.returncode == 0
+
+
+@dataclass
+class _PendingCommand:
+    """A command sent to the shell whose end marker has not been read yet."""
+
+    command: str
+    marker: str
+    started: float
+    output: OutputBuffer = field(default_factory=OutputBuffer)
+
+
+class ShellSession:
+    """
+    A long-lived PowerShell runspace in the guest, fed commands over stdin.
+
+    Every ``Sandbox.execute()`` opens a fresh connection and shell, so the
+    working directory, environment and variables are lost between calls. A
+    session keeps one shell for its whole life: ``cd``, ``$env:`` changes
+    and variables carry over from one command to the next, and commands
+    skip the connection cost.
+
+    Each command is written as one line followed by a unique end marker,
+    which the shell prints with the exit code once the command completes.
+    Output, with standard error merged in, is read up to that marker.
+    ``send()`` may queue several commands; ``read()`` and ``iter_lines()``
+    consume their results in order.
+    """
+
+    def __init__(
+        self,
+        sandbox: "Sandbox",
+        process: asyncio.subprocess.Process,
+        max_output_bytes: Optional[int] = None,
+        truncation: Union[TruncationPolicy, str] = TruncationPolicy.HEAD_TAIL,
+        on_close: Optional[Callable[["ShellSession"], None]] = None,
+    ):
+        self.sandbox = sandbox
+        self.process = process
+        self.max_output_bytes = max_output_bytes
+        self.truncation = TruncationPolicy(truncation)
+        self.on_close = on_close
+        self.id = uuid.uuid4().hex[:12]
+        # Result of the command most recently read to its end
+        self.last_result: Optional[SessionResult] = None
+        self._pending: Deque[_PendingCommand] = deque()
+        self._sequence = 0
+        self._read_lock = asyncio.Lock()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """Whether the session was closed or its shell exited."""
+        return self._closed or self.process.returncode is not None
+
+    @property
+    def busy(self) -> bool:
+        """Whether commands are running or waiting to be read."""
+        return bool(self._pending)
+
+    @property
+    def pending(self) -> int:
+        """Number of commands sent but not yet read."""
+        return len(self._pending)
+
+    async def send(self, command: str) -> None:
+        """Queue a single-line command without waiting for it to finish."""
+        if self.closed:
+            raise SandboxError("Shell session is closed")
+        if "\n" in command or "\r" in command:
+            raise SandboxError("Session commands must be a single line")
+
+        self._sequence += 1
+        marker = f"__WSB_{self.id}_{self._sequence}__"
+        self._pending.append(
+            _PendingCommand(
+                command,
+                marker,
+                asyncio.get_running_loop().time(),
+                OutputBuffer(self.max_output_bytes, self.truncation),
+            )
+        )
+        self.process.stdin.write(self._frame(command, marker).encode("utf-8"))
+        try:
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            self._fail_pending("shell session ended")
+            raise SandboxError(f"Shell session ended: {e}") from e
+
+        self.sandbox.touch()
+        self._publish(ExecutionStartedEvent(sandbox_id=self.sandbox.id, command=command))
+
+    async def read(self, timeout: Optional[float] = None) -> SessionResult:
+        """Wait for the oldest queued command to finish and return its result.
+
+        On timeout the command keeps running and stays queued; output read
+        so far is kept, so a later call picks up where this one stopped.
+        """
+        async for _ in self.iter_lines(timeout):
+            pass
+        assert self.last_result is not None
+        return self.last_result
+
+    async def iter_lines(self, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield output lines of the oldest queued command as they arrive.
+
+        When the command finishes its result is stored in ``last_result``.
+        """
+        async with self._read_lock:
+            if not self._pending:
+                raise SandboxError("No command is waiting for output")
+            pending = self._pending[0]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout if timeout is not None else None
+            marker = pending.marker.encode("utf-8")
+
+            while True:
+                line = await self._readline(pending, deadline)
+                index = line.find(marker)
+                if index < 0:
+                    pending.output.feed(line)
+                    yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+                    continue
+
+                # Output without a trailing newline shares the marker's line
+                if index:
+                    pending.output.feed(line[:index])
+                    yield line[:index].decode("utf-8", errors="replace")
+                code = line[index + len(marker) :].strip()
+                self._finish(pending, int(code) if code.lstrip(b"-").isdigit() else 1)
+                return
+
+    async def run(self, command: str, timeout: Optional[float] = None) -> SessionResult:
+        """Send a command and wait for its result."""
+        await self.send(command)
+        return await self.read(timeout)
+
+    async def stream(self, command: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Send a command and yield its output lines as they arrive."""
+        await self.send(command)
+        async for line in self.iter_lines(timeout):
+            yield line
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """End the shell, killing it if it does not exit within ``timeout``."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self.process.returncode is None:
+                self.process.stdin.close()
+                try:
+                    await asyncio.wait_for(self.process.wait(), timeout)
+                except asyncio.TimeoutError:
+                    WindowsUtils.kill_process_tree(self.process.pid)
+                    await self.process.wait()
+        finally:
+            self._fail_pending("shell session closed")
+            if self.on_close:
+                self.on_close(self)
+
+    def _frame(self, command: str, marker: str) -> str:
+        """Command line for the guest shell, ending with the marker and exit code.
+
+        The code is the native exit code, else 1 if the command raised or
+        wrote any error record (as cmdlets do instead of exiting), else 0.
+        """
+        return (
+            f"$global:LASTEXITCODE = 0; $Error.Clear(); try {{ {command} }} catch {{ $_ }}; "
+            "$__wsb_code = if ($global:LASTEXITCODE) { $global:LASTEXITCODE } "
+            "elseif ($Error.Count) { 1 } else { 0 }; "
+            f'Write-Output "{marker}$__wsb_code"\n'
+        )
+
+    async def _readline(self, pending: _PendingCommand, deadline: Optional[float]) -> bytes:
+        """Next line of shell output, failing on timeout or shell exit."""
+        remaining = None
+        if deadline is not None:
+            remaining = max(0.0, deadline - asyncio.get_running_loop().time())
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readuntil(b"\n"), remaining)
+        except asyncio.TimeoutError:
+            raise SandboxError(f"Session command timed out: {pending.command}")
+        except asyncio.LimitOverrunError as e:
+            # Line longer than the stream limit; hand it over in pieces
+            line = await self.process.stdout.read(e.consumed)
+        except asyncio.IncompleteReadError as e:
+            line = e.partial
+        if not line:
+            await self.close()
+            raise SandboxError("Shell session ended unexpectedly")
+        return line
+
+    def _finish(self, pending: _PendingCommand, returncode: int) -> None:
+        """Record a completed command."""
+        self._pending.popleft()
+        elapsed = asyncio.get_running_loop().time() - pending.started
+        self.last_result = SessionResult(
+            command=pending.command,
+            output=pending.output.getvalue().decode("utf-8", errors="replace"),
+            returncode=returncode,
+            execution_time=elapsed,
+            truncated_bytes=pending.output.truncated_bytes,
+        )
+        self.sandbox.touch()
+        self._publish(
+            ExecutionFinishedEvent(
+                sandbox_id=self.sandbox.id,
+                command=pending.command,
+                returncode=returncode,
+                execution_time=elapsed,
+                usage=ExecutionUsage(stdout_bytes=pending.output.total_bytes),
+            )
+        )
+
+    def _fail_pending(self, error: str) -> None:
+        """Report commands that will never finish."""
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            pending = self._pending.popleft()
+            self._publish(
+                ExecutionFinishedEvent(
+                    sandbox_id=self.sandbox.id,
+                    command=pending.command,
+                    returncode=None,
+                    execution_time=loop.time() - pending.started,
+                    error=error,
+                )
+            )
+
+    def _publish(self, event: object) -> None:
+        """Publish an event if the sandbox is attached to a bus."""
+        if self.sandbox.event_bus:
+            self.sandbox.event_bus.publish(event)
+
+    async def __aenter__(self) -> "ShellSession":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
@@ -0,0 +1,195 @@
+"""
+Fleet-wide shutdown with a global deadline and staged escalation.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .sandbox import Sandbox, SandboxState, ShutdownStage
+from ..exceptions import SandboxError
+
+
+@dataclass
+class SandboxShutdown:
+    """How one sandbox was shut down."""
+
+    sandbox_id: str
+    name: str
+    # Seconds spent in each stage that ran, in order
+    stages: Dict[str, float] = field(default_factory=dict)
+    # Stage after which the process was gone; None if there was nothing to stop
+    final_stage: Optional[ShutdownStage] = None
+    error: Optional[str] = None
+
+    @property
+    def forced(self) -> bool:
+        """Whether the sandbox had to be killed."""
+        return self.final_stage == ShutdownStage.KILL
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            "sandbox_id": self.sandbox_id,
+            "name": self.name,
+            "stages": dict(self.stages),
+            "final_stage": self.final_stage.value if self.final_stage else None,
+            "forced": self.forced,
+            "error": self.error,
+        }
+
+
+@dataclass
+class ShutdownReport:
+    """Outcome of a coordinated shutdown."""
+
+    sandboxes: List[SandboxShutdown] = field(default_factory=list)
+    elapsed: float = 0.0
+    deadline: Optional[float] = None
+
+    @property
+    def force_killed(self) -> List[SandboxShutdown]:
+        """Sandboxes that needed a kill."""
+        return [record for record in self.sandboxes if record.forced]
+
+    @property
+    def failed(self) -> List[SandboxShutdown]:
+        """Sandboxes whose shutdown raised an error."""
+        return [record for record in self.sandboxes if record.error]
+
+    @property
+    def deadline_exceeded(self) -> bool:
+        """Whether the shutdown ran past its deadline."""
+        return self.deadline is not None and self.elapsed > self.deadline
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Seconds spent in each stage, summed across sandboxes."""
+        totals: Dict[str, float] = {stage.value: 0.0 for stage in ShutdownStage}
+        for record in self.sandboxes:
+            for stage, seconds in record.stages.items():
+                totals[stage] += seconds
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            "elapsed": self.elapsed,
+            "deadline": self.deadline,
+            "deadline_exceeded": self.deadline_exceeded,
+            "force_killed": [record.sandbox_id for record in self.force_killed],
+            "stage_totals": self.stage_totals(),
+            "sandboxes": [record.to_dict() for record in self.sandboxes],
+        }
+
+
+class ShutdownCoordinator:
+    """
+    Shuts down many sandboxes with bounded concurrency and a global deadline.
+
+    Each sandbox is asked to stop gracefully, then terminated, then killed,
+    moving on when a stage's timeout expires. Stage timeouts are cut short so
+    that every sandbox still has ``kill_timeout`` left for the kill before the
+    deadline; sandboxes that only get a slot near the deadline go straight to
+    the kill. If the coordinator is cancelled, unfinished sandboxes are killed
+    before the cancellation propagates.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 10,
+        deadline: Optional[float] = None,
+        graceful_timeout: float = 0.0,
+        terminate_timeout: float = 30.0,
+        kill_timeout: float = 10.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.deadline = deadline
+        self.graceful_timeout = graceful_timeout
+        self.terminate_timeout = terminate_timeout
+        self.kill_timeout = kill_timeout
+
+    async def shutdown(
+        self,
+        sandboxes: Iterable[Sandbox],
+        on_finished: Optional[Callable[[Sandbox], Awaitable[None]]] = None,
+    ) -> ShutdownReport:
+        """Shut down every sandbox, calling ``on_finished`` for each one afterwards."""
+        sandboxes = list(sandboxes)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline_at = started + self.deadline if self.deadline is not None else None
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def run(sandbox: Sandbox) -> SandboxShutdown:
+            async with semaphore:
+                try:
+                    return await self._shutdown_one(sandbox, deadline_at)
+                finally:
+                    if on_finished:
+                        await on_finished(sandbox)
+
+        tasks = [asyncio.create_task(run(sandbox)) for sandbox in sandboxes]
+        try:
+            records = await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for sandbox in sandboxes:
+                sandbox.kill_process()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return ShutdownReport(
+            sandboxes=list(records), elapsed=loop.time() - started, deadline=self.deadline
+        )
+
+    async def _shutdown_one(
+        self, sandbox: Sandbox, deadline_at: Optional[float]
+    ) -> SandboxShutdown:
+        """Escalate through the stages for one sandbox."""
+        loop = asyncio.get_running_loop()
+        record = SandboxShutdown(sandbox_id=sandbox.id, name=sandbox.config.name)
+
+        try:
+            if not await sandbox.begin_shutdown():
+                return record
+
+            stages = (
+                (ShutdownStage.GRACEFUL, self.graceful_timeout),
+                (ShutdownStage.TERMINATE, self.terminate_timeout),
+                (ShutdownStage.KILL, self.kill_timeout),
+            )
+            for stage, budget in stages:
+                # A sandbox whose process already exited has nothing to escalate
+                if not sandbox.process_alive:
+                    break
+                if stage != ShutdownStage.KILL and deadline_at is not None:
+                    # Keep enough time for the kill stage before the deadline
+                    budget = min(budget, deadline_at - loop.time() - self.kill_timeout)
+                if budget <= 0:
+                    continue
+
+                stage_started = loop.time()
+                exited = await sandbox.stop_process(stage, budget)
+                record.stages[stage.value] = loop.time() - stage_started
+                if exited:
+                    record.final_stage = stage
+                    break
+
+            if sandbox.process_alive:
+                raise SandboxError(
+                    f"Process still running after kill ({self.kill_timeout}s)"
+                )
+
+            await sandbox.finish_shutdown()
+
+        except asyncio.CancelledError:
+            sandbox.kill_process()
+            raise
+        except Exception as e:
+            record.error = str(e)
+            sandbox.state = SandboxState.FAILED
+            logging.error(f"Error during sandbox shutdown {sandbox.id}: {e}")
+
+        return record
@@ -0,0 +1,335 @@
+"""
+Chunked, parallel and resumable copying of file trees through a staging folder.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Written into each destination root; records what was copied there
+MANIFEST_FILE = ".transfer-manifest.json"
+# Manifest of the last pack(), until commit_pack() confirms its delivery
+PENDING_MANIFEST_FILE = ".transfer-manifest.pending.json"
+PART_SUFFIX = ".part"
+
+
+@dataclass
+class TransferReport:
+    """Outcome and throughput of one transfer."""
+
+    direction: str
+    files_total: int = 0
+    files_copied: int = 0
+    files_skipped: int = 0
+    # Copies that continued from a partial file left by an interrupted transfer
+    files_resumed: int = 0
+    bytes_total: int = 0
+    bytes_copied: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput_mb_s(self) -> float:
+        """Megabytes copied per second."""
+        if not self.elapsed:
+            return 0.0
+        return self.bytes_copied / (1024 * 1024) / self.elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        data = asdict(self)
+        data["throughput_mb_s"] = round(self.throughput_mb_s, 2)
+        return data
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file's content in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_files(root: Path) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (relative POSIX path, stat) for every regular file under root."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    if entry.name == MANIFEST_FILE or entry.name.endswith(PART_SUFFIX):
+                        continue
+                    rel = Path(entry.path).relative_to(root).as_posix()
+                    yield rel, entry.stat(follow_symlinks=False)
+
+
+class FileTransfer:
+    """
+    Copies file trees into and out of a sandbox's staging folder.
+
+    Each destination root keeps a manifest of (size, mtime, sha256) per file,
+    so files whose content is already there are skipped; unchanged sources
+    are recognised by size and mtime without being hashed again. Files are
+    copied in ``chunk_size`` pieces by ``workers`` threads into ``.part``
+    files named after the source's size and mtime, and a transfer that was
+    interrupted picks up where each partial file stopped.
+    """
+
+    def __init__(self, chunk_size: int = 1024 * 1024, workers: int = 4):
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+    def copy_tree(self, source: Path, dest: Path, direction: str = "copy") -> TransferReport:
+        """Copy changed files from source (a file or directory) into dest."""
+        started = time.monotonic()
+        report = TransferReport(direction=direction)
+        dest.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest(dest)
+        lock = threading.Lock()
+
+        files: List[Tuple[str, os.stat_result]]
+        if source.is_dir():
+            files = list(iter_files(source))
+            root = source
+        else:
+            files = [(source.name, source.stat())]
+            root = source.parent
+
+        def transfer(item: Tuple[str, os.stat_result]) -> None:
+            rel, stat = item
+            outcome, resumed, copied = self._sync_file(
+                root / rel, dest / rel, rel, stat, manifest, lock
+            )
+            with lock:
+                report.files_total += 1
+                report.bytes_total += stat.st_size
+                if outcome:
+                    report.files_copied += 1
+                    report.bytes_copied += copied
+                    report.files_resumed += resumed
+                else:
+                    report.files_skipped += 1
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # list() re-raises the first worker error
+                list(pool.map(transfer, files))
+        finally:
+            # Saved even when interrupted, so completed files are not copied again
+            self._save_manifest(dest, manifest)
+            report.elapsed = time.monotonic() - started
+
+        return report
+
+    def pack(self, source: Path, archive: Path, manifest_dir: Path) -> TransferReport:
+        """Write changed files from a source tree into a zip archive.
+
+        ``manifest_dir`` holds the manifest describing what earlier archives
+        delivered, so each archive carries only the changes. The manifest
+        including this archive is only kept as pending; call commit_pack()
+        once the archive has been extracted, otherwise the next pack() sends
+        the same changes again.
+        """
+        started = time.monotonic()
+        report = TransferReport(direction="pack")
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest(manifest_dir)
+        lock = threading.Lock()
+        temp = archive.with_name(f"{archive.name}.{uuid.uuid4().hex[:8]}{PART_SUFFIX}")
+
+        with zipfile.ZipFile(temp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+
+            def add(item: Tuple[str, os.stat_result]) -> None:
+                rel, stat = item
+                path = source / rel
+                entry = manifest.get(rel)
+                if entry and self._stat_matches(entry, stat):
+                    changed, sha = False, entry["sha256"]
+                else:
+                    sha = file_sha256(path, self.chunk_size)
+                    changed = not entry or entry["sha256"] != sha
+
+                with lock:
+                    report.files_total += 1
+                    report.bytes_total += stat.st_size
+                    if changed:
+                        # ZipFile supports one writer at a time
+                        with open(path, "rb") as src:
+                            with zf.open(rel, "w", force_zip64=True) as dst:
+                                shutil.copyfileobj(src, dst, self.chunk_size)
+                        report.files_copied += 1
+                        report.bytes_copied += stat.st_size
+                    else:
+                        report.files_skipped += 1
+                    manifest[rel] = self._entry(stat, sha)
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(add, iter_files(source)))
+
+        os.replace(temp, archive)
+        self._save_manifest(manifest_dir, manifest, PENDING_MANIFEST_FILE)
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def commit_pack(self, manifest_dir: Path) -> None:
+        """Record the last pack() into ``manifest_dir`` as delivered."""
+        pending = manifest_dir / PENDING_MANIFEST_FILE
+        if pending.exists():
+            os.replace(pending, manifest_dir / MANIFEST_FILE)
+
+    def unpack(self, archive: Path, dest: Path) -> TransferReport:
+        """Extract a zip archive into dest, streaming each member in chunks."""
+        started = time.monotonic()
+        report = TransferReport(direction="unpack")
+        dest.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest(dest)
+        root = dest.resolve()
+
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                target = (dest / info.filename).resolve()
+                if root not in target.parents:
+                    raise ValueError(f"Archive member escapes destination: {info.filename}")
+
+                target.parent.mkdir(parents=True, exist_ok=True)
+                digest = hashlib.sha256()
+                with zf.open(info) as src, open(target, "wb") as dst:
+                    while True:
+                        chunk = src.read(self.chunk_size)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        dst.write(chunk)
+
+                rel = target.relative_to(root).as_posix()
+                manifest[rel] = self._entry(target.stat(), digest.hexdigest())
+                report.files_total += 1
+                report.files_copied += 1
+                report.bytes_total += info.file_size
+                report.bytes_copied += info.file_size
+
+        self._save_manifest(dest, manifest)
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def _sync_file(
+        self,
+        source: Path,
+        target: Path,
+        rel: str,
+        stat: os.stat_result,
+        manifest: Dict[str, Dict[str, Any]],
+        lock: threading.Lock,
+    ) -> Tuple[bool, int, int]:
+        """Copy one file unless its content is already at the target.
+
+        Returns (copied, resumed, bytes written).
+        """
+        entry = manifest.get(rel)
+        target_present = entry is not None and self._target_intact(target, entry)
+
+        if target_present and self._stat_matches(entry, stat):
+            return False, 0, 0
+
+        sha: Optional[str] = None
+        if target_present:
+            # Touched but possibly identical: compare content before copying
+            sha = file_sha256(source, self.chunk_size)
+            if sha == entry["sha256"]:
+                with lock:
+                    manifest[rel] = self._entry(stat, sha)
+                return False, 0, 0
+
+        sha, resumed, written = self._copy_file(source, target, stat)
+        with lock:
+            manifest[rel] = self._entry(stat, sha)
+        return True, resumed, written
+
+    def _copy_file(self, source: Path, target: Path, stat: os.stat_result) -> Tuple[str, int, int]:
+        """Chunked copy through a resumable part file. Returns (sha256, resumed, bytes written)."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # The source's size and mtime tie a partial copy to the version it came from
+        part = target.with_name(
+            f".{target.name}.{stat.st_size}-{stat.st_mtime_ns}{PART_SUFFIX}"
+        )
+        digest = hashlib.sha256()
+        offset = 0
+
+        if part.exists() and part.stat().st_size <= stat.st_size:
+            with open(part, "rb") as existing:
+                while True:
+                    chunk = existing.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    offset += len(chunk)
+
+        written = 0
+        with open(source, "rb") as src, open(part, "ab" if offset else "wb") as dst:
+            src.seek(offset)
+            while True:
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                dst.write(chunk)
+                written += len(chunk)
+
+        os.replace(part, target)
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        return digest.hexdigest(), int(offset > 0), written
+
+    @staticmethod
+    def _entry(stat: os.stat_result, sha: str) -> Dict[str, Any]:
+        """Manifest record for a file."""
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha}
+
+    @staticmethod
+    def _stat_matches(entry: Dict[str, Any], stat: os.stat_result) -> bool:
+        """Whether a source file looks unchanged since the manifest entry."""
+        return entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    @staticmethod
+    def _target_intact(target: Path, entry: Dict[str, Any]) -> bool:
+        """Whether the copied file is still there at the recorded size."""
+        try:
+            return target.stat().st_size == entry["size"]
+        except OSError:
+            return False
+
+    @staticmethod
+    def _load_manifest(root: Path) -> Dict[str, Dict[str, Any]]:
+        """Read the manifest of a destination root."""
+        try:
+            data = json.loads((root / MANIFEST_FILE).read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_manifest(
+        root: Path, manifest: Dict[str, Dict[str, Any]], name: str = MANIFEST_FILE
+    ) -> None:
+        """Write the manifest of a destination root atomically."""
+        path = root / name
+        temp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        temp.write_text(json.dumps(manifest, sort_keys=True), encoding="utf-8")
+        os.replace(temp, path)
@@ -0,0 +1,327 @@
+"""
+Incremental synchronisation of a workspace into a mapped folder.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..config.models import FolderMapping
+from ..exceptions import ConfigurationError
+from ..utils.windows import WindowsUtils
+from .transfer import file_sha256
+
+# Bump when the index layout changes so old indexes are rebuilt
+INDEX_VERSION = 1
+
+# ioctl that clones a file's extents (Linux btrfs/XFS)
+_FICLONE = 0x40049409
+
+# (size, mtime_ns, sha256) of a synced file
+IndexEntry = List[Any]
+
+
+class SyncMode(Enum):
+    """How changed files are placed in the destination."""
+
+    COPY = "copy"
+    # Shares the source's data; only safe for read-only mappings
+    HARDLINK = "hardlink"
+    # Copy-on-write clone where the filesystem supports it, otherwise a copy
+    REFLINK = "reflink"
+
+
+@dataclass
+class SyncReport:
+    """Outcome of one workspace sync."""
+
+    scanned: int = 0
+    unchanged: int = 0
+    copied: int = 0
+    linked: int = 0
+    deleted: int = 0
+    bytes_copied: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        """Whether the destination was modified."""
+        return bool(self.copied or self.linked or self.deleted)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return asdict(self)
+
+
+class WorkspaceSync:
+    """
+    Mirrors a host workspace into the host side of a folder mapping.
+
+    The index records (size, mtime, hash) of every file last synced and is
+    persisted between runs. A sync makes one ``os.scandir`` walk over the
+    workspace; files whose size and mtime match the index are skipped without
+    touching the destination, so a sync with no changes costs one stat per
+    file. Changed files are hashed, and copied (or linked) only if their
+    content differs. Files that disappeared from the workspace are deleted.
+
+    The destination is assumed to be written only by the sync; ``full=True``
+    also checks it for files changed or added behind the index's back.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Path],
+        dest: Union[str, Path],
+        mode: Union[SyncMode, str] = SyncMode.COPY,
+        index_path: Optional[Path] = None,
+        workers: int = 4,
+    ):
+        self.source = Path(source)
+        self.dest = Path(dest)
+        self.mode = SyncMode(mode)
+        self.workers = workers
+        if index_path is None:
+            key = hashlib.sha256(
+                f"{self.source.resolve()}|{self.dest.resolve()}".encode("utf-8")
+            ).hexdigest()[:16]
+            index_path = WindowsUtils.get_cache_dir("sync") / f"{key}.json"
+        self.index_path = index_path
+
+    @classmethod
+    def for_mapping(
+        cls, mapping: FolderMapping, source: Optional[Path] = None, **kwargs: Any
+    ) -> "WorkspaceSync":
+        """Sync into a mapping's host folder from ``source`` or its ``sync_from``."""
+        source = source or mapping.sync_from
+        if source is None:
+            raise ConfigurationError(f"No sync source for mapped folder {mapping.host}")
+        mode = SyncMode(kwargs.pop("mode", mapping.sync_mode))
+        if mode == SyncMode.HARDLINK and not mapping.readonly:
+            # The guest would write straight through to the workspace
+            raise ConfigurationError(
+                f"Hard-link sync needs a read-only mapping: {mapping.host}"
+            )
+        return cls(source, mapping.host, mode=mode, **kwargs)
+
+    def sync(self, full: bool = False) -> SyncReport:
+        """Bring the destination up to date with the workspace."""
+        started = time.monotonic()
+        report = SyncReport()
+        if not self.source.is_dir():
+            raise ConfigurationError(f"Workspace does not exist: {self.source}")
+
+        index = self._load_index()
+        current = self._scan(self.source)
+        report.scanned = len(current)
+
+        pending: List[Tuple[str, os.stat_result]] = []
+        for rel, stat in current.items():
+            entry = index.get(rel)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                report.unchanged += 1
+            else:
+                pending.append((rel, stat))
+
+        if full:
+            stale = self._stale_in_dest(index, current, pending)
+            report.unchanged -= len(stale)
+            pending.extend(stale)
+
+        removed = [rel for rel in index if rel not in current]
+        if full:
+            removed.extend(
+                rel for rel in self._scan(self.dest) if rel not in current and rel not in index
+            )
+
+        self.dest.mkdir(parents=True, exist_ok=True)
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    for rel, entry, outcome in pool.map(
+                        lambda item: self._update(item, index.get(item[0])), pending
+                    ):
+                        index[rel] = entry
+                        if outcome == "copied":
+                            report.copied += 1
+                            report.bytes_copied += entry[0]
+                        elif outcome == "linked":
+                            report.linked += 1
+                        else:
+                            report.unchanged += 1
+
+            for rel in removed:
+                self._remove(rel)
+                index.pop(rel, None)
+                report.deleted += 1
+        finally:
+            if pending or removed:
+                self._save_index(index)
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+    @staticmethod
+    def _scan(root: Path) -> Dict[str, os.stat_result]:
+        """Map relative POSIX paths to stats in one scandir walk."""
+        files: Dict[str, os.stat_result] = {}
+        if not root.is_dir():
+            return files
+        prefix_len = len(str(root)) + 1
+        stack = [str(root)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        rel = entry.path[prefix_len:].replace(os.sep, "/")
+                        files[rel] = entry.stat(follow_symlinks=False)
+        return files
+
+    def _stale_in_dest(
+        self,
+        index: Dict[str, IndexEntry],
+        current: Dict[str, os.stat_result],
+        pending: List[Tuple[str, os.stat_result]],
+    ) -> List[Tuple[str, os.stat_result]]:
+        """Unchanged workspace files whose destination copy is missing or altered."""
+        queued = {rel for rel, _ in pending}
+        stale = []
+        for rel, stat in current.items():
+            if rel in queued:
+                continue
+            try:
+                target = (self.dest / rel).stat()
+            except OSError:
+                target = None
+            # Every mode carries the source's mtime over to the destination
+            if (
+                target is None
+                or target.st_size != stat.st_size
+                or target.st_mtime_ns != stat.st_mtime_ns
+            ):
+                # Forget the entry so the file is rewritten rather than skipped
+                index.pop(rel, None)
+                stale.append((rel, stat))
+        return stale
+
+    def _update(
+        self, item: Tuple[str, os.stat_result], entry: Optional[IndexEntry]
+    ) -> Tuple[str, IndexEntry, str]:
+        """Place one new or changed file. Returns (path, index entry, outcome)."""
+        rel, stat = item
+        source = self.source / rel
+        target = self.dest / rel
+
+        sha: Optional[str] = None
+        if entry and target.exists():
+            # Touched but identical content: only the index needs updating
+            sha = file_sha256(source)
+            if sha == entry[2]:
+                return rel, [stat.st_size, stat.st_mtime_ns, sha], "unchanged"
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            outcome, copied_sha = self._place(source, temp)
+            os.replace(temp, target)
+        finally:
+            if temp.exists():
+                temp.unlink()
+
+        sha = sha or copied_sha or file_sha256(source)
+        return rel, [stat.st_size, stat.st_mtime_ns, sha], outcome
+
+    def _place(self, source: Path, temp: Path) -> Tuple[str, Optional[str]]:
+        """Write the source at temp using the configured mode.
+
+        Returns the outcome and, for copies, the hash of the copied content.
+        """
+        if self.mode == SyncMode.HARDLINK:
+            try:
+                os.link(source, temp)
+                return "linked", None
+            except OSError:
+                # Different volume or unsupported filesystem
+                pass
+        elif self.mode == SyncMode.REFLINK and self._reflink(source, temp):
+            return "linked", None
+
+        # Hash while copying so new files are read only once
+        digest = hashlib.sha256()
+        with open(source, "rb") as src, open(temp, "wb") as dst:
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                dst.write(chunk)
+        shutil.copystat(source, temp)
+        return "copied", digest.hexdigest()
+
+    @staticmethod
+    def _reflink(source: Path, temp: Path) -> bool:
+        """Clone a file copy-on-write, if the platform and filesystem allow it."""
+        try:
+            import fcntl
+        except ImportError:
+            return False
+
+        try:
+            with open(source, "rb") as src, open(temp, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY):
+                raise
+            temp.unlink()
+            return False
+        shutil.copystat(source, temp)
+        return True
+
+    def _remove(self, rel: str) -> None:
+        """Delete a file gone from the workspace and any directories it leaves empty."""
+        target = self.dest / rel
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            pass
+
+        parent = target.parent
+        while parent != self.dest and self.dest in parent.parents:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+    def _load_index(self) -> Dict[str, IndexEntry]:
+        """Read the persisted index, or start empty."""
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def _save_index(self, index: Dict[str, IndexEntry]) -> None:
+        """Write the index atomically."""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": INDEX_VERSION,
+            "source": str(self.source),
+            "dest": str(self.dest),
+            "files": index,
+        }
+        temp = self.index_path.with_name(f"{self.index_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        temp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(temp, self.index_path)
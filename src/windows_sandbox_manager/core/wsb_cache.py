@@ -0,0 +1,113 @@
+"""
+Content-addressed cache of generated Windows Sandbox (.wsb) files.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from ..config.models import FolderMapping, SandboxConfig
+from ..utils.windows import WindowsUtils
+
+# Bump when the generated XML changes so stale cache files are not reused
+WSB_FORMAT_VERSION = 1
+
+# SandboxConfig fields that end up in the .wsb file (folders are passed separately)
+WSB_FIELDS = {"memory_mb", "cpu_cores", "networking", "gpu_acceleration"}
+
+
+class WsbFileCache:
+    """
+    Shares one .wsb file between all sandboxes whose configuration renders to
+    the same XML. Files are named after a hash of the relevant config fields,
+    reference counted while sandboxes use them, and garbage collected once
+    unreferenced and older than a maximum age.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir or WindowsUtils.get_cache_dir("wsb")
+        self._refcounts: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def compute_key(config: SandboxConfig, folders: Iterable[FolderMapping]) -> str:
+        """Canonical hash of everything that affects the generated XML."""
+        material = {
+            "version": WSB_FORMAT_VERSION,
+            "config": config.model_dump(mode="json", include=WSB_FIELDS),
+            "folders": [
+                [str(folder.host), str(folder.guest), folder.readonly] for folder in folders
+            ],
+        }
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def acquire(self, key: str, render: Callable[[], str]) -> Path:
+        """Get the file for a key, rendering it on first use, and take a reference."""
+        path = self.cache_dir / f"{key}.wsb"
+
+        if path.exists():
+            self._hits += 1
+            try:
+                # Refresh mtime so garbage collection sees the file as recently used
+                os.utime(path)
+            except OSError:
+                pass
+        else:
+            self._misses += 1
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+            temp_path.write_text(render(), encoding="utf-8")
+            os.replace(temp_path, path)
+
+        self._refcounts[key] = self._refcounts.get(key, 0) + 1
+        return path
+
+    def release(self, path: Path) -> None:
+        """Drop a reference taken by acquire()."""
+        key = path.stem
+        count = self._refcounts.get(key, 0)
+        if count <= 1:
+            self._refcounts.pop(key, None)
+        else:
+            self._refcounts[key] = count - 1
+
+    def gc(self, max_age_seconds: float = 24 * 3600) -> int:
+        """Remove unreferenced files not used within max_age_seconds. Returns count removed."""
+        if not self.cache_dir.is_dir():
+            return 0
+
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+
+        for path in self.cache_dir.iterdir():
+            # Temp files are left behind by writes interrupted by a crash
+            if path.suffix == ".wsb":
+                if path.stem in self._refcounts:
+                    continue
+            elif path.suffix != ".tmp":
+                continue
+
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError as e:
+                logging.warning(f"Failed to remove cached WSB file {path}: {e}")
+
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reference and hit/miss counters."""
+        return {
+            "referenced_files": len(self._refcounts),
+            "references": sum(self._refcounts.values()),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
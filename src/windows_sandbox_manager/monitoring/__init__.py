@@ -3,5 +3,17 @@ Monitoring and observability components.
 """
 
 from .resources import ResourceMonitor, ResourceStats
+from .accounting import ExecutionUsage, UsageTotals, ProcessTreeSampler
+from .live import MonitorBoard, MonitorExporter, MonitorRow, RowFilter
 
-__all__ = ["ResourceMonitor", "ResourceStats"]
+__all__ = [
+    "ResourceMonitor",
+    "ResourceStats",
+    "ExecutionUsage",
+    "UsageTotals",
+    "ProcessTreeSampler",
+    "MonitorBoard",
+    "MonitorExporter",
+    "MonitorRow",
+    "RowFilter",
+]
@@ -0,0 +1,285 @@
+"""
+Per-execution resource accounting.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import psutil
+
+# C# helper compiled in the guest: a job object that the command's process,
+# and every process it starts, belongs to. Job accounting keeps counting
+# processes that have already exited.
+GUEST_JOB_SOURCE = r"""
+using System;
+using System.Collections;
+using System.Diagnostics;
+using System.Runtime.InteropServices;
+
+public class WsbJobAccounting
+{
+    [StructLayout(LayoutKind.Sequential)]
+    struct IoCounters
+    {
+        public ulong ReadOperationCount, WriteOperationCount, OtherOperationCount;
+        public ulong ReadTransferCount, WriteTransferCount, OtherTransferCount;
+    }
+
+    [StructLayout(LayoutKind.Sequential)]
+    struct BasicAndIoAccounting
+    {
+        public long TotalUserTime, TotalKernelTime, ThisPeriodUserTime, ThisPeriodKernelTime;
+        public uint TotalPageFaultCount, TotalProcesses, ActiveProcesses, TerminatedProcesses;
+        public IoCounters Io;
+    }
+
+    [StructLayout(LayoutKind.Sequential)]
+    struct ExtendedLimits
+    {
+        public long PerProcessUserTimeLimit, PerJobUserTimeLimit;
+        public uint LimitFlags;
+        public UIntPtr MinimumWorkingSetSize, MaximumWorkingSetSize;
+        public uint ActiveProcessLimit;
+        public UIntPtr Affinity;
+        public uint PriorityClass, SchedulingClass;
+        public IoCounters Io;
+        public UIntPtr ProcessMemoryLimit, JobMemoryLimit, PeakProcessMemoryUsed, PeakJobMemoryUsed;
+    }
+
+    [DllImport("kernel32.dll", CharSet = CharSet.Unicode, SetLastError = true)]
+    static extern IntPtr CreateJobObject(IntPtr attributes, string name);
+
+    [DllImport("kernel32.dll", SetLastError = true)]
+    static extern bool AssignProcessToJobObject(IntPtr job, IntPtr process);
+
+    [DllImport("kernel32.dll", SetLastError = true)]
+    static extern bool QueryInformationJobObject(
+        IntPtr job, int infoClass, out BasicAndIoAccounting info, int length, IntPtr returned);
+
+    [DllImport("kernel32.dll", SetLastError = true)]
+    static extern bool QueryInformationJobObject(
+        IntPtr job, int infoClass, out ExtendedLimits info, int length, IntPtr returned);
+
+    readonly IntPtr job = CreateJobObject(IntPtr.Zero, null);
+
+    public bool Add(Process process)
+    {
+        return job != IntPtr.Zero && AssignProcessToJobObject(job, process.Handle);
+    }
+
+    public Hashtable Usage()
+    {
+        BasicAndIoAccounting accounting;
+        ExtendedLimits limits;
+        if (!QueryInformationJobObject(job, 8, out accounting,
+                Marshal.SizeOf(typeof(BasicAndIoAccounting)), IntPtr.Zero)
+            || !QueryInformationJobObject(job, 9, out limits,
+                Marshal.SizeOf(typeof(ExtendedLimits)), IntPtr.Zero))
+        {
+            return null;
+        }
+        Hashtable usage = new Hashtable();
+        usage["cpu_time_seconds"] = (accounting.TotalUserTime + accounting.TotalKernelTime) / 1e7;
+        usage["peak_memory_mb"] = limits.PeakJobMemoryUsed.ToUInt64() / 1048576.0;
+        usage["io_read_bytes"] = accounting.Io.ReadTransferCount;
+        usage["io_write_bytes"] = accounting.Io.WriteTransferCount;
+        usage["process_count"] = accounting.TotalProcesses;
+        return usage;
+    }
+}
+"""
+
+
+@dataclass
+class ExecutionUsage:
+    """Resources consumed by one command execution.
+
+    ``cpu_time_seconds``, ``peak_memory_mb`` (peak committed memory),
+    ``io_read_bytes``, ``io_write_bytes`` and ``process_count`` are measured
+    inside the sandbox over every process the command started, and are the
+    figures to bill by. They are None when the guest reported nothing, as
+    for commands that timed out. The ``client_`` counters cover the
+    host-side PowerShell client relaying the command. Output sizes are those
+    of the command itself.
+    """
+
+    cpu_time_seconds: Optional[float] = None
+    peak_memory_mb: Optional[float] = None
+    io_read_bytes: Optional[int] = None
+    io_write_bytes: Optional[int] = None
+    process_count: Optional[int] = None
+    client_cpu_time_seconds: float = 0.0
+    client_peak_memory_mb: float = 0.0
+    client_io_read_bytes: int = 0
+    client_io_write_bytes: int = 0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+
+    @property
+    def measured(self) -> bool:
+        """Whether the guest reported its counters."""
+        return self.cpu_time_seconds is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return asdict(self)
+
+
+@dataclass
+class UsageTotals:
+    """Resources consumed by all executions in a sandbox; see ExecutionUsage."""
+
+    executions: int = 0
+    # Executions whose guest counters are missing from the guest totals
+    unmeasured_executions: int = 0
+    wall_time_seconds: float = 0.0
+    cpu_time_seconds: float = 0.0
+    # Largest peak of any single execution
+    peak_memory_mb: float = 0.0
+    io_read_bytes: int = 0
+    io_write_bytes: int = 0
+    process_count: int = 0
+    client_cpu_time_seconds: float = 0.0
+    # Largest client peak of any single execution
+    client_peak_memory_mb: float = 0.0
+    client_io_read_bytes: int = 0
+    client_io_write_bytes: int = 0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+
+    def add(self, usage: ExecutionUsage, wall_time: float) -> None:
+        """Fold one execution into the totals."""
+        self.executions += 1
+        self.wall_time_seconds += wall_time
+        if usage.measured:
+            self.cpu_time_seconds += usage.cpu_time_seconds
+            self.peak_memory_mb = max(self.peak_memory_mb, usage.peak_memory_mb or 0.0)
+            self.io_read_bytes += usage.io_read_bytes or 0
+            self.io_write_bytes += usage.io_write_bytes or 0
+            self.process_count += usage.process_count or 0
+        else:
+            self.unmeasured_executions += 1
+        self.client_cpu_time_seconds += usage.client_cpu_time_seconds
+        self.client_peak_memory_mb = max(self.client_peak_memory_mb, usage.client_peak_memory_mb)
+        self.client_io_read_bytes += usage.client_io_read_bytes
+        self.client_io_write_bytes += usage.client_io_write_bytes
+        self.stdout_bytes += usage.stdout_bytes
+        self.stderr_bytes += usage.stderr_bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return asdict(self)
+
+
+_GUEST_FIELDS = {
+    "cpu_time_seconds": float,
+    "peak_memory_mb": float,
+    "io_read_bytes": int,
+    "io_write_bytes": int,
+    "process_count": int,
+}
+
+
+def read_guest_usage(path: Path) -> Dict[str, Any]:
+    """Guest counters from the report an execution wrote, removing the file.
+
+    Returns ExecutionUsage fields; empty if there is no usable report.
+    """
+    try:
+        report = json.loads(path.read_text(encoding="utf-8-sig"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.error(f"Unreadable usage report {path}: {e}")
+        report = None
+    finally:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    if not isinstance(report, dict):
+        return {}
+    try:
+        usage = {name: cast(report[name]) for name, cast in _GUEST_FIELDS.items()}
+    except (KeyError, TypeError, ValueError):
+        return {}
+    usage["cpu_time_seconds"] = round(usage["cpu_time_seconds"], 4)
+    usage["peak_memory_mb"] = round(usage["peak_memory_mb"], 2)
+    return usage
+
+
+class ProcessTreeSampler:
+    """
+    Samples CPU time, memory and I/O of a host process and its descendants
+    while it runs. Counters are kept per PID at their last observed value,
+    so children that exit between samples still count towards the totals.
+    Samples are taken in a worker thread, off the event loop.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self._cpu: Dict[int, float] = {}
+        self._io: Dict[int, Tuple[int, int]] = {}
+        self._peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self) -> None:
+        """Sample now and then every ``interval`` seconds in the background."""
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop sampling, letting a sample in progress finish."""
+        if self._task:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    def usage(self, stdout_bytes: int = 0, stderr_bytes: int = 0) -> ExecutionUsage:
+        """Host client usage observed so far, with the given output sizes."""
+        return ExecutionUsage(
+            client_cpu_time_seconds=round(sum(self._cpu.values()), 4),
+            client_peak_memory_mb=round(self._peak_rss / (1024 * 1024), 2),
+            client_io_read_bytes=sum(read for read, _ in self._io.values()),
+            client_io_write_bytes=sum(write for _, write in self._io.values()),
+            stdout_bytes=stdout_bytes,
+            stderr_bytes=stderr_bytes,
+        )
+
+    def sample(self) -> None:
+        """Record the current counters of the process tree."""
+        try:
+            root = psutil.Process(self.pid)
+            processes = [root, *root.children(recursive=True)]
+        except (psutil.Error, OSError):
+            return
+
+        rss = 0
+        for proc in processes:
+            try:
+                with proc.oneshot():
+                    times = proc.cpu_times()
+                    self._cpu[proc.pid] = times.user + times.system
+                    rss += proc.memory_info().rss
+                    io = proc.io_counters() if hasattr(proc, "io_counters") else None
+                    if io:
+                        self._io[proc.pid] = (io.read_bytes, io.write_bytes)
+            except (psutil.Error, OSError):
+                continue
+
+        self._peak_rss = max(self._peak_rss, rss)
+
+    async def _loop(self) -> None:
+        """Sample until stopped."""
+        while not self._stopping.is_set():
+            await asyncio.to_thread(self.sample)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,342 @@
+"""
+Live resource view of many sandboxes, with trend sparklines and export.
+"""
+
+import asyncio
+import operator
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from rich.table import Table
+
+from ..utils.records import RECORD_FORMATS, RecordWriter
+from .resources import ResourceStats
+
+if TYPE_CHECKING:
+    from ..core.sandbox import Sandbox
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+# Column name -> value used for sorting and filtering
+_COLUMNS: Dict[str, Callable[["MonitorRow"], Any]] = {
+    "id": lambda row: row.sandbox_id,
+    "name": lambda row: row.name,
+    "state": lambda row: row.state,
+    "cpu": lambda row: row.stats.cpu_percent if row.stats else None,
+    "memory": lambda row: row.stats.memory_mb if row.stats else None,
+    "disk": lambda row: row.stats.disk_mb if row.stats else None,
+    "network": lambda row: (
+        row.stats.network_sent_mb + row.stats.network_recv_mb if row.stats else None
+    ),
+    "io": lambda row: (
+        row.stats.disk_io_read_mb + row.stats.disk_io_write_mb if row.stats else None
+    ),
+    "procs": lambda row: row.stats.process_count if row.stats else None,
+}
+SORT_COLUMNS = tuple(_COLUMNS)
+_TEXT_COLUMNS = frozenset({"id", "name", "state"})
+
+# Fields of every exported sample, in column order
+EXPORT_FIELDS = (
+    "timestamp",
+    "sandbox_id",
+    "name",
+    "state",
+    "memory_mb",
+    "memory_percent",
+    "cpu_percent",
+    "disk_mb",
+    "disk_io_read_mb",
+    "disk_io_write_mb",
+    "network_sent_mb",
+    "network_recv_mb",
+    "process_count",
+)
+EXPORT_FORMATS = RECORD_FORMATS
+
+_FILTER_PATTERN = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$")
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "=": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def sparkline(values: Iterable[float], width: int = 20, maximum: Optional[float] = None) -> str:
+    """Block-character trend of the last ``width`` values.
+
+    Values are scaled against ``maximum`` (e.g. 100 for percentages) or,
+    when omitted, against the largest value shown.
+    """
+    shown = list(values)[-width:]
+    if not shown:
+        return ""
+    top = maximum if maximum is not None else max(shown)
+    steps = len(SPARK_CHARS) - 1
+    if top <= 0:
+        return SPARK_CHARS[0] * len(shown)
+    return "".join(SPARK_CHARS[min(steps, max(0, round(v / top * steps)))] for v in shown)
+
+
+@dataclass
+class MonitorRow:
+    """One sandbox in the live view."""
+
+    sandbox_id: str
+    name: str
+    state: str
+    # None when the sandbox has no resource monitor or sampling failed
+    stats: Optional[ResourceStats]
+    history: List[ResourceStats] = field(default_factory=list)
+
+    def value(self, column: str) -> Any:
+        """Value of a sort/filter column."""
+        return _COLUMNS[column](self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flat record with the fields in ``EXPORT_FIELDS``."""
+        record: Dict[str, Any] = dict.fromkeys(EXPORT_FIELDS)
+        record.update(sandbox_id=self.sandbox_id, name=self.name, state=self.state)
+        if self.stats:
+            record.update(
+                {k: v for k, v in self.stats.to_dict().items() if k in record}
+            )
+        return record
+
+
+@dataclass(frozen=True)
+class RowFilter:
+    """Condition on one column, parsed from text such as ``cpu>50``."""
+
+    column: str
+    op: str
+    value: Union[str, float]
+
+    @classmethod
+    def parse(cls, text: str) -> "RowFilter":
+        """Parse ``<column><op><value>``; text columns accept globs with = and !=."""
+        match = _FILTER_PATTERN.match(text)
+        if not match or match.group(1) not in _COLUMNS:
+            raise ValueError(
+                f"Invalid filter '{text}': expected <column><op><value> "
+                f"with column one of {', '.join(SORT_COLUMNS)}"
+            )
+        column, op, raw = match.groups()
+        if column in _TEXT_COLUMNS:
+            if op not in ("=", "!="):
+                raise ValueError(f"Invalid filter '{text}': {column} supports = and != only")
+            return cls(column, op, raw.lower())
+        try:
+            return cls(column, op, float(raw))
+        except ValueError:
+            raise ValueError(f"Invalid filter '{text}': '{raw}' is not a number") from None
+
+    def matches(self, row: MonitorRow) -> bool:
+        """Whether a row satisfies the condition; rows without stats never match numbers."""
+        actual = row.value(self.column)
+        if actual is None:
+            return False
+        if self.column in _TEXT_COLUMNS:
+            found = fnmatchcase(str(actual).lower(), self.value)
+            return found if self.op == "=" else not found
+        return _OPERATORS[self.op](actual, self.value)
+
+
+class MonitorBoard:
+    """
+    Samples a changing set of sandboxes and renders them as one table.
+
+    Each refresh reads every sandbox's resource monitor concurrently, so a
+    slow or stuck sample delays a single row rather than the whole view.
+    Sandboxes whose monitor holds a recent sample cost nothing to read;
+    monitors without one, or whose sample is older than ``max_age``
+    seconds, are sampled on demand, bounded by ``sample_timeout``. A view
+    refreshing faster than the monitors' own interval should set
+    ``max_age`` to its refresh interval. Trend sparklines come from each
+    monitor's history.
+    """
+
+    def __init__(
+        self,
+        sandboxes: Callable[[], Iterable["Sandbox"]],
+        sort_by: str = "cpu",
+        descending: bool = True,
+        filters: Sequence[Union[str, RowFilter]] = (),
+        limit: Optional[int] = None,
+        sample_timeout: float = 5.0,
+        spark_width: int = 10,
+        max_age: Optional[float] = None,
+    ):
+        if sort_by not in _COLUMNS:
+            raise ValueError(f"Unknown sort column '{sort_by}'")
+        self.sandboxes = sandboxes
+        self.sort_by = sort_by
+        self.descending = descending
+        self.filters = [f if isinstance(f, RowFilter) else RowFilter.parse(f) for f in filters]
+        self.limit = limit
+        self.sample_timeout = sample_timeout
+        self.spark_width = spark_width
+        self.max_age = max_age
+        # Sandboxes seen by the last refresh, before filtering
+        self.total = 0
+
+    async def refresh(self) -> List[MonitorRow]:
+        """Sample all sandboxes at once; rows are filtered, sorted and limited."""
+        sandboxes = list(self.sandboxes())
+        self.total = len(sandboxes)
+        rows = await asyncio.gather(*(self._row(sandbox) for sandbox in sandboxes))
+        return self.arrange(rows)
+
+    def arrange(self, rows: Iterable[MonitorRow]) -> List[MonitorRow]:
+        """Apply the board's filters, sort order and row limit."""
+        kept = [row for row in rows if all(f.matches(row) for f in self.filters)]
+        # Rows without a value sort last in either direction
+        present = [row for row in kept if row.value(self.sort_by) is not None]
+        missing = [row for row in kept if row.value(self.sort_by) is None]
+        present.sort(key=lambda row: row.value(self.sort_by), reverse=self.descending)
+        arranged = present + sorted(missing, key=lambda row: row.sandbox_id)
+        return arranged[: self.limit] if self.limit else arranged
+
+    def render(self, rows: Sequence[MonitorRow], interval: float) -> Table:
+        """Table of rows, titled with the refresh settings."""
+        direction = "desc" if self.descending else "asc"
+        table = Table(
+            title=(
+                f"Resource Monitor (Interval: {interval:g}s, "
+                f"{len(rows)} of {self.total} sandboxes, sorted by {self.sort_by} {direction})"
+            )
+        )
+        table.add_column("Sandbox", style="cyan", no_wrap=True)
+        table.add_column("Name", style="green")
+        table.add_column("State")
+        table.add_column("CPU", justify="right", style="blue", no_wrap=True)
+        table.add_column("Memory", justify="right", style="yellow", no_wrap=True)
+        table.add_column("Disk", justify="right", style="magenta")
+        table.add_column("Network", justify="right", style="cyan")
+        table.add_column("Disk I/O", justify="right", style="red")
+        table.add_column("Procs", justify="right", style="white")
+
+        for row in rows:
+            table.add_row(row.sandbox_id[:8] + "...", row.name, row.state, *self._cells(row))
+        return table
+
+    def _cells(self, row: MonitorRow) -> Tuple[str, ...]:
+        """Resource cells of a row, with trends next to CPU and memory."""
+        stats = row.stats
+        if stats is None:
+            return ("N/A",) * 6
+        cpu_trend = sparkline((s.cpu_percent for s in row.history), self.spark_width, 100)
+        memory_trend = sparkline((s.memory_mb for s in row.history), self.spark_width)
+        return (
+            f"{cpu_trend} {stats.cpu_percent:.1f}%",
+            f"{memory_trend} {stats.memory_mb}MB ({stats.memory_percent:.1f}%)",
+            f"{stats.disk_mb}MB",
+            f"↑{stats.network_sent_mb:.1f}MB ↓{stats.network_recv_mb:.1f}MB",
+            f"R:{stats.disk_io_read_mb:.1f}MB W:{stats.disk_io_write_mb:.1f}MB",
+            str(stats.process_count),
+        )
+
+    async def _row(self, sandbox: "Sandbox") -> MonitorRow:
+        """Row for one sandbox from its monitor's latest sample."""
+        monitor = sandbox.resource_monitor
+        stats: Optional[ResourceStats] = None
+        history: List[ResourceStats] = []
+        if monitor is not None:
+            stats = monitor.latest
+            if stats is None or self._is_stale(stats):
+                try:
+                    stats = await asyncio.wait_for(monitor.sample(), self.sample_timeout)
+                except Exception:
+                    # An old sample still beats an empty row
+                    pass
+            history = monitor.history or ([stats] if stats else [])
+        return MonitorRow(
+            sandbox_id=sandbox.id,
+            name=sandbox.config.name,
+            state=sandbox.state.value,
+            stats=stats,
+            history=history,
+        )
+
+    def _is_stale(self, stats: ResourceStats) -> bool:
+        """Whether a sample is older than ``max_age``."""
+        if self.max_age is None:
+            return False
+        return (datetime.utcnow() - stats.timestamp).total_seconds() >= self.max_age
+
+
+class MonitorExporter:
+    """
+    Writes monitor samples to a CSV, JSON or JSONL file, or to a RecordWriter.
+
+    A sample is written once, however many refreshes show it, so a view
+    refreshing faster than the monitors sample does not repeat rows.
+    """
+
+    def __init__(self, target: Union[str, Path, RecordWriter], fmt: Optional[str] = None):
+        self.path: Optional[Path] = None
+        self._file: Optional[TextIO] = None
+        if isinstance(target, RecordWriter):
+            self._writer = target
+        else:
+            self.path = Path(target)
+            fmt = fmt or self.path.suffix.lstrip(".").lower()
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(
+                    f"Cannot export to '{self.path.name}': use a .csv, .json or .jsonl file "
+                    "or give the format explicitly"
+                )
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = RecordWriter(self._file, fmt, EXPORT_FIELDS)
+        self.format = self._writer.format
+        self.rows_written = 0
+        self._last_sample: Dict[str, str] = {}
+
+    def write(self, rows: Iterable[MonitorRow]) -> int:
+        """Write rows holding new samples; returns how many were written."""
+        written = self._writer.write_many(self._new_samples(rows))
+        self.rows_written += written
+        return written
+
+    def close(self) -> None:
+        """Finish the output, closing the export file if this exporter opened it."""
+        self._writer.close()
+        if self._file:
+            self._file.close()
+
+    def _new_samples(self, rows: Iterable[MonitorRow]) -> Iterator[Dict[str, Any]]:
+        """Records of rows whose sample has not been written yet."""
+        for row in rows:
+            if row.stats is None:
+                continue
+            record = row.to_dict()
+            if self._last_sample.get(row.sandbox_id) == record["timestamp"]:
+                continue
+            self._last_sample[row.sandbox_id] = record["timestamp"]
+            yield record
+
+    def __enter__(self) -> "MonitorExporter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
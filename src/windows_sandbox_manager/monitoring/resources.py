@@ -4,8 +4,9 @@ Resource monitoring for sandbox instances.
 
 import asyncio
 import psutil
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Deque, List, Optional, Dict, Any, Callable
 
 
 class ResourceStats:
@@ -45,14 +46,26 @@ class ResourceStats:
 class ResourceMonitor:
     """
     Monitors resource usage for sandbox instances.
+
+    The most recent ``history_size`` samples are kept for trend displays.
+    Sampling runs in a worker thread so psutil calls never block the
+    event loop.
     """
 
-    def __init__(self, sandbox_id: str, interval: int = 30):
+    def __init__(
+        self,
+        sandbox_id: str,
+        interval: int = 30,
+        on_sample: Optional[Callable[[ResourceStats], None]] = None,
+        history_size: int = 60,
+    ):
         self.sandbox_id = sandbox_id
         self.interval = interval
+        self.on_sample = on_sample
         self._monitoring = False
         self._task: Optional[asyncio.Task] = None
         self._latest_stats: Optional[ResourceStats] = None
+        self._history: Deque[ResourceStats] = deque(maxlen=history_size)
         self._initial_io_counters: Optional[Dict[str, Any]] = None
         self._initial_net_counters: Optional[Dict[str, Any]] = None
 
@@ -75,6 +88,29 @@ class ResourceMonitor:
                 pass
             self._task = None
 
+    @property
+    def latest(self) -> Optional[ResourceStats]:
+        """Most recent sample, or None before the first one."""
+        return self._latest_stats
+
+    @property
+    def history(self) -> List[ResourceStats]:
+        """Recent samples, oldest first."""
+        return list(self._history)
+
+    def record(self, stats: ResourceStats) -> None:
+        """Store a sample as the latest and notify the sample callback."""
+        self._latest_stats = stats
+        self._history.append(stats)
+        if self.on_sample:
+            self.on_sample(stats)
+
+    async def sample(self) -> ResourceStats:
+        """Take a sample now and record it, whatever the interval."""
+        stats = await self._collect_stats()
+        self.record(stats)
+        return stats
+
     async def get_stats(self) -> ResourceStats:
         """Get latest resource statistics."""
         if self._latest_stats is None:
@@ -86,8 +122,7 @@ class ResourceMonitor:
         """Main monitoring loop."""
         while self._monitoring:
             try:
-                stats = await self._collect_stats()
-                self._latest_stats = stats
+                self.record(await self._collect_stats())
                 await asyncio.sleep(self.interval)
             except asyncio.CancelledError:
                 break
@@ -96,6 +131,10 @@ class ResourceMonitor:
                 await asyncio.sleep(self.interval)
 
     async def _collect_stats(self) -> ResourceStats:
+        """Collect current resource statistics without blocking the event loop."""
+        return await asyncio.to_thread(self._sample)
+
+    def _sample(self) -> ResourceStats:
         """Collect current resource statistics for sandbox process and system."""
         try:
             # System-wide statistics
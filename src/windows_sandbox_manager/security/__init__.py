@@ -3,9 +3,24 @@ Security framework components.
 """
 
 from .validation import InputValidator, PathValidator, CommandValidator
+from .folders import FolderValidator, FolderValidationReport, FolderViolation
+from .network import NetworkPolicy, NetworkDecision
+from .policy import SecurityPolicy, PolicyRequest, PolicyDecision, PolicyAuditTrail
+from .ingest import FileIngestValidator, FileCheck
 
 __all__ = [
     "InputValidator",
     "PathValidator",
     "CommandValidator",
+    "FolderValidator",
+    "FolderValidationReport",
+    "FolderViolation",
+    "NetworkPolicy",
+    "NetworkDecision",
+    "SecurityPolicy",
+    "PolicyRequest",
+    "PolicyDecision",
+    "PolicyAuditTrail",
+    "FileIngestValidator",
+    "FileCheck",
 ]
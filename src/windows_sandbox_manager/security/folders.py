@@ -0,0 +1,229 @@
+"""
+Batched validation of folder mappings.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PureWindowsPath
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..config.models import FolderMapping
+from ..exceptions import SecurityError
+from .validation import PathValidator
+
+# Outcome of checking one host path: (resolved path, error message)
+_HostResult = Tuple[Optional[Path], Optional[str]]
+
+
+@dataclass
+class FolderViolation:
+    """A problem with one folder mapping."""
+
+    index: int
+    field: str
+    path: str
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return asdict(self)
+
+
+@dataclass
+class FolderValidationReport:
+    """Every violation found in a set of folder mappings."""
+
+    violations: List[FolderViolation] = field(default_factory=list)
+    # Resolved host path per mapping index, for mappings that passed
+    resolved: Dict[int, Path] = field(default_factory=dict)
+    # (outer, inner) indexes of mappings whose host folder lies inside another's
+    nested: List[Tuple[int, int]] = field(default_factory=list)
+    # Distinct host paths checked on disk, and how many came from the cache
+    checked: int = 0
+    cache_hits: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """Whether all mappings are valid."""
+        return not self.violations
+
+    def raise_for_violations(self) -> None:
+        """Raise a SecurityError listing every violation."""
+        if self.violations:
+            details = "\n".join(
+                f"  folders[{v.index}].{v.field} ({v.path}): {v.message}" for v in self.violations
+            )
+            raise SecurityError(f"Invalid folder mappings:\n{details}")
+
+
+class FolderValidator:
+    """
+    Validates all folder mappings of a config in one pass.
+
+    Each distinct host path is checked once, in a thread pool, so configs
+    with many mappings on slow (e.g. network) drives do not validate one
+    path after another. Results are cached for ``cache_ttl`` seconds and
+    shared by every config validated through the same instance. Guest paths
+    are checked for duplicates and nesting, and writable mappings nested
+    inside read-only ones are rejected. All violations are collected rather
+    than stopping at the first.
+    """
+
+    def __init__(self, max_workers: int = 16, cache_ttl: float = 30.0):
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[Tuple[str, bool], Tuple[float, _HostResult]] = {}
+        self._lock = threading.Lock()
+
+    def validate(self, folders: Sequence[FolderMapping]) -> FolderValidationReport:
+        """Check every mapping and return all violations found."""
+        report = FolderValidationReport()
+
+        # Mappings filled by a workspace sync need not exist yet
+        requests: Dict[Tuple[str, bool], List[int]] = {}
+        for index, folder in enumerate(folders):
+            requests.setdefault((str(folder.host), folder.sync_from is None), []).append(index)
+
+        results = self._check_hosts(list(requests), report)
+        for key, indexes in requests.items():
+            resolved, error = results[key]
+            for index in indexes:
+                if error:
+                    report.violations.append(
+                        FolderViolation(index, "host", str(folders[index].host), error)
+                    )
+                else:
+                    report.resolved[index] = resolved
+
+        for index, folder in enumerate(folders):
+            if folder.sync_from is not None:
+                self._check_sync_source(index, folder, report)
+            try:
+                PathValidator.validate_guest_path(folder.guest)
+            except SecurityError as e:
+                report.violations.append(FolderViolation(index, "guest", str(folder.guest), str(e)))
+
+        self._check_guest_overlaps(folders, report)
+        self._check_host_overlaps(folders, report)
+        report.violations.sort(key=lambda v: (v.index, v.field))
+        return report
+
+    def clear_cache(self) -> None:
+        """Forget cached host path results."""
+        with self._lock:
+            self._cache.clear()
+
+    def _check_hosts(
+        self, keys: List[Tuple[str, bool]], report: FolderValidationReport
+    ) -> Dict[Tuple[str, bool], _HostResult]:
+        """Check distinct host paths concurrently, reusing fresh cached results."""
+        now = time.monotonic()
+        results: Dict[Tuple[str, bool], _HostResult] = {}
+        pending = []
+        with self._lock:
+            for key in keys:
+                cached = self._cache.get(key)
+                if cached and now - cached[0] < self.cache_ttl:
+                    results[key] = cached[1]
+                    report.cache_hits += 1
+                else:
+                    pending.append(key)
+
+        if pending:
+            workers = min(self.max_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                checked = list(pool.map(self._check_host, pending))
+            with self._lock:
+                for key, result in zip(pending, checked):
+                    self._cache[key] = (now, result)
+                    results[key] = result
+
+        report.checked = len(pending)
+        return results
+
+    @staticmethod
+    def _check_host(key: Tuple[str, bool]) -> _HostResult:
+        """Validate one host path on disk."""
+        path, must_exist = key
+        try:
+            return PathValidator.validate_host_path(path, must_exist=must_exist), None
+        except SecurityError as e:
+            return None, str(e)
+
+    @staticmethod
+    def _check_sync_source(
+        index: int, folder: FolderMapping, report: FolderValidationReport
+    ) -> None:
+        """A synced mapping's workspace must exist and not overlap its target."""
+        source = Path(folder.sync_from).resolve()
+        if not source.is_dir():
+            report.violations.append(
+                FolderViolation(index, "sync_from", str(folder.sync_from), "Workspace does not exist")
+            )
+            return
+        target = report.resolved.get(index)
+        if target and (target == source or source in target.parents or target in source.parents):
+            report.violations.append(
+                FolderViolation(
+                    index, "sync_from", str(folder.sync_from), "Workspace overlaps the mapped folder"
+                )
+            )
+
+    @staticmethod
+    def _check_guest_overlaps(
+        folders: Sequence[FolderMapping], report: FolderValidationReport
+    ) -> None:
+        """Guest folders must be distinct and not nested in one another."""
+        parts = {
+            i: tuple(part.lower() for part in PureWindowsPath(str(f.guest)).parts)
+            for i, f in enumerate(folders)
+        }
+        for outer, inner in _nested_pairs((p, i) for i, p in parts.items()):
+            message = (
+                f"Duplicate guest path (also folders[{outer}])"
+                if parts[outer] == parts[inner]
+                else f"Guest path is inside folders[{outer}].guest"
+            )
+            report.violations.append(
+                FolderViolation(inner, "guest", str(folders[inner].guest), message)
+            )
+
+    @staticmethod
+    def _check_host_overlaps(
+        folders: Sequence[FolderMapping], report: FolderValidationReport
+    ) -> None:
+        """Record nested host folders; writable ones must not sit inside read-only ones."""
+        keyed = [(path.parts, i) for i, path in report.resolved.items()]
+        for outer, inner in _nested_pairs(keyed):
+            report.nested.append((outer, inner))
+            if folders[outer].readonly and not folders[inner].readonly:
+                report.violations.append(
+                    FolderViolation(
+                        inner,
+                        "host",
+                        str(folders[inner].host),
+                        f"Writable mapping inside read-only folders[{outer}].host",
+                    )
+                )
+
+
+def _nested_pairs(keyed: Iterable[Tuple[Tuple[str, ...], int]]) -> List[Tuple[int, int]]:
+    """(outer, inner) index pairs where inner's path equals or lies under outer's.
+
+    Sorting puts every path right after its ancestors, so one sweep with a
+    stack of open ancestors finds each path's nearest enclosing path.
+    """
+    pairs = []
+    stack: List[Tuple[Tuple[str, ...], int]] = []
+    for parts, index in sorted(keyed):
+        while stack and stack[-1][0] != parts[: len(stack[-1][0])]:
+            stack.pop()
+        if stack:
+            pairs.append((stack[-1][1], index))
+            if stack[-1][0] == parts:
+                # Duplicates all pair with the first mapping of the path
+                continue
+        stack.append((parts, index))
+    return pairs
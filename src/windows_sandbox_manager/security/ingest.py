@@ -0,0 +1,214 @@
+"""
+Bulk validation of host files before they are staged into a sandbox.
+"""
+
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ..exceptions import SecurityError
+from .policy import SecurityPolicy
+from .validation import PathValidator
+
+# Leading bytes of common binary formats: (signature, type, extensions it may carry)
+MAGIC_SIGNATURES: List[Tuple[bytes, str, Tuple[str, ...]]] = [
+    (b"MZ", "windows-executable", (".exe", ".dll", ".sys", ".scr", ".com")),
+    (b"\x7fELF", "elf-executable", (".so", ".o", ".bin")),
+    (b"\xca\xfe\xba\xbe", "java-class", (".class",)),
+    (b"PK\x03\x04", "zip", (".zip", ".jar", ".docx", ".xlsx", ".pptx", ".whl", ".nupkg")),
+    (b"\x1f\x8b", "gzip", (".gz", ".tgz")),
+    (b"7z\xbc\xaf\x27\x1c", "7z", (".7z",)),
+    (b"Rar!\x1a\x07", "rar", (".rar",)),
+    (b"%PDF-", "pdf", (".pdf",)),
+    (b"\x89PNG\r\n\x1a\n", "png", (".png",)),
+    (b"\xff\xd8\xff", "jpeg", (".jpg", ".jpeg")),
+    (b"GIF8", "gif", (".gif",)),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole2", (".doc", ".xls", ".ppt", ".msi")),
+    (b"SQLite format 3\x00", "sqlite", (".db", ".sqlite", ".sqlite3")),
+]
+# Extensions whose content must be text; NUL bytes in them mean binary data
+TEXT_EXTENSIONS = frozenset(
+    {
+        ".txt",
+        ".py",
+        ".js",
+        ".json",
+        ".yaml",
+        ".yml",
+        ".md",
+        ".csv",
+        ".xml",
+        ".html",
+        ".css",
+        ".sql",
+        ".log",
+        ".ini",
+        ".cfg",
+        ".toml",
+        ".ps1",
+        ".bat",
+        ".cmd",
+    }
+)
+_SNIFF_BYTES = 512
+
+
+@dataclass
+class FileCheck:
+    """Result of checking one file."""
+
+    path: str
+    size: int
+    allowed: bool
+    reason: str
+    # Format recognised from the file's leading bytes, if any
+    detected_type: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return asdict(self)
+
+
+def sniff_type(header: bytes) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """(type, extensions) of the format a file header starts with."""
+    for signature, file_type, extensions in MAGIC_SIGNATURES:
+        if header.startswith(signature):
+            return file_type, extensions
+    return None
+
+
+def read_header(path: Union[str, Path], size: int, length: int = _SNIFF_BYTES) -> bytes:
+    """First bytes of a file, mapped rather than read through a buffer."""
+    if size <= 0:
+        return b""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[: min(length, size)]
+
+
+class FileIngestValidator:
+    """
+    Validates every file under a directory against a security policy.
+
+    The tree is walked once with ``os.scandir`` and sizes come from its
+    stat results, so extension, path and size rules cost no extra system
+    calls. Files passing those rules have their leading bytes mapped and
+    compared with known formats, catching executables or archives renamed
+    to an allowed extension. Sniffing runs in a thread pool with a bounded
+    window of pending files, and results are yielded in walk order as they
+    complete, so memory stays constant however large the tree is.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[SecurityPolicy] = None,
+        max_workers: int = 8,
+        follow_symlinks: bool = False,
+    ):
+        self.policy = policy or SecurityPolicy()
+        self.max_workers = max_workers
+        self.follow_symlinks = follow_symlinks
+
+    def iter_checks(self, root: Union[str, Path]) -> Iterator[FileCheck]:
+        """Check every file under root (or root itself, if a file)."""
+        root = PathValidator.validate_host_path(root)
+        window: Deque[Union[FileCheck, "Future[FileCheck]"]] = deque()
+        limit = self.max_workers * 4
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for path, size, error in self._walk(root):
+                window.append(self._check(pool, path, size, error))
+                while len(window) > limit:
+                    yield _result(window.popleft())
+            while window:
+                yield _result(window.popleft())
+
+    def violations(self, root: Union[str, Path]) -> Iterator[FileCheck]:
+        """Only the files that failed a check."""
+        return (check for check in self.iter_checks(root) if not check.allowed)
+
+    def raise_for_violations(self, root: Union[str, Path], limit: int = 20) -> int:
+        """Raise SecurityError listing failed files; returns the number checked."""
+        checked = 0
+        failed: List[FileCheck] = []
+        count = 0
+        for check in self.iter_checks(root):
+            checked += 1
+            if not check.allowed:
+                count += 1
+                if len(failed) < limit:
+                    failed.append(check)
+        if failed:
+            details = "\n".join(f"  {c.path}: {c.reason}" for c in failed)
+            more = f"\n  ... and {count - len(failed)} more" if count > len(failed) else ""
+            raise SecurityError(f"{count} file(s) failed validation:\n{details}{more}")
+        return checked
+
+    def _walk(self, root: Path) -> Iterable[Tuple[str, int, Optional[str]]]:
+        """(path, size, error) for every file, from one scandir pass."""
+        if root.is_file():
+            yield str(root), root.stat().st_size, None
+            return
+
+        stack = [str(root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                                stack.append(entry.path)
+                            elif entry.is_symlink() and not self.follow_symlinks:
+                                yield entry.path, 0, "symbolic links are not staged"
+                            elif entry.is_file(follow_symlinks=self.follow_symlinks):
+                                yield entry.path, entry.stat().st_size, None
+                        except OSError as e:
+                            yield entry.path, 0, f"cannot stat: {e.strerror or e}"
+            except OSError as e:
+                yield directory, 0, f"cannot read directory: {e.strerror or e}"
+
+    def _check(
+        self, pool: ThreadPoolExecutor, path: str, size: int, error: Optional[str]
+    ) -> Union[FileCheck, "Future[FileCheck]"]:
+        """Policy checks inline; content sniffing is handed to the pool."""
+        if error:
+            return FileCheck(path, size, False, error)
+        decision = self.policy.check_file(path, size=size)
+        if not decision.allowed:
+            return FileCheck(path, size, False, decision.reason)
+        return pool.submit(self._sniff, path, size)
+
+    @staticmethod
+    def _sniff(path: str, size: int) -> FileCheck:
+        """Compare a file's leading bytes with its extension."""
+        try:
+            header = read_header(path, size)
+        except (OSError, ValueError) as e:
+            return FileCheck(path, size, False, f"cannot read: {e}")
+
+        sniffed = sniff_type(header)
+        extension = os.path.splitext(path)[1].lower()
+        if sniffed:
+            file_type, extensions = sniffed
+            if extension not in extensions:
+                reason = f"{file_type} content with {extension or 'no'} extension"
+                return FileCheck(path, size, False, reason, file_type)
+            return FileCheck(path, size, True, "ok", file_type)
+        if extension in TEXT_EXTENSIONS and b"\x00" in header and not _is_utf16(header):
+            return FileCheck(path, size, False, "binary content", "binary")
+        return FileCheck(path, size, True, "ok")
+
+
+def _is_utf16(header: bytes) -> bool:
+    """Whether a header starts with a UTF-16 byte order mark."""
+    return header.startswith((b"\xff\xfe", b"\xfe\xff"))
+
+
+def _result(item: Union[FileCheck, "Future[FileCheck]"]) -> FileCheck:
+    """A check, waiting for it if it was sniffed in the pool."""
+    return item.result() if isinstance(item, Future) else item
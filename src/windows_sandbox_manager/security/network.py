@@ -0,0 +1,245 @@
+"""
+Compiled network allow/deny policy for egress and URL checks.
+"""
+
+import ipaddress
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from ..config.models import NetworkRestriction
+from ..exceptions import SecurityError
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+# Blocked unless an allow rule names them explicitly
+PRIVATE_NETWORKS = (
+    "0.0.0.0/8",
+    "10.0.0.0/8",
+    "100.64.0.0/10",
+    "127.0.0.0/8",
+    "169.254.0.0/16",
+    "172.16.0.0/12",
+    "192.168.0.0/16",
+    "::/128",
+    "::1/128",
+    "fc00::/7",
+    "fe80::/10",
+)
+PRIVATE_DOMAINS = ("localhost",)
+
+
+@dataclass(frozen=True)
+class NetworkDecision:
+    """Outcome of a policy check and the rule that decided it."""
+
+    host: str
+    allowed: bool
+    rule: Optional[str]
+    reason: str
+
+
+class _IntervalSet:
+    """Disjoint integer ranges labelled with a rule, searched by bisection."""
+
+    def __init__(self, ranges: Iterable[Tuple[int, int, str]]):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._rules: List[str] = []
+        for start, end, rule in sorted(ranges):
+            if self._ends and start <= self._ends[-1] + 1:
+                # Overlapping rules merge; the earlier-starting label is kept
+                self._ends[-1] = max(self._ends[-1], end)
+                continue
+            self._starts.append(start)
+            self._ends.append(end)
+            self._rules.append(rule)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def find(self, value: int) -> Optional[str]:
+        """Rule whose range contains value."""
+        index = bisect_right(self._starts, value) - 1
+        if index >= 0 and value <= self._ends[index]:
+            return self._rules[index]
+        return None
+
+
+class _DomainTrie:
+    """Domain rules keyed by reversed labels, so lookups walk from the TLD down."""
+
+    def __init__(self) -> None:
+        self._root: Dict[str, Any] = {}
+        self.size = 0
+
+    def add(self, pattern: str) -> None:
+        """Add ``example.com`` (domain and subdomains) or ``*.example.com`` (subdomains)."""
+        subdomains_only = pattern.startswith("*.")
+        labels = pattern[2:] if subdomains_only else pattern
+        node = self._root
+        for label in reversed(labels.split(".")):
+            node = node.setdefault(label, {})
+        node["$sub" if subdomains_only else "$all"] = pattern
+        self.size += 1
+
+    def find(self, host: str) -> Optional[str]:
+        """Most specific rule matching host."""
+        labels = host.split(".")
+        node = self._root
+        match = None
+        for depth, label in enumerate(reversed(labels), start=1):
+            node = node.get(label)
+            if node is None:
+                break
+            if "$all" in node:
+                match = node["$all"]
+            if "$sub" in node and depth < len(labels):
+                match = node["$sub"]
+        return match
+
+
+class _RuleSet:
+    """Compiled IP and domain rules of one list."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.any = False
+        self.domains = _DomainTrie()
+        ranges: Dict[int, List[Tuple[int, int, str]]] = {4: [], 6: []}
+
+        for raw in patterns:
+            pattern = raw.strip().lower().rstrip(".")
+            if not pattern:
+                continue
+            if pattern == "*":
+                self.any = True
+                continue
+            try:
+                network = ipaddress.ip_network(pattern, strict=False)
+            except ValueError:
+                self.domains.add(pattern)
+                continue
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address), raw)
+            )
+
+        self.networks = {version: _IntervalSet(r) for version, r in ranges.items()}
+
+    def match(self, host: str, address: Optional[IPAddress]) -> Optional[str]:
+        """Rule matching a host name or address, other than ``*``."""
+        if address is not None:
+            return self.networks[address.version].find(int(address))
+        return self.domains.find(host)
+
+
+class NetworkPolicy:
+    """
+    Decides whether a host may be contacted.
+
+    ``allow`` and ``deny`` entries are IP addresses, CIDR ranges, domains
+    (``example.com`` also covers its subdomains), subdomain wildcards
+    (``*.example.com``) or ``*``. CIDR ranges compile into sorted intervals
+    searched by bisection and domains into a suffix trie, so a check costs
+    O(log n) in the number of rules; decisions are cached per host.
+
+    Rules apply in order: an explicit deny, then an explicit allow, then
+    (with ``block_private``) loopback, private and link-local addresses and
+    ``localhost``. ``*`` sets the default for anything left, and otherwise a
+    non-empty allow list denies anything it does not match. Host names are
+    not resolved, so address rules only apply to literal addresses.
+    """
+
+    def __init__(
+        self,
+        allow: Optional[Iterable[str]] = None,
+        deny: Optional[Iterable[str]] = None,
+        block_private: bool = True,
+        cache_size: int = 4096,
+    ):
+        self._allow_list = list(allow) if allow is not None else None
+        self._allow = _RuleSet(self._allow_list or [])
+        self._deny = _RuleSet(deny or [])
+        self._private = _RuleSet([*PRIVATE_NETWORKS, *PRIVATE_DOMAINS] if block_private else [])
+        self._decide = lru_cache(maxsize=cache_size)(self._evaluate)
+
+    @classmethod
+    def from_restriction(
+        cls, restriction: Optional[NetworkRestriction], **kwargs: Any
+    ) -> "NetworkPolicy":
+        """Compile a sandbox config's network restrictions."""
+        if restriction is None:
+            return cls(**kwargs)
+        return cls(allow=restriction.allow, deny=restriction.deny, **kwargs)
+
+    def check_host(self, host: str) -> NetworkDecision:
+        """Decide whether a host name or IP address may be contacted."""
+        return self._decide(host.strip().lower().rstrip(".").strip("[]"))
+
+    def check_url(self, url: str) -> NetworkDecision:
+        """Decide whether a URL's host may be contacted."""
+        try:
+            hostname = urlparse(url).hostname
+        except ValueError as e:
+            raise SecurityError(f"Invalid URL: {e}")
+        if not hostname:
+            raise SecurityError(f"URL has no host: {url}")
+        return self.check_host(hostname)
+
+    def is_allowed(self, host: str) -> bool:
+        """Whether a host may be contacted."""
+        return self.check_host(host).allowed
+
+    def enforce(self, host: str) -> None:
+        """Raise SecurityError if a host may not be contacted."""
+        decision = self.check_host(host)
+        if not decision.allowed:
+            raise SecurityError(f"Network access to {decision.host} denied: {decision.reason}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rule counts and decision cache counters."""
+        info = self._decide.cache_info()
+        return {
+            "allow_rules": len(self._allow_list or []),
+            "deny_rules": self._deny.domains.size
+            + sum(len(s) for s in self._deny.networks.values()),
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+            "cache_size": info.currsize,
+        }
+
+    def _evaluate(self, host: str) -> NetworkDecision:
+        """Apply the rules to a normalised host."""
+        address = _parse_address(host)
+
+        rule = self._deny.match(host, address)
+        if rule:
+            return NetworkDecision(host, False, rule, f"matches deny rule {rule}")
+
+        rule = self._allow.match(host, address)
+        if rule:
+            return NetworkDecision(host, True, rule, f"matches allow rule {rule}")
+
+        rule = self._private.match(host, address)
+        if rule:
+            return NetworkDecision(host, False, rule, "local or private network")
+
+        if self._deny.any:
+            return NetworkDecision(host, False, "*", "matches deny rule *")
+        if self._allow.any:
+            return NetworkDecision(host, True, "*", "matches allow rule *")
+        if self._allow_list:
+            return NetworkDecision(host, False, None, "not in allow list")
+        return NetworkDecision(host, True, None, "no rule matched")
+
+
+def _parse_address(host: str) -> Optional[IPAddress]:
+    """The host as an IP address, or None for a name."""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return None
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
@@ -0,0 +1,438 @@
+"""
+Declarative security policy compiled from the sandbox configuration.
+"""
+
+import fnmatch
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from ..config.models import PolicyRules, SecurityConfig
+from ..exceptions import ConfigurationError, SecurityError
+from .network import NetworkPolicy
+from .validation import CommandValidator, PathValidator
+
+_SYSTEM_PATHS = sorted(PathValidator.DANGEROUS_PATHS["windows"])
+_DANGEROUS_COMMANDS = sorted(CommandValidator.DANGEROUS_COMMANDS)
+
+# Built-in rules per isolation level; config ``rules`` override them field by field
+ISOLATION_LEVELS: Dict[str, PolicyRules] = {
+    "low": PolicyRules(
+        allowed_extensions=[],
+        max_file_size_mb=1024,
+        allowed_paths=[],
+        denied_paths=[],
+        allowed_commands=[],
+        denied_commands=_DANGEROUS_COMMANDS,
+        command_patterns=[],
+        max_command_length=8000,
+        url_schemes=["http", "https"],
+        block_private_networks=False,
+    ),
+    "medium": PolicyRules(
+        allowed_extensions=[
+            ".txt",
+            ".py",
+            ".js",
+            ".json",
+            ".yaml",
+            ".yml",
+            ".md",
+            ".csv",
+            ".xml",
+            ".html",
+            ".css",
+            ".sql",
+            ".log",
+        ],
+        max_file_size_mb=100,
+        allowed_paths=[],
+        denied_paths=_SYSTEM_PATHS,
+        allowed_commands=[],
+        denied_commands=_DANGEROUS_COMMANDS,
+        command_patterns=list(CommandValidator.DANGEROUS_PATTERNS),
+        max_command_length=1000,
+        url_schemes=["http", "https"],
+        block_private_networks=True,
+    ),
+    "high": PolicyRules(
+        allowed_extensions=[".txt", ".json", ".yaml", ".yml", ".md", ".csv", ".xml", ".log"],
+        max_file_size_mb=25,
+        allowed_paths=[],
+        denied_paths=[*_SYSTEM_PATHS, "C:\\Users\\*\\AppData"],
+        allowed_commands=[],
+        denied_commands=[
+            *_DANGEROUS_COMMANDS,
+            "bcdedit",
+            "icacls",
+            "netsh",
+            "reg",
+            "regedit",
+            "sc",
+            "schtasks",
+            "takeown",
+            "wmic",
+        ],
+        command_patterns=list(CommandValidator.DANGEROUS_PATTERNS),
+        max_command_length=1000,
+        url_schemes=["https"],
+        block_private_networks=True,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class PolicyRequest:
+    """An action to check: a file, path, command or URL."""
+
+    kind: str
+    target: str
+    write: bool = False
+    # File size in bytes, for "file" requests
+    size: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class PolicyDecision:
+    """Outcome of a policy check and the rule that decided it."""
+
+    kind: str
+    target: str
+    allowed: bool
+    rule: Optional[str]
+    reason: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    """A policy decision and when it was made."""
+
+    timestamp: float
+    decision: PolicyDecision
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary."""
+        return {"timestamp": self.timestamp, **self.decision.to_dict()}
+
+
+class PolicyAuditTrail:
+    """Bounded log of policy decisions; the oldest records are dropped first."""
+
+    def __init__(self, max_records: int = 10_000):
+        self._records: Deque[AuditRecord] = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._denied = 0
+
+    def record(self, decision: PolicyDecision) -> None:
+        """Append a decision."""
+        with self._lock:
+            self._records.append(AuditRecord(time.time(), decision))
+            if decision.allowed:
+                self._allowed += 1
+            else:
+                self._denied += 1
+
+    def records(
+        self, allowed: Optional[bool] = None, kind: Optional[str] = None
+    ) -> List[AuditRecord]:
+        """Retained records, optionally only allowed or denied ones of one kind."""
+        with self._lock:
+            records = list(self._records)
+        return [
+            r
+            for r in records
+            if (allowed is None or r.decision.allowed == allowed)
+            and (kind is None or r.decision.kind == kind)
+        ]
+
+    def clear(self) -> None:
+        """Drop all retained records."""
+        with self._lock:
+            self._records.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get decision counters."""
+        with self._lock:
+            return {
+                "retained": len(self._records),
+                "allowed": self._allowed,
+                "denied": self._denied,
+            }
+
+
+class _PatternSet:
+    """Patterns combined into one regex; the matching pattern is only looked up on a hit."""
+
+    def __init__(self, patterns: Iterable[str], expressions: Iterable[str], flags: int = 0):
+        self.patterns = list(patterns)
+        self._compiled = [re.compile(e, flags) for e in expressions]
+        self._combined = re.compile("|".join(f"(?:{e})" for e in expressions), flags)
+
+    def find(self, value: str, search: bool = False) -> Optional[str]:
+        """Pattern matching value (anywhere in it, with ``search``)."""
+        if not self.patterns:
+            return None
+        if not (self._combined.search(value) if search else self._combined.match(value)):
+            return None
+        for pattern, compiled in zip(self.patterns, self._compiled):
+            if compiled.search(value) if search else compiled.match(value):
+                return pattern
+        return None
+
+
+def _normalize_path(path: str) -> str:
+    """Case-folded path with forward slashes, as Windows compares paths."""
+    return str(path).replace("\\", "/").rstrip("/").lower()
+
+
+def _path_globs(patterns: Iterable[str]) -> _PatternSet:
+    """Compile path globs; each also covers everything below what it matches."""
+    patterns = list(patterns)
+    expressions = []
+    for pattern in patterns:
+        normalized = _normalize_path(pattern)
+        expressions.append(
+            f"{fnmatch.translate(normalized)}|{fnmatch.translate(normalized + '/*')}"
+        )
+    return _PatternSet(patterns, expressions)
+
+
+def _base_command(command: str) -> str:
+    """Executable name of a command, without directory or extension."""
+    token = command.split(None, 1)[0].strip("\"'")
+    return re.split(r"[\\/]", token)[-1].lower().split(".")[0]
+
+
+class _CompiledRules:
+    """Matchers for one effective rule set, with memoized decisions."""
+
+    def __init__(self, config: SecurityConfig, cache_size: int):
+        rules = ISOLATION_LEVELS[config.isolation_level].model_copy(
+            update=config.rules.get(
+                config.isolation_level, PolicyRules()
+            ).model_dump(exclude_none=True)
+        )
+        self.rules = rules
+
+        self.extensions: FrozenSet[str] = frozenset(
+            e.lower() if e.startswith(".") else f".{e.lower()}"
+            for e in rules.allowed_extensions or []
+        )
+        self.max_file_bytes = (rules.max_file_size_mb or 0) * 1024 * 1024
+        self.allowed_paths = _path_globs(rules.allowed_paths or [])
+        self.denied_paths = _path_globs(rules.denied_paths or [])
+        self.system_paths = _path_globs(_SYSTEM_PATHS)
+        self.allowed_commands = frozenset(c.lower() for c in rules.allowed_commands or [])
+        self.denied_commands = frozenset(c.lower() for c in rules.denied_commands or [])
+        try:
+            patterns = rules.command_patterns or []
+            self.command_patterns = _PatternSet(patterns, patterns, re.IGNORECASE)
+        except re.error as e:
+            raise ConfigurationError(f"Invalid command pattern in security rules: {e}")
+        self.url_schemes = frozenset(s.lower() for s in rules.url_schemes or [])
+        self.network = NetworkPolicy.from_restriction(
+            config.network_restrictions, block_private=bool(rules.block_private_networks)
+        )
+        self.writable = config.file_access.get("write", True)
+        self.readonly_system = config.file_access.get("readonly_system", True)
+
+        self.decide = lru_cache(maxsize=cache_size)(self._decide)
+
+    def _decide(self, request: PolicyRequest) -> Tuple[bool, Optional[str], str]:
+        """(allowed, rule, reason) for a request."""
+        if request.kind == "command":
+            return self._decide_command(request.target)
+        if request.kind == "url":
+            return self._decide_url(request.target)
+        if request.kind in ("file", "path"):
+            return self._decide_path(request)
+        raise ValueError(f"Unknown policy request kind: {request.kind}")
+
+    def _decide_command(self, command: str) -> Tuple[bool, Optional[str], str]:
+        command = command.strip()
+        if not command:
+            return False, None, "empty command"
+        if len(command) > (self.rules.max_command_length or 0):
+            return False, "max_command_length", f"longer than {self.rules.max_command_length}"
+
+        base = _base_command(command)
+        if base in self.denied_commands:
+            return False, f"denied_commands:{base}", f"command {base} is denied"
+        if self.allowed_commands and base not in self.allowed_commands:
+            return False, "allowed_commands", f"command {base} is not allowed"
+
+        pattern = self.command_patterns.find(command, search=True)
+        if pattern:
+            return False, f"command_patterns:{pattern}", "dangerous command pattern"
+        return True, None, "no rule matched"
+
+    def _decide_url(self, url: str) -> Tuple[bool, Optional[str], str]:
+        try:
+            parsed = urlparse(url)
+            hostname = parsed.hostname
+        except ValueError as e:
+            return False, None, f"invalid URL: {e}"
+        if parsed.scheme.lower() not in self.url_schemes:
+            return False, "url_schemes", f"scheme {parsed.scheme or '(none)'} is not allowed"
+        if not hostname:
+            return False, None, "URL has no host"
+        decision = self.network.check_host(hostname)
+        rule = f"network:{decision.rule}" if decision.rule else None
+        return decision.allowed, rule, decision.reason
+
+    def _decide_path(self, request: PolicyRequest) -> Tuple[bool, Optional[str], str]:
+        path = _normalize_path(request.target)
+        if ".." in path.split("/"):
+            return False, None, "path traversal"
+
+        pattern = self.denied_paths.find(path)
+        if pattern:
+            return False, f"denied_paths:{pattern}", "path is denied"
+        if self.allowed_paths.patterns and not self.allowed_paths.find(path):
+            return False, "allowed_paths", "path is outside the allowed paths"
+        if request.write:
+            if not self.writable:
+                return False, "file_access.write", "writes are disabled"
+            if self.readonly_system and self.system_paths.find(path):
+                return False, "file_access.readonly_system", "system paths are read-only"
+
+        if request.kind == "file":
+            suffix = path.rsplit("/", 1)[-1]
+            extension = suffix[suffix.rfind(".") :] if "." in suffix else ""
+            if self.extensions and extension not in self.extensions:
+                return False, "allowed_extensions", f"extension {extension or '(none)'} is not allowed"
+            if request.size is not None and request.size > self.max_file_bytes:
+                return (
+                    False,
+                    "max_file_size_mb",
+                    f"larger than {self.rules.max_file_size_mb}MB",
+                )
+        return True, None, "no rule matched"
+
+
+@lru_cache(maxsize=32)
+def _compile(config_json: str, cache_size: int) -> _CompiledRules:
+    """Compile a serialized security config once, sharing it across sandboxes."""
+    return _CompiledRules(SecurityConfig.model_validate_json(config_json), cache_size)
+
+
+DecisionListener = Callable[[PolicyDecision], None]
+_RequestLike = Union[PolicyRequest, Tuple[Any, ...]]
+
+
+class SecurityPolicy:
+    """
+    Security rules for one sandbox config, compiled into fast matchers.
+
+    The rules are the isolation level's built-in defaults with the config's
+    ``rules`` for that level applied on top; ``file_access`` toggles
+    ``write`` (default on) and ``readonly_system`` (default on) restrict
+    writes. Extensions and commands compile into sets, path globs and
+    command patterns into single regular expressions, and URLs use a
+    NetworkPolicy built from ``network_restrictions``. Identical configs
+    share one compiled rule set, and decisions are memoized, so repeated
+    and bulk checks are cheap. Every decision is appended to ``audit`` and
+    passed to listeners.
+
+    Paths are checked as strings and never touch the filesystem.
+    """
+
+    def __init__(
+        self,
+        config: Optional[SecurityConfig] = None,
+        audit: Optional[PolicyAuditTrail] = None,
+        cache_size: int = 8192,
+    ):
+        self.config = config or SecurityConfig()
+        self.level = self.config.isolation_level
+        self._compiled = _compile(self.config.model_dump_json(), cache_size)
+        self.audit = audit or PolicyAuditTrail()
+        self._listeners: List[DecisionListener] = []
+
+    @property
+    def rules(self) -> PolicyRules:
+        """Effective rules after applying the config's overrides."""
+        return self._compiled.rules
+
+    @property
+    def network(self) -> NetworkPolicy:
+        """Network policy used for URL checks."""
+        return self._compiled.network
+
+    def add_listener(self, listener: DecisionListener) -> None:
+        """Call listener with every decision."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: DecisionListener) -> None:
+        """Stop calling a listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def check_file(
+        self, path: Union[str, Path], size: Optional[int] = None, write: bool = False
+    ) -> PolicyDecision:
+        """Check a file's path, extension and, if given, size in bytes."""
+        return self.evaluate(PolicyRequest("file", str(path), write, size))
+
+    def check_path(self, path: Union[str, Path], write: bool = False) -> PolicyDecision:
+        """Check a path against the path rules only."""
+        return self.evaluate(PolicyRequest("path", str(path), write))
+
+    def check_command(self, command: str) -> PolicyDecision:
+        """Check a command line."""
+        return self.evaluate(PolicyRequest("command", command))
+
+    def check_url(self, url: str) -> PolicyDecision:
+        """Check a URL's scheme and host."""
+        return self.evaluate(PolicyRequest("url", url))
+
+    def evaluate(self, request: PolicyRequest) -> PolicyDecision:
+        """Decide one request and record the decision."""
+        allowed, rule, reason = self._compiled.decide(request)
+        decision = PolicyDecision(request.kind, request.target, allowed, rule, reason)
+        self.audit.record(decision)
+        for listener in self._listeners:
+            try:
+                listener(decision)
+            except Exception as e:
+                logging.error(f"Policy decision listener failed: {e}")
+        return decision
+
+    def evaluate_many(self, requests: Iterable[_RequestLike]) -> List[PolicyDecision]:
+        """Decide many requests, given as PolicyRequest or (kind, target, ...) tuples."""
+        return [
+            self.evaluate(r if isinstance(r, PolicyRequest) else PolicyRequest(*r))
+            for r in requests
+        ]
+
+    def enforce(self, decision: PolicyDecision) -> PolicyDecision:
+        """Raise SecurityError if the decision denies the action."""
+        if not decision.allowed:
+            raise SecurityError(
+                f"{decision.kind.capitalize()} denied by {self.level} policy: "
+                f"{decision.target} ({decision.reason})"
+            )
+        return decision
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get decision cache and audit counters."""
+        info = self._compiled.decide.cache_info()
+        return {
+            "isolation_level": self.level,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+            "cache_size": info.currsize,
+            "audit": self.audit.get_stats(),
+        }
@@ -2,13 +2,23 @@
 Input validation and sanitization for security.
 """
 
+import logging
 import re
 import os
 from pathlib import Path
-from typing import Union, Set
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Union, Set
 from urllib.parse import urlparse
 
+from ..config.models import SecurityConfig as SecurityConfigModel
 from ..exceptions import SecurityError
+from .network import NetworkPolicy
+
+if TYPE_CHECKING:
+    from .ingest import FileCheck
+
+_DEFAULT_NETWORK_POLICY = NetworkPolicy()
+
+DenialListener = Callable[[str, str, str], None]
 
 
 class InputValidator:
@@ -75,8 +85,12 @@ class PathValidator:
     }
 
     @classmethod
-    def validate_host_path(cls, path: Union[str, Path]) -> Path:
-        """Validate host system path for security."""
+    def validate_host_path(cls, path: Union[str, Path], must_exist: bool = True) -> Path:
+        """Validate host system path for security.
+
+        With ``must_exist=False`` a missing path passes the existence and
+        access checks, for folders that are created later.
+        """
         if isinstance(path, str):
             path = Path(path)
 
@@ -97,6 +111,9 @@ class PathValidator:
             if path_str.startswith(protected.lower()):
                 raise SecurityError(f"Access to protected directory denied: {protected}")
 
+        if not must_exist and not abs_path.exists():
+            return abs_path
+
         # Ensure path exists and is accessible
         if not abs_path.exists():
             raise SecurityError(f"Path does not exist: {abs_path}")
@@ -160,9 +177,45 @@ class CommandValidator:
         r"<\s*\S",  # Input redirection
     ]
 
+    # Called with (check, target, reason) whenever a validation fails.
+    # Shared by the whole process, as the validators are class methods.
+    _listeners: List[DenialListener] = []
+
+    @classmethod
+    def add_listener(cls, listener: DenialListener) -> None:
+        """Call listener for every command or URL that fails validation.
+
+        Listeners are process-wide: they hear failures from every caller,
+        whichever manager or sandbox the validated input belongs to.
+        """
+        cls._listeners.append(listener)
+
+    @classmethod
+    def remove_listener(cls, listener: DenialListener) -> None:
+        """Stop calling a listener."""
+        if listener in cls._listeners:
+            cls._listeners.remove(listener)
+
+    @classmethod
+    def _notify_denied(cls, check: str, target: str, error: SecurityError) -> None:
+        """Tell listeners about a failed validation."""
+        for listener in list(cls._listeners):
+            try:
+                listener(check, target, str(error))
+            except Exception as e:
+                logging.error(f"Validation listener failed: {e}")
+
     @classmethod
     def validate_command(cls, command: str) -> str:
         """Validate command for security issues."""
+        try:
+            return cls._validate_command(command)
+        except SecurityError as e:
+            cls._notify_denied("command", command, e)
+            raise
+
+    @classmethod
+    def _validate_command(cls, command: str) -> str:
         if not command or not command.strip():
             raise SecurityError("Command cannot be empty")
 
@@ -200,8 +253,20 @@ class CommandValidator:
         return arg.strip()
 
     @classmethod
-    def validate_url(cls, url: str) -> str:
-        """Validate URL for security."""
+    def validate_url(cls, url: str, policy: Optional[NetworkPolicy] = None) -> str:
+        """Validate URL for security.
+
+        Hosts are checked against ``policy``; by default loopback, private
+        and link-local addresses are refused.
+        """
+        try:
+            return cls._validate_url(url, policy)
+        except SecurityError as e:
+            cls._notify_denied("url", url, e)
+            raise
+
+    @classmethod
+    def _validate_url(cls, url: str, policy: Optional[NetworkPolicy]) -> str:
         try:
             parsed = urlparse(url)
         except Exception as e:
@@ -212,15 +277,10 @@ class CommandValidator:
             raise SecurityError(f"Unsupported URL scheme: {parsed.scheme}")
 
         # Prevent local network access
-        hostname = parsed.hostname
-        if hostname:
-            # Block localhost and local IPs
-            if hostname.lower() in ["localhost", "127.0.0.1", "::1"]:
-                raise SecurityError("Local network access not allowed")
-
-            # Block private IP ranges (basic check)
-            if hostname.startswith(("192.168.", "10.", "172.")):
-                raise SecurityError("Private network access not allowed")
+        if parsed.hostname:
+            decision = (policy or _DEFAULT_NETWORK_POLICY).check_url(url)
+            if not decision.allowed:
+                raise SecurityError(f"Network access to {decision.host} not allowed: {decision.reason}")
 
         return url
 
@@ -228,26 +288,20 @@ class CommandValidator:
 class SecurityConfig:
     """
     Security configuration and policy enforcement.
+
+    Limits come from the policy rules of the config's isolation level
+    (see ``security.policy``); without a config they are the ``medium``
+    level's.
     """
 
-    def __init__(self) -> None:
-        self.allowed_file_extensions: Set[str] = {
-            ".txt",
-            ".py",
-            ".js",
-            ".json",
-            ".yaml",
-            ".yml",
-            ".md",
-            ".csv",
-            ".xml",
-            ".html",
-            ".css",
-            ".sql",
-            ".log",
-        }
-        self.max_file_size_mb: int = 100
-        self.max_command_length: int = 1000
+    def __init__(self, config: Optional[SecurityConfigModel] = None) -> None:
+        from .policy import SecurityPolicy
+
+        self.policy = SecurityPolicy(config)
+        rules = self.policy.rules
+        self.allowed_file_extensions: Set[str] = set(rules.allowed_extensions or [])
+        self.max_file_size_mb: int = rules.max_file_size_mb or 0
+        self.max_command_length: int = rules.max_command_length or 0
         self.enable_path_validation: bool = True
         self.enable_command_validation: bool = True
 
@@ -255,6 +309,7 @@ class SecurityConfig:
         """Validate file access according to security policy."""
         if self.enable_path_validation:
             PathValidator.validate_host_path(path)
+            self.policy.enforce(self.policy.check_path(path))
 
         # Check file size
         if path.is_file():
@@ -267,3 +322,21 @@ class SecurityConfig:
             raise SecurityError(f"File extension not allowed: {path.suffix}")
 
         return True
+
+    def validate_files(
+        self, root: Union[str, Path], max_workers: int = 8
+    ) -> Iterator["FileCheck"]:
+        """Check every file under root for staging, streaming one result per file.
+
+        Unlike validate_file_access(), the tree is walked once and file
+        contents are sniffed for spoofed extensions.
+        """
+        from .ingest import FileIngestValidator
+
+        return FileIngestValidator(self.policy, max_workers=max_workers).iter_checks(root)
+
+    def validate_command(self, command: str) -> str:
+        """Validate a command according to security policy."""
+        if self.enable_command_validation:
+            self.policy.enforce(self.policy.check_command(command))
+        return command.strip()
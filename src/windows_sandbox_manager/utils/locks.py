@@ -0,0 +1,81 @@
+"""
+File locks shared between processes.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import IO, Any, Optional, Union
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Exclusive lock on a file, held across processes.
+
+    Backed by ``msvcrt.locking()`` on Windows and ``flock()`` elsewhere. The
+    lock belongs to the open file rather than the process, so two FileLocks
+    on one path also exclude each other within a process. The lock is
+    released when the holder closes it or exits, however it exits.
+    """
+
+    def __init__(self, path: Union[str, Path], poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._file: Optional[IO[bytes]] = None
+
+    @property
+    def locked(self) -> bool:
+        """Whether this instance holds the lock."""
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        """Take the lock if it is free, without waiting."""
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Wait for the lock; raises TimeoutError after ``timeout`` seconds."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out after {timeout}s waiting for {self.path}")
+            time.sleep(self.poll_interval)
+
+    def release(self) -> None:
+        """Give the lock up. Idempotent."""
+        handle, self._file = self._file, None
+        if handle is None:
+            return
+        try:
+            if os.name == "nt":
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
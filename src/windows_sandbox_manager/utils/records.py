@@ -0,0 +1,79 @@
+"""
+Streaming writers for machine-readable output.
+"""
+
+import csv
+import json
+from typing import Any, Dict, Iterable, Mapping, Sequence, TextIO
+
+RECORD_FORMATS = ("json", "jsonl", "csv")
+
+
+class RecordWriter:
+    """
+    Writes records with a fixed set of fields as JSON, JSON lines or CSV.
+
+    Every record carries exactly ``fields``, in that order: missing fields
+    are written as null (empty in CSV) and extra keys are dropped, so the
+    schema does not depend on which values a command happened to produce.
+    Records are written as they arrive rather than collected first; JSON
+    output is a single array with one element per line, closed by
+    ``close()``. Nested values are JSON-encoded inside CSV cells.
+    """
+
+    def __init__(self, stream: TextIO, fmt: str, fields: Sequence[str]):
+        if fmt not in RECORD_FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}': use one of {', '.join(RECORD_FORMATS)}")
+        self.stream = stream
+        self.format = fmt
+        self.fields = tuple(fields)
+        self.count = 0
+        self._closed = False
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.writer(stream, lineterminator="\n")
+            self._csv.writerow(self.fields)
+
+    def write(self, record: Mapping[str, Any]) -> None:
+        """Write one record."""
+        row = self._project(record)
+        if self._csv is not None:
+            self._csv.writerow(_csv_cell(row[name]) for name in self.fields)
+        else:
+            line = json.dumps(row, separators=(",", ":"), default=str)
+            if self.format == "json":
+                line = ("[\n" if self.count == 0 else ",\n") + line
+            else:
+                line += "\n"
+            self.stream.write(line)
+        self.count += 1
+
+    def write_many(self, records: Iterable[Mapping[str, Any]]) -> int:
+        """Write records and flush once; returns how many were written."""
+        before = self.count
+        for record in records:
+            self.write(record)
+        self.stream.flush()
+        return self.count - before
+
+    def close(self) -> None:
+        """Finish the output (closing a JSON array); the stream stays open."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.format == "json":
+            self.stream.write("[]\n" if self.count == 0 else "\n]\n")
+        self.stream.flush()
+
+    def _project(self, record: Mapping[str, Any]) -> Dict[str, Any]:
+        """The record reduced to the writer's fields."""
+        return {name: record.get(name) for name in self.fields}
+
+
+def _csv_cell(value: Any) -> Any:
+    """CSV representation of a value."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
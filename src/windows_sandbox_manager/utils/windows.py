@@ -2,10 +2,14 @@
 Windows-specific utility functions.
 """
 
+import os
 import platform
 import subprocess
+from pathlib import Path
 from typing import Dict, Tuple
 
+import psutil
+
 from ..exceptions import SandboxError
 
 
@@ -77,6 +81,37 @@ class WindowsUtils:
 
         return info
 
+    @staticmethod
+    def get_cache_dir(name: str) -> Path:
+        """Get the host-side cache directory for a named cache.
+
+        Honours ``WSB_CACHE_DIR``, then ``%LOCALAPPDATA%``, then ``~/.cache``.
+        """
+        root = os.environ.get("WSB_CACHE_DIR")
+        if root:
+            return Path(root) / name
+
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        if local_app_data:
+            return Path(local_app_data) / "WindowsSandboxManager" / "Cache" / name
+
+        return Path.home() / ".cache" / "windows-sandbox-manager" / name
+
+    @staticmethod
+    def kill_process_tree(pid: int) -> None:
+        """Kill a process and all of its descendants, ignoring ones already gone."""
+        try:
+            root = psutil.Process(pid)
+            processes = [*root.children(recursive=True), root]
+        except psutil.Error:
+            return
+
+        for proc in processes:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+
     @staticmethod
     def _get_windows_edition() -> str:
         """Get Windows edition (Pro, Enterprise, etc.)."""
@@ -0,0 +1,140 @@
+"""
+Unit tests for per-execution resource accounting.
+"""
+
+import json
+import shlex
+import sys
+from pathlib import Path
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.events import EventBus, ExecutionFinishedEvent
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.exceptions import SandboxError
+from windows_sandbox_manager.monitoring.accounting import read_guest_usage
+
+BUSY_SCRIPT = """
+import sys, time
+data = bytearray(32 * 1024 * 1024)
+end = time.process_time() + 0.3
+while time.process_time() < end:
+    pass
+sys.stdout.write("x" * 1000)
+sys.stderr.write("e" * 10)
+"""
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch) -> Sandbox:
+    """Running sandbox whose commands run as local Python scripts."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        Sandbox,
+        "_build_powershell_command",
+        lambda self, command, usage_path=None: f"{shlex.quote(sys.executable)} -c {shlex.quote(command)}",
+    )
+    sandbox = Sandbox(SandboxConfig(name="accounting"), event_bus=EventBus())
+    sandbox.state = SandboxState.RUNNING
+    return sandbox
+
+
+class TestExecutionAccounting:
+    """Test usage recorded around Sandbox.execute."""
+
+    async def test_usage_on_result(self, sandbox):
+        """Test CPU, memory and output sizes are measured."""
+        result = await sandbox.execute(BUSY_SCRIPT)
+
+        assert result.success
+        assert result.usage.stdout_bytes == 1000
+        assert result.usage.stderr_bytes == 10
+        assert result.usage.client_cpu_time_seconds >= 0.1
+        assert result.usage.client_peak_memory_mb >= 32
+        # The local stand-in for the guest reports nothing
+        assert not result.usage.measured
+        assert sandbox.usage_totals.unmeasured_executions == 1
+
+    async def test_totals_and_event(self, sandbox):
+        """Test usage is aggregated per sandbox and published."""
+        subscription = sandbox.event_bus.subscribe(event_types={ExecutionFinishedEvent})
+
+        await sandbox.execute("print('hello')")
+        await sandbox.execute("print('world!')")
+
+        totals = sandbox.usage_totals
+        assert totals.executions == 2
+        assert totals.stdout_bytes == len("hello\n") + len("world!\n")
+        assert totals.wall_time_seconds > 0
+
+        event = await subscription.get()
+        assert event.usage.stdout_bytes == len("hello\n")
+
+    async def test_failed_execution_counted(self, sandbox):
+        """Test timed-out executions still count towards the totals."""
+        with pytest.raises(SandboxError):
+            await sandbox.execute("import time; time.sleep(5)", timeout=0.2)
+
+        assert sandbox.usage_totals.executions == 1
+
+
+GUEST_REPORT = {
+    "cpu_time_seconds": 1.23456,
+    "peak_memory_mb": 64.123,
+    "io_read_bytes": 4096,
+    "io_write_bytes": 512,
+    "process_count": 3,
+}
+
+
+class TestGuestUsage:
+    """Test counters reported from inside the sandbox."""
+
+    @pytest.fixture
+    def reporting_sandbox(self, sandbox, monkeypatch) -> Sandbox:
+        """Sandbox whose commands also write a guest usage report."""
+
+        def build(self, command: str, usage_path: Path) -> str:
+            write_report = (
+                f"import json; open({str(usage_path)!r}, 'w').write("
+                f"json.dumps({GUEST_REPORT!r}))"
+            )
+            return f"{shlex.quote(sys.executable)} -c {shlex.quote(write_report + chr(10) + command)}"
+
+        monkeypatch.setattr(Sandbox, "_build_powershell_command", build)
+        return sandbox
+
+    async def test_guest_counters_on_result(self, reporting_sandbox):
+        """Test guest counters are attached to the result and totals."""
+        result = await reporting_sandbox.execute("print('hello')")
+        await reporting_sandbox.execute("print('again')")
+
+        usage = result.usage
+        assert usage.measured
+        assert usage.cpu_time_seconds == 1.2346
+        assert usage.peak_memory_mb == 64.12
+        assert (usage.io_read_bytes, usage.io_write_bytes, usage.process_count) == (4096, 512, 3)
+        assert usage.stdout_bytes == len("hello\n")
+
+        totals = reporting_sandbox.usage_totals
+        assert totals.cpu_time_seconds == pytest.approx(2.4692)
+        assert totals.peak_memory_mb == 64.12
+        assert totals.process_count == 6
+        assert totals.unmeasured_executions == 0
+        # Reports are consumed
+        assert not list(reporting_sandbox._execution_dir.glob("usage-*.json"))
+
+    def test_invalid_report_ignored(self, tmp_path):
+        """Test unreadable or incomplete reports yield no counters."""
+        assert read_guest_usage(tmp_path / "missing.json") == {}
+
+        partial = tmp_path / "partial.json"
+        partial.write_text(json.dumps({"cpu_time_seconds": 1.0}))
+        assert read_guest_usage(partial) == {}
+        assert not partial.exists()
+
+        garbled = tmp_path / "garbled.json"
+        garbled.write_text("{not json")
+        assert read_guest_usage(garbled) == {}
+        assert not garbled.exists()
@@ -0,0 +1,161 @@
+"""
+Unit tests for the audit log.
+"""
+
+import shlex
+import sys
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.audit import AuditLog, command_hash, parse_time
+from windows_sandbox_manager.core.events import EventBus
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.security.validation import CommandValidator, SecurityError
+
+
+def entry(sandbox_id: str, ts: float, **fields) -> dict:
+    """Minimal execution entry."""
+    return {"type": "execution", "sandbox_id": sandbox_id, "ts": ts, "command": "dir", **fields}
+
+
+class TestAuditLog:
+    """Test buffering, segments and queries."""
+
+    def test_record_does_not_touch_disk(self, tmp_path):
+        """Test entries are only written on flush."""
+        log = AuditLog(tmp_path / "audit")
+        log.record(entry("sb-1", 100.0))
+
+        assert not (tmp_path / "audit").exists()
+        assert log.flush_sync() == 1
+        assert [e["sandbox_id"] for e in log.query()] == ["sb-1"]
+
+    def test_query_filters(self, tmp_path):
+        """Test sandbox prefix, time range, type and limit filters."""
+        log = AuditLog(tmp_path)
+        for i in range(10):
+            log.record(entry(f"sb-{i % 2}-abcdef", 1000.0 + i))
+        log.record({"type": "security", "sandbox_id": "sb-0-abcdef", "ts": 1005.5})
+        log.flush_sync()
+
+        assert len(list(log.query(sandbox_id="sb-0"))) == 6
+        assert [e["ts"] for e in log.query(since=1007, until=1008.5)] == [1007.0, 1008.0]
+        assert len(list(log.query(entry_type="security"))) == 1
+        assert len(list(log.query(limit=3))) == 3
+
+    def test_rotation_and_index(self, tmp_path):
+        """Test segments rotate, compress and are skipped via the index."""
+        log = AuditLog(tmp_path, compress=True, max_segment_bytes=1, max_segments=3)
+        for i in range(5):
+            log.record(entry(f"sb-{i}", 2000.0 + i))
+            log.flush_sync()
+
+        names = sorted(p.name for p in tmp_path.glob("audit-*"))
+        assert names == ["audit-000003.jsonl.gz", "audit-000004.jsonl.gz", "audit-000005.jsonl.gz"]
+        assert [e["sandbox_id"] for e in log.query()] == ["sb-2", "sb-3", "sb-4"]
+
+        # Only the segment listing the sandbox is opened
+        opened = []
+        original = AuditLog._read_segment
+        log._read_segment = lambda path: (opened.append(path.name), original(path))[1]
+        assert [e["ts"] for e in log.query(sandbox_id="sb-3")] == [2003.0]
+        assert opened == ["audit-000004.jsonl.gz"]
+
+    def test_index_rebuilt_when_corrupt(self, tmp_path):
+        """Test a damaged index is recomputed from the segments."""
+        log = AuditLog(tmp_path)
+        log.record(entry("sb-1", 5.0))
+        log.flush_sync()
+        (tmp_path / "index.json").write_text("{not json")
+
+        assert [e["ts"] for e in log.query()] == [5.0]
+
+    def test_full_buffer_drops_oldest(self, tmp_path):
+        """Test a full buffer drops entries instead of blocking."""
+        log = AuditLog(tmp_path, max_buffer=3)
+        for i in range(5):
+            log.record(entry("sb", float(i)))
+
+        assert log.get_stats()["dropped"] == 2
+        log.flush_sync()
+        assert [e["ts"] for e in log.query()] == [2.0, 3.0, 4.0]
+
+    def test_parse_time(self):
+        """Test ISO timestamps and relative ages."""
+        assert parse_time("1970-01-01T00:01:40") == 100.0
+        assert parse_time(datetime(1970, 1, 1, 0, 2, tzinfo=timezone.utc)) == 120.0
+        assert abs(parse_time("2h") - (time.time() - 7200)) < 5
+        with pytest.raises(ValueError):
+            parse_time("yesterday")
+
+
+class TestAuditAttach:
+    """Test recording from the event bus and validators."""
+
+    async def test_records_executions_and_decisions(self, tmp_path, monkeypatch):
+        """Test executions, policy decisions and validator denials are audited."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(
+            Sandbox,
+            "_build_powershell_command",
+            lambda self, command, usage_path=None: f"{shlex.quote(sys.executable)} -c {shlex.quote(command)}",
+        )
+        bus = EventBus()
+        log = AuditLog(tmp_path / "audit", flush_interval=0.05)
+        log.attach(bus)
+
+        sandbox = Sandbox(SandboxConfig(name="audited"), event_bus=bus)
+        sandbox.state = SandboxState.RUNNING
+        await sandbox.execute("print('hello')")
+        sandbox.security_policy.check_command("format c:")
+        with pytest.raises(SecurityError):
+            CommandValidator.validate_command("shutdown /s")
+        await log.detach()
+
+        entries = list(log.query())
+        assert len(entries) == 3
+        execution = next(e for e in entries if e["type"] == "execution")
+        decision = next(e for e in entries if e.get("sandbox_id") and e["type"] == "security")
+        denial = next(e for e in entries if e.get("sandbox_id") is None)
+        assert execution["command_sha256"] == command_hash("print('hello')")
+        assert (execution["returncode"], execution["stdout_bytes"]) == (0, 6)
+        assert execution["started_at"] <= execution["ts"]
+        assert (decision["sandbox_id"], decision["allowed"]) == (sandbox.id, False)
+        assert (denial["sandbox_id"], denial["check"]) == (None, "command")
+
+        # Detached logs no longer hear validator denials
+        with pytest.raises(SecurityError):
+            CommandValidator.validate_command("shutdown /s")
+        assert log.get_stats()["recorded"] == 3
+
+    async def test_cached_results_and_allowed_decisions(self, tmp_path, monkeypatch):
+        """Test cache hits are audited as such and allowed decisions stay out by default."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(
+            Sandbox,
+            "_build_powershell_command",
+            lambda self, command, usage_path=None: f"{shlex.quote(sys.executable)} -c {shlex.quote(command)}",
+        )
+        bus = EventBus()
+        log = AuditLog(tmp_path / "audit", validator_denials=False)
+        log.attach(bus)
+
+        sandbox = Sandbox(SandboxConfig(name="cached"), event_bus=bus)
+        sandbox.state = SandboxState.RUNNING
+        for _ in range(2):
+            await sandbox.execute("print('hello')", cache=True)
+        for _ in range(20):
+            sandbox.security_policy.check_command("python --version")
+        with pytest.raises(SecurityError):
+            CommandValidator.validate_command("shutdown /s")
+        await log.detach()
+
+        entries = list(log.query())
+        assert [(e["type"], e["cached"]) for e in entries] == [
+            ("execution", False),
+            ("execution", True),
+        ]
+        assert log.get_stats()["events_dropped"] == 0
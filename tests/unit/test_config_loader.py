@@ -0,0 +1,74 @@
+"""
+Unit tests for cached and bulk configuration loading.
+"""
+
+import os
+
+import pytest
+
+from windows_sandbox_manager.config.loader import ConfigLoader
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.exceptions import ConfigurationError
+
+
+class TestConfigLoader:
+    """Test ConfigLoader class."""
+
+    def test_round_trip_with_paths(self, tmp_path):
+        """Test configs with folder mappings survive to_file/from_file."""
+        config = SandboxConfig(
+            name="roundtrip", folders=[{"host": "C:/host", "guest": "C:/guest"}]
+        )
+        config.to_file(tmp_path / "config.yaml")
+
+        loaded = SandboxConfig.from_file(tmp_path / "config.yaml")
+        assert loaded == config
+
+    def test_cache_hit_and_invalidation_on_change(self, tmp_path):
+        """Test unchanged files come from the cache and edits are picked up."""
+        path = tmp_path / "config.yaml"
+        SandboxConfig(name="first").to_file(path)
+        loader = ConfigLoader()
+
+        assert loader.load(path).name == "first"
+        assert loader.load(path).name == "first"
+        assert loader.get_stats()["hits"] == 1
+
+        SandboxConfig(name="second-name").to_file(path)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert loader.load(path).name == "second-name"
+        assert loader.get_stats()["misses"] == 2
+
+    def test_returned_configs_are_copies(self, temp_config_file):
+        """Test mutating a loaded config does not leak into the cache."""
+        loader = ConfigLoader()
+        loader.load(temp_config_file).name = "changed"
+
+        assert loader.load(temp_config_file).name == "test-sandbox"
+
+    def test_load_directory(self, tmp_path):
+        """Test bulk loading a directory of configs."""
+        for i in range(20):
+            SandboxConfig(name=f"sandbox-{i}").to_file(tmp_path / f"s{i}.yaml")
+        SandboxConfig(name="json-sandbox").to_file(tmp_path / "s.json", format="json")
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        configs = ConfigLoader().load_directory(tmp_path)
+
+        assert len(configs) == 21
+        assert configs[tmp_path / "s.json"].name == "json-sandbox"
+
+    def test_load_many_reports_all_errors(self, tmp_path):
+        """Test every failing file is reported at once."""
+        SandboxConfig(name="good").to_file(tmp_path / "good.yaml")
+        (tmp_path / "bad1.yaml").write_text("name: ''\n")
+        (tmp_path / "bad2.yaml").write_text("memory_mb: 1\nname: x\n")
+
+        with pytest.raises(ConfigurationError) as exc_info:
+            ConfigLoader().load_directory(tmp_path)
+
+        message = str(exc_info.value)
+        assert "2 of 3" in message
+        assert "bad1.yaml" in message
+        assert "bad2.yaml" in message
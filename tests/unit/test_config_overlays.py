@@ -0,0 +1,145 @@
+"""
+Unit tests for config inheritance and overlays.
+"""
+
+from pathlib import Path
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from windows_sandbox_manager.cli.main import cli
+from windows_sandbox_manager.config.loader import ConfigLoader, deep_merge
+from windows_sandbox_manager.config import loader as loader_module, models
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.exceptions import ConfigurationError
+
+
+def write_yaml(path, data) -> None:
+    """Write a YAML file."""
+    path.write_text(yaml.dump(data), encoding="utf-8")
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    """Directory with a shared base config."""
+    write_yaml(
+        tmp_path / "base.yaml",
+        {
+            "name": "base",
+            "memory_mb": 2048,
+            "startup_commands": ["python --version"],
+            "monitoring": {"log_level": "warning", "health_check_interval": 60},
+        },
+    )
+    return tmp_path
+
+
+class TestDeepMerge:
+    """Test deep_merge function."""
+
+    def test_mappings_merge_and_lists_replace(self):
+        """Test merge semantics."""
+        base = {"a": {"x": 1, "y": 2}, "items": [1, 2], "keep": True}
+        override = {"a": {"y": 3}, "items": [3]}
+
+        assert deep_merge(base, override) == {
+            "a": {"x": 1, "y": 3},
+            "items": [3],
+            "keep": True,
+        }
+        assert base["a"]["y"] == 2
+
+
+class TestConfigInheritance:
+    """Test extends and overlays in ConfigLoader."""
+
+    def test_extends(self, base_dir):
+        """Test a config inherits and overrides its base."""
+        write_yaml(
+            base_dir / "child.yaml",
+            {"extends": "base.yaml", "name": "child", "monitoring": {"log_level": "debug"}},
+        )
+
+        config = ConfigLoader().load(base_dir / "child.yaml")
+
+        assert config.name == "child"
+        assert config.memory_mb == 2048
+        assert config.startup_commands == ["python --version"]
+        assert config.monitoring.log_level == "debug"
+        assert config.monitoring.health_check_interval == 60
+
+        # from_file resolves extends as well
+        assert SandboxConfig.from_file(base_dir / "child.yaml") == config
+
+    def test_overlays_apply_in_order(self, base_dir):
+        """Test overlays are merged after the file and its bases."""
+        write_yaml(base_dir / "ci.yaml", {"memory_mb": 4096, "cpu_cores": 4})
+        write_yaml(base_dir / "small.yaml", {"memory_mb": 1024})
+
+        config = ConfigLoader().load(
+            base_dir / "base.yaml", overlays=[base_dir / "ci.yaml", base_dir / "small.yaml"]
+        )
+
+        assert config.memory_mb == 1024
+        assert config.cpu_cores == 4
+
+    def test_shared_base_parsed_once(self, base_dir):
+        """Test many children of one base parse it only once."""
+        for i in range(10):
+            write_yaml(base_dir / f"child{i}.yaml", {"extends": "base.yaml", "name": f"c{i}"})
+
+        loader = ConfigLoader()
+        for i in range(10):
+            loader.load(base_dir / f"child{i}.yaml")
+        loader.load(base_dir / "child0.yaml")
+
+        stats = loader.get_stats()
+        assert stats["files_parsed"] == 11
+        assert stats["hits"] == 1
+
+    def test_diamond_extends_merges_shared_base_once(self, base_dir, monkeypatch):
+        """Test a base reached through two parents does not undo the first parent."""
+        write_yaml(base_dir / "big.yaml", {"extends": "base.yaml", "memory_mb": 8192})
+        write_yaml(base_dir / "fast.yaml", {"extends": "base.yaml", "cpu_cores": 4})
+        write_yaml(
+            base_dir / "child.yaml", {"extends": ["big.yaml", "fast.yaml"], "name": "child"}
+        )
+
+        loader = ConfigLoader()
+        config = loader.load(base_dir / "child.yaml")
+
+        assert (config.memory_mb, config.cpu_cores) == (8192, 4)
+        assert loader.get_stats()["files_parsed"] == 4
+
+        # from_file reads the child itself once and the loader reads only its bases
+        reads = []
+        original = models.read_config_data
+        for module in (models, loader_module):
+            monkeypatch.setattr(
+                module,
+                "read_config_data",
+                lambda path: reads.append(Path(path).name) or original(path),
+            )
+        assert SandboxConfig.from_file(base_dir / "child.yaml") == config
+        assert sorted(reads) == ["base.yaml", "big.yaml", "child.yaml", "fast.yaml"]
+
+    def test_circular_extends(self, tmp_path):
+        """Test extends cycles are reported."""
+        write_yaml(tmp_path / "a.yaml", {"extends": "b.yaml", "name": "a"})
+        write_yaml(tmp_path / "b.yaml", {"extends": "a.yaml", "name": "b"})
+
+        with pytest.raises(ConfigurationError, match="Circular"):
+            ConfigLoader().load(tmp_path / "a.yaml")
+
+    def test_render_command(self, base_dir):
+        """Test wsb config render prints the effective config."""
+        write_yaml(base_dir / "child.yaml", {"extends": "base.yaml", "name": "child"})
+
+        result = CliRunner().invoke(cli, ["config", "render", str(base_dir / "child.yaml")])
+
+        assert result.exit_code == 0
+        rendered = yaml.safe_load(result.output)
+        assert rendered["name"] == "child"
+        assert rendered["memory_mb"] == 2048
+        assert "extends" not in rendered
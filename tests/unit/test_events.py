@@ -0,0 +1,75 @@
+"""
+Unit tests for the sandbox event bus.
+"""
+
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.events import (
+    DropPolicy,
+    EventBus,
+    ExecutionStartedEvent,
+    StateChangedEvent,
+)
+from windows_sandbox_manager.core.registry import SandboxRegistry
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+
+
+class TestEventBus:
+    """Test EventBus and Subscription classes."""
+
+    async def test_filtered_subscription(self):
+        """Test subscriptions only receive matching events."""
+        bus = EventBus()
+        state_events = bus.subscribe(event_types={StateChangedEvent})
+        one_sandbox = bus.subscribe(sandbox_id="a")
+
+        bus.publish(ExecutionStartedEvent(sandbox_id="a", command="dir"))
+        bus.publish(StateChangedEvent("b", SandboxState.PENDING, SandboxState.CREATING))
+
+        assert state_events.pending == 1
+        assert (await state_events.get()).sandbox_id == "b"
+        assert one_sandbox.pending == 1
+        assert (await one_sandbox.get()).command == "dir"
+
+    async def test_drop_policies(self):
+        """Test bounded queues drop according to policy."""
+        bus = EventBus()
+        oldest = bus.subscribe(maxsize=2, drop_policy=DropPolicy.DROP_OLDEST)
+        newest = bus.subscribe(maxsize=2, drop_policy=DropPolicy.DROP_NEWEST)
+
+        for command in ["one", "two", "three"]:
+            bus.publish(ExecutionStartedEvent(sandbox_id="a", command=command))
+
+        assert [(await oldest.get()).command for _ in range(2)] == ["two", "three"]
+        assert [(await newest.get()).command for _ in range(2)] == ["one", "two"]
+        assert bus.get_stats()["dropped"] == 2
+
+    async def test_close_ends_iteration(self):
+        """Test closing a subscription ends async iteration."""
+        bus = EventBus()
+        subscription = bus.subscribe()
+        bus.publish(ExecutionStartedEvent(sandbox_id="a", command="dir"))
+        subscription.close()
+
+        received = [event async for event in subscription]
+        assert len(received) == 1
+        assert bus.get_stats()["subscribers"] == 0
+
+
+class TestSandboxEvents:
+    """Test sandboxes publish events and the registry follows them."""
+
+    async def test_state_change_reaches_registry(self, tmp_path):
+        """Test registry state is updated from pushed events."""
+        bus = EventBus()
+        registry = SandboxRegistry(tmp_path / "registry.json")
+        sandbox = Sandbox(SandboxConfig(name="events"), event_bus=bus)
+
+        await registry.register(sandbox)
+        registry.attach(bus)
+
+        sandbox.state = SandboxState.RUNNING
+        await registry.detach()
+
+        info = await registry.get_info(sandbox.id)
+        assert info.state == SandboxState.RUNNING.value
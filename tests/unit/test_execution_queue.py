@@ -0,0 +1,213 @@
+"""
+Unit tests for the per-sandbox execution scheduler.
+"""
+
+import asyncio
+import shlex
+import subprocess
+import sys
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.execution_queue import (
+    ExecutionPriority,
+    ExecutionScheduler,
+    SharedSlots,
+)
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.exceptions import ResourceError
+
+
+async def enqueue(scheduler: ExecutionScheduler, order: list, label: str, **kwargs):
+    """Queue an acquisition that records its label when granted."""
+
+    async def run():
+        ticket = await scheduler.acquire(**kwargs)
+        order.append(label)
+        return ticket
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(0)
+    return task
+
+
+class TestExecutionScheduler:
+    """Test slot limits, ordering and timeouts."""
+
+    async def test_limits_concurrency(self):
+        """Test executions beyond the limit wait for a release."""
+        scheduler = ExecutionScheduler(max_concurrent=2)
+        first = await scheduler.acquire()
+        await scheduler.acquire()
+
+        order = []
+        waiting = await enqueue(scheduler, order, "third")
+        assert order == []
+        assert scheduler.get_stats()["queue_depth"] == 1
+
+        scheduler.release(first)
+        ticket = await waiting
+        assert order == ["third"]
+        assert ticket.wait_time > 0
+        assert scheduler.get_stats()["running"] == 2
+
+    async def test_priority_then_tenant_fairness(self):
+        """Test higher classes go first and tenants take turns within a class."""
+        scheduler = ExecutionScheduler(max_concurrent=1)
+        running = await scheduler.acquire()
+
+        order = []
+        tasks = {
+            "a1": await enqueue(scheduler, order, "a1", tenant="a", priority="low"),
+            "a2": await enqueue(scheduler, order, "a2", tenant="a"),
+            "a3": await enqueue(scheduler, order, "a3", tenant="a"),
+            "b1": await enqueue(scheduler, order, "b1", tenant="b"),
+            "h1": await enqueue(scheduler, order, "h1", tenant="b", priority="high"),
+        }
+        stats = scheduler.get_stats()
+        assert stats["queue_depth_by_priority"] == {"high": 1, "normal": 3, "low": 1}
+
+        ticket, pending = running, set(tasks.values())
+        while pending:
+            scheduler.release(ticket)
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            assert len(done) == 1
+            ticket = done.pop().result()
+
+        assert order == ["h1", "a2", "b1", "a3", "a1"]
+        assert ticket.priority == ExecutionPriority.LOW
+
+    async def test_queue_full_rejected(self):
+        """Test arrivals are rejected once the queue is full."""
+        scheduler = ExecutionScheduler(max_concurrent=1, max_queue_size=1)
+        await scheduler.acquire()
+        await enqueue(scheduler, [], "queued")
+
+        with pytest.raises(ResourceError, match="queue full"):
+            await scheduler.acquire()
+        assert scheduler.get_stats()["rejected"] == 1
+
+    async def test_queue_timeout(self):
+        """Test a waiter gives up after the queue timeout and leaves the queue."""
+        scheduler = ExecutionScheduler(max_concurrent=1, queue_timeout=0.05)
+        ticket = await scheduler.acquire()
+
+        with pytest.raises(ResourceError, match="Timed out"):
+            await scheduler.acquire()
+
+        stats = scheduler.get_stats()
+        assert stats["timed_out"] == 1
+        assert stats["queue_depth"] == 0
+        scheduler.release(ticket)
+        assert scheduler.get_stats()["running"] == 0
+
+
+HOLD_SLOT_SCRIPT = """
+import sys, time
+from windows_sandbox_manager.core.execution_queue import ExecutionPriority, SharedSlots
+slot = SharedSlots(sys.argv[1], 1).try_take(ExecutionPriority.NORMAL)
+print("held" if slot else "busy", flush=True)
+time.sleep(float(sys.argv[2]))
+"""
+
+
+class TestSharedSlots:
+    """Test limits shared by schedulers in several processes."""
+
+    def shared(self, tmp_path, **kwargs) -> ExecutionScheduler:
+        """Scheduler using the single slot in tmp_path."""
+        return ExecutionScheduler(
+            max_concurrent=4, shared_slots=SharedSlots(tmp_path, 1), poll_interval=0.01, **kwargs
+        )
+
+    async def test_schedulers_share_the_limit(self, tmp_path):
+        """Test a second scheduler waits for the first to release."""
+        first, second = self.shared(tmp_path), self.shared(tmp_path)
+        ticket = await first.acquire()
+
+        order = []
+        waiting = await enqueue(second, order, "second")
+        await asyncio.sleep(0.05)
+        assert order == []
+
+        first.release(ticket)
+        assert (await waiting).wait_time > 0
+        assert order == ["second"]
+
+    async def test_priority_across_schedulers(self, tmp_path):
+        """Test a higher class waiting elsewhere goes first."""
+        holder, low, high = (self.shared(tmp_path) for _ in range(3))
+        ticket = await holder.acquire()
+
+        order = []
+        low_task = await enqueue(low, order, "low", priority="low")
+        high_task = await enqueue(high, order, "high", priority="high")
+        await asyncio.sleep(0.05)
+
+        holder.release(ticket)
+        high.release(await high_task)
+        await low_task
+        assert order == ["high", "low"]
+        assert not list(tmp_path.glob("waiting-*"))
+
+    async def test_slot_held_by_another_process(self, tmp_path):
+        """Test a slot held by another process blocks until it exits."""
+        proc = subprocess.Popen(
+            [sys.executable, "-c", HOLD_SLOT_SCRIPT, str(tmp_path), "0.5"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert proc.stdout.readline().strip() == "held"
+            scheduler = self.shared(tmp_path)
+
+            with pytest.raises(ResourceError, match="Timed out"):
+                await scheduler.acquire(timeout=0.1)
+            ticket = await scheduler.acquire(timeout=10)
+            assert ticket.slot is not None
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch) -> Sandbox:
+    """Running sandbox whose commands run as local Python scripts."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        Sandbox,
+        "_build_powershell_command",
+        lambda self, command, usage_path=None: f"{shlex.quote(sys.executable)} -c {shlex.quote(command)}",
+    )
+    config = SandboxConfig(name="queued", execution={"max_concurrent": 1})
+    sandbox = Sandbox(config)
+    sandbox.state = SandboxState.RUNNING
+    return sandbox
+
+
+class TestExecuteScheduling:
+    """Test Sandbox.execute goes through the scheduler."""
+
+    async def test_executions_serialised(self, sandbox):
+        """Test commands beyond the limit queue instead of running at once."""
+        results = await asyncio.gather(
+            sandbox.execute("import time; time.sleep(0.3)"),
+            sandbox.execute("print('second')"),
+        )
+
+        assert all(result.success for result in results)
+        assert results[1].queue_time > 0.2
+        assert sandbox.execution_scheduler.get_stats()["granted"] == 2
+
+    async def test_queue_timeout_raises(self, sandbox):
+        """Test a command that cannot get a slot in time fails without running."""
+        slow = asyncio.create_task(sandbox.execute("import time; time.sleep(0.5)"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ResourceError):
+            await sandbox.execute("print('never')", queue_timeout=0.05)
+        assert sandbox.idle_seconds == 0
+
+        await slow
+        assert sandbox.usage_totals.executions == 1
@@ -0,0 +1,127 @@
+"""
+Unit tests for bulk file-ingest validation.
+"""
+
+import os
+import time
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig, SecurityConfig
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.exceptions import SecurityError
+from windows_sandbox_manager.security.ingest import FileIngestValidator
+from windows_sandbox_manager.security.policy import SecurityPolicy
+from windows_sandbox_manager.security.validation import SecurityConfig as SecurityEnforcer
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Directory mixing valid, oversized and disguised files."""
+    root = tmp_path / "ingest"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("print('ok')\n")
+    (root / "data.csv").write_text("a,b\n1,2\n")
+    (root / "empty.txt").write_bytes(b"")
+    (root / "notes.txt").write_bytes(b"MZ\x90\x00\x03" + b"\x00" * 100)
+    (root / "report.json").write_bytes(b"PK\x03\x04" + b"\x00" * 50)
+    (root / "blob.log").write_bytes(b"abc\x00def")
+    (root / "tool.exe").write_bytes(b"MZ")
+    return root
+
+
+def results(root, **security):
+    """Path (relative to root) -> check for every file."""
+    validator = FileIngestValidator(SecurityPolicy(SecurityConfig(**security)), max_workers=4)
+    return {
+        os.path.relpath(check.path, root).replace(os.sep, "/"): check
+        for check in validator.iter_checks(root)
+    }
+
+
+class TestFileIngestValidator:
+    """Test tree walking, policy checks and content sniffing."""
+
+    def test_checks_every_file(self, tree):
+        """Test each file gets one result with the right verdict."""
+        checks = results(tree)
+
+        assert {path for path, c in checks.items() if c.allowed} == {
+            "src/app.py",
+            "data.csv",
+            "empty.txt",
+        }
+        assert checks["notes.txt"].detected_type == "windows-executable"
+        assert "windows-executable content with .txt" in checks["notes.txt"].reason
+        assert checks["report.json"].detected_type == "zip"
+        assert checks["blob.log"].reason == "binary content"
+        assert "extension" in checks["tool.exe"].reason
+        assert checks["data.csv"].size == 8
+
+    def test_size_limit_from_policy(self, tree):
+        """Test sizes from the walk are checked against the level's limit."""
+        (tree / "big.txt").write_bytes(b"x" * (2 * 1024 * 1024))
+        checks = results(tree, rules={"medium": {"max_file_size_mb": 1}})
+
+        assert not checks["big.txt"].allowed
+        assert "larger than 1MB" in checks["big.txt"].reason
+
+    def test_low_level_allows_matching_binaries(self, tree):
+        """Test binaries pass when their extension matches their content."""
+        checks = results(tree, isolation_level="low")
+
+        assert checks["tool.exe"].allowed
+        assert checks["blob.log"].allowed is False
+        assert not checks["notes.txt"].allowed
+
+    def test_symlinks_are_refused(self, tree):
+        """Test links are reported instead of followed."""
+        (tree / "link.txt").symlink_to(tree / "data.csv")
+        assert results(tree)["link.txt"].reason == "symbolic links are not staged"
+
+    def test_streams_in_walk_order(self, tmp_path):
+        """Test results stream lazily and large trees validate quickly."""
+        root = tmp_path / "many"
+        for d in range(10):
+            folder = root / f"d{d}"
+            folder.mkdir(parents=True)
+            for f in range(200):
+                (folder / f"f{f}.txt").write_text("x")
+
+        validator = FileIngestValidator(max_workers=8)
+        iterator = validator.iter_checks(root)
+        assert next(iterator).allowed
+
+        started = time.perf_counter()
+        count = 1 + sum(1 for _ in iterator)
+        assert count == 2_000
+        assert time.perf_counter() - started < 5
+
+    def test_raise_for_violations(self, tree):
+        """Test failures are summarised up to the limit."""
+        with pytest.raises(SecurityError) as excinfo:
+            FileIngestValidator().raise_for_violations(tree, limit=2)
+        assert "4 file(s) failed validation" in str(excinfo.value)
+        assert "... and 2 more" in str(excinfo.value)
+
+    def test_security_config_entry_point(self, tree):
+        """Test SecurityConfig.validate_files() streams the same checks."""
+        denied = [c for c in SecurityEnforcer().validate_files(tree) if not c.allowed]
+        assert len(denied) == 4
+
+
+class TestSandboxIngest:
+    """Test Sandbox.put_files(validate=True)."""
+
+    async def test_rejects_before_copying(self, tree, tmp_path, monkeypatch):
+        """Test nothing is staged when a file fails validation."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        staging = tmp_path / "staging"
+        sandbox = Sandbox(
+            SandboxConfig(name="ingest", transfer={"enabled": True, "host_dir": str(staging)})
+        )
+        sandbox.state = SandboxState.RUNNING
+
+        with pytest.raises(SecurityError):
+            await sandbox.put_files(tree, validate=True)
+        assert not (staging / "inbox" / "ingest").exists()
@@ -0,0 +1,214 @@
+"""
+Unit tests for pipelined fleet creation.
+"""
+
+import asyncio
+import pytest
+from typing import AsyncGenerator, Dict, List
+
+from windows_sandbox_manager.config.fleet import FleetManifest
+from windows_sandbox_manager.config.models import FolderMapping, SandboxConfig
+from windows_sandbox_manager.core.fleet import FleetProgress
+from windows_sandbox_manager.core.manager import SandboxManager
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.core.scheduler import ResourceScheduler
+from windows_sandbox_manager.exceptions import ConfigurationError, SandboxCreationError
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch) -> Dict[str, List[str]]:
+    """Replace host-facing creation stages with fast fakes that record calls."""
+    calls: Dict[str, List[str]] = {"validate": [], "launch": [], "ready": []}
+
+    async def fake_validate(self: Sandbox) -> None:
+        calls["validate"].append(self.config.name)
+        await asyncio.sleep(0.01)
+
+    async def fake_start(self: Sandbox) -> None:
+        if self.config.name.startswith("broken"):
+            raise SandboxCreationError("launch failed")
+        calls["launch"].append(self.config.name)
+
+    async def fake_ready(self: Sandbox) -> None:
+        calls["ready"].append(self.config.name)
+        await asyncio.sleep(0.02)
+
+    async def fake_shutdown(self: Sandbox, timeout: int = 30) -> None:
+        self.state = SandboxState.STOPPED
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(Sandbox, "_validate_system_requirements", fake_validate)
+    monkeypatch.setattr(Sandbox, "_start_sandbox", fake_start)
+    monkeypatch.setattr(Sandbox, "_wait_until_ready", fake_ready)
+    monkeypatch.setattr(Sandbox, "shutdown", fake_shutdown)
+    return calls
+
+
+@pytest.fixture
+async def manager(calls) -> AsyncGenerator[SandboxManager, None]:
+    """Manager with ample resources and two concurrent creation slots."""
+    scheduler = ResourceScheduler(memory_capacity_mb=65536, cpu_capacity=64)
+    async with SandboxManager(max_concurrent=2, scheduler=scheduler) as manager:
+        yield manager
+
+
+class TestCreateMany:
+    """Test SandboxManager.create_many()."""
+
+    async def test_creates_all_and_validates_once(self, manager, calls):
+        """Test every sandbox comes up and the host check is shared."""
+        updates: List[FleetProgress] = []
+        configs = [SandboxConfig(name=f"worker-{i}") for i in range(5)]
+
+        result = await manager.create_many(configs, on_progress=updates.append)
+
+        assert result.success
+        assert [s.config.name for s in result.sandboxes] == [c.name for c in configs]
+        assert all(s.state == SandboxState.RUNNING for s in result.sandboxes)
+        assert len(calls["validate"]) == 1
+        assert manager.get_running_count() == 5
+
+        stages = [u.stage for u in updates if u.index == 3 and u.status == "completed"]
+        assert stages == [
+            "admit", "validate", "folders", "generate_wsb", "launch", "readiness", "startup"
+        ]
+
+    async def test_folders_checked_per_sandbox(self, manager, tmp_path):
+        """Test each sandbox's folder mappings are validated, not just the first's."""
+        (tmp_path / "shared").mkdir()
+        configs = [
+            SandboxConfig(
+                name=name,
+                folders=[FolderMapping(host=tmp_path / folder, guest="C:\\Work")],
+            )
+            for name, folder in (("ok", "shared"), ("bad", "missing"), ("ok-2", "shared"))
+        ]
+
+        result = await manager.create_many(configs)
+
+        assert [s.config.name for s in result.sandboxes] == ["ok", "ok-2"]
+        [error] = result.errors
+        assert (error.name, error.stage) == ("bad", "folders")
+        assert "does not exist" in error.message
+
+    async def test_partial_failure(self, manager):
+        """Test failures are reported per sandbox without stopping the rest."""
+        configs = [SandboxConfig(name=name) for name in ("ok-1", "broken", "ok-2")]
+
+        result = await manager.create_many(configs)
+
+        assert not result.success
+        assert [s.config.name for s in result.sandboxes] == ["ok-1", "ok-2"]
+        [error] = result.errors
+        assert (error.index, error.name, error.stage) == (1, "broken", "launch")
+        assert error.error_type == "SandboxCreationError"
+        assert error.message == "launch failed"
+
+        assert manager.get_total_count() == 2
+        assert manager.scheduler.get_stats()["active_reservations"] == 2
+
+    async def test_duplicate_names_rejected(self, manager):
+        """Test repeated names within a fleet fail at admission."""
+        result = await manager.create_many([SandboxConfig(name="twin")] * 2)
+
+        assert len(result.sandboxes) == 1
+        assert result.errors[0].stage == "admit"
+        assert "Duplicate" in result.errors[0].message
+
+    async def test_name_taken_while_queued(self, manager, monkeypatch):
+        """Test names are checked again once admitted."""
+        acquire = manager.scheduler.acquire
+
+        async def slow_acquire(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return await acquire(*args, **kwargs)
+
+        monkeypatch.setattr(manager.scheduler, "acquire", slow_acquire)
+        single, result = await asyncio.gather(
+            manager.create_sandbox(SandboxConfig(name="shared")),
+            manager.create_many([SandboxConfig(name="shared")]),
+        )
+
+        assert single.is_running and not result.sandboxes
+        assert result.errors[0].stage == "admit"
+        assert "already" in result.errors[0].message
+        assert manager.get_total_count() == 1
+        assert manager.scheduler.get_stats()["active_reservations"] == 1
+
+    async def test_respects_max_concurrent(self, manager, monkeypatch):
+        """Test no more than max_concurrent sandboxes boot at once."""
+        active = 0
+        peak = 0
+
+        async def tracked_ready(self: Sandbox) -> None:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+        monkeypatch.setattr(Sandbox, "_wait_until_ready", tracked_ready)
+        result = await manager.create_many([SandboxConfig(name=f"s{i}") for i in range(6)])
+
+        assert result.success
+        assert peak == manager.max_concurrent
+
+
+class TestFleetManifest:
+    """Test manifest resolution."""
+
+    def test_build_configs(self, tmp_path):
+        """Test counts, defaults and per-entry overrides."""
+        (tmp_path / "base.yaml").write_text("name: base\nmemory_mb: 2048\n")
+        (tmp_path / "fleet.yaml").write_text(
+            "defaults:\n"
+            "  cpu_cores: 4\n"
+            "sandboxes:\n"
+            "  - config: base.yaml\n"
+            "    name: web\n"
+            "    count: 2\n"
+            "  - config: base.yaml\n"
+            "    overrides:\n"
+            "      memory_mb: 8192\n"
+        )
+
+        configs = FleetManifest.from_file(tmp_path / "fleet.yaml").build_configs()
+
+        assert [c.name for c in configs] == ["web-1", "web-2", "base"]
+        assert [c.memory_mb for c in configs] == [2048, 2048, 8192]
+        assert all(c.cpu_cores == 4 for c in configs)
+
+    def test_config_values_win_over_defaults(self, tmp_path):
+        """Test defaults only fill in keys the config does not set."""
+        (tmp_path / "big.yaml").write_text("name: big\ncpu_cores: 8\n")
+        (tmp_path / "fleet.yaml").write_text(
+            "defaults:\n"
+            "  cpu_cores: 2\n"
+            "  memory_mb: 2048\n"
+            "sandboxes:\n"
+            "  - config: big.yaml\n"
+            "  - config: big.yaml\n"
+            "    name: small\n"
+            "    overrides:\n"
+            "      cpu_cores: 1\n"
+        )
+
+        configs = FleetManifest.from_file(tmp_path / "fleet.yaml").build_configs()
+
+        assert [(c.name, c.cpu_cores, c.memory_mb) for c in configs] == [
+            ("big", 8, 2048),
+            ("small", 1, 2048),
+        ]
+
+    def test_reports_all_bad_entries(self, tmp_path):
+        """Test every failing entry is listed in one error."""
+        (tmp_path / "fleet.yaml").write_text(
+            "sandboxes:\n  - config: missing-a.yaml\n  - config: missing-b.yaml\n"
+        )
+
+        with pytest.raises(ConfigurationError) as exc_info:
+            FleetManifest.from_file(tmp_path / "fleet.yaml").build_configs()
+
+        assert "missing-a.yaml" in str(exc_info.value)
+        assert "missing-b.yaml" in str(exc_info.value)
@@ -0,0 +1,135 @@
+"""
+Unit tests for batched folder mapping validation.
+"""
+
+import threading
+import time
+
+import pytest
+
+from windows_sandbox_manager.config.models import FolderMapping, SandboxConfig
+from windows_sandbox_manager.core.sandbox import Sandbox
+from windows_sandbox_manager.security.folders import FolderValidator
+from windows_sandbox_manager.security.validation import PathValidator, SecurityError
+
+
+def mapping(host, guest, **kwargs) -> FolderMapping:
+    """Folder mapping from plain values."""
+    return FolderMapping(host=host, guest=guest, **kwargs)
+
+
+class TestFolderValidator:
+    """Test violations, overlaps and caching."""
+
+    def test_valid_mappings(self, tmp_path):
+        """Test valid mappings pass and are resolved."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        report = FolderValidator().validate(
+            [mapping(tmp_path / "a", "C:/a"), mapping(tmp_path / "b", "C:/b")]
+        )
+
+        assert report.ok
+        assert report.resolved == {0: (tmp_path / "a").resolve(), 1: (tmp_path / "b").resolve()}
+        report.raise_for_violations()
+
+    def test_reports_all_violations(self, tmp_path):
+        """Test every bad mapping is reported, not just the first."""
+        (tmp_path / "ok").mkdir()
+        folders = [
+            mapping(tmp_path / "missing", "C:/one"),
+            mapping(tmp_path / "ok", "relative/path"),
+            mapping(tmp_path / "also-missing", "C:/three"),
+        ]
+        report = FolderValidator().validate(folders)
+
+        assert [(v.index, v.field) for v in report.violations] == [
+            (0, "host"),
+            (1, "guest"),
+            (2, "host"),
+        ]
+        with pytest.raises(SecurityError) as excinfo:
+            report.raise_for_violations()
+        assert "folders[0].host" in str(excinfo.value)
+        assert "folders[2].host" in str(excinfo.value)
+
+    def test_overlapping_mappings(self, tmp_path):
+        """Test nested guests and writable-inside-read-only hosts are rejected."""
+        (tmp_path / "src" / "build").mkdir(parents=True)
+        folders = [
+            mapping(tmp_path / "src", "C:/work", readonly=True),
+            mapping(tmp_path / "src" / "build", "C:/work/build"),
+            mapping(tmp_path / "src", "C:/WORK"),
+        ]
+        report = FolderValidator().validate(folders)
+        messages = {(v.index, v.field): v.message for v in report.violations}
+
+        assert "inside folders[0].guest" in messages[(1, "guest")]
+        assert "Duplicate guest path" in messages[(2, "guest")]
+        assert "inside read-only folders[0].host" in messages[(1, "host")]
+        assert "inside read-only folders[0].host" in messages[(2, "host")]
+        assert (0, 1) in report.nested
+        # The same host folder is checked once
+        assert report.checked == 2
+
+    def test_sync_targets_need_not_exist(self, tmp_path):
+        """Test synced mappings are checked against their workspace instead."""
+        workspace = tmp_path / "workspace"
+        workspace.mkdir()
+        folders = [
+            mapping(tmp_path / "mirror", "C:/app", sync_from=workspace),
+            mapping(tmp_path / "other", "C:/other", sync_from=tmp_path / "nowhere"),
+        ]
+        report = FolderValidator().validate(folders)
+
+        assert [(v.index, v.field) for v in report.violations] == [(1, "sync_from")]
+
+    def test_checks_run_concurrently_and_cache(self, tmp_path, monkeypatch):
+        """Test slow host checks overlap and are reused across configs."""
+        original = PathValidator.validate_host_path.__func__
+        calls = []
+        active = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def slow(cls, path, must_exist=True):
+            with lock:
+                calls.append(path)
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return original(cls, path, must_exist)
+
+        monkeypatch.setattr(PathValidator, "validate_host_path", classmethod(slow))
+        for i in range(8):
+            (tmp_path / f"d{i}").mkdir()
+        folders = [mapping(tmp_path / f"d{i}", f"C:/d{i}") for i in range(8)]
+
+        validator = FolderValidator(max_workers=8)
+        assert validator.validate(folders).ok
+        assert active["peak"] > 1
+
+        report = validator.validate(folders[:4])
+        assert report.cache_hits == 4
+        assert len(calls) == 8
+
+
+class TestSandboxFolderValidation:
+    """Test Sandbox.validate_folders()."""
+
+    async def test_rejects_invalid_config(self, tmp_path, monkeypatch):
+        """Test the creation-time check raises with every violation."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        config = SandboxConfig(
+            name="folders",
+            folders=[
+                {"host": str(tmp_path / "missing-1"), "guest": "C:/one"},
+                {"host": str(tmp_path / "missing-2"), "guest": "C:/two"},
+            ],
+        )
+
+        with pytest.raises(SecurityError) as excinfo:
+            await Sandbox(config).validate_folders()
+        assert "missing-1" in str(excinfo.value)
+        assert "missing-2" in str(excinfo.value)
@@ -0,0 +1,209 @@
+"""
+Unit tests for the live resource monitor view.
+"""
+
+import asyncio
+import csv
+import json
+import time
+from datetime import timedelta
+
+import pytest
+from rich.console import Console
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.monitoring.live import (
+    EXPORT_FIELDS,
+    MonitorBoard,
+    MonitorExporter,
+    RowFilter,
+    sparkline,
+)
+from windows_sandbox_manager.monitoring.resources import ResourceMonitor, ResourceStats
+
+
+def stats(cpu: float, memory: int = 512) -> ResourceStats:
+    """Sample with the given CPU and memory."""
+    return ResourceStats(memory_mb=memory, cpu_percent=cpu, disk_mb=100, process_count=3)
+
+
+@pytest.fixture
+def make_sandbox(tmp_path, monkeypatch):
+    """Factory for running sandboxes with an optional monitor history."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+
+    def make(name, *samples, monitored=True):
+        sandbox = Sandbox(SandboxConfig(name=name))
+        sandbox.state = SandboxState.RUNNING
+        if monitored:
+            sandbox._resource_monitor = ResourceMonitor(sandbox.id)
+            for sample in samples:
+                sandbox.resource_monitor.record(sample)
+        return sandbox
+
+    return make
+
+
+class TestResourceMonitorHistory:
+    """Test the public sample accessors."""
+
+    def test_latest_and_history(self):
+        """Test recorded samples are kept up to the history size."""
+        seen = []
+        monitor = ResourceMonitor("sb", on_sample=seen.append, history_size=3)
+        assert monitor.latest is None
+
+        for cpu in range(5):
+            monitor.record(stats(cpu))
+
+        assert monitor.latest.cpu_percent == 4
+        assert [s.cpu_percent for s in monitor.history] == [2, 3, 4]
+        assert len(seen) == 5
+
+
+class TestSparklineAndFilters:
+    """Test trend rendering and filter parsing."""
+
+    def test_sparkline(self):
+        """Test values scale against the maximum and keep the last width."""
+        assert sparkline([0, 50, 100], maximum=100) == "▁▅█"
+        assert sparkline([1, 2, 4, 8], width=2) == "▅█"
+        assert sparkline([0, 0]) == "▁▁"
+        assert sparkline([250], maximum=100) == "█"
+        assert sparkline([]) == ""
+
+    def test_filter_parsing(self):
+        """Test numeric comparisons, globs and rejected filters."""
+        assert RowFilter.parse("cpu >= 50") == RowFilter("cpu", ">=", 50.0)
+        assert RowFilter.parse("name=Web-*") == RowFilter("name", "=", "web-*")
+        for text in ("cpu~5", "speed>1", "cpu>high", "name>a"):
+            with pytest.raises(ValueError):
+                RowFilter.parse(text)
+
+
+class TestMonitorBoard:
+    """Test sampling, arranging and rendering."""
+
+    async def test_sort_filter_and_limit(self, make_sandbox):
+        """Test rows are filtered, sorted and unmonitored sandboxes sort last."""
+        sandboxes = [
+            make_sandbox("web-1", stats(10), stats(30)),
+            make_sandbox("web-2", stats(90)),
+            make_sandbox("db-1", stats(50, memory=4096)),
+            make_sandbox("web-3", monitored=False),
+        ]
+        board = MonitorBoard(lambda: sandboxes)
+
+        rows = await board.refresh()
+        assert [r.name for r in rows] == ["web-2", "db-1", "web-1", "web-3"]
+        assert rows[-1].stats is None
+        assert [s.cpu_percent for s in rows[2].history] == [10, 30]
+
+        board = MonitorBoard(lambda: sandboxes, sort_by="memory", filters=["name=web-*"], limit=2)
+        assert [r.name for r in await board.refresh()] == ["web-1", "web-2"]
+        assert board.total == 4
+
+        board = MonitorBoard(lambda: sandboxes, descending=False, filters=["cpu>20"])
+        assert [r.name for r in await board.refresh()] == ["web-1", "db-1", "web-2"]
+
+    async def test_samples_concurrently(self, make_sandbox, monkeypatch):
+        """Test monitors without a sample are read at the same time."""
+
+        async def slow_sample(self):
+            await asyncio.sleep(0.2)
+            return stats(5)
+
+        monkeypatch.setattr(ResourceMonitor, "_collect_stats", slow_sample)
+        sandboxes = [make_sandbox(f"sb-{i}") for i in range(20)]
+        board = MonitorBoard(lambda: sandboxes)
+
+        started = time.perf_counter()
+        rows = await board.refresh()
+        assert time.perf_counter() - started < 1.0
+        assert all(r.stats.cpu_percent == 5 for r in rows)
+
+    async def test_stuck_sample_times_out(self, make_sandbox, monkeypatch):
+        """Test a monitor that never answers only blanks its own row."""
+
+        async def stuck(self):
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(ResourceMonitor, "_collect_stats", stuck)
+        sandboxes = [make_sandbox("stuck"), make_sandbox("ok", stats(1))]
+        rows = await MonitorBoard(lambda: sandboxes, sample_timeout=0.05).refresh()
+
+        assert [(r.name, r.stats is None) for r in rows] == [("ok", False), ("stuck", True)]
+
+    async def test_resamples_stale_rows(self, make_sandbox, monkeypatch):
+        """Test samples older than max_age are replaced on refresh."""
+
+        async def fresh(self):
+            return stats(77)
+
+        monkeypatch.setattr(ResourceMonitor, "_collect_stats", fresh)
+        old = stats(10)
+        old.timestamp -= timedelta(seconds=30)
+        sandbox = make_sandbox("slow", old)
+
+        [row] = await MonitorBoard(lambda: [sandbox]).refresh()
+        assert row.stats is old
+
+        [row] = await MonitorBoard(lambda: [sandbox], max_age=1.0).refresh()
+        assert row.stats.cpu_percent == 77
+        assert [s.cpu_percent for s in row.history] == [10, 77]
+
+        # A recent sample is reused as is
+        [row] = await MonitorBoard(lambda: [sandbox], max_age=1.0).refresh()
+        assert len(row.history) == 2
+
+    async def test_renders_large_fleets(self, make_sandbox):
+        """Test a table of 150 sandboxes renders well within one interval."""
+        history = [stats(cpu) for cpu in range(0, 100, 5)]
+        sandboxes = [make_sandbox(f"sb-{i}", *history) for i in range(150)]
+        board = MonitorBoard(lambda: sandboxes)
+        console = Console(file=open("/dev/null", "w"), width=160)
+
+        started = time.perf_counter()
+        rows = await board.refresh()
+        console.print(board.render(rows, interval=1))
+        assert time.perf_counter() - started < 1.0
+
+        table = board.render(rows, interval=1)
+        assert table.row_count == 150
+        assert "150 of 150 sandboxes" in table.title
+        console.file.close()
+
+
+class TestMonitorExporter:
+    """Test CSV and JSONL export."""
+
+    async def test_exports_new_samples_once(self, make_sandbox, tmp_path):
+        """Test repeated refreshes do not duplicate a sample."""
+        sandboxes = [make_sandbox("a", stats(10)), make_sandbox("b", monitored=False)]
+        board = MonitorBoard(lambda: sandboxes)
+
+        with MonitorExporter(tmp_path / "samples.csv") as exporter:
+            assert exporter.write(await board.refresh()) == 1
+            assert exporter.write(await board.refresh()) == 0
+            sandboxes[0].resource_monitor.record(stats(20))
+            assert exporter.write(await board.refresh()) == 1
+
+        with open(tmp_path / "samples.csv", newline="") as f:
+            records = list(csv.DictReader(f))
+        assert tuple(records[0]) == EXPORT_FIELDS
+        assert [r["cpu_percent"] for r in records] == ["10", "20"]
+        assert records[0]["name"] == "a"
+
+    async def test_jsonl_and_format_checks(self, make_sandbox, tmp_path):
+        """Test JSONL output and rejected file types."""
+        sandbox = make_sandbox("a", stats(10))
+        with MonitorExporter(tmp_path / "samples.out", "jsonl") as exporter:
+            exporter.write(await MonitorBoard(lambda: [sandbox]).refresh())
+
+        record = json.loads((tmp_path / "samples.out").read_text())
+        assert list(record) == list(EXPORT_FIELDS)
+        assert (record["sandbox_id"], record["state"]) == (sandbox.id, "running")
+
+        with pytest.raises(ValueError):
+            MonitorExporter(tmp_path / "samples.txt")
@@ -0,0 +1,182 @@
+"""
+Unit tests for SandboxManager bookkeeping.
+"""
+
+import asyncio
+import pytest
+from datetime import timedelta
+from typing import AsyncGenerator
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.manager import SandboxManager
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.core.scheduler import ResourceScheduler
+from windows_sandbox_manager.monitoring.resources import ResourceStats
+
+
+@pytest.fixture
+async def manager(tmp_path, monkeypatch) -> AsyncGenerator[SandboxManager, None]:
+    """Manager whose sandboxes start instantly and whose registry lives in tmp_path."""
+
+    async def fake_create(self: Sandbox) -> None:
+        self.state = SandboxState.RUNNING
+
+    async def fake_shutdown(self: Sandbox, timeout: int = 30) -> None:
+        self.state = SandboxState.STOPPED
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(Sandbox, "create", fake_create)
+    monkeypatch.setattr(Sandbox, "shutdown", fake_shutdown)
+    scheduler = ResourceScheduler(memory_capacity_mb=65536, cpu_capacity=64)
+    async with SandboxManager(scheduler=scheduler) as manager:
+        yield manager
+
+
+class TestSandboxManagerIndexes:
+    """Test secondary indexes and aggregates."""
+
+    async def test_lookup_by_name(self, manager):
+        """Test name lookups use the index."""
+        sandbox = await manager.create_sandbox(SandboxConfig(name="alpha"))
+
+        assert manager.get_sandbox_by_name("alpha") is sandbox
+        assert manager.get_sandbox_by_name("missing") is None
+
+        await manager.shutdown_sandbox(sandbox.id)
+        assert manager.get_sandbox_by_name("alpha") is None
+
+    async def test_state_index_follows_transitions(self, manager):
+        """Test state filters reflect direct state changes."""
+        first = await manager.create_sandbox(SandboxConfig(name="first"))
+        second = await manager.create_sandbox(SandboxConfig(name="second"))
+
+        assert manager.list_sandboxes() == [first, second]
+        assert manager.list_sandboxes(SandboxState.RUNNING) == [first, second]
+        assert manager.get_running_count() == 2
+
+        first.state = SandboxState.FAILED
+        assert manager.list_sandboxes(SandboxState.RUNNING) == [second]
+        assert manager.list_sandboxes(SandboxState.FAILED) == [first]
+
+        assert await manager.cleanup_stopped_sandboxes() == 1
+        assert manager.get_total_count() == 1
+
+    async def test_running_aggregates(self, manager):
+        """Test incremental memory and CPU totals."""
+        await manager.create_sandbox(SandboxConfig(name="a", memory_mb=2048, cpu_cores=1))
+        b = await manager.create_sandbox(SandboxConfig(name="b", memory_mb=4096, cpu_cores=2))
+
+        stats = await manager.get_system_stats()
+        assert stats["running_sandboxes"] == 2
+        assert stats["total_memory_mb"] == 6144
+        assert stats["total_cpu_cores"] == 3
+        assert stats["average_uptime_seconds"] >= 0
+
+        b.state = SandboxState.STOPPING
+        stats = await manager.get_system_stats()
+        assert stats["total_memory_mb"] == 2048
+        assert stats["total_cpu_cores"] == 1
+
+
+class TestSandboxManagerAdmission:
+    """Test admission and name checks in create_sandbox()."""
+
+    async def test_default_manager_admits_any_size(self, manager):
+        """Test admission control is opt-in."""
+        async with SandboxManager(reaper_interval=None) as default:
+            sandbox = await default.create_sandbox(
+                SandboxConfig(name="large", memory_mb=32768, cpu_cores=16)
+            )
+            assert sandbox.is_running
+            assert default.scheduler.get_stats()["memory_reserved_mb"] == 32768
+
+    async def test_concurrent_creations_of_one_name(self, manager, monkeypatch):
+        """Test only one of two simultaneous creations with a name proceeds."""
+
+        async def slow_create(self: Sandbox) -> None:
+            await asyncio.sleep(0.05)
+            self.state = SandboxState.RUNNING
+
+        monkeypatch.setattr(Sandbox, "create", slow_create)
+        results = await asyncio.gather(
+            manager.create_sandbox(SandboxConfig(name="twin")),
+            manager.create_sandbox(SandboxConfig(name="twin")),
+            return_exceptions=True,
+        )
+
+        assert sum(isinstance(r, Sandbox) for r in results) == 1
+        [error] = [r for r in results if isinstance(r, Exception)]
+        assert "already being created" in str(error)
+        assert manager.scheduler.get_stats()["active_reservations"] == 1
+
+
+class TestSandboxManagerShutdown:
+    """Test coordinated shutdown."""
+
+    async def test_shutdown_all_reports_and_forgets(self, manager):
+        """Test shutdown_all stops everything and returns a report."""
+        for name in ("a", "b", "c"):
+            await manager.create_sandbox(SandboxConfig(name=name))
+
+        report = await manager.shutdown_all(deadline=5, max_concurrent=2)
+
+        assert [r.name for r in report.sandboxes] == ["a", "b", "c"]
+        assert not report.failed and not report.force_killed
+        assert manager.get_total_count() == 0
+        assert manager.scheduler.get_stats()["active_reservations"] == 0
+
+
+    async def test_close_leaves_sandboxes_running(self, manager):
+        """Test close() stops background tasks without shutting anything down."""
+        other = SandboxManager(reaper_interval=60)
+        await other.start()
+        sandbox = await other.create_sandbox(SandboxConfig(name="kept"))
+        follower = other._registry._follow_task
+        assert follower and not follower.done()
+
+        await other.close()
+
+        assert follower.done() and other._reaper_task is None
+        assert sandbox.is_running
+        assert other.get_sandbox(sandbox.id) is sandbox
+
+
+class TestSandboxReaper:
+    """Test idle and lifetime based auto-shutdown."""
+
+    async def test_reaps_idle_sandbox(self, manager):
+        """Test only sandboxes idle past their TTL are shut down."""
+        idle = await manager.create_sandbox(
+            SandboxConfig(name="idle", lifecycle={"idle_ttl": 60})
+        )
+        busy = await manager.create_sandbox(
+            SandboxConfig(name="busy", lifecycle={"idle_ttl": 60})
+        )
+        idle.last_activity -= timedelta(seconds=120)
+
+        assert await manager.reap() == {idle.id: "idle"}
+        assert manager.get_sandbox(idle.id) is None
+        assert manager.get_sandbox(busy.id) is busy
+
+    async def test_cpu_activity_resets_idle_timer(self, manager):
+        """Test monitor samples above the CPU threshold count as activity."""
+        sandbox = await manager.create_sandbox(
+            SandboxConfig(name="crunching", lifecycle={"idle_ttl": 60})
+        )
+        sandbox.last_activity -= timedelta(seconds=120)
+
+        sandbox._on_monitor_sample(ResourceStats(memory_mb=100, cpu_percent=80, disk_mb=0))
+
+        assert await manager.reap() == {}
+
+    async def test_reaps_past_max_lifetime(self, manager):
+        """Test the maximum lifetime applies even to active sandboxes."""
+        sandbox = await manager.create_sandbox(
+            SandboxConfig(name="old", lifecycle={"max_lifetime": 0.01})
+        )
+        sandbox.touch()
+        await asyncio.sleep(0.02)
+
+        assert await manager.reap() == {sandbox.id: "max_lifetime"}
+        assert manager.get_total_count() == 0
@@ -0,0 +1,118 @@
+"""
+Unit tests for the compiled network policy.
+"""
+
+import pytest
+
+from windows_sandbox_manager.config.models import NetworkRestriction, SandboxConfig
+from windows_sandbox_manager.core.sandbox import Sandbox
+from windows_sandbox_manager.security.network import NetworkPolicy
+from windows_sandbox_manager.security.validation import CommandValidator, SecurityError
+
+
+class TestNetworkPolicy:
+    """Test rule matching and precedence."""
+
+    def test_default_blocks_only_private_ranges(self):
+        """Test the default policy blocks local ranges but not public neighbours."""
+        policy = NetworkPolicy()
+
+        for host in ["127.0.0.1", "10.1.2.3", "172.16.0.1", "172.31.255.255", "192.168.1.1",
+                     "169.254.0.1", "::1", "fe80::1", "::ffff:10.0.0.1", "localhost",
+                     "api.localhost"]:
+            assert not policy.is_allowed(host), host
+        for host in ["172.15.255.255", "172.32.0.1", "172.217.16.14", "8.8.8.8",
+                     "2001:4860:4860::8888", "example.com"]:
+            assert policy.is_allowed(host), host
+
+    def test_cidr_rules(self):
+        """Test overlapping and adjacent CIDR rules match their whole range."""
+        policy = NetworkPolicy(deny=["203.0.113.0/25", "203.0.113.128/25", "198.51.100.7",
+                                     "2001:db8::/32"])
+
+        assert not policy.is_allowed("203.0.113.0")
+        assert not policy.is_allowed("203.0.113.255")
+        assert policy.is_allowed("203.0.114.0")
+        assert not policy.is_allowed("198.51.100.7")
+        assert policy.is_allowed("198.51.100.8")
+        assert not policy.is_allowed("[2001:db8::1]")
+
+    def test_domain_rules(self):
+        """Test exact domains cover subdomains and wildcards cover only subdomains."""
+        policy = NetworkPolicy(allow=["example.com", "*.cdn.net"], block_private=False)
+
+        assert policy.is_allowed("example.com")
+        assert policy.is_allowed("API.Example.com.")
+        assert not policy.is_allowed("badexample.com")
+        assert policy.is_allowed("eu.cdn.net")
+        assert not policy.is_allowed("cdn.net")
+        decision = policy.check_host("other.org")
+        assert (decision.allowed, decision.reason) == (False, "not in allow list")
+
+    def test_precedence(self):
+        """Test deny beats allow, and an explicit allow overrides the private block."""
+        policy = NetworkPolicy(
+            allow=["example.com", "10.20.0.0/16"], deny=["internal.example.com"]
+        )
+
+        assert policy.is_allowed("www.example.com")
+        decision = policy.check_host("db.internal.example.com")
+        assert not decision.allowed
+        assert decision.rule == "internal.example.com"
+        assert policy.is_allowed("10.20.5.5")
+        assert not policy.is_allowed("10.21.0.1")
+
+    def test_wildcard_sets_default(self):
+        """Test ``*`` only applies to hosts no other rule matched."""
+        policy = NetworkPolicy(allow=["*.pypi.org"], deny=["*"])
+
+        assert policy.is_allowed("files.pypi.org")
+        decision = policy.check_host("example.com")
+        assert (decision.allowed, decision.rule) == (False, "*")
+        assert not NetworkPolicy(allow=["*"]).is_allowed("127.0.0.1")
+
+    def test_decisions_are_cached(self):
+        """Test repeated checks of a host are answered from the cache."""
+        policy = NetworkPolicy(deny=["evil.com"])
+        for _ in range(3):
+            policy.check_host("Evil.com")
+
+        stats = policy.get_stats()
+        assert (stats["cache_misses"], stats["cache_hits"]) == (1, 2)
+        with pytest.raises(SecurityError, match="evil.com"):
+            policy.enforce("evil.com")
+
+
+class TestValidateUrl:
+    """Test CommandValidator.validate_url() with policies."""
+
+    def test_public_172_allowed(self):
+        """Test only 172.16.0.0/12 counts as private."""
+        assert CommandValidator.validate_url("https://172.217.16.14/") == "https://172.217.16.14/"
+        with pytest.raises(SecurityError):
+            CommandValidator.validate_url("http://172.20.0.1/")
+
+    def test_custom_policy(self):
+        """Test a restriction-derived policy is applied."""
+        policy = NetworkPolicy.from_restriction(NetworkRestriction(allow=["pypi.org"]))
+
+        assert CommandValidator.validate_url("https://files.pypi.org/x", policy=policy)
+        with pytest.raises(SecurityError, match="not in allow list"):
+            CommandValidator.validate_url("https://example.com", policy=policy)
+
+
+class TestSandboxEgress:
+    """Test Sandbox.check_egress()."""
+
+    def test_uses_config_restrictions(self, tmp_path, monkeypatch):
+        """Test egress checks follow the sandbox's network restrictions."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        config = SandboxConfig(
+            name="egress",
+            security={"network_restrictions": {"deny": ["tracker.io", "198.51.100.0/24"]}},
+        )
+        sandbox = Sandbox(config)
+
+        assert not sandbox.check_egress("https://cdn.tracker.io/pixel").allowed
+        assert not sandbox.check_egress("198.51.100.9").allowed
+        assert sandbox.check_egress("github.com").allowed
@@ -0,0 +1,97 @@
+"""
+Unit tests for output limits and truncation.
+"""
+
+import shlex
+import sys
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.output import OutputBuffer, TruncationPolicy
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+
+
+def feed_all(buffer: OutputBuffer, data: bytes, chunk: int = 7) -> OutputBuffer:
+    """Feed data in small chunks, as a pipe would deliver it."""
+    for start in range(0, len(data), chunk):
+        buffer.feed(data[start : start + chunk])
+    return buffer
+
+
+class TestOutputBuffer:
+    """Test truncation policies."""
+
+    DATA = bytes(range(100))
+
+    def test_unlimited(self):
+        """Test no limit keeps everything."""
+        buffer = feed_all(OutputBuffer(None), self.DATA)
+        assert buffer.getvalue() == self.DATA
+        assert buffer.truncated_bytes == 0
+
+    def test_head(self):
+        """Test HEAD keeps the first bytes."""
+        buffer = feed_all(OutputBuffer(10, TruncationPolicy.HEAD), self.DATA)
+        assert buffer.getvalue() == self.DATA[:10]
+        assert buffer.truncated_bytes == 90
+        assert buffer.total_bytes == 100
+
+    def test_tail(self):
+        """Test TAIL keeps the last bytes."""
+        buffer = feed_all(OutputBuffer(10, "tail"), self.DATA)
+        assert buffer.getvalue() == self.DATA[-10:]
+        assert buffer.truncated_bytes == 90
+
+    def test_head_tail_marks_gap(self):
+        """Test HEAD_TAIL keeps both ends around a marker."""
+        buffer = feed_all(OutputBuffer(10, TruncationPolicy.HEAD_TAIL), self.DATA)
+        value = buffer.getvalue()
+        assert value.startswith(self.DATA[:5])
+        assert value.endswith(self.DATA[-5:])
+        assert b"[90 bytes truncated]" in value
+
+    def test_under_limit_untouched(self):
+        """Test output within the limit is returned as is."""
+        buffer = feed_all(OutputBuffer(1000, TruncationPolicy.HEAD_TAIL), self.DATA)
+        assert buffer.getvalue() == self.DATA
+        assert buffer.truncated_bytes == 0
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch) -> Sandbox:
+    """Running sandbox whose commands run as local Python scripts."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        Sandbox,
+        "_build_powershell_command",
+        lambda self, command, usage_path=None: f"{shlex.quote(sys.executable)} -c {shlex.quote(command)}",
+    )
+    config = SandboxConfig(name="output", execution={"max_output_bytes": 1024})
+    sandbox = Sandbox(config)
+    sandbox.state = SandboxState.RUNNING
+    return sandbox
+
+
+class TestExecuteOutputLimits:
+    """Test limits applied by Sandbox.execute."""
+
+    SCRIPT = "import sys; sys.stdout.write('a' * 1000000 + 'END')"
+
+    async def test_config_limit(self, sandbox):
+        """Test the configured limit and policy apply by default."""
+        result = await sandbox.execute(self.SCRIPT)
+
+        assert result.truncated
+        assert result.stdout.endswith("END")
+        assert "bytes truncated" in result.stdout
+        assert result.stdout_truncated_bytes == 1000003 - 1024
+        assert result.usage.stdout_bytes == 1000003
+
+    async def test_per_call_override(self, sandbox):
+        """Test per-call limit and policy override the config."""
+        result = await sandbox.execute(self.SCRIPT, max_output_bytes=100, truncation="head")
+
+        assert result.stdout == "a" * 100
+        assert result.stdout_truncated_bytes == 1000003 - 100
+        assert result.stderr_truncated_bytes == 0
@@ -0,0 +1,139 @@
+"""
+Unit tests for the provisioning cache.
+"""
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.provisioning import ProvisioningCache
+from windows_sandbox_manager.exceptions import ConfigurationError
+
+
+@pytest.fixture
+def config() -> SandboxConfig:
+    """Config with a pip install startup command."""
+    return SandboxConfig(
+        name="provisioned",
+        startup_commands=["python -m pip install requests pandas", "cd C:/work"],
+        provisioning={"cache_enabled": True},
+    )
+
+
+class TestProvisioningCache:
+    """Test ProvisioningCache class."""
+
+    def test_key_depends_on_commands_and_inputs(self, tmp_path, config):
+        """Test the cache key covers commands and input file content."""
+        cache = ProvisioningCache(tmp_path / "cache")
+        requirements = tmp_path / "requirements.txt"
+        requirements.write_text("requests\n")
+
+        base_key = cache.compute_key(config)
+        assert base_key == cache.compute_key(config.model_copy(update={"name": "other"}))
+
+        config.startup_commands = ["pip install numpy"]
+        assert cache.compute_key(config) != base_key
+
+        config.provisioning.inputs = [requirements]
+        with_input = cache.compute_key(config)
+        requirements.write_text("requests==2.0\n")
+        assert cache.compute_key(config) != with_input
+
+        config.provisioning.inputs = [tmp_path / "missing.txt"]
+        with pytest.raises(ConfigurationError):
+            cache.compute_key(config)
+
+    def test_miss_then_hit(self, tmp_path, config):
+        """Test a committed miss is served read-only and offline afterwards."""
+        cache = ProvisioningCache(tmp_path / "cache")
+
+        miss = cache.plan(config)
+        assert not miss.hit
+        assert not miss.folder.readonly
+        assert miss.commands[0].startswith("python -m pip download -d ")
+        assert "--no-index" in miss.commands[1]
+        assert miss.commands[2] == "cd C:/work"
+
+        (miss.entry_dir / "wheels" / "requests.whl").write_bytes(b"x" * 100)
+        cache.commit(miss)
+        # Still mapped into the sandbox that filled it, so copied, not moved
+        assert (miss.entry_dir / "wheels" / "requests.whl").exists()
+        assert cache.get_stats()["in_use"] == 1
+        cache.release(miss)
+        cache.discard(miss)
+        assert not miss.entry_dir.exists()
+        assert cache.get_stats()["in_use"] == 0
+
+        hit = cache.plan(config)
+        assert hit.hit
+        assert hit.folder.readonly
+        assert hit.folder.host == tmp_path / "cache" / hit.key
+        assert len(hit.commands) == 2
+        assert "--no-index --find-links" in hit.commands[0]
+
+        stats = cache.get_stats()
+        assert stats["entries"] == 1
+        assert stats["size_bytes"] == 100
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_discard_failed_miss(self, tmp_path, config):
+        """Test failed provisioning leaves nothing cached."""
+        cache = ProvisioningCache(tmp_path / "cache")
+        miss = cache.plan(config)
+        cache.discard(miss)
+
+        assert not miss.entry_dir.exists()
+        assert not cache.plan(config).hit
+
+    def test_lru_eviction_skips_entries_in_use(self, tmp_path):
+        """Test eviction removes least recently used entries that are not mapped."""
+        cache = ProvisioningCache(tmp_path / "cache", max_size_bytes=150)
+        configs = [
+            SandboxConfig(name=f"s{i}", startup_commands=[f"pip install pkg{i}"])
+            for i in range(3)
+        ]
+
+        for config in configs[:2]:
+            plan = cache.plan(config)
+            (plan.entry_dir / "wheels" / "pkg.whl").write_bytes(b"x" * 100)
+            cache.commit(plan)
+            cache.release(plan)
+
+        # First commit fit, second pushed the cache over and evicted the oldest
+        assert cache.get_stats()["entries"] == 1
+
+        pinned = cache.plan(configs[1])
+        assert pinned.hit
+
+        plan = cache.plan(configs[2])
+        (plan.entry_dir / "wheels" / "pkg.whl").write_bytes(b"x" * 100)
+        cache.commit(plan)
+
+        # A fresh commit is pinned by its sandbox, so both entries stay for now
+        assert cache.get_stats()["entries"] == 2
+        cache.release(plan)
+        cache.evict()
+
+        # The pinned entry survives even though it is least recently used
+        assert cache.plan(configs[1]).hit
+        assert not cache.plan(configs[2]).hit
+
+    def test_download_drops_install_only_options(self, tmp_path):
+        """Test pip download is not given options only pip install accepts."""
+        config = SandboxConfig(
+            name="upgrade",
+            startup_commands=[
+                "python -m pip install --upgrade pip",
+                'pip install -U --target C:/libs --upgrade-strategy=eager "requests>=2"',
+                "pip install -e C:/src/app",
+            ],
+        )
+
+        commands = ProvisioningCache(tmp_path / "cache").plan(config).commands
+        wheels = f"{config.provisioning.guest_path}/wheels"
+
+        assert commands[0] == f"python -m pip download -d {wheels} pip"
+        assert commands[1].endswith(f"--find-links {wheels} --upgrade pip")
+        assert commands[2] == f'pip download -d {wheels} "requests>=2"'
+        assert commands[4] == "pip install -e C:/src/app"
+        assert len(commands) == 5
@@ -0,0 +1,124 @@
+"""
+Unit tests for machine-readable CLI output.
+"""
+
+import csv
+import io
+import json
+import shlex
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from windows_sandbox_manager.cli import main
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.utils.records import RecordWriter
+
+
+class TestRecordWriter:
+    """Test the streaming writer formats."""
+
+    def test_json_array_streams_one_record_per_line(self):
+        """Test JSON output is a valid array written as records arrive."""
+        stream = io.StringIO()
+        writer = RecordWriter(stream, "json", ["a", "b"])
+        writer.write({"a": 1, "b": 2})
+        assert stream.getvalue() == '[\n{"a":1,"b":2}'
+
+        writer.write_many([{"b": "x", "extra": True}])
+        writer.close()
+        writer.close()
+        assert json.loads(stream.getvalue()) == [{"a": 1, "b": 2}, {"a": None, "b": "x"}]
+        assert len(stream.getvalue().splitlines()) == 4
+
+    def test_empty_json_is_an_empty_array(self):
+        """Test closing without records still yields valid JSON."""
+        stream = io.StringIO()
+        RecordWriter(stream, "json", ["a"]).close()
+        assert json.loads(stream.getvalue()) == []
+
+    def test_jsonl_and_csv_keep_the_schema(self):
+        """Test fields keep their order and nested values are encoded."""
+        record = {"b": {"k": [1]}, "a": None}
+
+        stream = io.StringIO()
+        RecordWriter(stream, "jsonl", ["a", "b"]).write_many([record, record])
+        lines = stream.getvalue().splitlines()
+        assert [list(json.loads(line)) for line in lines] == [["a", "b"], ["a", "b"]]
+
+        stream = io.StringIO()
+        RecordWriter(stream, "csv", ["a", "b"]).write_many([record])
+        assert list(csv.reader(io.StringIO(stream.getvalue()))) == [["a", "b"], ["", '{"k":[1]}']]
+
+    def test_unknown_format(self):
+        """Test unsupported formats are rejected."""
+        with pytest.raises(ValueError):
+            RecordWriter(io.StringIO(), "xml", ["a"])
+
+
+class TestCliOutput:
+    """Test --output on CLI commands."""
+
+    @pytest.fixture
+    def sandbox(self, tmp_path, monkeypatch):
+        """Running sandbox served by a stub manager."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(
+            Sandbox,
+            "_build_powershell_command",
+            lambda self, command, usage_path=None: f"{shlex.quote(sys.executable)} -c {shlex.quote(command)}",
+        )
+        sandbox = Sandbox(SandboxConfig(name="scripted"))
+        sandbox.state = SandboxState.RUNNING
+
+        class Manager:
+            def list_sandboxes(self, state=None):
+                return [sandbox]
+
+            def get_sandbox(self, sandbox_id):
+                return sandbox if sandbox_id == sandbox.id else None
+
+            async def close(self):
+                pass
+
+        async def open_manager(**kwargs):
+            return Manager()
+
+        monkeypatch.setattr(main, "_open_manager", open_manager)
+        return sandbox
+
+    def test_list_json(self, sandbox):
+        """Test listings are records with the documented fields."""
+        result = CliRunner().invoke(main.cli, ["list", "--output", "json"])
+
+        assert result.exit_code == 0
+        records = json.loads(result.stdout)
+        assert list(records[0]) == list(main.SANDBOX_FIELDS)
+        assert (records[0]["id"], records[0]["state"]) == (sandbox.id, "running")
+
+    def test_exec_jsonl_keeps_stdout_clean(self, sandbox):
+        """Test execution output is one record and messages go to stderr."""
+        result = CliRunner().invoke(
+            main.cli, ["exec", sandbox.id, "import sys; sys.exit(3)", "--output", "jsonl"]
+        )
+
+        assert result.exit_code == 3
+        record = json.loads(result.stdout)
+        assert list(record) == list(main.EXECUTION_FIELDS)
+        assert (record["returncode"], record["success"]) == (3, False)
+
+        missing = CliRunner().invoke(main.cli, ["exec", "nope", "dir", "--output", "csv"])
+        assert missing.exit_code == 1
+        assert missing.stdout.strip() == ",".join(main.EXECUTION_FIELDS)
+        assert "not found" in missing.stderr
+        assert not main.console.stderr
+
+    def test_check_system_csv(self):
+        """Test requirement checks are written as CSV rows."""
+        result = CliRunner().invoke(main.cli, ["check-system", "--output", "csv"])
+
+        rows = list(csv.DictReader(io.StringIO(result.stdout)))
+        assert tuple(rows[0]) == main.REQUIREMENT_FIELDS
+        assert all(row["status"] in ("passed", "failed", "warning", "unknown") for row in rows)
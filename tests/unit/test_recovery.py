@@ -0,0 +1,192 @@
+"""
+Unit tests for registry reconciliation at manager startup.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import psutil
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.manager import SandboxManager
+from windows_sandbox_manager.core.recovery import AdoptedProcess
+from windows_sandbox_manager.core.registry import SandboxRegistry
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.core.scheduler import ResourceScheduler
+
+
+@pytest.fixture
+def child():
+    """A long-running host process standing in for a sandbox."""
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc
+    if proc.poll() is None:
+        proc.kill()
+    proc.wait()
+
+
+def registry_entry(sandbox_id, state, pid, started_at):
+    """Registry record as an earlier manager would have written it."""
+    config = SandboxConfig(name=sandbox_id, monitoring={"metrics_enabled": False})
+    return {
+        "id": sandbox_id,
+        "name": sandbox_id,
+        "state": state,
+        "created_at": datetime.utcnow().isoformat(),
+        "config_snapshot": config.model_dump(mode="json"),
+        "last_seen": datetime.utcnow().isoformat(),
+        "pid": pid,
+        "process_started_at": started_at,
+    }
+
+
+def make_manager() -> SandboxManager:
+    """Manager with ample resources and no background reaper."""
+    scheduler = ResourceScheduler(memory_capacity_mb=65536, cpu_capacity=64)
+    return SandboxManager(scheduler=scheduler, reaper_interval=None)
+
+
+class TestRegistryRecovery:
+    """Test crash recovery at startup."""
+
+    async def test_reconciles_entries(self, tmp_path, monkeypatch, child):
+        """Test live sandboxes are adopted and dead ones dropped."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        me = psutil.Process(os.getpid())
+        child_started = psutil.Process(child.pid).create_time()
+        entries = [
+            registry_entry("alive", "running", child.pid, child_started),
+            # Same PID but a different start time means the PID was reused
+            registry_entry("reused", "running", os.getpid(), 1.0),
+            registry_entry("unrecorded", "running", None, None),
+            registry_entry("booting", "creating", os.getpid(), me.create_time()),
+            registry_entry("stopped", "stopped", None, None),
+        ]
+        registry_path = tmp_path / ".sandbox_registry.json"
+        registry_path.write_text(json.dumps({e["id"]: e for e in entries}))
+
+        manager = make_manager()
+        async with manager:
+            report = await manager.recover()  # Second pass finds nothing new
+            assert report.adopted == []
+
+            sandbox = manager.get_sandbox("alive")
+            assert sandbox is not None and sandbox.state == SandboxState.RUNNING
+            assert manager.get_running_count() == 1
+            assert manager.scheduler.get_stats()["active_reservations"] == 1
+
+            stored = json.loads(registry_path.read_text())
+            assert sorted(stored) == ["alive", "booting", "stopped"]
+
+        # Shutting the manager down stops the adopted process
+        assert child.wait(timeout=10) is not None
+
+    async def test_borrows_entries_of_live_managers(self, tmp_path, monkeypatch, child):
+        """Test only sandboxes whose owning manager has exited are claimed."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        child_started = psutil.Process(child.pid).create_time()
+        me = psutil.Process(os.getpid())
+        owned = registry_entry("owned", "running", child.pid, child_started)
+        # A manager in this very process, other than the one under test
+        owned.update(owner_id="other", owner_pid=os.getpid(), owner_started_at=me.create_time())
+        orphaned = registry_entry("orphaned", "running", child.pid, child_started)
+        orphaned.update(owner_id="gone", owner_pid=os.getpid(), owner_started_at=1.0)
+        registry_path = tmp_path / ".sandbox_registry.json"
+        registry_path.write_text(json.dumps({"owned": owned, "orphaned": orphaned}))
+
+        manager = make_manager()
+        report = await manager.recover()
+
+        assert report.owned_elsewhere == ["owned"]
+        assert report.adopted == ["orphaned"]
+        stored = json.loads(registry_path.read_text())
+        assert stored["owned"]["owner_id"] == "other"
+        assert stored["orphaned"]["owner_id"] == manager._registry.owner_id
+
+        # Borrowed sandboxes can be used here but are left running on exit
+        async with make_manager() as second:
+            assert second.get_sandbox("owned").is_running
+            assert second.get_sandbox("orphaned").is_running
+            assert await second.reap() == {}
+        assert child.poll() is None
+        stored = json.loads(registry_path.read_text())
+        assert sorted(stored) == ["orphaned", "owned"]
+
+        await manager.shutdown_all()
+        assert manager.get_sandbox("owned") is None
+
+    async def test_records_pid_on_creation(self, tmp_path, monkeypatch, child):
+        """Test created sandboxes persist their process identity."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+
+        async def fake_create(self: Sandbox) -> None:
+            self.process = AdoptedProcess.from_pid(child.pid)
+            self.state = SandboxState.RUNNING
+
+        monkeypatch.setattr(Sandbox, "create", fake_create)
+
+        async with make_manager() as manager:
+            sandbox = await manager.create_sandbox(SandboxConfig(name="tracked"))
+            stored = json.loads((tmp_path / ".sandbox_registry.json").read_text())
+
+            assert stored[sandbox.id]["pid"] == child.pid
+            assert stored[sandbox.id]["process_started_at"] == pytest.approx(
+                psutil.Process(child.pid).create_time()
+            )
+
+
+REGISTER_SCRIPT = """
+import asyncio, sys
+from pathlib import Path
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.registry import SandboxRegistry
+from windows_sandbox_manager.core.sandbox import Sandbox
+
+async def main():
+    registry = SandboxRegistry(Path(sys.argv[1]))
+    for number in range(10):
+        await registry.register(Sandbox(SandboxConfig(name=f"{sys.argv[2]}-{number}")))
+
+asyncio.run(main())
+"""
+
+
+class TestRegistryPersistence:
+    """Test registries sharing one file."""
+
+    async def test_writers_keep_each_others_entries(self, tmp_path):
+        """Test each change is merged into the file rather than replacing it."""
+        path = tmp_path / "registry.json"
+        first, second = SandboxRegistry(path), SandboxRegistry(path)
+        a = Sandbox(SandboxConfig(name="a"))
+        b = Sandbox(SandboxConfig(name="b"))
+
+        await first.register(a)
+        await second.register(b)
+        await first.update_state(a.id, SandboxState.RUNNING)
+
+        stored = json.loads(path.read_text())
+        assert sorted(info["name"] for info in stored.values()) == ["a", "b"]
+        assert stored[a.id]["state"] == "running"
+        assert sorted(info.name for info in await first.list_all()) == ["a", "b"]
+
+        assert await second.unregister(a.id)
+        assert list(json.loads(path.read_text())) == [b.id]
+
+    def test_concurrent_processes(self, tmp_path):
+        """Test entries written by several processes at once all survive."""
+        path = tmp_path / "registry.json"
+        writers = [
+            subprocess.Popen([sys.executable, "-c", REGISTER_SCRIPT, str(path), f"p{index}"])
+            for index in range(4)
+        ]
+        assert [writer.wait(timeout=60) for writer in writers] == [0] * 4
+
+        assert len(json.loads(path.read_text())) == 40
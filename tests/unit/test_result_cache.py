@@ -0,0 +1,145 @@
+"""
+Unit tests for the execution result cache.
+"""
+
+import shlex
+import sys
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.result_cache import ResultCache
+from windows_sandbox_manager.core.sandbox import ExecutionResult, Sandbox, SandboxState
+
+
+def make_result(stdout: str = "ok") -> ExecutionResult:
+    """Successful result with the given output."""
+    return ExecutionResult(stdout=stdout, stderr="", returncode=0, execution_time=0.1)
+
+
+class TestResultCache:
+    """Test keys, expiry and eviction."""
+
+    def test_fingerprint_ignores_name(self):
+        """Test sandboxes differing only by name share a fingerprint."""
+        first = ResultCache.fingerprint(SandboxConfig(name="a"))
+        second = ResultCache.fingerprint(SandboxConfig(name="b", description="other"))
+        different = ResultCache.fingerprint(SandboxConfig(name="a", memory_mb=8192))
+
+        assert first == second
+        assert first != different
+
+    def test_key_includes_input_hash(self):
+        """Test the input hash and options distinguish keys."""
+        key = ResultCache.compute_key("fp", "pip list")
+        assert key == ResultCache.compute_key("fp", "pip list")
+        assert key != ResultCache.compute_key("fp", "pip list", "abc")
+        assert key != ResultCache.compute_key("fp", "pip list", truncation="head")
+
+    def test_hit_returns_copy(self):
+        """Test hits are marked cached and do not alias the stored result."""
+        cache = ResultCache()
+        cache.put("k", "fp", make_result())
+
+        result = cache.get("k")
+        result.stdout = "changed"
+
+        assert result.cached
+        assert cache.get("k").stdout == "ok"
+        assert cache.get("missing") is None
+        assert cache.get_stats()["hits"] == 2
+        assert cache.get_stats()["misses"] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Test entries expire after their TTL."""
+        now = [1000.0]
+        monkeypatch.setattr("time.monotonic", lambda: now[0])
+        cache = ResultCache(ttl=10)
+        cache.put("k", "fp", make_result())
+        cache.put("forever", "fp", make_result(), ttl=3600)
+
+        now[0] += 11
+        assert cache.get("k") is None
+        assert cache.get("forever") is not None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full."""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", "fp", make_result())
+        cache.put("b", "fp", make_result())
+        cache.get("a")
+        cache.put("c", "fp", make_result())
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_invalidate(self):
+        """Test invalidation by key, by fingerprint and entirely."""
+        cache = ResultCache()
+        cache.put("a", "fp1", make_result())
+        cache.put("b", "fp1", make_result())
+        cache.put("c", "fp2", make_result())
+
+        assert cache.invalidate(key="a") == 1
+        assert cache.invalidate(fingerprint="fp1") == 1
+        assert cache.invalidate() == 1
+        assert cache.get_stats()["entries"] == 0
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch) -> Sandbox:
+    """Running sandbox whose commands run as local Python scripts."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        Sandbox,
+        "_build_powershell_command",
+        lambda self, command, usage_path=None: f"{shlex.quote(sys.executable)} -c {shlex.quote(command)}",
+    )
+    sandbox = Sandbox(SandboxConfig(name="cached"))
+    sandbox.state = SandboxState.RUNNING
+    return sandbox
+
+
+class TestExecuteCache:
+    """Test Sandbox.execute(cache=True)."""
+
+    SCRIPT = "import uuid; print(uuid.uuid4())"
+
+    async def test_cached_execution(self, sandbox):
+        """Test a repeated command is served from the cache."""
+        first = await sandbox.execute(self.SCRIPT, cache=True)
+        second = await sandbox.execute(self.SCRIPT, cache=True)
+
+        assert not first.cached
+        assert second.cached
+        assert second.stdout == first.stdout
+        assert sandbox.usage_totals.executions == 1
+
+    async def test_opt_in_and_input_hash(self, sandbox):
+        """Test uncached calls and different inputs run the command."""
+        first = await sandbox.execute(self.SCRIPT, cache=True)
+        uncached = await sandbox.execute(self.SCRIPT)
+        other_input = await sandbox.execute(self.SCRIPT, cache=True, input_hash="v2")
+
+        assert uncached.stdout != first.stdout
+        assert other_input.stdout != first.stdout
+        assert sandbox.usage_totals.executions == 3
+
+    async def test_failures_not_cached(self, sandbox):
+        """Test failed commands are run again."""
+        await sandbox.execute("import sys; sys.exit(3)", cache=True)
+        result = await sandbox.execute("import sys; sys.exit(3)", cache=True)
+
+        assert not result.cached
+        assert result.returncode == 3
+
+    async def test_invalidate_after_mutation(self, sandbox):
+        """Test invalidate_cache() forces the next call to run."""
+        first = await sandbox.execute(self.SCRIPT, cache=True)
+        assert sandbox.invalidate_cache() == 1
+
+        second = await sandbox.execute(self.SCRIPT, cache=True)
+        assert not second.cached
+        assert second.stdout != first.stdout
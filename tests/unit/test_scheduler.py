@@ -0,0 +1,104 @@
+"""
+Unit tests for resource-aware admission control.
+"""
+
+import asyncio
+import pytest
+
+from windows_sandbox_manager.core.scheduler import ResourceScheduler
+from windows_sandbox_manager.exceptions import ResourceError
+from windows_sandbox_manager.utils.system_check import SystemChecker
+
+
+class TestResourceScheduler:
+    """Test ResourceScheduler class."""
+
+    async def test_grant_and_release(self):
+        """Test reservations are tracked against capacity."""
+        scheduler = ResourceScheduler(memory_capacity_mb=8192, cpu_capacity=4)
+
+        reservation = await scheduler.acquire(4096, 2)
+        stats = scheduler.get_stats()
+        assert stats["memory_reserved_mb"] == 4096
+        assert stats["cpu_reserved"] == 2
+
+        scheduler.release(reservation)
+        assert scheduler.get_stats()["memory_reserved_mb"] == 0
+
+        # Releasing twice is a no-op
+        scheduler.release(reservation)
+        assert scheduler.get_stats()["cpu_reserved"] == 0
+
+    async def test_reject_oversized_request(self):
+        """Test requests larger than the host are rejected immediately."""
+        scheduler = ResourceScheduler(memory_capacity_mb=4096, cpu_capacity=4)
+
+        with pytest.raises(ResourceError):
+            await scheduler.acquire(8192, 1)
+
+        assert scheduler.get_stats()["rejected"] == 1
+
+    async def test_unknown_capacity_is_unlimited(self, monkeypatch):
+        """Test missing or undetectable capacity does not reject requests."""
+        scheduler = ResourceScheduler()
+        await scheduler.acquire(1 << 20, 1024)
+        assert scheduler.get_stats()["memory_capacity_mb"] is None
+
+        monkeypatch.setattr(SystemChecker, "get_system_memory_gb", staticmethod(lambda: 0.0))
+        monkeypatch.setattr(SystemChecker, "get_cpu_cores", staticmethod(lambda: 8))
+        scheduler = ResourceScheduler.for_host(cpu_overcommit=2.0)
+        assert (scheduler.memory_capacity_mb, scheduler.cpu_capacity) == (None, 16)
+        await scheduler.acquire(4096, 2)
+
+        with pytest.raises(ResourceError, match="unlimitedMB / 16 vCPU"):
+            await scheduler.acquire(1024, 32)
+
+    async def test_queue_full_rejection(self):
+        """Test requests are rejected when the queue is full."""
+        scheduler = ResourceScheduler(memory_capacity_mb=4096, cpu_capacity=4, max_queue_size=1)
+        await scheduler.acquire(4096, 1)
+
+        waiter = asyncio.create_task(scheduler.acquire(1024, 1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ResourceError):
+            await scheduler.acquire(1024, 1)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.get_stats()["queue_depth"] == 0
+
+    async def test_priority_order(self):
+        """Test higher priority waiters are admitted first."""
+        scheduler = ResourceScheduler(memory_capacity_mb=4096, cpu_capacity=4, aging_interval=0)
+        blocker = await scheduler.acquire(4096, 1)
+
+        order = []
+
+        async def request(label: str, priority: int) -> None:
+            reservation = await scheduler.acquire(4096, 1, priority=priority)
+            order.append(label)
+            scheduler.release(reservation)
+
+        low = asyncio.create_task(request("low", 0))
+        high = asyncio.create_task(request("high", 10))
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["queue_depth"] == 2
+
+        scheduler.release(blocker)
+        await asyncio.gather(low, high)
+
+        assert order == ["high", "low"]
+
+    async def test_acquire_timeout(self):
+        """Test queued requests time out and free their queue slot."""
+        scheduler = ResourceScheduler(memory_capacity_mb=4096, cpu_capacity=4)
+        await scheduler.acquire(4096, 1)
+
+        with pytest.raises(ResourceError):
+            await scheduler.acquire(1024, 1, timeout=0.01)
+
+        stats = scheduler.get_stats()
+        assert stats["timed_out"] == 1
+        assert stats["queue_depth"] == 0
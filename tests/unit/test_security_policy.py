@@ -0,0 +1,152 @@
+"""
+Unit tests for the declarative security policy.
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from windows_sandbox_manager.config.models import SandboxConfig, SecurityConfig
+from windows_sandbox_manager.core.sandbox import Sandbox
+from windows_sandbox_manager.exceptions import ConfigurationError, SecurityError
+from windows_sandbox_manager.security.policy import PolicyRequest, SecurityPolicy
+from windows_sandbox_manager.security.validation import SecurityConfig as SecurityEnforcer
+
+
+def policy(**security) -> SecurityPolicy:
+    """Policy for a security config given as keyword arguments."""
+    return SecurityPolicy(SecurityConfig(**security))
+
+
+class TestIsolationLevels:
+    """Test the built-in rules of each level."""
+
+    def test_medium_matches_previous_defaults(self):
+        """Test the default level keeps the former hard-coded limits."""
+        rules = policy().rules
+
+        assert rules.max_file_size_mb == 100
+        assert rules.max_command_length == 1000
+        assert ".py" in rules.allowed_extensions
+        assert SecurityEnforcer().max_file_size_mb == 100
+        assert SecurityEnforcer().max_command_length == 1000
+
+    def test_levels_differ(self):
+        """Test stricter levels refuse what looser ones allow."""
+        low, medium, high = (policy(isolation_level=level) for level in ("low", "medium", "high"))
+
+        assert low.check_command("echo hi > out.txt").allowed
+        assert not medium.check_command("echo hi > out.txt").allowed
+        assert medium.check_file("C:/work/app.py").allowed
+        assert not high.check_file("C:/work/app.py").allowed
+        assert low.check_url("http://10.0.0.5/").allowed
+        assert not high.check_url("http://example.com/").allowed
+        for level in (low, medium, high):
+            assert not level.check_command("shutdown /s").allowed
+
+
+class TestSecurityPolicy:
+    """Test rule evaluation, overrides, caching and auditing."""
+
+    def test_path_rules(self):
+        """Test denied paths cover their subtrees and traversal is refused."""
+        p = policy()
+
+        decision = p.check_path("c:\\windows\\System32\\drivers")
+        assert not decision.allowed
+        assert decision.rule.startswith("denied_paths:")
+        assert p.check_path("C:/Windowsill/notes.txt").allowed
+        assert not p.check_path("C:/work/../Windows").allowed
+
+    def test_file_rules(self):
+        """Test extension and size limits apply to file requests."""
+        p = policy()
+
+        assert p.check_file("C:/work/data.CSV", size=1024).allowed
+        assert p.check_file("C:/work/tool.exe").rule == "allowed_extensions"
+        assert p.check_file("C:/work/big.log", size=101 * 1024 * 1024).rule == "max_file_size_mb"
+
+    def test_config_overrides(self):
+        """Test rules for the selected level replace the built-in values."""
+        p = policy(
+            isolation_level="high",
+            rules={
+                "high": {"allowed_paths": ["C:/work"], "allowed_commands": ["python", "pip"]},
+                "low": {"allowed_extensions": []},
+            },
+            file_access={"write": False},
+        )
+
+        assert p.check_path("C:/work/src").allowed
+        assert p.check_path("C:/other").rule == "allowed_paths"
+        assert p.check_path("C:/work/out.txt", write=True).rule == "file_access.write"
+        assert p.check_command("python -m pytest").allowed
+        assert p.check_command("C:\\Tools\\curl.exe https://x").rule == "allowed_commands"
+        # Overrides for other levels do not apply
+        assert p.rules.allowed_extensions != []
+
+    def test_readonly_system(self):
+        """Test system paths are only writable with readonly_system off."""
+        assert not policy(isolation_level="low").check_path("C:/Windows/x", write=True).allowed
+        p = policy(isolation_level="low", file_access={"readonly_system": False})
+        assert p.check_path("C:/Windows/x", write=True).allowed
+
+    def test_network_restrictions(self):
+        """Test URL checks use the config's network restrictions."""
+        p = policy(network_restrictions={"allow": ["*.pypi.org"], "deny": ["*"]})
+
+        assert p.check_url("https://files.pypi.org/simple").allowed
+        decision = p.check_url("https://example.com")
+        assert (decision.allowed, decision.rule) == (False, "network:*")
+        assert p.check_url("ftp://files.pypi.org").rule == "url_schemes"
+
+    def test_bulk_evaluation_is_memoized(self):
+        """Test repeated requests hit the cache and every decision is audited."""
+        p = SecurityPolicy(SecurityConfig(rules={"medium": {"max_command_length": 123}}))
+        requests = [("command", "dir"), ("command", "format c:"), ("url", "https://a.io")] * 100
+        decisions = p.evaluate_many(requests)
+
+        assert [d.allowed for d in decisions[:3]] == [True, False, True]
+        stats = p.get_stats()
+        assert stats["cache_misses"] == 3
+        assert stats["cache_hits"] == 297
+        assert stats["audit"] == {"retained": 300, "allowed": 200, "denied": 100}
+        denied = p.audit.records(allowed=False)
+        assert {r.decision.target for r in denied} == {"format c:"}
+
+    def test_identical_configs_share_compiled_rules(self):
+        """Test configs with the same rules compile once."""
+        first, second = policy(isolation_level="low"), policy(isolation_level="low")
+
+        assert first._compiled is second._compiled
+        assert first.audit is not second.audit
+
+    def test_listeners_and_enforce(self):
+        """Test listeners see decisions and enforce raises on denials."""
+        p = policy()
+        seen = []
+        p.add_listener(seen.append)
+
+        p.enforce(p.evaluate(PolicyRequest("command", "dir")))
+        with pytest.raises(SecurityError, match="medium policy"):
+            p.enforce(p.check_command("diskpart"))
+        assert [d.allowed for d in seen] == [True, False]
+
+    def test_invalid_rules(self):
+        """Test bad levels and patterns are reported."""
+        with pytest.raises(ValidationError):
+            SecurityConfig(rules={"extreme": {}})
+        with pytest.raises(ConfigurationError):
+            policy(rules={"medium": {"command_patterns": ["("]}})
+
+
+class TestSandboxPolicy:
+    """Test Sandbox.security_policy."""
+
+    def test_built_from_config(self, tmp_path, monkeypatch):
+        """Test the sandbox compiles its config's security section."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        sandbox = Sandbox(SandboxConfig(name="policy", security={"isolation_level": "high"}))
+
+        assert sandbox.security_policy.level == "high"
+        assert not sandbox.security_policy.check_command("reg add HKLM\\x").allowed
+        assert sandbox.network_policy is sandbox.security_policy.network
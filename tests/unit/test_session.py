@@ -0,0 +1,162 @@
+"""
+Unit tests for persistent shell sessions.
+"""
+
+import pytest
+from click.testing import CliRunner
+
+from windows_sandbox_manager.cli import main
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.events import EventBus, ExecutionFinishedEvent
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState
+from windows_sandbox_manager.core.session import ShellSession
+from windows_sandbox_manager.exceptions import SandboxError
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    """Running sandbox whose session shell is a local POSIX shell."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(Sandbox, "_build_shell_command", lambda self: "/bin/sh")
+    monkeypatch.setattr(
+        ShellSession, "_frame", lambda self, command, marker: f'{command}\necho "{marker}$?"\n'
+    )
+    sandbox = Sandbox(SandboxConfig(name="session"), event_bus=EventBus())
+    sandbox.state = SandboxState.RUNNING
+    return sandbox
+
+
+class TestShellSession:
+    """Test commands sharing one shell."""
+
+    async def test_state_persists_between_commands(self, sandbox, tmp_path):
+        """Test directory and environment changes carry over."""
+        async with await sandbox.open_session() as session:
+            await session.run(f"cd {tmp_path} && export GREETING=hello")
+            result = await session.run("pwd; echo $GREETING")
+
+            assert result.output.splitlines() == [str(tmp_path), "hello"]
+            assert result.success
+
+            failed = await session.run("ls /does-not-exist")
+            assert failed.returncode != 0
+            assert "does-not-exist" in failed.output
+
+        assert session.closed
+        assert not sandbox._sessions
+
+    async def test_queued_commands_and_streaming(self, sandbox):
+        """Test sent commands are read back in order, line by line."""
+        async with await sandbox.open_session() as session:
+            await session.send("sleep 0.2; echo first")
+            await session.send("printf 'a\\nb'")
+            assert session.pending == 2
+            assert sandbox.idle_seconds == 0.0
+
+            assert (await session.read()).output == "first\n"
+            assert [line async for line in session.iter_lines()] == ["a", "b"]
+            assert session.last_result.output == "a\nb"
+            assert [line async for line in session.stream("echo done")] == ["done"]
+
+    async def test_timeout_keeps_command_queued(self, sandbox):
+        """Test a timed-out read can be resumed."""
+        async with await sandbox.open_session() as session:
+            with pytest.raises(SandboxError, match="timed out"):
+                await session.run("echo partial; sleep 0.5; echo rest", timeout=0.1)
+
+            assert session.pending == 1
+            assert (await session.read()).output == "partial\nrest\n"
+
+    async def test_output_limit_and_events(self, sandbox):
+        """Test output is bounded and each command is published."""
+        subscription = sandbox.event_bus.subscribe(event_types={ExecutionFinishedEvent})
+        async with await sandbox.open_session(max_output_bytes=10, truncation="head") as session:
+            result = await session.run("seq 1 100")
+
+        assert result.output == "1\n2\n3\n4\n5\n"
+        assert result.truncated_bytes == 292 - 10
+        event = await subscription.get()
+        assert (event.command, event.returncode) == ("seq 1 100", 0)
+
+    async def test_errors(self, sandbox):
+        """Test invalid commands, reads and a dead shell are reported."""
+        session = await sandbox.open_session()
+        with pytest.raises(SandboxError, match="single line"):
+            await session.send("echo a\necho b")
+        with pytest.raises(SandboxError, match="No command"):
+            await session.read()
+
+        with pytest.raises(SandboxError, match="ended"):
+            await session.run("exit 3")
+        assert session.closed
+        with pytest.raises(SandboxError, match="closed"):
+            await session.send("echo again")
+
+        sandbox.state = SandboxState.STOPPED
+        with pytest.raises(SandboxError):
+            await sandbox.open_session()
+
+    def test_powershell_frame(self):
+        """Test guest commands are framed as one line ending in the marker."""
+        frame = ShellSession._frame(None, "Set-Location C:\\Work", "__M__")
+
+        assert frame.count("\n") == 1
+        assert "try { Set-Location C:\\Work }" in frame
+        assert frame.endswith('Write-Output "__M__$__wsb_code"\n')
+
+    async def test_session_holds_an_execution_slot(self, sandbox):
+        """Test an open session counts against the execution limit."""
+        scheduler = sandbox.execution_scheduler
+        async with await sandbox.open_session():
+            assert scheduler.get_stats()["running"] == 1
+        assert scheduler.get_stats()["running"] == 0
+
+    async def test_shutdown_closes_sessions(self, sandbox):
+        """Test sessions do not outlive their sandbox."""
+        session = await sandbox.open_session()
+        await sandbox.begin_shutdown()
+        assert session.closed
+
+
+class TestShellCommand:
+    """Test the wsb shell CLI."""
+
+    @pytest.fixture
+    def manager(self, sandbox, monkeypatch):
+        """Stub manager serving the sandbox."""
+
+        class Manager:
+            def get_sandbox(self, sandbox_id):
+                return sandbox if sandbox_id == sandbox.id else None
+
+            async def close(self):
+                pass
+
+        async def open_manager(**kwargs):
+            return Manager()
+
+        monkeypatch.setattr(main, "_open_manager", open_manager)
+
+    def test_scripted_commands(self, sandbox, manager):
+        """Test -c commands share state and the first failure sets the exit code."""
+        result = CliRunner().invoke(
+            main.cli,
+            ["shell", sandbox.id, "-c", "X=42", "-c", "echo $X", "-c", "(exit 4)"]
+            + ["-c", "echo skipped"],
+        )
+
+        assert result.exit_code == 4
+        assert "42" in result.stdout
+        assert "skipped" not in result.stdout
+
+    def test_interactive_prompt(self, sandbox, manager):
+        """Test lines read from stdin run until exit."""
+        result = CliRunner().invoke(
+            main.cli, ["shell", sandbox.id], input="cd /\npwd\nfalse\nexit\necho never\n"
+        )
+
+        assert result.exit_code == 0
+        assert "PS> " in result.stdout
+        assert "PS> /\n" in result.stdout
+        assert "exit code 1" in result.stdout
+        assert "never" not in result.stdout
@@ -0,0 +1,111 @@
+"""
+Unit tests for the shutdown coordinator.
+"""
+
+import asyncio
+import pytest
+from typing import Optional
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.sandbox import Sandbox, SandboxState, ShutdownStage
+from windows_sandbox_manager.core.shutdown import ShutdownCoordinator
+
+
+class FakeProcess:
+    """Process stand-in that exits on terminate unless it is stubborn."""
+
+    def __init__(self, stubborn: bool = False):
+        self.stubborn = stubborn
+        self.returncode: Optional[int] = None
+        self.killed = False
+        self._exited = asyncio.Event()
+
+    def terminate(self) -> None:
+        if not self.stubborn:
+            self._exit(0)
+
+    def kill(self) -> None:
+        self.killed = True
+        self._exit(-9)
+
+    async def wait(self) -> int:
+        await self._exited.wait()
+        return self.returncode
+
+    def _exit(self, code: int) -> None:
+        self.returncode = code
+        self._exited.set()
+
+
+@pytest.fixture
+def make_sandbox(tmp_path, monkeypatch):
+    """Build running sandboxes backed by fake processes."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+
+    def make(name: str, stubborn: bool = False) -> Sandbox:
+        sandbox = Sandbox(SandboxConfig(name=name))
+        sandbox.process = FakeProcess(stubborn)
+        sandbox.state = SandboxState.RUNNING
+        return sandbox
+
+    return make
+
+
+class TestShutdownCoordinator:
+    """Test staged, bounded fleet shutdown."""
+
+    async def test_escalates_only_when_needed(self, make_sandbox):
+        """Test cooperative sandboxes stop on terminate and stubborn ones are killed."""
+        polite = make_sandbox("polite")
+        stubborn = make_sandbox("stubborn", stubborn=True)
+        coordinator = ShutdownCoordinator(terminate_timeout=0.05, kill_timeout=1)
+
+        report = await coordinator.shutdown([polite, stubborn])
+
+        first, second = report.sandboxes
+        assert first.final_stage == ShutdownStage.TERMINATE and not first.forced
+        assert second.forced and stubborn.process.killed
+        assert second.stages["terminate"] >= 0.05
+        assert [r.name for r in report.force_killed] == ["stubborn"]
+        assert polite.state == stubborn.state == SandboxState.STOPPED
+
+    async def test_deadline_shortens_stages(self, make_sandbox):
+        """Test a global deadline caps the fleet even with long stage timeouts."""
+        sandboxes = [make_sandbox(f"s{i}", stubborn=True) for i in range(4)]
+        coordinator = ShutdownCoordinator(
+            max_concurrent=2, deadline=0.3, terminate_timeout=30, kill_timeout=0.1
+        )
+
+        report = await coordinator.shutdown(sandboxes)
+
+        assert len(report.force_killed) == 4
+        assert report.elapsed < 1.0
+        assert report.stage_totals()["terminate"] < 0.5
+
+    async def test_on_finished_called_for_each(self, make_sandbox):
+        """Test the completion hook runs for every sandbox, already stopped or not."""
+        running = make_sandbox("running")
+        stopped = make_sandbox("stopped")
+        stopped.state = SandboxState.STOPPED
+        finished = []
+
+        async def on_finished(sandbox: Sandbox) -> None:
+            finished.append(sandbox.config.name)
+
+        report = await ShutdownCoordinator().shutdown([running, stopped], on_finished)
+
+        assert sorted(finished) == ["running", "stopped"]
+        assert report.sandboxes[1].final_stage is None
+
+    async def test_cancellation_kills_processes(self, make_sandbox):
+        """Test cancelling a shutdown kills whatever is still running."""
+        sandboxes = [make_sandbox(f"s{i}", stubborn=True) for i in range(3)]
+        coordinator = ShutdownCoordinator(max_concurrent=1, terminate_timeout=30)
+
+        task = asyncio.create_task(coordinator.shutdown(sandboxes))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert all(sandbox.process.killed for sandbox in sandboxes)
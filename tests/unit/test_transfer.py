@@ -0,0 +1,189 @@
+"""
+Unit tests for host/sandbox file transfers.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from windows_sandbox_manager.config.models import SandboxConfig
+from windows_sandbox_manager.core.sandbox import ExecutionResult, Sandbox, SandboxState
+from windows_sandbox_manager.core.transfer import MANIFEST_FILE, FileTransfer
+from windows_sandbox_manager.exceptions import SandboxError
+
+
+@pytest.fixture
+def tree(tmp_path) -> Path:
+    """Small source tree with nested directories."""
+    root = tmp_path / "src"
+    (root / "pkg" / "sub").mkdir(parents=True)
+    (root / "README.md").write_text("readme")
+    (root / "pkg" / "main.py").write_text("print('hi')\n")
+    (root / "pkg" / "sub" / "data.bin").write_bytes(os.urandom(100_000))
+    return root
+
+
+def read_tree(root: Path) -> dict:
+    """Relative path -> bytes for every file except the manifest."""
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes()
+        for path in root.rglob("*")
+        if path.is_file() and path.name != MANIFEST_FILE
+    }
+
+
+class TestFileTransfer:
+    """Test the copy engine."""
+
+    def test_copy_then_skip_unchanged(self, tree, tmp_path):
+        """Test a second copy skips files recorded in the manifest."""
+        transfer = FileTransfer(chunk_size=4096, workers=3)
+        dest = tmp_path / "dest"
+
+        first = transfer.copy_tree(tree, dest)
+        assert first.files_copied == 3
+        assert read_tree(dest) == read_tree(tree)
+
+        second = transfer.copy_tree(tree, dest)
+        assert second.files_copied == 0
+        assert second.files_skipped == 3
+        assert second.bytes_copied == 0
+
+    def test_changed_and_touched_files(self, tree, tmp_path):
+        """Test changed content is copied and touched-but-identical files are not."""
+        transfer = FileTransfer()
+        dest = tmp_path / "dest"
+        transfer.copy_tree(tree, dest)
+
+        (tree / "pkg" / "main.py").write_text("print('changed')\n")
+        os.utime(tree / "README.md", ns=(0, 10**18))
+        report = transfer.copy_tree(tree, dest)
+
+        assert report.files_copied == 1
+        assert (dest / "pkg" / "main.py").read_text() == "print('changed')\n"
+
+    def test_resumes_partial_copy(self, tree, tmp_path):
+        """Test an interrupted copy continues from its part file."""
+        source = tree / "pkg" / "sub" / "data.bin"
+        stat = source.stat()
+        dest = tmp_path / "dest"
+        part = dest / "pkg" / "sub" / f".data.bin.{stat.st_size}-{stat.st_mtime_ns}.part"
+        part.parent.mkdir(parents=True)
+        part.write_bytes(source.read_bytes()[:60_000])
+
+        report = FileTransfer(chunk_size=4096).copy_tree(tree, dest)
+
+        assert report.files_resumed == 1
+        assert report.bytes_copied == report.bytes_total - 60_000
+        assert read_tree(dest) == read_tree(tree)
+
+    def test_pack_and_unpack(self, tree, tmp_path):
+        """Test archives carry only changes and extract to the same tree."""
+        transfer = FileTransfer()
+        archive = tmp_path / "out" / "src.zip"
+        manifests = tmp_path / "manifests"
+
+        assert transfer.pack(tree, archive, manifests).files_copied == 3
+        # Until the archive is known to be delivered, its files count as unsent
+        assert transfer.pack(tree, archive, manifests).files_copied == 3
+        dest = tmp_path / "dest"
+        transfer.unpack(archive, dest)
+        assert read_tree(dest) == read_tree(tree)
+        transfer.commit_pack(manifests)
+
+        (tree / "README.md").write_text("updated")
+        report = transfer.pack(tree, archive, manifests)
+        assert report.files_copied == 1
+        assert report.files_skipped == 2
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch) -> Sandbox:
+    """Running sandbox with transfers enabled and guest commands recorded."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+    sandbox = Sandbox(SandboxConfig(name="transfer", transfer={"enabled": True}))
+    sandbox._plan_transfers()
+    sandbox.state = SandboxState.RUNNING
+    sandbox.guest_commands = []
+
+    async def fake_execute(command, timeout=300, **kwargs):
+        sandbox.guest_commands.append(command)
+        return ExecutionResult(stdout="", stderr="", returncode=1, execution_time=0.0)
+
+    monkeypatch.setattr(sandbox, "execute", fake_execute)
+    return sandbox
+
+
+class TestSandboxTransfers:
+    """Test Sandbox.put_files() and get_files()."""
+
+    async def test_staging_folder_mapped(self, sandbox):
+        """Test the staging folder is mapped writable into the guest."""
+        mapping = sandbox.mapped_folders[-1]
+        assert mapping.host == sandbox.transfer_dir
+        assert not mapping.readonly
+        assert (sandbox.transfer_dir / "inbox").is_dir()
+
+    async def test_put_files(self, sandbox, tree):
+        """Test files are staged and copied into place inside the guest."""
+        report = await sandbox.put_files(tree, guest_dest="C:\\work")
+
+        assert report.direction == "put"
+        assert read_tree(sandbox.transfer_dir / "inbox" / "src") == read_tree(tree)
+        assert sandbox.guest_commands == [
+            'robocopy "C:\\Transfer\\inbox\\src" "C:\\work" /E /MT:4 /NFL /NDL /NJH /NJS /NP'
+        ]
+
+    async def test_get_files_from_outbox(self, sandbox, tree, tmp_path):
+        """Test files written to the outbox are fetched without guest commands."""
+        FileTransfer().copy_tree(tree, sandbox.transfer_dir / "outbox" / "results")
+
+        report = await sandbox.get_files("results", tmp_path / "fetched")
+
+        assert report.files_copied == 3
+        assert report.throughput_mb_s > 0
+        assert read_tree(tmp_path / "fetched") == read_tree(tree)
+        assert sandbox.guest_commands == []
+
+    async def test_compressed_put_per_destination(self, sandbox, tree, monkeypatch):
+        """Test archives are tracked per destination and only once extracted."""
+        returncodes = [1, 0, 0, 0]
+
+        async def extract(command, timeout=300, **kwargs):
+            sandbox.guest_commands.append(command)
+            return ExecutionResult(
+                stdout="", stderr="", returncode=returncodes.pop(0), execution_time=0.0
+            )
+
+        async def put(dest: str) -> int:
+            report = await sandbox.put_files(tree, guest_dest=dest, compress=True)
+            return report.files_copied
+
+        monkeypatch.setattr(sandbox, "execute", extract)
+        with pytest.raises(SandboxError):
+            await put("C:\\a")
+
+        # The failed extraction is sent again in full
+        assert [await put("C:\\a"), await put("C:\\a")] == [3, 0]
+        # Another destination has received nothing yet
+        assert await put("C:\\b") == 3
+
+    async def test_guest_command_failure(self, sandbox, tree, monkeypatch):
+        """Test a failing guest copy is reported."""
+
+        async def failing(command, timeout=300, **kwargs):
+            return ExecutionResult(stdout="", stderr="denied", returncode=16, execution_time=0.0)
+
+        monkeypatch.setattr(sandbox, "execute", failing)
+        with pytest.raises(SandboxError, match="exit code 16"):
+            await sandbox.put_files(tree, guest_dest="C:\\work")
+
+    async def test_disabled(self, tmp_path, monkeypatch, tree):
+        """Test transfers need to be enabled in the config."""
+        monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+        sandbox = Sandbox(SandboxConfig(name="plain"))
+        sandbox.state = SandboxState.RUNNING
+
+        with pytest.raises(SandboxError, match="not enabled"):
+            await sandbox.put_files(tree)
@@ -0,0 +1,153 @@
+"""
+Unit tests for incremental workspace sync.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from windows_sandbox_manager.config.models import FolderMapping, SandboxConfig
+from windows_sandbox_manager.core.sandbox import Sandbox
+from windows_sandbox_manager.core.workspace_sync import WorkspaceSync
+from windows_sandbox_manager.exceptions import ConfigurationError
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep sync indexes inside the test directory."""
+    monkeypatch.setenv("WSB_CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def workspace(tmp_path) -> Path:
+    """Workspace with a few nested files."""
+    root = tmp_path / "workspace"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "README.md").write_text("readme")
+    (root / "src" / "app.py").write_text("print('app')\n")
+    (root / "src" / "pkg" / "util.py").write_text("X = 1\n")
+    return root
+
+
+def read_tree(root: Path) -> dict:
+    """Relative path -> text for every file."""
+    return {
+        path.relative_to(root).as_posix(): path.read_text()
+        for path in root.rglob("*")
+        if path.is_file()
+    }
+
+
+class TestWorkspaceSync:
+    """Test deltas, deletes and link modes."""
+
+    def test_initial_and_noop_sync(self, workspace, tmp_path):
+        """Test the first sync copies everything and the next copies nothing."""
+        dest = tmp_path / "mapped"
+        first = WorkspaceSync(workspace, dest).sync()
+        assert first.copied == 3
+        assert read_tree(dest) == read_tree(workspace)
+
+        # A fresh instance reads the persisted index
+        second = WorkspaceSync(workspace, dest).sync()
+        assert second.unchanged == 3
+        assert not second.changed
+
+    def test_changes_and_deletes(self, workspace, tmp_path):
+        """Test modified, added and removed files are propagated."""
+        dest = tmp_path / "mapped"
+        sync = WorkspaceSync(workspace, dest)
+        sync.sync()
+
+        (workspace / "src" / "app.py").write_text("print('changed')\n")
+        (workspace / "NEW.txt").write_text("new")
+        (workspace / "src" / "pkg" / "util.py").unlink()
+        (workspace / "src" / "pkg").rmdir()
+        report = sync.sync()
+
+        assert (report.copied, report.deleted) == (2, 1)
+        assert read_tree(dest) == read_tree(workspace)
+        assert not (dest / "src" / "pkg").exists()
+
+    def test_touched_file_not_copied(self, workspace, tmp_path):
+        """Test a file with a new mtime but the same content is only re-indexed."""
+        dest = tmp_path / "mapped"
+        sync = WorkspaceSync(workspace, dest)
+        sync.sync()
+
+        os.utime(workspace / "README.md", ns=(0, 10**18))
+        report = sync.sync()
+        assert report.copied == 0
+        assert report.unchanged == 3
+        assert not sync.sync().changed
+
+    def test_full_repairs_destination(self, workspace, tmp_path):
+        """Test full=True restores altered files and removes strays."""
+        dest = tmp_path / "mapped"
+        sync = WorkspaceSync(workspace, dest)
+        sync.sync()
+
+        (dest / "README.md").write_text("tampered!")
+        (dest / "stray.txt").write_text("stray")
+        assert not sync.sync().changed
+
+        report = sync.sync(full=True)
+        assert (report.copied, report.deleted) == (1, 1)
+        assert read_tree(dest) == read_tree(workspace)
+
+    def test_hardlink_mode(self, workspace, tmp_path):
+        """Test hard-link mode shares the workspace files."""
+        mapping = FolderMapping(
+            host=tmp_path / "mapped", guest="C:/work", readonly=True, sync_from=workspace
+        )
+        report = WorkspaceSync.for_mapping(mapping, mode="hardlink").sync()
+
+        assert report.linked == 3
+        assert os.path.samefile(workspace / "README.md", tmp_path / "mapped" / "README.md")
+
+    def test_hardlink_needs_readonly(self, workspace, tmp_path):
+        """Test hard links are refused for writable mappings."""
+        mapping = FolderMapping(
+            host=tmp_path / "mapped", guest="C:/work", sync_from=workspace, sync_mode="hardlink"
+        )
+        with pytest.raises(ConfigurationError, match="read-only"):
+            WorkspaceSync.for_mapping(mapping)
+
+    def test_noop_sync_is_fast(self, tmp_path):
+        """Test a no-change sync only stats files, so large trees sync quickly."""
+        workspace = tmp_path / "big"
+        for d in range(20):
+            folder = workspace / f"d{d}"
+            folder.mkdir(parents=True)
+            for f in range(100):
+                (folder / f"f{f}.txt").write_bytes(b"")
+        sync = WorkspaceSync(workspace, tmp_path / "mapped", workers=8)
+        assert sync.sync().scanned == 2_000
+
+        started = time.perf_counter()
+        report = sync.sync()
+        elapsed = time.perf_counter() - started
+
+        assert report.unchanged == 2_000
+        # Well under a second for 50k files leaves 40ms for 2k; allow for slow CI
+        assert elapsed < 0.1
+
+
+class TestSandboxSync:
+    """Test Sandbox.sync_folders()."""
+
+    async def test_syncs_configured_mappings(self, workspace, tmp_path):
+        """Test mappings with sync_from are mirrored."""
+        config = SandboxConfig(
+            name="sync",
+            folders=[
+                {"host": str(tmp_path / "mapped"), "guest": "C:/work", "sync_from": str(workspace)},
+                {"host": str(tmp_path), "guest": "C:/other"},
+            ],
+        )
+        reports = await Sandbox(config).sync_folders()
+
+        assert list(reports) == [str(tmp_path / "mapped")]
+        assert read_tree(tmp_path / "mapped") == read_tree(workspace)
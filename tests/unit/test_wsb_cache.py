@@ -0,0 +1,64 @@
+"""
+Unit tests for the content-addressed WSB file cache.
+"""
+
+import os
+import time
+from pathlib import Path
+
+from windows_sandbox_manager.config.models import FolderMapping, SandboxConfig
+from windows_sandbox_manager.core.sandbox import Sandbox
+from windows_sandbox_manager.core.wsb_cache import WsbFileCache
+
+
+class TestWsbFileCache:
+    """Test WsbFileCache class."""
+
+    def test_key_ignores_irrelevant_fields(self):
+        """Test only fields that reach the XML change the key."""
+        config = SandboxConfig(name="a", memory_mb=2048)
+        key = WsbFileCache.compute_key(config, [])
+
+        assert key == WsbFileCache.compute_key(
+            SandboxConfig(name="b", memory_mb=2048, startup_commands=["dir"]), []
+        )
+        assert key != WsbFileCache.compute_key(SandboxConfig(name="a", memory_mb=4096), [])
+
+        folder = FolderMapping(host=Path("C:/host"), guest=Path("C:/guest"))
+        assert key != WsbFileCache.compute_key(config, [folder])
+
+    async def test_identical_configs_share_file(self, tmp_path):
+        """Test sandboxes with identical configs reuse one file."""
+        cache = WsbFileCache(tmp_path)
+        first = Sandbox(SandboxConfig(name="first"), wsb_cache=cache)
+        second = Sandbox(SandboxConfig(name="second"), wsb_cache=cache)
+
+        first_path = await first._generate_wsb_file()
+        second_path = await second._generate_wsb_file()
+
+        assert first_path == second_path
+        assert "<MemoryInMB>4096</MemoryInMB>" in first_path.read_text(encoding="utf-8")
+        assert cache.get_stats() == {
+            "referenced_files": 1,
+            "references": 2,
+            "hits": 1,
+            "misses": 1,
+        }
+
+    def test_gc_removes_only_old_unreferenced_files(self, tmp_path):
+        """Test garbage collection keeps referenced and recent files."""
+        cache = WsbFileCache(tmp_path)
+        in_use = cache.acquire("in-use", lambda: "<Configuration />")
+        released = cache.acquire("released", lambda: "<Configuration />")
+        cache.release(released)
+        stray_temp = tmp_path / "crashed.wsb.1234.tmp"
+        stray_temp.write_text("partial")
+
+        old = time.time() - 3600
+        for path in (in_use, released, stray_temp):
+            os.utime(path, (old, old))
+
+        assert cache.gc(max_age_seconds=60) == 2
+        assert in_use.exists()
+        assert not released.exists()
+        assert not stray_temp.exists()